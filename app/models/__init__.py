@@ -9,6 +9,8 @@ from .unit_tenancy import UnitTenancy
 from .meter import Meter
 from .unit import Unit
 from .meter_reading import MeterReading
+from .meter_consumption_hourly import MeterConsumptionHourly
+from .meter_consumption_daily import MeterConsumptionDaily
 from .wallet import Wallet
 from .transaction import Transaction
 from .payment_method import PaymentMethod
@@ -25,6 +27,8 @@ from .message_recipient import MessageRecipient
 from .system_setting import SystemSetting
 from .meter_alert import MeterAlert
 from .reconciliation_report import ReconciliationReport
+from .report_job import ReportJob
+from .dashboard_snapshot import DashboardSnapshot
 from .device_type import DeviceType
 from .communication_type import CommunicationType
 
@@ -40,6 +44,8 @@ __all__ = [
     "Meter",
     "Unit",
     "MeterReading",
+    "MeterConsumptionHourly",
+    "MeterConsumptionDaily",
     "Wallet",
     "Transaction",
     "PaymentMethod",
@@ -56,6 +62,8 @@ __all__ = [
     "SystemSetting",
     "MeterAlert",
     "ReconciliationReport",
+    "ReportJob",
+    "DashboardSnapshot",
     "DeviceType",
     "CommunicationType",
 ]
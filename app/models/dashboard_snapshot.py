@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from ..db import db
+
+
+@dataclass
+class DashboardSnapshot(db.Model):
+    """Precomputed dashboard metrics for one estate and period.
+
+    ``estate_id`` 0 holds the all-estates view. Refreshed by the
+    refresh_dashboard_snapshots beat task; see
+    app/services/dashboard_metrics.py.
+    """
+
+    __tablename__ = "dashboard_snapshots"
+
+    estate_id: int
+    period: str
+    period_start: datetime
+    period_end: datetime
+    metrics: str
+    computed_at: datetime
+
+    estate_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    period = db.Column(db.String(20), primary_key=True)
+    period_start = db.Column(db.DateTime, nullable=False)
+    period_end = db.Column(db.DateTime, nullable=False)
+    metrics = db.Column(db.Text, nullable=False)  # JSON
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -28,6 +28,9 @@ class Meter(db.Model):
     is_active: Optional[bool]
     device_eui: Optional[str]
     lorawan_device_type: Optional[str]
+    pulse_factor: Optional[float]
+    unit_id: Optional[int]
+    utility_role: Optional[str]
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     serial_number = db.Column(db.String(100), unique=True, nullable=False)
@@ -47,6 +50,17 @@ class Meter(db.Model):
     # LoRaWAN Device Fields (for backend MQTT integration)
     device_eui = db.Column(db.String(16), unique=True, nullable=True, index=True)
     lorawan_device_type = db.Column(db.String(50), nullable=True)  # milesight_em300, qalcosonic_w1
+    pulse_factor = db.Column(db.Numeric(10, 3), nullable=True)  # Pulses per kWh / m³ (pulse counters)
+
+    # Denormalized copy of the Unit.*_meter_id assignment, maintained by
+    # app/models/unit.py on flush; join on Meter.unit_id == Unit.id
+    unit_id = db.Column(
+        db.Integer,
+        db.ForeignKey("units.id", ondelete="SET NULL", use_alter=True, name="fk_meters_unit_id"),
+        nullable=True,
+        index=True,
+    )
+    utility_role = db.Column(db.String(20), nullable=True)  # electricity, water, solar, hot_water
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
     updated_at = db.Column(
@@ -94,6 +108,11 @@ class Meter(db.Model):
             "is_active": self.is_active,
             "device_eui": self.device_eui,
             "lorawan_device_type": self.lorawan_device_type,
+            "pulse_factor": float(self.pulse_factor)
+            if self.pulse_factor is not None
+            else None,
+            "unit_id": self.unit_id,
+            "utility_role": self.utility_role,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
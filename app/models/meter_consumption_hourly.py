@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Index
+from ..db import db
+
+
+@dataclass
+class MeterConsumptionHourly(db.Model):
+    """Consumption per meter per hour, maintained from meter_readings.
+
+    Updated incrementally on every bulk reading insert and rebuilt with
+    scripts/backfill_consumption_rollups.py. See
+    app/services/consumption_rollups.py.
+    """
+
+    __tablename__ = "meter_consumption_hourly"
+
+    meter_id: int
+    bucket: datetime
+    consumption: float
+    reading_count: int
+    updated_at: Optional[datetime]
+
+    meter_id = db.Column(db.Integer, db.ForeignKey("meters.id"), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # start of the hour
+    consumption = db.Column(db.Numeric(15, 3), nullable=False, default=0)
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Range scans across all meters (estate/dashboard totals)
+        Index("ix_meter_consumption_hourly_bucket", "bucket"),
+    )
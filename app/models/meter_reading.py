@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Index, text
 from ..db import db
 
 
@@ -77,11 +77,29 @@ class MeterReading(db.Model):
     billed_at = db.Column(db.DateTime, nullable=True)
     transaction_id = db.Column(db.Integer, db.ForeignKey("transactions.id"), nullable=True)
 
+    # On PostgreSQL the table is range-partitioned by month on reading_date
+    # (see app/services/reading_partitions.py) and the database primary key
+    # is (id, reading_date). Always bound reading_date in queries so the
+    # planner can prune partitions.
     __table_args__ = (
         CheckConstraint(
             "reading_type IN ('automatic','manual','estimated')",
             name="ck_meter_readings_type",
         ),
+        # Hot path: latest reading / readings in a date window for one meter
+        Index(
+            "ix_meter_readings_meter_id_reading_date",
+            "meter_id",
+            text("reading_date DESC"),
+            postgresql_include=["reading_value", "consumption_since_last"],
+        ),
+        # Billing engine: unbilled readings only
+        Index(
+            "ix_meter_readings_unbilled",
+            "meter_id",
+            "reading_date",
+            postgresql_where=text("is_billed = false"),
+        ),
     )
 
     def to_dict(self):
@@ -65,4 +65,11 @@ class Notification(db.Model):
             "status IN ('pending','sent','delivered','failed','read')",
             name="ck_notifications_status",
         ),
+        # "Already sent this type today?" checks (NotificationService.create_notifications)
+        db.Index(
+            "ix_notifications_recipient_type_created",
+            "recipient_id",
+            "notification_type",
+            "created_at",
+        ),
     )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import CheckConstraint, Index
+from ..db import db
+
+
+@dataclass
+class ReportJob(db.Model):
+    """A CSV/PDF report rendered in the background by a Celery worker.
+
+    Jobs with the same ``job_key`` (report, format, date range, estate and
+    filters) reuse a completed artifact until ``expires_at``. See
+    app/services/report_jobs.py.
+    """
+
+    __tablename__ = "report_jobs"
+
+    id: Optional[int]
+    job_key: str
+    report_type: str
+    category: str
+    format: str
+    parameters: Optional[str]
+    status: str
+    progress: int
+    file_path: Optional[str]
+    file_name: Optional[str]
+    file_size: Optional[int]
+    error_message: Optional[str]
+    requested_by: Optional[int]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    expires_at: Optional[datetime]
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
+    job_key = db.Column(db.String(64), nullable=False)
+    report_type = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(20), nullable=False)
+    format = db.Column(db.String(10), nullable=False)
+    parameters = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(500))
+    file_name = db.Column(db.String(255))
+    file_size = db.Column(db.Integer)
+    error_message = db.Column(db.Text)
+    requested_by = db.Column(db.Integer, db.ForeignKey("users.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        CheckConstraint(
+            "format IN ('csv','pdf')",
+            name="ck_report_jobs_format",
+        ),
+        CheckConstraint(
+            "status IN ('pending','running','completed','failed','expired')",
+            name="ck_report_jobs_status",
+        ),
+        # Reuse lookup: newest job for the same request
+        Index("ix_report_jobs_job_key_created_at", "job_key", "created_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "report_type": self.report_type,
+            "category": self.category,
+            "format": self.format,
+            "status": self.status,
+            "progress": self.progress,
+            "file_name": self.file_name,
+            "file_size": self.file_size,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
@@ -4,8 +4,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 
-from sqlalchemy import CheckConstraint, UniqueConstraint, or_
+from sqlalchemy import CheckConstraint, UniqueConstraint, bindparam, event, or_, update
+from sqlalchemy.orm import Session, attributes
 from ..db import db
+from .meter import Meter
 
 if TYPE_CHECKING:
     from .person import Person
@@ -200,3 +202,72 @@ class Unit(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+# Unit meter column -> Meter.utility_role
+METER_ROLES = (
+    ("electricity_meter_id", "electricity"),
+    ("water_meter_id", "water"),
+    ("solar_meter_id", "solar"),
+    ("hot_water_meter_id", "hot_water"),
+)
+
+
+def _meter_columns_changed(unit: Unit) -> bool:
+    return any(
+        attributes.get_history(unit, column).has_changes() for column, _ in METER_ROLES
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def sync_meter_assignments(session, flush_context):
+    """Mirror flushed Unit meter columns onto Meter.unit_id / utility_role.
+
+    Runs in the flush's transaction, so every writer (the units service,
+    meter assignment, imports, fixtures) keeps the denormalized columns in
+    step without calling anything. Meters of the touched units are cleared
+    and then re-pointed, so moving a meter between units in one flush works.
+    """
+    changed = [
+        obj
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Unit) and (obj in session.new or _meter_columns_changed(obj))
+    ]
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Unit)]
+    unit_ids = {unit.id for unit in changed} | set(removed)
+    if not unit_ids:
+        return
+
+    assignments = [
+        {"b_meter_id": meter_id, "b_unit_id": unit.id, "b_role": role}
+        for unit in changed
+        for column, role in METER_ROLES
+        if (meter_id := getattr(unit, column)) is not None
+    ]
+    meters = Meter.__table__
+    connection = session.connection()
+    connection.execute(
+        update(meters)
+        .where(meters.c.unit_id.in_(sorted(unit_ids)))
+        .values(unit_id=None, utility_role=None)
+    )
+    if assignments:
+        connection.execute(
+            update(meters)
+            .where(meters.c.id == bindparam("b_meter_id"))
+            .values(unit_id=bindparam("b_unit_id"), utility_role=bindparam("b_role")),
+            sorted(assignments, key=lambda row: row["b_meter_id"]),
+        )
+
+    # Keep already-loaded meters consistent with what was just written
+    assigned = {row["b_meter_id"]: row for row in assignments}
+    for obj in list(session.identity_map.values()):
+        if not isinstance(obj, Meter):
+            continue
+        row = assigned.get(obj.id)
+        if row is not None:
+            attributes.set_committed_value(obj, "unit_id", row["b_unit_id"])
+            attributes.set_committed_value(obj, "utility_role", row["b_role"])
+        elif obj.__dict__.get("unit_id") in unit_ids:
+            attributes.set_committed_value(obj, "unit_id", None)
+            attributes.set_committed_value(obj, "utility_role", None)
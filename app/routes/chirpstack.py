@@ -0,0 +1,82 @@
+"""ChirpStack HTTP integration webhook.
+
+ChirpStack POSTs every device event for an application to this endpoint,
+with the event type in the ``event`` query parameter (up, status, join,
+ack, txack, log, location, integration). Uplinks are parsed and buffered,
+then written to meter_readings in batches by the uplink buffer; all other
+event types are acknowledged and ignored.
+
+No login decorator — this is a server-to-server callback from ChirpStack.
+Requests are authenticated with the CHIRPSTACK_WEBHOOK_TOKEN shared secret,
+configured as an ``Authorization: Bearer <token>`` header on the integration.
+Without a token every event is refused, unless the development-only
+CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED flag is set.
+"""
+from __future__ import annotations
+
+import hmac
+import logging
+
+from flask import Blueprint, current_app, jsonify, request
+
+from ..services.chirpstack_uplinks import IngestUnavailable, parse_uplink, uplink_buffer
+
+logger = logging.getLogger(__name__)
+
+chirpstack_bp = Blueprint("chirpstack", __name__, url_prefix="/api/chirpstack")
+
+
+def _is_configured() -> bool:
+    """A token is set, or unauthenticated events are explicitly allowed."""
+    config = current_app.config
+    return bool(
+        config.get("CHIRPSTACK_WEBHOOK_TOKEN")
+        or config.get("CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED")
+    )
+
+
+def _is_authorised() -> bool:
+    """Check the shared-secret bearer token (fails closed without one)."""
+    expected = current_app.config.get("CHIRPSTACK_WEBHOOK_TOKEN")
+    if not expected:
+        return bool(current_app.config.get("CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED"))
+    header = request.headers.get("Authorization", "")
+    token = header[7:] if header.startswith("Bearer ") else header
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+@chirpstack_bp.route("/events", methods=["POST"])
+def chirpstack_events():
+    """Receive ChirpStack integration events.
+
+    Accepts a single event object (as sent by ChirpStack) or a JSON list of
+    events (for replaying exported uplinks). Responds as soon as the uplinks
+    are buffered; the database write happens in the next batch flush. Answers
+    503 when the database cannot take the uplinks, so ChirpStack retries.
+    """
+    if not _is_configured():
+        logger.error("ChirpStack event rejected: CHIRPSTACK_WEBHOOK_TOKEN is not set")
+        return jsonify({"error": "Webhook not configured"}), 503
+    if not _is_authorised():
+        logger.warning("ChirpStack event rejected: invalid token")
+        return jsonify({"error": "Unauthorized"}), 401
+
+    event_type = request.args.get("event", "up")
+    if event_type != "up":
+        return jsonify({"status": "ignored", "event": event_type}), 200
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"error": "Invalid JSON body"}), 400
+
+    events = payload if isinstance(payload, list) else [payload]
+    rows = [row for row in (parse_uplink(e) for e in events if isinstance(e, dict)) if row]
+
+    try:
+        if uplink_buffer.add(rows):
+            uplink_buffer.flush(hold_back=rows)
+    except IngestUnavailable:
+        # Not kept: ChirpStack retries the event
+        return jsonify({"error": "Ingest temporarily unavailable"}), 503
+
+    return jsonify({"status": "queued", "accepted": len(rows)}), 200
@@ -129,12 +129,7 @@ def get_meter_details(meter_id: int, mobile_user: MobileUser):
         }), 404
 
     # Find which unit this meter belongs to
-    unit = Unit.query.filter(
-        (Unit.electricity_meter_id == meter_id) |
-        (Unit.water_meter_id == meter_id) |
-        (Unit.solar_meter_id == meter_id) |
-        (Unit.hot_water_meter_id == meter_id)
-    ).first()
+    unit = Unit.query.get(meter.unit_id) if meter.unit_id else None
 
     if not unit:
         return jsonify({
@@ -150,15 +145,7 @@ def get_meter_details(meter_id: int, mobile_user: MobileUser):
         }), 403
 
     # Determine utility type
-    utility_type = 'unknown'
-    if unit.electricity_meter_id == meter_id:
-        utility_type = 'electricity'
-    elif unit.water_meter_id == meter_id:
-        utility_type = 'water'
-    elif unit.solar_meter_id == meter_id:
-        utility_type = 'solar'
-    elif unit.hot_water_meter_id == meter_id:
-        utility_type = 'hot_water'
+    utility_type = meter.utility_role or 'unknown'
 
     # Get wallet balance for this utility
     wallet = Wallet.query.filter_by(unit_id=unit.id).first()
@@ -230,12 +217,7 @@ def get_meter_readings(meter_id: int, mobile_user: MobileUser):
         }), 404
 
     # Find which unit this meter belongs to
-    unit = Unit.query.filter(
-        (Unit.electricity_meter_id == meter_id) |
-        (Unit.water_meter_id == meter_id) |
-        (Unit.solar_meter_id == meter_id) |
-        (Unit.hot_water_meter_id == meter_id)
-    ).first()
+    unit = Unit.query.get(meter.unit_id) if meter.unit_id else None
 
     if not unit:
         return jsonify({
@@ -259,15 +241,7 @@ def get_meter_readings(meter_id: int, mobile_user: MobileUser):
     start_date = end_date - timedelta(days=days)
 
     # Determine utility type
-    utility_type = 'unknown'
-    if unit.electricity_meter_id == meter_id:
-        utility_type = 'electricity'
-    elif unit.water_meter_id == meter_id:
-        utility_type = 'water'
-    elif unit.solar_meter_id == meter_id:
-        utility_type = 'solar'
-    elif unit.hot_water_meter_id == meter_id:
-        utility_type = 'hot_water'
+    utility_type = meter.utility_role or 'unknown'
 
     # Get readings
     from ...models import MeterReading
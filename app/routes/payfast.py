@@ -20,6 +20,7 @@ from ..models.transaction import Transaction
 from ..models.wallet import Wallet
 from ..services.wallets import credit_wallet
 from ..utils.payfast import validate_itn_signature, verify_itn_with_payfast
+from ..utils.report_cache import invalidate_for_wallets
 
 logger = logging.getLogger(__name__)
 
@@ -157,6 +158,7 @@ def payfast_itn():
         txn.status = "completed"
         txn.completed_at = datetime.utcnow()
         db.session.commit()
+        invalidate_for_wallets([txn.wallet_id])
 
         # Queue async notification (SMS / in-app)
         try:
@@ -220,6 +222,7 @@ def sandbox_confirm(txn_id):
         txn.payment_gateway_status = "COMPLETE"
         txn.payment_gateway_ref = "SANDBOX-MANUAL"
         db.session.commit()
+        invalidate_for_wallets([txn.wallet_id])
     except ValueError as e:
         return jsonify({"error": str(e)}), 500
 
@@ -4,7 +4,8 @@ from flask_login import current_user
 from . import portal
 from .decorators import portal_login_required
 from ...services.mobile_users import get_user_units
-from ...models import Unit, Meter, MeterReading
+from ...models import Unit, Meter
+from ...services.latest_telemetry import get_latest
 
 
 @portal.route('/meters')
@@ -32,12 +33,7 @@ def portal_meters():
             if not meter:
                 continue
 
-            last_reading = (
-                MeterReading.query
-                .filter_by(meter_id=meter.id)
-                .order_by(MeterReading.reading_date.desc())
-                .first()
-            )
+            last_reading = get_latest(meter.id)
 
             all_meters.append({
                 'id': meter.id,
@@ -4,7 +4,8 @@ from flask_login import current_user
 from . import portal
 from .decorators import portal_login_required
 from ...services.mobile_users import get_user_units, can_access_unit
-from ...models import Unit, Wallet, Meter, MeterReading
+from ...models import Unit, Wallet, Meter
+from ...services.latest_telemetry import get_latest
 from ...db import db
 
 
@@ -54,7 +55,7 @@ def portal_unit_detail(unit_id):
         if meter_id:
             meter = Meter.query.get(meter_id)
             if meter:
-                last_reading = MeterReading.query.filter_by(meter_id=meter.id).order_by(MeterReading.reading_date.desc()).first()
+                last_reading = get_latest(meter.id)
                 meters.append({
                     'id': meter.id,
                     'serial_number': meter.serial_number,
@@ -11,7 +11,16 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
-from ...models import Meter, MeterReading, Unit, Wallet, Estate, MeterAlert, Transaction
+from ...models import (
+    Meter,
+    MeterReading,
+    Unit,
+    Wallet,
+    Estate,
+    MeterAlert,
+    Transaction,
+    ReportJob,
+)
 from ...utils.pagination import paginate_query, parse_pagination_params
 from ...utils.audit import log_action
 from ...utils.decorators import requires_permission
@@ -25,9 +34,24 @@ from ...services.meters import (
     list_available_by_type as svc_list_available_by_type,
     list_for_meter_readings as svc_list_for_meter_readings,
 )
-from ...services.units import find_unit_by_meter_id as svc_find_unit_by_meter_id
+from ...services.units import (
+    find_unit_by_meter_id as svc_find_unit_by_meter_id,
+    search_units_for_meter as svc_search_units_for_meter,
+)
 from ...services.device_types import list_device_types as svc_list_device_types
 from ...services.communication_types import list_communication_types as svc_list_communication_types
+from ...services.report_jobs import METERS_CATEGORY, submit_report
+from ...services.meter_charts import (
+    CHART_PERIODS,
+    DEFAULT_PERIOD,
+    DEFAULT_POINTS,
+    MAX_POINTS,
+    TELEMETRY_UNITS,
+    consumption_series,
+    telemetry_series,
+)
+from ...services.meter_stats import MAX_BATCH_METERS, realtime_stats
+from .reports import report_artifact_response, report_job_response
 
 
 @api_v1.route("/meters", methods=["GET"])
@@ -60,21 +84,12 @@ def meters_page():
     total_active = Meter.query.filter(Meter.is_active == True).count()
 
     # Low credit count - use efficient subquery
-    from sqlalchemy import or_, and_, case
+    from sqlalchemy import and_, case
     from ...db import db
 
     low_credit_subquery = (
         db.session.query(Meter.id)
-        .outerjoin(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-            ),
-        )
-        .outerjoin(Wallet, Wallet.unit_id == Unit.id)
+        .outerjoin(Wallet, Wallet.unit_id == Meter.unit_id)
         .filter(
             and_(
                 Wallet.id.isnot(None),
@@ -127,28 +142,6 @@ def meters_page():
             unassigned_count += 1
     estate_meter_counts["unassigned"] = unassigned_count
 
-    # Units availability - join with Estate to get estate name
-    units_info = []
-    units_with_estates = (
-        Unit.query
-        .join(Estate, Unit.estate_id == Estate.id)
-        .order_by(Estate.name.asc(), Unit.unit_number.asc())
-        .all()
-    )
-    for u in units_with_estates:
-        units_info.append(
-            {
-                "id": u.id,
-                "unit_number": u.unit_number,
-                "estate_id": u.estate_id,
-                "estate_name": u.estate.name if u.estate else "",
-                "has_electricity": bool(u.electricity_meter_id),
-                "has_water": bool(u.water_meter_id),
-                "has_solar": bool(u.solar_meter_id),
-                "has_hot_water": bool(u.hot_water_meter_id),
-            }
-        )
-
     meter_types = [
         {"value": "electricity", "label": "Electricity"},
         {"value": "bulk_electricity", "label": "Bulk Electricity"},
@@ -166,7 +159,6 @@ def meters_page():
         meters=meters,
         estates=estates,
         estate_meter_counts=estate_meter_counts,
-        units=units_info,
         meter_types=meter_types,
         device_types=device_types,
         communication_types=communication_types,
@@ -221,30 +213,37 @@ def list_meters_api():
     })
 
 
-@api_v1.route("/api/meters/units-availability", methods=["GET"])
+@api_v1.route("/api/meters/unit-search", methods=["GET"])
 @login_required
 @requires_permission("meters.view")
-def get_units_availability():
-    """Get fresh unit availability data for meter assignment dropdowns."""
-    units_with_estates = (
-        Unit.query
-        .join(Estate, Unit.estate_id == Estate.id)
-        .order_by(Estate.name.asc(), Unit.unit_number.asc())
-        .all()
+def search_units_for_meter():
+    """Typeahead for the meter assignment picker.
+
+    Query params: q (unit number prefix or estate name), meter_type (only
+    units with that slot free), estate_id, unit_id (always include the
+    meter's current unit), after (the previous page's next_cursor),
+    per_page.
+    """
+    _, per_page = parse_pagination_params()
+    try:
+        units, next_cursor = svc_search_units_for_meter(
+            q=request.args.get("q"),
+            meter_type=request.args.get("meter_type") or None,
+            estate_id=request.args.get("estate_id", type=int),
+            include_unit_id=request.args.get("unit_id", type=int),
+            after=request.args.get("after") or None,
+            per_page=per_page,
+        )
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), 400
+    return jsonify(
+        {
+            "data": units,
+            "per_page": per_page,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+        }
     )
-    units_info = []
-    for u in units_with_estates:
-        units_info.append({
-            "id": u.id,
-            "unit_number": u.unit_number,
-            "estate_id": u.estate_id,
-            "estate_name": u.estate.name if u.estate else "",
-            "has_electricity": bool(u.electricity_meter_id),
-            "has_water": bool(u.water_meter_id),
-            "has_solar": bool(u.solar_meter_id),
-            "has_hot_water": bool(u.hot_water_meter_id),
-        })
-    return jsonify({"units": units_info})
 
 
 @api_v1.route("/meters/<meter_id>/details", methods=["GET"])
@@ -269,12 +268,7 @@ def meter_details_page(meter_id: str):
         )
 
     # Assigned unit
-    unit = Unit.query.filter(
-        (Unit.electricity_meter_id == meter.id)
-        | (Unit.water_meter_id == meter.id)
-        | (Unit.solar_meter_id == meter.id)
-        | (Unit.hot_water_meter_id == meter.id)
-    ).first()
+    unit = Unit.query.get(meter.unit_id) if meter.unit_id else None
     estate = Estate.query.get(unit.estate_id) if unit else None
     # Use backward compatibility: unit.resident returns primary_tenant
     resident = unit.resident if unit else None
@@ -353,14 +347,13 @@ def get_meter(meter_id: int):
 
 
 def _assign_meter_to_unit(meter: Meter, unit_id: int | None):
-    """Assign the meter to the given unit based on meter_type; handles unassigning from previous unit."""
+    """Assign the meter to the given unit based on meter_type; handles unassigning from previous unit.
+
+    Meter.unit_id / utility_role follow the Unit columns on flush
+    (app/models/unit.py).
+    """
     # Unassign from any current unit first
-    current_unit = Unit.query.filter(
-        (Unit.electricity_meter_id == meter.id)
-        | (Unit.water_meter_id == meter.id)
-        | (Unit.solar_meter_id == meter.id)
-        | (Unit.hot_water_meter_id == meter.id)
-    ).first()
+    current_unit = Unit.query.get(meter.unit_id) if meter.unit_id else None
     if current_unit:
         if current_unit.electricity_meter_id == meter.id:
             current_unit.electricity_meter_id = None
@@ -500,7 +493,7 @@ def update_meter(meter_id: int):
         # Allow clearing device_eui by setting to empty string or null
         payload["device_eui"] = None
 
-    for f in ("serial_number", "meter_type", "installation_date", "is_active", "device_eui"):
+    for f in ("serial_number", "meter_type", "installation_date", "is_active", "device_eui", "pulse_factor"):
         if f in payload:
             setattr(meter, f, payload[f])
     from ...db import db
@@ -592,166 +585,181 @@ def meter_readings(meter_id: int):
     return jsonify({"data": [r.to_dict() for r in items], **meta})
 
 
-@api_v1.route("/meters/export", methods=["GET"])
-@login_required
-@requires_permission("meters.view")
-def export_meters_pdf():
-    """Export meters data to PDF"""
-    try:
-        meter_type = request.args.get("meter_type") or None
-        comm_status = request.args.get("communication_status") or None
-        estate_id = request.args.get("estate_id", type=int) or None
-        credit_status = request.args.get("credit_status") or None
-
-        query = Meter.query
-        if meter_type:
-            query = query.filter(Meter.meter_type == meter_type)
-        if comm_status:
-            query = query.filter(Meter.communication_status == comm_status)
-        if estate_id:
-            query = query.join(Unit).filter(Unit.estate_id == estate_id)
-        if credit_status:
-            if credit_status == "low":
-                query = query.join(Unit).join(Wallet).filter(Wallet.balance < 50)
-            elif credit_status == "sufficient":
-                query = query.join(Unit).join(Wallet).filter(Wallet.balance >= 50)
-
-        meters = query.all()
-
-        # Create PDF buffer
-        buffer = io.BytesIO()
+def render_meters_pdf(filters, output):
+    """Render the meters report as PDF into a binary file object.
 
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            leftMargin=0.5 * inch,
-            rightMargin=0.5 * inch,
-            topMargin=0.5 * inch,
-            bottomMargin=0.5 * inch,
-        )
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1,
+    ``filters`` takes the meter_type, communication_status, estate_id and
+    credit_status query parameters. Returns the number of meters listed.
+    """
+    meter_type = filters.get("meter_type") or None
+    comm_status = filters.get("communication_status") or None
+    estate_id = filters.get("estate_id") or None
+    credit_status = filters.get("credit_status") or None
+
+    query = Meter.query
+    if meter_type:
+        query = query.filter(Meter.meter_type == meter_type)
+    if comm_status:
+        query = query.filter(Meter.communication_status == comm_status)
+    if estate_id:
+        query = query.join(Unit).filter(Unit.estate_id == estate_id)
+    if credit_status:
+        if credit_status == "low":
+            query = query.join(Unit).join(Wallet).filter(Wallet.balance < 50)
+        elif credit_status == "sufficient":
+            query = query.join(Unit).join(Wallet).filter(Wallet.balance >= 50)
+
+    meters = query.all()
+
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=landscape(A4),
+        leftMargin=0.5 * inch,
+        rightMargin=0.5 * inch,
+        topMargin=0.5 * inch,
+        bottomMargin=0.5 * inch,
+    )
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Title
+    title_style = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1,
+    )
+    title = Paragraph("Meters Report", title_style)
+    story.append(title)
+
+    # Report info
+    info_style = ParagraphStyle(
+        "Info", parent=styles["Normal"], fontSize=10, spaceAfter=20, alignment=1
+    )
+    report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    info_text = f"Generated on {report_date}<br/>Total Meters: {len(meters)}"
+    info = Paragraph(info_text, info_style)
+    story.append(info)
+    story.append(Spacer(1, 20))
+
+    # Create table data
+    table_data = [
+        [
+            "Serial Number",
+            "Type",
+            "Status",
+            "Unit/Location",
+            "Estate",
+            "Credit Balance",
+            "Last Reading",
+        ]
+    ]
+
+    for meter in meters:
+        # Get unit and estate info
+        unit = svc_find_unit_by_meter_id(meter.id)
+        estate_name = ""
+        unit_location = ""
+
+        if unit:
+            estate = Estate.query.get(unit.estate_id)
+            estate_name = estate.name if estate else ""
+            unit_location = (
+                f"{unit.unit_number}" if unit.unit_number else f"Unit {unit.id}"
+            )
+
+        # Get wallet balance
+        wallet = Wallet.query.filter_by(unit_id=unit.id).first() if unit else None
+        if wallet:
+            if meter.meter_type == "electricity":
+                balance = f"R {wallet.electricity_balance:.2f}"
+            elif meter.meter_type == "water":
+                balance = f"R {wallet.water_balance:.2f}"
+            elif meter.meter_type == "solar":
+                balance = f"R {wallet.solar_balance:.2f}"
+            else:
+                balance = f"R {wallet.balance:.2f}"
+        else:
+            balance = "N/A"
+
+        # Last reading, maintained on the meter by ingest
+        last_reading_text = (
+            meter.last_reading_date.strftime("%Y-%m-%d")
+            if meter.last_reading_date
+            else "No readings"
         )
-        title = Paragraph("Meters Report", title_style)
-        story.append(title)
 
-        # Report info
-        info_style = ParagraphStyle(
-            "Info", parent=styles["Normal"], fontSize=10, spaceAfter=20, alignment=1
+        status = "Active" if meter.is_active else "Inactive"
+
+        table_data.append(
+            [
+                meter.serial_number,
+                meter.meter_type.replace("_", " ").title(),
+                status,
+                unit_location,
+                estate_name,
+                balance,
+                last_reading_text,
+            ]
         )
-        report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-        info_text = f"Generated on {report_date}<br/>Total Meters: {len(meters)}"
-        info = Paragraph(info_text, info_style)
-        story.append(info)
-        story.append(Spacer(1, 20))
-
-        # Create table data
-        table_data = [
+
+    # Create table
+    available_width = doc.width
+    col_weights = [1.6, 1.2, 1.0, 1.6, 1.6, 1.4, 1.2]
+    total_weight = sum(col_weights)
+    col_widths = [available_width * (w / total_weight) for w in col_weights]
+    table = Table(table_data, colWidths=col_widths, repeatRows=1, hAlign="LEFT")
+    table.setStyle(
+        TableStyle(
             [
-                "Serial Number",
-                "Type",
-                "Status",
-                "Unit/Location",
-                "Estate",
-                "Credit Balance",
-                "Last Reading",
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("ALIGN", (0, 1), (-1, -1), "LEFT"),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 11),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -1), 1, colors.black),
+                ("FONTSIZE", (0, 1), (-1, -1), 9),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
             ]
-        ]
+        )
+    )
 
-        for meter in meters:
-            # Get unit and estate info
-            unit = svc_find_unit_by_meter_id(meter.id)
-            estate_name = ""
-            unit_location = ""
-
-            if unit:
-                estate = Estate.query.get(unit.estate_id)
-                estate_name = estate.name if estate else ""
-                unit_location = (
-                    f"{unit.unit_number}" if unit.unit_number else f"Unit {unit.id}"
-                )
-
-            # Get wallet balance
-            wallet = Wallet.query.filter_by(unit_id=unit.id).first() if unit else None
-            if wallet:
-                if meter.meter_type == "electricity":
-                    balance = f"R {wallet.electricity_balance:.2f}"
-                elif meter.meter_type == "water":
-                    balance = f"R {wallet.water_balance:.2f}"
-                elif meter.meter_type == "solar":
-                    balance = f"R {wallet.solar_balance:.2f}"
-                else:
-                    balance = f"R {wallet.balance:.2f}"
-            else:
-                balance = "N/A"
-
-            # Get last reading
-            readings_query = svc_list_for_meter_readings(meter.id)
-            last_reading = readings_query.first()
-            last_reading_text = (
-                last_reading.reading_date.strftime("%Y-%m-%d")
-                if last_reading
-                else "No readings"
-            )
+    story.append(table)
 
-            status = "Active" if meter.is_active else "Inactive"
-
-            table_data.append(
-                [
-                    meter.serial_number,
-                    meter.meter_type.replace("_", " ").title(),
-                    status,
-                    unit_location,
-                    estate_name,
-                    balance,
-                    last_reading_text,
-                ]
-            )
+    # Build PDF
+    doc.build(story)
 
-        # Create table
-        available_width = doc.width
-        col_weights = [1.6, 1.2, 1.0, 1.6, 1.6, 1.4, 1.2]
-        total_weight = sum(col_weights)
-        col_widths = [available_width * (w / total_weight) for w in col_weights]
-        table = Table(table_data, colWidths=col_widths, repeatRows=1, hAlign="LEFT")
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                    ("ALIGN", (0, 1), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 11),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-        )
+    return len(meters)
 
-        story.append(table)
 
-        # Build PDF
-        doc.build(story)
+@api_v1.route("/meters/export", methods=["GET"])
+@login_required
+@requires_permission("meters.view")
+def export_meters_pdf():
+    """Export meters data to PDF"""
+    try:
+        buffer = io.BytesIO()
+        total = render_meters_pdf(
+            {
+                "meter_type": request.args.get("meter_type"),
+                "communication_status": request.args.get("communication_status"),
+                "estate_id": request.args.get("estate_id", type=int),
+                "credit_status": request.args.get("credit_status"),
+            },
+            buffer,
+        )
 
         # Log the export action
         log_action(
             "meter.export",
             entity_type="meter",
             entity_id=None,
-            new_values={"export_type": "pdf", "total_records": len(meters)},
+            new_values={"export_type": "pdf", "total_records": total},
         )
 
         response = Response(buffer.getvalue(), mimetype="application/pdf")
@@ -764,6 +772,79 @@ def export_meters_pdf():
         return jsonify({"error": f"Export failed: {str(e)}"}), 500
 
 
+@api_v1.route("/meters/export/jobs", methods=["POST"])
+@login_required
+@requires_permission("meters.view")
+def create_meters_export_job():
+    """Queue the meters PDF to be rendered in the background.
+
+    Takes the same filters as /meters/export. An identical request that is
+    still rendering, or that finished within REPORT_ARTIFACT_TTL, returns the
+    existing job.
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        estate_id = int(data["estate_id"]) if data.get("estate_id") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "estate_id must be an integer"}), 400
+
+    job, created = submit_report(
+        "meters",
+        METERS_CATEGORY,
+        "pdf",
+        {
+            "meter_type": data.get("meter_type") or None,
+            "communication_status": data.get("communication_status") or None,
+            "estate_id": estate_id,
+            "credit_status": data.get("credit_status") or None,
+        },
+        requested_by=current_user.id,
+    )
+    if created:
+        log_action(
+            "meter.export",
+            entity_type="meter",
+            entity_id=None,
+            new_values={"export_type": "pdf", "report_job_id": job.id},
+        )
+    return report_job_response(
+        job, "api_v1.meters_export_job_status", "api_v1.download_meters_export_job", created
+    )
+
+
+def _meters_job(job_id):
+    from ...db import db
+
+    job = db.session.get(ReportJob, job_id)
+    if job is None or job.category != METERS_CATEGORY:
+        return None
+    return job
+
+
+@api_v1.route("/meters/export/jobs/<int:job_id>", methods=["GET"])
+@login_required
+@requires_permission("meters.view")
+def meters_export_job_status(job_id):
+    """Status and progress of a meters PDF job"""
+    job = _meters_job(job_id)
+    if job is None:
+        return jsonify({"error": "Export job not found"}), 404
+    return report_job_response(
+        job, "api_v1.meters_export_job_status", "api_v1.download_meters_export_job"
+    )
+
+
+@api_v1.route("/meters/export/jobs/<int:job_id>/download", methods=["GET"])
+@login_required
+@requires_permission("meters.view")
+def download_meters_export_job(job_id):
+    """Download a finished meters PDF"""
+    job = _meters_job(job_id)
+    if job is None:
+        return jsonify({"error": "Export job not found"}), 404
+    return report_artifact_response(job)
+
+
 @api_v1.route("/meters", methods=["POST"])
 @login_required
 @requires_permission("meters.create")
@@ -827,205 +908,83 @@ def register_meter():
         return jsonify({"error": f"Failed to register meter: {str(e)}"}), 500
 
 
+@api_v1.route("/meters/realtime-stats", methods=["GET"])
+@login_required
+@requires_permission("meters.view")
+def meters_realtime_stats():
+    """Real-time statistics for many meters in one call (list views).
+
+    Query params:
+        meters: comma-separated device EUIs (at most 200)
+    """
+    device_euis = [
+        eui.strip() for eui in request.args.get("meters", "").split(",") if eui.strip()
+    ]
+    if not device_euis:
+        return jsonify({"error": "meters is required"}), 400
+    if len(device_euis) > MAX_BATCH_METERS:
+        return jsonify({"error": f"At most {MAX_BATCH_METERS} meters per request"}), 400
+
+    meters = Meter.query.filter(Meter.device_eui.in_(device_euis)).all()
+    stats = realtime_stats(meters)
+    return jsonify({"data": {meter.device_eui: stats[meter.id] for meter in meters}}), 200
+
+
 @api_v1.route("/meters/<meter_id>/realtime-stats", methods=["GET"])
 @login_required
 @requires_permission("meters.view")
 def meter_realtime_stats(meter_id: str):
     """Get real-time statistics for a specific meter."""
-    from sqlalchemy import func
-    from datetime import date
-    from ...db import db
-
     # Get meter
     meter = Meter.query.filter_by(device_eui=meter_id).first()
     if not meter:
         return jsonify({"error": "Meter not found"}), 404
 
-    # Get latest reading
-    latest_reading = MeterReading.query.filter_by(meter_id=meter.id)\
-        .order_by(MeterReading.reading_date.desc())\
-        .first()
-
-    # Determine device capabilities based on device type
-    capabilities = {
-        "measures_power": False,
-        "measures_voltage": False,
-        "measures_flow": False,
-        "measures_temperature": True if meter.lorawan_device_type == "milesight_em300" else False,
-        "unit": "kWh" if meter.meter_type in ["electricity", "solar"] else "m³"
-    }
-
-    # Calculate today's consumption
-    today = date.today()
-    today_readings = MeterReading.query.filter(
-        MeterReading.meter_id == meter.id,
-        func.date(MeterReading.reading_date) == today
-    ).all()
-
-    today_consumption = 0.0
-    if len(today_readings) >= 2:
-        values = [r.reading_value for r in today_readings if r.reading_value is not None]
-        if values:
-            today_consumption = max(values) - min(values)
-
-    # Check for unit assignment and calculate cost
-    unit = svc_find_unit_by_meter_id(meter.id)
-    cost = None
-    cost_message = None
-
-    if not unit:
-        cost_message = "Meter not assigned to unit"
-    else:
-        # Calculate cost using rate tables
-        from app.utils.rates import calculate_consumption_charge
-
-        try:
-            # Determine utility type based on meter type
-            utility_type = meter.meter_type
-            if utility_type == "hot_water":
-                utility_type = "water"  # Use water rates for hot water
-            elif utility_type not in ("electricity", "water"):
-                utility_type = "electricity"  # Default to electricity for solar/bulk
-
-            # Calculate cost for today's consumption
-            if today_consumption > 0:
-                cost = calculate_consumption_charge(
-                    consumption=today_consumption,
-                    utility_type=utility_type
-                )
-            else:
-                cost = 0
-                cost_message = "No consumption today"
-        except Exception as e:
-            cost_message = f"Cost calculation error: {str(e)}"
-
-    # Build response
-    response = {
-        "meter_id": meter.device_eui,
-        "meter_type": meter.meter_type,
-        "device_type": meter.lorawan_device_type,
-        "capabilities": capabilities,
-        "latest_reading": {
-            "timestamp": latest_reading.reading_date.isoformat() if latest_reading else None,
-            "value": float(latest_reading.reading_value) if latest_reading and latest_reading.reading_value else 0.0,
-            "pulse_count": latest_reading.pulse_count if latest_reading else None,
-            "temperature": float(latest_reading.temperature) if latest_reading and latest_reading.temperature else None,
-            "humidity": float(latest_reading.humidity) if latest_reading and latest_reading.humidity else None,
-            "battery_level": latest_reading.battery_level if latest_reading else None,
-            "rssi": latest_reading.rssi if latest_reading else None,
-            "snr": float(latest_reading.snr) if latest_reading and latest_reading.snr else None
-        } if latest_reading else None,
-        "today": {
-            "consumption": round(today_consumption, 2),
-            "cost": cost,
-            "unit": capabilities["unit"],
-            "cost_message": cost_message
-        },
-        "communication": {
-            "last_communication": meter.last_communication.isoformat() if meter.last_communication else None,
-            "status": "online" if meter.communication_status == "online" else "offline"
-        }
-    }
-
-    return jsonify(response), 200
+    return jsonify(realtime_stats([meter])[meter.id]), 200
 
 
 @api_v1.route("/meters/<meter_id>/chart-data", methods=["GET"])
 @login_required
 @requires_permission("meters.view")
 def meter_chart_data(meter_id: str):
-    """Get chart data for a specific meter."""
-    from sqlalchemy import func
-    from datetime import datetime, timedelta
-    from ...db import db
+    """Get chart data for a specific meter.
 
+    Query params:
+        period: hour, day, week, month, quarter or year (default day)
+        series: a telemetry column (voltage, power, ...) to chart instead of
+            consumption
+        points: maximum points for a telemetry series (default 500)
+    """
     # Get meter
     meter = Meter.query.filter_by(device_eui=meter_id).first()
     if not meter:
         return jsonify({"error": "Meter not found"}), 404
 
     # Get period parameter
-    period = request.args.get("period", "day")
-
-    # Determine time range and grouping
-    now = datetime.now()
-    if period == "hour":
-        start_time = now - timedelta(hours=24)
-        interval = "hour"
-    elif period == "week":
-        start_time = now - timedelta(days=7)
-        interval = "day"
-    elif period == "month":
-        start_time = now - timedelta(days=30)
-        interval = "day"
-    else:  # day
-        start_time = now - timedelta(days=1)
-        interval = "hour"
-
-    # Get readings for the period
-    readings = MeterReading.query.filter(
-        MeterReading.meter_id == meter.id,
-        MeterReading.reading_date >= start_time
-    ).order_by(MeterReading.reading_date).all()
-
-    # Group by interval and calculate consumption
-    labels = []
-    data = []
-
-    if interval == "hour":
-        # Group by hour
-        hourly_data = {}
-        for reading in readings:
-            hour_key = reading.reading_date.strftime("%H:00")
-            if hour_key not in hourly_data:
-                hourly_data[hour_key] = []
-            if reading.reading_value is not None:
-                hourly_data[hour_key].append(float(reading.reading_value))
-
-        # Generate 24-hour labels
-        for i in range(24):
-            hour_label = f"{i:02d}:00"
-            labels.append(hour_label)
-
-            if hour_label in hourly_data and len(hourly_data[hour_label]) >= 2:
-                consumption = max(hourly_data[hour_label]) - min(hourly_data[hour_label])
-                data.append(round(consumption, 2))
-            else:
-                data.append(0.0)
-
-    elif interval == "day":
-        # Group by day
-        daily_data = {}
-        for reading in readings:
-            day_key = reading.reading_date.strftime("%Y-%m-%d")
-            if day_key not in daily_data:
-                daily_data[day_key] = []
-            if reading.reading_value is not None:
-                daily_data[day_key].append(float(reading.reading_value))
-
-        # Generate labels based on period
-        num_days = 7 if period == "week" else 30
-        for i in range(num_days):
-            day = now - timedelta(days=num_days - i - 1)
-            day_key = day.strftime("%Y-%m-%d")
-            day_label = day.strftime("%b %d")
-            labels.append(day_label)
-
-            if day_key in daily_data and len(daily_data[day_key]) >= 2:
-                consumption = max(daily_data[day_key]) - min(daily_data[day_key])
-                data.append(round(consumption, 2))
-            else:
-                data.append(0.0)
-
-    unit = "kWh" if meter.meter_type in ["electricity", "solar"] else "m³"
+    period = request.args.get("period", DEFAULT_PERIOD)
+    if period not in CHART_PERIODS:
+        period = DEFAULT_PERIOD
+
+    series = request.args.get("series")
+    if series:
+        if series not in TELEMETRY_UNITS:
+            return jsonify({"error": f"Unsupported series: {series}"}), 400
+        points = request.args.get("points", DEFAULT_POINTS, type=int) or DEFAULT_POINTS
+        chart = telemetry_series(meter, series, period, max(3, min(points, MAX_POINTS)))
+        unit = TELEMETRY_UNITS[series]
+    else:
+        chart = consumption_series(meter, period)
+        unit = "kWh" if meter.meter_type in ["electricity", "solar"] else "m³"
 
     response = {
-        "labels": labels,
-        "data": data,
+        "labels": chart["labels"],
+        "data": chart["data"],
         "period": period,
         "unit": unit,
         "meter_type": meter.meter_type
     }
+    if series:
+        response["series"] = series
 
     return jsonify(response), 200
 
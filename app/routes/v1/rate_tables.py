@@ -6,6 +6,7 @@ from flask_login import login_required, current_user
 from ...models import RateTable, Estate, RateTableTier, TimeOfUseRate
 from ...utils.pagination import paginate_query
 from ...utils.rates import calculate_estate_bill
+from ...utils.rate_cache import invalidate_rate_table
 from ...utils.audit import log_action
 from ...utils.decorators import requires_permission
 from . import api_v1
@@ -222,6 +223,7 @@ def create_rate_table():
     )
     db.session.add(rt)
     db.session.commit()
+    invalidate_rate_table(rt.id)
 
     log_action(
         "rate_table.create",
@@ -328,6 +330,7 @@ def update_rate_table(rate_table_id: int):
 
         rt.updated_by = getattr(current_user, "id", None)
         db.session.commit()
+        invalidate_rate_table(rt.id)
 
         log_action(
             "rate_table.update",
@@ -364,6 +367,7 @@ def delete_rate_table(rate_table_id: int):
     before = rt.to_dict()
     db.session.delete(rt)
     db.session.commit()
+    invalidate_rate_table(rate_table_id)
     log_action(
         "rate_table.delete",
         entity_type="rate_table",
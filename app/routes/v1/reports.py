@@ -1,7 +1,15 @@
 from __future__ import annotations
 
-from flask import jsonify, request, render_template, send_file
-from flask_login import login_required
+from flask import (
+    Response,
+    jsonify,
+    request,
+    render_template,
+    send_file,
+    stream_with_context,
+    url_for,
+)
+from flask_login import current_user, login_required
 from datetime import datetime, timedelta
 from sqlalchemy import func, extract, case, or_, and_, desc, asc
 from sqlalchemy.orm import joinedload
@@ -17,6 +25,7 @@ from reportlab.lib.units import inch
 from . import api_v1
 from app.models import (
     MeterReading,
+    MeterConsumptionDaily,
     Transaction,
     Estate,
     Meter,
@@ -26,27 +35,22 @@ from app.models import (
     MeterAlert,
     Person,
     UnitTenancy,
+    ReportJob,
 )
 from app.db import db
 from ...utils.pagination import parse_pagination_params
+from ...services.consumption_rollups import consumption_source, estate_bulk_sub_totals
+from ...services.report_jobs import METERS_CATEGORY, submit_report
+from ...utils.report_cache import cached_report
 
+# CSV exports: rows fetched per server-side cursor round trip, and the size
+# (in characters) of each chunk written to the response
+EXPORT_YIELD_PER = 1000
+CSV_CHUNK_SIZE = 64 * 1024
 
-@api_v1.route("/reports", methods=["GET"])
-@login_required
-def reports_page():
-    """Main reports page with category navigation"""
-    # Get filter parameters
-    category = request.args.get("category", "consumption")
-    estate_id = request.args.get("estate_id", type=int)
-    date_range = request.args.get("date_range", "current_month")
-    meter_type = request.args.get("meter_type", "all")
 
-    # Get pagination parameters for different tables
-    unit_page = request.args.get("unit_page", 1, type=int)
-    top_page = request.args.get("top_page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
-
-    # Calculate date range
+def report_date_range(date_range):
+    """(start_date, end_date) for a date_range filter value"""
     today = datetime.now().date()
     if date_range == "current_month":
         start_date = today.replace(day=1)
@@ -67,6 +71,27 @@ def reports_page():
         next_month = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
         end_date = next_month - timedelta(days=1)
 
+    return start_date, end_date
+
+
+@api_v1.route("/reports", methods=["GET"])
+@login_required
+def reports_page():
+    """Main reports page with category navigation"""
+    # Get filter parameters
+    category = request.args.get("category", "consumption")
+    estate_id = request.args.get("estate_id", type=int)
+    date_range = request.args.get("date_range", "current_month")
+    meter_type = request.args.get("meter_type", "all")
+
+    # Get pagination parameters for different tables
+    unit_page = request.args.get("unit_page", 1, type=int)
+    top_page = request.args.get("top_page", 1, type=int)
+    per_page = request.args.get("per_page", 10, type=int)
+
+    # Calculate date range
+    start_date, end_date = report_date_range(date_range)
+
     # Get estates
     estates = Estate.query.filter_by(is_active=True).order_by(Estate.name).all()
 
@@ -115,6 +140,21 @@ def get_consumption_reports(
     start_date, end_date, estate_id, meter_type, unit_page=1, top_page=1, per_page=10
 ):
     """Get consumption report data"""
+    reports = _consumption_period_reports(
+        start_date, end_date, estate_id, meter_type, unit_page, top_page, per_page
+    )
+    reports["daily_consumption_trend"] = _daily_consumption_trend(estate_id)
+    return reports
+
+
+@cached_report("consumption")
+def _consumption_period_reports(
+    start_date, end_date, estate_id, meter_type, unit_page, top_page, per_page
+):
+    """Consumption datasets for the selected period"""
+    # Consumption is summed from the hourly/daily rollups, not raw readings
+    usage = consumption_source(start_date, end_date)
+
     reports = {
         "unit_consumption": [],
         "bulk_sub_comparison": [],
@@ -127,67 +167,7 @@ def get_consumption_reports(
     }
 
     # Unit Consumption Summary
-    unit_consumption_query = (
-        db.session.query(
-            Unit.unit_number,
-            Estate.name.label("estate_name"),
-            func.sum(
-                case(
-                    (
-                        Meter.meter_type == "electricity",
-                        MeterReading.consumption_since_last,
-                    ),
-                    else_=0,
-                )
-            ).label("electricity_kwh"),
-            func.sum(
-                case(
-                    (Meter.meter_type == "water", MeterReading.consumption_since_last),
-                    else_=0,
-                )
-            ).label("water_kL"),
-            func.sum(
-                case(
-                    (
-                        Meter.meter_type == "hot_water",
-                        MeterReading.consumption_since_last,
-                    ),
-                    else_=0,
-                )
-            ).label("hot_water_kL"),
-            func.sum(
-                case(
-                    (Meter.meter_type == "solar", MeterReading.consumption_since_last),
-                    else_=0,
-                )
-            ).label("solar_kwh"),
-        )
-        .join(Estate, Unit.estate_id == Estate.id)
-        .outerjoin(
-            Meter,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
-        )
-        .outerjoin(
-            MeterReading,
-            and_(
-                MeterReading.meter_id == Meter.id,
-                MeterReading.reading_date >= start_date,
-                MeterReading.reading_date <= end_date,
-            ),
-        )
-        .filter(Unit.is_active == True)
-        .group_by(Unit.id, Unit.unit_number, Estate.name)
-    )
-
-    if estate_id:
-        unit_consumption_query = unit_consumption_query.filter(
-            Unit.estate_id == estate_id
-        )
+    unit_consumption_query = _unit_consumption_query(usage, estate_id)
 
     total_count = unit_consumption_query.count()
     paginated_query = unit_consumption_query.offset((unit_page - 1) * per_page).limit(
@@ -204,107 +184,17 @@ def get_consumption_reports(
         "has_next": unit_page * per_page < total_count,
     }
 
-    # Bulk vs Sub-Meter Comparison
-    bulk_sub_comparison = []
-    estates_to_check = Estate.query.filter_by(is_active=True)
-    if estate_id:
-        estates_to_check = estates_to_check.filter(Estate.id == estate_id)
-
-    for estate in estates_to_check:
-        # Bulk meter readings
-        bulk_electricity = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .filter(Meter.id == estate.bulk_electricity_meter_id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        bulk_water = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .filter(Meter.id == estate.bulk_water_meter_id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        # Sub-meter totals
-        sub_electricity = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .join(Unit, Unit.electricity_meter_id == Meter.id)
-            .filter(Unit.estate_id == estate.id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        sub_water = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .join(Unit, Unit.water_meter_id == Meter.id)
-            .filter(Unit.estate_id == estate.id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        communal_electricity = float(bulk_electricity) - float(sub_electricity)
-        communal_water = float(bulk_water) - float(sub_water)
-
-        bulk_sub_comparison.append(
-            {
-                "estate_name": estate.name,
-                "bulk_electricity": float(bulk_electricity),
-                "sub_electricity": float(sub_electricity),
-                "communal_electricity": communal_electricity,
-                "bulk_water": float(bulk_water),
-                "sub_water": float(sub_water),
-                "communal_water": communal_water,
-            }
-        )
+    # Bulk vs Sub-Meter Comparison, all estates in one grouped query
+    bulk_sub_comparison = [
+        {key: value for key, value in row.items() if key != "estate_id"}
+        for row in estate_bulk_sub_totals(start_date, end_date, estate_id)
+    ]
 
     reports["bulk_sub_comparison"] = bulk_sub_comparison
 
     # Top Consumers by Utility Type
     def get_top_consumers_by_type(utility_type):
-        query = (
-            db.session.query(
-                Unit.unit_number,
-                Estate.name.label("estate_name"),
-                Meter.meter_type,
-                func.sum(MeterReading.consumption_since_last).label(
-                    "total_consumption"
-                ),
-            )
-            .join(Estate, Unit.estate_id == Estate.id)
-            .join(
-                Meter,
-                or_(
-                    Unit.electricity_meter_id == Meter.id,
-                    Unit.water_meter_id == Meter.id,
-                    Unit.hot_water_meter_id == Meter.id,
-                    Unit.solar_meter_id == Meter.id,
-                ),
-            )
-            .join(MeterReading, MeterReading.meter_id == Meter.id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .filter(Unit.is_active == True)
-            .filter(Meter.meter_type == utility_type)
-            .filter(MeterReading.consumption_since_last > 0)
-            .group_by(Unit.id, Unit.unit_number, Estate.name, Meter.meter_type)
-            .order_by(desc(func.sum(MeterReading.consumption_since_last)))
-        )
-
-        if estate_id:
-            query = query.filter(Unit.estate_id == estate_id)
+        query = _top_consumers_query(usage, estate_id, utility_type)
 
         # Pagination
         total_count = query.count()
@@ -334,7 +224,7 @@ def get_consumption_reports(
             Estate.name.label("estate_name"),
             func.sum(
                 case(
-                    (Meter.meter_type == "solar", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "solar", usage.c.consumption),
                     else_=0,
                 )
             ).label("solar_generation"),
@@ -342,7 +232,7 @@ def get_consumption_reports(
                 case(
                     (
                         Meter.meter_type == "electricity",
-                        MeterReading.consumption_since_last,
+                        usage.c.consumption,
                     ),
                     else_=0,
                 )
@@ -351,16 +241,9 @@ def get_consumption_reports(
         .join(Unit, Estate.id == Unit.estate_id)
         .outerjoin(
             Meter,
-            or_(Unit.electricity_meter_id == Meter.id, Unit.solar_meter_id == Meter.id),
-        )
-        .outerjoin(
-            MeterReading,
-            and_(
-                MeterReading.meter_id == Meter.id,
-                MeterReading.reading_date >= start_date,
-                MeterReading.reading_date <= end_date,
-            ),
+            and_(Meter.unit_id == Unit.id, Meter.utility_role.in_(("electricity", "solar"))),
         )
+        .outerjoin(usage, usage.c.meter_id == Meter.id)
         .filter(Estate.is_active == True)
         .group_by(Estate.id, Estate.name)
     )
@@ -370,61 +253,58 @@ def get_consumption_reports(
 
     reports["solar_generation_vs_usage"] = solar_data.all()
 
-    # Daily Consumption Trend - last 30 days aggregated by date
-    from datetime import timedelta
+    return reports
+
 
+@cached_report("consumption_trend", live=True)
+def _daily_consumption_trend(estate_id):
+    """Daily Consumption Trend - last 30 days from the daily rollup"""
     # Calculate date 30 days ago
-    thirty_days_ago = datetime.now() - timedelta(days=30)
+    thirty_days_ago = (datetime.now() - timedelta(days=30)).date()
 
     daily_trend_query = (
         db.session.query(
-            func.date(MeterReading.reading_date).label("date"),
+            MeterConsumptionDaily.bucket.label("date"),
             func.sum(
                 case(
-                    (Meter.meter_type == "electricity", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "electricity", MeterConsumptionDaily.consumption),
                     else_=0,
                 )
             ).label("electricity"),
             func.sum(
                 case(
-                    (Meter.meter_type == "water", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "water", MeterConsumptionDaily.consumption),
                     else_=0,
                 )
             ).label("water"),
             func.sum(
                 case(
-                    (Meter.meter_type == "hot_water", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "hot_water", MeterConsumptionDaily.consumption),
                     else_=0,
                 )
             ).label("hot_water"),
             func.sum(
                 case(
-                    (Meter.meter_type == "solar", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "solar", MeterConsumptionDaily.consumption),
                     else_=0,
                 )
             ).label("solar"),
         )
-        .join(Meter, MeterReading.meter_id == Meter.id)
-        .filter(MeterReading.reading_date >= thirty_days_ago)
-        .group_by(func.date(MeterReading.reading_date))
-        .order_by(func.date(MeterReading.reading_date))
+        .join(Meter, MeterConsumptionDaily.meter_id == Meter.id)
+        .filter(MeterConsumptionDaily.bucket >= thirty_days_ago)
+        .group_by(MeterConsumptionDaily.bucket)
+        .order_by(MeterConsumptionDaily.bucket)
     )
 
     if estate_id:
         # Join with units to filter by estate
-        daily_trend_query = daily_trend_query.join(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
-        ).filter(Unit.estate_id == estate_id)
+        daily_trend_query = daily_trend_query.join(Unit, Meter.unit_id == Unit.id).filter(
+            Unit.estate_id == estate_id
+        )
 
     # Convert Row objects to dictionaries for JSON serialization
     daily_trend_results = daily_trend_query.all()
-    reports["daily_consumption_trend"] = [
+    return [
         {
             "date": row.date.isoformat() if row.date else None,
             "electricity": float(row.electricity) if row.electricity else 0,
@@ -435,41 +315,14 @@ def get_consumption_reports(
         for row in daily_trend_results
     ]
 
-    return reports
-
 
+@cached_report("financial")
 def get_financial_reports(start_date, end_date, estate_id, page=1, per_page=10):
     """Get financial report data"""
     reports = {"credit_purchases": [], "revenue_summary": None}
 
     # Credit Purchase Report
-    credit_purchase_query = (
-        db.session.query(
-            Transaction.transaction_number,
-            Transaction.completed_at,
-            Unit.unit_number,
-            Estate.name.label("estate_name"),
-            Transaction.amount,
-            case(
-                (Transaction.payment_method.is_(None), "Unknown"),
-                else_=Transaction.payment_method,
-            ).label("payment_method"),
-            Transaction.status,
-            Transaction.description,
-        )
-        .join(Wallet, Transaction.wallet_id == Wallet.id)
-        .join(Unit, Wallet.unit_id == Unit.id)
-        .join(Estate, Unit.estate_id == Estate.id)
-        .filter(Transaction.transaction_type == "topup")
-        .filter(Transaction.completed_at >= start_date)
-        .filter(Transaction.completed_at <= end_date)
-        .order_by(desc(Transaction.completed_at))
-    )
-
-    if estate_id:
-        credit_purchase_query = credit_purchase_query.filter(
-            Unit.estate_id == estate_id
-        )
+    credit_purchase_query = _credit_purchase_query(start_date, end_date, estate_id)
 
     # Pagination
     total_purchases = credit_purchase_query.count()
@@ -570,6 +423,7 @@ def get_financial_reports(start_date, end_date, estate_id, page=1, per_page=10):
     return reports
 
 
+@cached_report("system_status", live=True)
 def get_system_status_reports(start_date, end_date, estate_id, page=1, per_page=10):
     """Get system and user status report data"""
     reports = {
@@ -581,86 +435,25 @@ def get_system_status_reports(start_date, end_date, estate_id, page=1, per_page=
     }
 
     # Communication Status
-    communication_status = (
-        db.session.query(
-            Meter.serial_number,
-            Meter.meter_type,
-            Estate.name.label("estate_name"),
-            Unit.unit_number,
-            func.max(MeterReading.reading_date).label("last_reading"),
-            case(
-                (
-                    func.max(MeterReading.reading_date)
-                    >= datetime.now() - timedelta(hours=24),
-                    "online",
-                ),
-                (
-                    func.max(MeterReading.reading_date)
-                    >= datetime.now() - timedelta(hours=72),
-                    "warning",
-                ),
-                else_="offline",
-            ).label("status"),
-        )
-        .join(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
-        )
-        .join(Estate, Unit.estate_id == Estate.id)
-        .outerjoin(MeterReading, MeterReading.meter_id == Meter.id)
-        .filter(Meter.is_active == True)
-        .group_by(
-            Meter.id,
-            Meter.serial_number,
-            Meter.meter_type,
-            Estate.name,
-            Unit.unit_number,
-        )
-    )
-
-    if estate_id:
-        communication_status = communication_status.filter(Unit.estate_id == estate_id)
-
-    reports["communication_status"] = communication_status.all()
+    reports["communication_status"] = _communication_status_query(estate_id).all()
 
     # Offline/Unresponsive Meters
+    last_seen = _last_seen()
     offline_meters = (
         db.session.query(
             Meter.serial_number,
             Meter.meter_type,
             Estate.name.label("estate_name"),
             Unit.unit_number,
-            func.max(MeterReading.reading_date).label("last_reading"),
-        )
-        .join(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
+            Meter.last_reading_date.label("last_reading"),
         )
+        .join(Unit, Meter.unit_id == Unit.id)
         .join(Estate, Unit.estate_id == Estate.id)
-        .outerjoin(MeterReading, MeterReading.meter_id == Meter.id)
         .filter(Meter.is_active == True)
-        .group_by(
-            Meter.id,
-            Meter.serial_number,
-            Meter.meter_type,
-            Estate.name,
-            Unit.unit_number,
-        )
-        .having(
+        .filter(
             or_(
-                func.max(MeterReading.reading_date)
-                < datetime.now() - timedelta(hours=72),
-                func.max(MeterReading.reading_date).is_(None),
+                last_seen < datetime.now() - timedelta(hours=72),
+                last_seen.is_(None),
             )
         )
     )
@@ -671,40 +464,7 @@ def get_system_status_reports(start_date, end_date, estate_id, page=1, per_page=
     reports["offline_meters"] = offline_meters.all()
 
     # Meter Health Report
-    meter_health = (
-        db.session.query(
-            Meter.serial_number,
-            Meter.meter_type,
-            Estate.name.label("estate_name"),
-            Unit.unit_number,
-            func.count(MeterAlert.id).label("alert_count"),
-            func.max(MeterAlert.created_at).label("last_alert"),
-        )
-        .join(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
-        )
-        .join(Estate, Unit.estate_id == Estate.id)
-        .outerjoin(MeterAlert, MeterAlert.meter_id == Meter.id)
-        .filter(Meter.is_active == True)
-        .group_by(
-            Meter.id,
-            Meter.serial_number,
-            Meter.meter_type,
-            Estate.name,
-            Unit.unit_number,
-        )
-    )
-
-    if estate_id:
-        meter_health = meter_health.filter(Unit.estate_id == estate_id)
-
-    reports["meter_health"] = meter_health.all()
+    reports["meter_health"] = _meter_health_query(estate_id).all()
 
     # Low Balance & Cut-off Alerts
     # Join through UnitTenancy → Person to get primary tenant info
@@ -773,8 +533,11 @@ def get_system_status_reports(start_date, end_date, estate_id, page=1, per_page=
     return reports
 
 
+@cached_report("estate")
 def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=10):
     """Get estate-level report data"""
+    usage = consumption_source(start_date, end_date)
+
     reports = {
         "estate_utility_summary": [],
         "communal_usage": [],
@@ -789,14 +552,14 @@ def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=1
                 case(
                     (
                         Meter.meter_type == "electricity",
-                        MeterReading.consumption_since_last,
+                        usage.c.consumption,
                     ),
                     else_=0,
                 )
             ).label("total_electricity"),
             func.sum(
                 case(
-                    (Meter.meter_type == "water", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "water", usage.c.consumption),
                     else_=0,
                 )
             ).label("total_water"),
@@ -804,40 +567,28 @@ def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=1
                 case(
                     (
                         Meter.meter_type == "hot_water",
-                        MeterReading.consumption_since_last,
+                        usage.c.consumption,
                     ),
                     else_=0,
                 )
             ).label("total_hot_water"),
             func.sum(
                 case(
-                    (Meter.meter_type == "solar", MeterReading.consumption_since_last),
+                    (Meter.meter_type == "solar", usage.c.consumption),
                     else_=0,
                 )
             ).label("total_solar"),
-            func.count(Unit.id).label("total_units"),
+            # Distinct: each unit appears once per meter and rollup bucket
+            func.count(func.distinct(Unit.id)).label("total_units"),
             func.count(
-                case((Unit.occupancy_status == "occupied", Unit.id), else_=None)
+                func.distinct(
+                    case((Unit.occupancy_status == "occupied", Unit.id), else_=None)
+                )
             ).label("occupied_units"),
         )
         .join(Unit, Estate.id == Unit.estate_id)
-        .outerjoin(
-            Meter,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-            ),
-        )
-        .outerjoin(
-            MeterReading,
-            and_(
-                MeterReading.meter_id == Meter.id,
-                MeterReading.reading_date >= start_date,
-                MeterReading.reading_date <= end_date,
-            ),
-        )
+        .outerjoin(Meter, Meter.unit_id == Unit.id)
+        .outerjoin(usage, usage.c.meter_id == Meter.id)
         .filter(Estate.is_active == True)
         .group_by(Estate.id, Estate.name)
     )
@@ -862,63 +613,15 @@ def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=1
         for row in estate_utility_summary_raw
     ]
 
-    # Communal Usage Report
-    communal_usage = []
-    estates_to_check = Estate.query.filter_by(is_active=True)
-    if estate_id:
-        estates_to_check = estates_to_check.filter(Estate.id == estate_id)
-
-    for estate in estates_to_check:
-        # Get bulk meter readings
-        bulk_electricity = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .filter(Meter.id == estate.bulk_electricity_meter_id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        bulk_water = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .filter(Meter.id == estate.bulk_water_meter_id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
+    # Communal Usage Report, all estates in one grouped query
+    from app.utils.rates import calculate_consumption_charge
 
-        # Get sub-meter totals
-        sub_electricity = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .join(Unit, Unit.electricity_meter_id == Meter.id)
-            .filter(Unit.estate_id == estate.id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        sub_water = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .join(Meter, Meter.id == MeterReading.meter_id)
-            .join(Unit, Unit.water_meter_id == Meter.id)
-            .filter(Unit.estate_id == estate.id)
-            .filter(MeterReading.reading_date >= start_date)
-            .filter(MeterReading.reading_date <= end_date)
-            .scalar()
-            or 0
-        )
-
-        communal_electricity = float(bulk_electricity) - float(sub_electricity)
-        communal_water = float(bulk_water) - float(sub_water)
+    communal_usage = []
+    for row in estate_bulk_sub_totals(start_date, end_date, estate_id):
+        communal_electricity = row["communal_electricity"]
+        communal_water = row["communal_water"]
 
         # Calculate costs using rate tables
-        from app.utils.rates import calculate_consumption_charge
-
         electricity_cost = calculate_consumption_charge(
             consumption=communal_electricity,
             utility_type="electricity"
@@ -929,7 +632,7 @@ def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=1
         )
         communal_usage.append(
             {
-                "estate_name": estate.name,
+                "estate_name": row["estate_name"],
                 "communal_electricity": communal_electricity,
                 "communal_water": communal_water,
                 "electricity_cost": electricity_cost,
@@ -966,11 +669,182 @@ def get_estate_level_reports(start_date, end_date, estate_id, page=1, per_page=1
     )
 
     if estate_id:
-        management_snapshot = management_snapshot.filter(Estate.id == estate_id)
+        management_snapshot = management_snapshot.filter(Estate.id == estate_id)
+
+    reports["management_snapshot"] = management_snapshot.all()
+
+    return reports
+
+
+def _unit_consumption_query(usage, estate_id):
+    """Per-unit consumption by utility over a consumption source"""
+    query = (
+        db.session.query(
+            Unit.unit_number,
+            Estate.name.label("estate_name"),
+            func.sum(
+                case(
+                    (
+                        Meter.meter_type == "electricity",
+                        usage.c.consumption,
+                    ),
+                    else_=0,
+                )
+            ).label("electricity_kwh"),
+            func.sum(
+                case(
+                    (Meter.meter_type == "water", usage.c.consumption),
+                    else_=0,
+                )
+            ).label("water_kL"),
+            func.sum(
+                case(
+                    (
+                        Meter.meter_type == "hot_water",
+                        usage.c.consumption,
+                    ),
+                    else_=0,
+                )
+            ).label("hot_water_kL"),
+            func.sum(
+                case(
+                    (Meter.meter_type == "solar", usage.c.consumption),
+                    else_=0,
+                )
+            ).label("solar_kwh"),
+        )
+        .join(Estate, Unit.estate_id == Estate.id)
+        .outerjoin(Meter, Meter.unit_id == Unit.id)
+        .outerjoin(usage, usage.c.meter_id == Meter.id)
+        .filter(Unit.is_active == True)
+        .group_by(Unit.id, Unit.unit_number, Estate.name)
+    )
+
+    if estate_id:
+        query = query.filter(Unit.estate_id == estate_id)
+
+    return query
+
+
+def _top_consumers_query(usage, estate_id, utility_type=None):
+    """Units ranked by consumption, per meter type"""
+    query = (
+        db.session.query(
+            Unit.unit_number,
+            Estate.name.label("estate_name"),
+            Meter.meter_type,
+            func.sum(usage.c.consumption).label(
+                "total_consumption"
+            ),
+        )
+        .join(Estate, Unit.estate_id == Estate.id)
+        .join(Meter, Meter.unit_id == Unit.id)
+        .join(usage, usage.c.meter_id == Meter.id)
+        .filter(Unit.is_active == True)
+        .filter(usage.c.consumption > 0)
+        .group_by(Unit.id, Unit.unit_number, Estate.name, Meter.meter_type)
+        .order_by(desc(func.sum(usage.c.consumption)))
+    )
+
+    if utility_type:
+        query = query.filter(Meter.meter_type == utility_type)
+    if estate_id:
+        query = query.filter(Unit.estate_id == estate_id)
+
+    return query
+
+
+def _credit_purchase_query(start_date, end_date, estate_id):
+    """Top-up transactions in a date range, newest first"""
+    query = (
+        db.session.query(
+            Transaction.transaction_number,
+            Transaction.completed_at,
+            Unit.unit_number,
+            Estate.name.label("estate_name"),
+            Transaction.amount,
+            case(
+                (Transaction.payment_method.is_(None), "Unknown"),
+                else_=Transaction.payment_method,
+            ).label("payment_method"),
+            Transaction.status,
+            Transaction.description,
+        )
+        .join(Wallet, Transaction.wallet_id == Wallet.id)
+        .join(Unit, Wallet.unit_id == Unit.id)
+        .join(Estate, Unit.estate_id == Estate.id)
+        .filter(Transaction.transaction_type == "topup")
+        .filter(Transaction.completed_at >= start_date)
+        .filter(Transaction.completed_at <= end_date)
+        .order_by(desc(Transaction.completed_at))
+    )
+
+    if estate_id:
+        query = query.filter(Unit.estate_id == estate_id)
+
+    return query
+
+
+def _last_seen():
+    """When a meter was last heard from, from the denormalized Meter columns"""
+    return func.coalesce(Meter.last_communication, Meter.last_reading_date)
+
+
+def _communication_status_query(estate_id):
+    """Active meters with their last reading and online status"""
+    last_seen = _last_seen()
+    query = (
+        db.session.query(
+            Meter.serial_number,
+            Meter.meter_type,
+            Estate.name.label("estate_name"),
+            Unit.unit_number,
+            Meter.last_reading_date.label("last_reading"),
+            case(
+                (last_seen >= datetime.now() - timedelta(hours=24), "online"),
+                (last_seen >= datetime.now() - timedelta(hours=72), "warning"),
+                else_="offline",
+            ).label("status"),
+        )
+        .join(Unit, Meter.unit_id == Unit.id)
+        .join(Estate, Unit.estate_id == Estate.id)
+        .filter(Meter.is_active == True)
+    )
+
+    if estate_id:
+        query = query.filter(Unit.estate_id == estate_id)
 
-    reports["management_snapshot"] = management_snapshot.all()
+    return query
 
-    return reports
+
+def _meter_health_query(estate_id):
+    """Active meters with their alert count and latest alert"""
+    query = (
+        db.session.query(
+            Meter.serial_number,
+            Meter.meter_type,
+            Estate.name.label("estate_name"),
+            Unit.unit_number,
+            func.count(MeterAlert.id).label("alert_count"),
+            func.max(MeterAlert.created_at).label("last_alert"),
+        )
+        .join(Unit, Meter.unit_id == Unit.id)
+        .join(Estate, Unit.estate_id == Estate.id)
+        .outerjoin(MeterAlert, MeterAlert.meter_id == Meter.id)
+        .filter(Meter.is_active == True)
+        .group_by(
+            Meter.id,
+            Meter.serial_number,
+            Meter.meter_type,
+            Estate.name,
+            Unit.unit_number,
+        )
+    )
+
+    if estate_id:
+        query = query.filter(Unit.estate_id == estate_id)
+
+    return query
 
 
 @api_v1.route("/reports/export/<report_type>")
@@ -985,25 +859,7 @@ def export_report(report_type):
     date_range = request.args.get("date_range", "current_month")
 
     # Calculate date range
-    today = datetime.now().date()
-    if date_range == "current_month":
-        start_date = today.replace(day=1)
-        next_month = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-        end_date = next_month - timedelta(days=1)
-    elif date_range == "previous_month":
-        first_this_month = today.replace(day=1)
-        end_date = first_this_month - timedelta(days=1)
-        start_date = end_date.replace(day=1)
-    elif date_range == "past_3_months":
-        start_date = today - timedelta(days=90)
-        end_date = today
-    elif date_range == "year_to_date":
-        start_date = today.replace(month=1, day=1)
-        end_date = today
-    else:
-        start_date = today.replace(day=1)
-        next_month = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-        end_date = next_month - timedelta(days=1)
+    start_date, end_date = report_date_range(date_range)
 
     if format_type == "csv":
         return export_csv(report_type, category, start_date, end_date, estate_id)
@@ -1013,281 +869,440 @@ def export_report(report_type):
         return jsonify({"error": "Unsupported format"}), 400
 
 
-def export_csv(report_type, category, start_date, end_date, estate_id):
-    """Export report data as CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output)
+def report_job_response(job, status_endpoint, download_endpoint, created=None):
+    """JSON for a report job: 202 while rendering, 200 when ready"""
+    payload = job.to_dict()
+    if created is not None:
+        payload["reused"] = not created
+    payload["status_url"] = url_for(status_endpoint, job_id=job.id)
+    payload["download_url"] = url_for(download_endpoint, job_id=job.id)
+    if job.status == "completed":
+        return jsonify({"data": payload}), 200
+    if job.status == "failed":
+        return jsonify({"data": payload, "error": job.error_message}), 503
+    return jsonify({"data": payload}), 202
+
+
+def report_artifact_response(job):
+    """Send a finished report artifact, or explain why it is unavailable"""
+    if job.status in ("pending", "running"):
+        return jsonify({"error": "Report is not ready", "status": job.status}), 409
+    if job.status != "completed" or not job.file_path:
+        return jsonify({"error": "Report is no longer available", "status": job.status}), 410
+    mimetype = "text/csv" if job.format == "csv" else "application/pdf"
+    return send_file(
+        job.file_path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=job.file_name,
+    )
+
+
+@api_v1.route("/reports/jobs", methods=["POST"])
+@login_required
+def create_report_job():
+    """Queue a CSV or PDF report to be rendered in the background.
+
+    Takes report_type, category, format, date_range and estate_id like the
+    export endpoint. An identical request that is still rendering, or that
+    finished within REPORT_ARTIFACT_TTL, returns the existing job.
+    """
+    data = request.get_json(silent=True) or request.form
+    report_type = data.get("report_type")
+    category = data.get("category", "consumption")
+    format_type = data.get("format", "csv")
+    if not report_type:
+        return jsonify({"error": "report_type is required"}), 400
+    if category == METERS_CATEGORY:
+        return jsonify({"error": "Use /meters/export/jobs for meter reports"}), 400
+    if format_type not in ("csv", "pdf"):
+        return jsonify({"error": "Unsupported format"}), 400
+    try:
+        estate_id = int(data["estate_id"]) if data.get("estate_id") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "estate_id must be an integer"}), 400
+
+    start_date, end_date = report_date_range(data.get("date_range", "current_month"))
+    job, created = submit_report(
+        report_type,
+        category,
+        format_type,
+        {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "estate_id": estate_id,
+        },
+        requested_by=current_user.id,
+    )
+    return report_job_response(
+        job, "api_v1.report_job_status", "api_v1.download_report_job", created
+    )
+
+
+def _report_job_or_404(job_id):
+    job = db.session.get(ReportJob, job_id)
+    if job is None or job.category == METERS_CATEGORY:
+        return None
+    return job
+
+
+@api_v1.route("/reports/jobs/<int:job_id>", methods=["GET"])
+@login_required
+def report_job_status(job_id):
+    """Status and progress of a report job"""
+    job = _report_job_or_404(job_id)
+    if job is None:
+        return jsonify({"error": "Report job not found"}), 404
+    return report_job_response(
+        job, "api_v1.report_job_status", "api_v1.download_report_job"
+    )
+
+
+@api_v1.route("/reports/jobs/<int:job_id>/download", methods=["GET"])
+@login_required
+def download_report_job(job_id):
+    """Download a finished report job's artifact"""
+    job = _report_job_or_404(job_id)
+    if job is None:
+        return jsonify({"error": "Report job not found"}), 404
+    return report_artifact_response(job)
+
+
+def _stream_rows(query):
+    """Iterate a query through a server-side cursor, EXPORT_YIELD_PER rows at a time"""
+    return query.yield_per(EXPORT_YIELD_PER)
+
+
+def _stream_csv(header, rows):
+    """Encode rows as CSV, yielding chunks of roughly CSV_CHUNK_SIZE characters"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _meter_labels(estate_id):
+    """Map meter id to (serial, type, estate, unit) for the readings export"""
+    query = (
+        db.session.query(
+            Meter.id,
+            Meter.serial_number,
+            Meter.meter_type,
+            Estate.name,
+            Unit.unit_number,
+        )
+        .outerjoin(Unit, Meter.unit_id == Unit.id)
+        .outerjoin(
+            Estate,
+            or_(
+                Estate.id == Unit.estate_id,
+                Estate.bulk_electricity_meter_id == Meter.id,
+                Estate.bulk_water_meter_id == Meter.id,
+            ),
+        )
+    )
+
+    if estate_id:
+        query = query.filter(Estate.id == estate_id)
+
+    return {row[0]: tuple(row[1:]) for row in query}
+
+
+def _meter_reading_rows(start_date, end_date, estate_id):
+    """Raw readings in the date range, streamed in (meter, date) order"""
+    labels = _meter_labels(estate_id)
+    query = (
+        db.session.query(
+            MeterReading.meter_id,
+            MeterReading.reading_date,
+            MeterReading.reading_value,
+            MeterReading.consumption_since_last,
+        )
+        .filter(MeterReading.reading_date >= start_date)
+        .filter(MeterReading.reading_date < end_date + timedelta(days=1))
+        .order_by(MeterReading.meter_id, MeterReading.reading_date)
+    )
+
+    if estate_id:
+        query = query.filter(MeterReading.meter_id.in_(list(labels)))
+
+    unknown = ("", "", "", "")
+    for row in _stream_rows(query):
+        serial_number, meter_type, estate_name, unit_number = labels.get(
+            row.meter_id, unknown
+        )
+        yield [
+            serial_number,
+            meter_type,
+            estate_name,
+            unit_number,
+            row.reading_date.strftime("%Y-%m-%d %H:%M:%S"),
+            row.reading_value,
+            row.consumption_since_last,
+        ]
+
+
+def csv_report(report_type, category, start_date, end_date, estate_id):
+    """Header and lazily fetched rows for a CSV report, or None if unknown.
+
+    Exports are never paginated. Rows are read through a server-side cursor
+    as they are consumed, so memory stays flat however large the export is.
+    """
+    header = None
 
     if category == "consumption":
         if report_type == "unit_consumption":
-            writer.writerow(
+            header = [
+                "Unit Number",
+                "Estate",
+                "Electricity (kWh)",
+                "Water (kL)",
+                "Hot Water (kL)",
+                "Solar (kWh)",
+            ]
+            usage = consumption_source(start_date, end_date)
+            rows = (
                 [
-                    "Unit Number",
-                    "Estate",
-                    "Electricity (kWh)",
-                    "Water (kL)",
-                    "Hot Water (kL)",
-                    "Solar (kWh)",
+                    row.unit_number,
+                    row.estate_name,
+                    row.electricity_kwh,
+                    row.water_kL,
+                    row.hot_water_kL,
+                    row.solar_kwh,
                 ]
+                for row in _stream_rows(_unit_consumption_query(usage, estate_id))
             )
-            data = get_consumption_reports(start_date, end_date, estate_id, "all")[
-                "unit_consumption"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row.unit_number,
-                        row.estate_name,
-                        row.electricity_kwh,
-                        row.water_kL,
-                        getattr(row, "hot_water_kL", 0),
-                        row.solar_kwh,
-                    ]
-                )
 
         elif report_type == "bulk_sub_comparison":
-            writer.writerow(
+            header = [
+                "Estate",
+                "Bulk Electricity",
+                "Sub Electricity",
+                "Communal Electricity",
+                "Bulk Water",
+                "Sub Water",
+                "Communal Water",
+            ]
+            rows = (
                 [
-                    "Estate",
-                    "Bulk Electricity",
-                    "Sub Electricity",
-                    "Communal Electricity",
-                    "Bulk Water",
-                    "Sub Water",
-                    "Communal Water",
+                    row["estate_name"],
+                    row["bulk_electricity"],
+                    row["sub_electricity"],
+                    row["communal_electricity"],
+                    row["bulk_water"],
+                    row["sub_water"],
+                    row["communal_water"],
                 ]
+                for row in estate_bulk_sub_totals(start_date, end_date, estate_id)
             )
-            data = get_consumption_reports(start_date, end_date, estate_id, "all")[
-                "bulk_sub_comparison"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row["estate_name"],
-                        row["bulk_electricity"],
-                        row["sub_electricity"],
-                        row["communal_electricity"],
-                        row["bulk_water"],
-                        row["sub_water"],
-                        row["communal_water"],
-                    ]
-                )
 
         elif report_type == "solar_generation_vs_usage":
-            writer.writerow(
-                [
-                    "Estate",
-                    "Solar Generation (kWh)",
-                    "Electricity Usage (kWh)",
-                    "Net Generation (kWh)",
-                    "Utilization (%)",
-                ]
-            )
-            data = get_consumption_reports(start_date, end_date, estate_id, "all")[
-                "solar_generation_vs_usage"
+            header = [
+                "Estate",
+                "Solar Generation (kWh)",
+                "Electricity Usage (kWh)",
+                "Net Generation (kWh)",
+                "Utilization (%)",
             ]
-            for row in data:
-                solar_gen = float(row.solar_generation or 0)
-                elec_usage = float(row.electricity_usage or 0)
-                net_gen = solar_gen - elec_usage
-                utilization = (solar_gen / elec_usage * 100) if elec_usage > 0 else 0
 
-                writer.writerow(
-                    [
+            def solar_rows():
+                data = get_consumption_reports(start_date, end_date, estate_id, "all")[
+                    "solar_generation_vs_usage"
+                ]
+                for row in data:
+                    solar_gen = float(row.solar_generation or 0)
+                    elec_usage = float(row.electricity_usage or 0)
+                    net_gen = solar_gen - elec_usage
+                    utilization = (
+                        (solar_gen / elec_usage * 100) if elec_usage > 0 else 0
+                    )
+                    yield [
                         row.estate_name,
                         solar_gen,
                         elec_usage,
                         net_gen,
                         f"{utilization:.1f}%",
                     ]
-                )
+
+            rows = solar_rows()
 
         elif report_type == "top_consumers":
-            writer.writerow(
-                ["Unit Number", "Estate", "Meter Type", "Total Consumption"]
+            header = ["Unit Number", "Estate", "Meter Type", "Total Consumption"]
+            usage = consumption_source(start_date, end_date)
+            rows = (
+                [
+                    row.unit_number,
+                    row.estate_name,
+                    row.meter_type,
+                    row.total_consumption,
+                ]
+                for row in _stream_rows(_top_consumers_query(usage, estate_id))
             )
-            data = get_consumption_reports(start_date, end_date, estate_id, "all")[
-                "top_consumers"
+
+        elif report_type == "meter_readings":
+            header = [
+                "Serial Number",
+                "Meter Type",
+                "Estate",
+                "Unit",
+                "Reading Date (UTC)",
+                "Reading Value",
+                "Consumption Since Last",
             ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row.unit_number,
-                        row.estate_name,
-                        row.meter_type,
-                        row.total_consumption,
-                    ]
-                )
+            rows = _meter_reading_rows(start_date, end_date, estate_id)
 
     elif category == "financial":
         if report_type == "credit_purchases":
-            writer.writerow(
+            header = [
+                "Transaction Number",
+                "Date",
+                "Unit",
+                "Estate",
+                "Amount",
+                "Payment Method",
+                "Status",
+                "Description",
+            ]
+            rows = (
                 [
-                    "Transaction Number",
-                    "Date",
-                    "Unit",
-                    "Estate",
-                    "Amount",
-                    "Payment Method",
-                    "Status",
-                    "Description",
+                    row.transaction_number,
+                    row.completed_at.strftime("%Y-%m-%d %H:%M")
+                    if row.completed_at
+                    else "",
+                    row.unit_number,
+                    row.estate_name,
+                    row.amount,
+                    row.payment_method or "Unknown",
+                    row.status,
+                    row.description,
                 ]
-            )
-            data = get_financial_reports(start_date, end_date, estate_id)[
-                "credit_purchases"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row.transaction_number,
-                        row.completed_at.strftime("%Y-%m-%d %H:%M")
-                        if row.completed_at
-                        else "",
-                        row.unit_number,
-                        row.estate_name,
-                        row.amount,
-                        row.payment_method or "Unknown",
-                        row.status,
-                        row.description,
-                    ]
+                for row in _stream_rows(
+                    _credit_purchase_query(start_date, end_date, estate_id)
                 )
+            )
 
     elif category == "system":
         if report_type == "communication_status":
-            writer.writerow(
+            header = [
+                "Serial Number",
+                "Meter Type",
+                "Estate",
+                "Unit",
+                "Last Reading",
+                "Status",
+            ]
+            rows = (
                 [
-                    "Serial Number",
-                    "Meter Type",
-                    "Estate",
-                    "Unit",
-                    "Last Reading",
-                    "Status",
+                    row.serial_number,
+                    row.meter_type,
+                    row.estate_name,
+                    row.unit_number,
+                    row.last_reading.strftime("%Y-%m-%d %H:%M")
+                    if row.last_reading
+                    else "Never",
+                    row.status,
                 ]
+                for row in _stream_rows(_communication_status_query(estate_id))
             )
-            data = get_system_status_reports(start_date, end_date, estate_id)[
-                "communication_status"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row.serial_number,
-                        row.meter_type,
-                        row.estate_name,
-                        row.unit_number,
-                        row.last_reading.strftime("%Y-%m-%d %H:%M")
-                        if row.last_reading
-                        else "Never",
-                        row.status,
-                    ]
-                )
 
         elif report_type == "meter_health":
-            writer.writerow(
+            header = [
+                "Serial Number",
+                "Meter Type",
+                "Estate",
+                "Unit",
+                "Alert Count",
+                "Last Alert",
+            ]
+            rows = (
                 [
-                    "Serial Number",
-                    "Meter Type",
-                    "Estate",
-                    "Unit",
-                    "Alert Count",
-                    "Last Alert",
+                    row.serial_number,
+                    row.meter_type,
+                    row.estate_name,
+                    row.unit_number,
+                    row.alert_count or 0,
+                    row.last_alert.strftime("%Y-%m-%d") if row.last_alert else "None",
                 ]
+                for row in _stream_rows(_meter_health_query(estate_id))
             )
-            data = get_system_status_reports(start_date, end_date, estate_id)[
-                "meter_health"
-            ]
-            for row in data:
-                last_alert_str = (
-                    row.last_alert.strftime("%Y-%m-%d") if row.last_alert else "None"
-                )
-                writer.writerow(
-                    [
-                        row.serial_number,
-                        row.meter_type,
-                        row.estate_name,
-                        row.unit_number,
-                        row.alert_count or 0,
-                        last_alert_str,
-                    ]
-                )
 
     elif category == "estate":
         if report_type == "estate_summary":
-            writer.writerow(
+            header = [
+                "Estate",
+                "Total Units",
+                "Occupied Units",
+                "Total Electricity",
+                "Total Water",
+                "Total Hot Water",
+                "Total Solar",
+            ]
+            rows = (
                 [
-                    "Estate",
-                    "Total Units",
-                    "Occupied Units",
-                    "Total Electricity",
-                    "Total Water",
-                    "Total Hot Water",
-                    "Total Solar",
+                    row.estate_name,
+                    row.total_units,
+                    row.occupied_units,
+                    row.total_electricity,
+                    row.total_water,
+                    getattr(row, "total_hot_water", 0),
+                    row.total_solar,
+                ]
+                for row in get_estate_level_reports(start_date, end_date, estate_id)[
+                    "estate_utility_summary"
                 ]
             )
-            data = get_estate_level_reports(start_date, end_date, estate_id)[
-                "estate_utility_summary"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row.estate_name,
-                        row.total_units,
-                        row.occupied_units,
-                        row.total_electricity,
-                        row.total_water,
-                        getattr(row, "total_hot_water", 0),
-                        row.total_solar,
-                    ]
-                )
 
         elif report_type == "communal_usage":
-            writer.writerow(
+            header = [
+                "Estate",
+                "Communal Electricity (kWh)",
+                "Communal Water (kL)",
+                "Electricity Cost",
+                "Water Cost",
+                "Total Cost",
+            ]
+            rows = (
                 [
-                    "Estate",
-                    "Communal Electricity (kWh)",
-                    "Communal Water (kL)",
-                    "Electricity Cost",
-                    "Water Cost",
-                    "Total Cost",
+                    row["estate_name"],
+                    row["communal_electricity"],
+                    row["communal_water"],
+                    row["electricity_cost"],
+                    row["water_cost"],
+                    row["total_cost"],
+                ]
+                for row in get_estate_level_reports(start_date, end_date, estate_id)[
+                    "communal_usage"
                 ]
             )
-            data = get_estate_level_reports(start_date, end_date, estate_id)[
-                "communal_usage"
-            ]
-            for row in data:
-                writer.writerow(
-                    [
-                        row["estate_name"],
-                        row["communal_electricity"],
-                        row["communal_water"],
-                        row["electricity_cost"],
-                        row["water_cost"],
-                        row["total_cost"],
-                    ]
-                )
 
         elif report_type == "management_snapshot":
-            writer.writerow(
-                [
-                    "Estate",
-                    "Total Units",
-                    "Occupied Units",
-                    "Occupancy Rate",
-                    "Total Wallet Balance",
-                    "Low Balance Count",
-                    "Zero Balance Count",
-                ]
-            )
-            data = get_estate_level_reports(start_date, end_date, estate_id)[
-                "management_snapshot"
+            header = [
+                "Estate",
+                "Total Units",
+                "Occupied Units",
+                "Occupancy Rate",
+                "Total Wallet Balance",
+                "Low Balance Count",
+                "Zero Balance Count",
             ]
-            for row in data:
-                occupancy_rate = (
-                    ((row.occupied_units or 0) / (row.total_units or 1)) * 100
-                    if row.total_units and row.total_units > 0
-                    else 0
-                )
-                writer.writerow(
-                    [
+
+            def snapshot_rows():
+                data = get_estate_level_reports(start_date, end_date, estate_id)[
+                    "management_snapshot"
+                ]
+                for row in data:
+                    occupancy_rate = (
+                        ((row.occupied_units or 0) / (row.total_units or 1)) * 100
+                        if row.total_units and row.total_units > 0
+                        else 0
+                    )
+                    yield [
                         row.estate_name,
                         row.total_units,
                         row.occupied_units,
@@ -1296,23 +1311,43 @@ def export_csv(report_type, category, start_date, end_date, estate_id):
                         row.low_balance_count,
                         row.zero_balance_count,
                     ]
-                )
 
-    output.seek(0)
+            rows = snapshot_rows()
+
+    if header is None:
+        return None
+    return header, rows
+
+
+def write_report_csv(report_type, category, start_date, end_date, estate_id, output):
+    """Write a CSV report into a text file object; False if the report is unknown"""
+    report = csv_report(report_type, category, start_date, end_date, estate_id)
+    if report is None:
+        return False
+    for chunk in _stream_csv(*report):
+        output.write(chunk)
+    return True
+
+
+def export_csv(report_type, category, start_date, end_date, estate_id):
+    """Stream report data as CSV"""
+    report = csv_report(report_type, category, start_date, end_date, estate_id)
+    if report is None:
+        return jsonify({"error": "Unsupported report"}), 400
+
     filename = f"{report_type}_{category}_{start_date}_{end_date}.csv"
 
-    return send_file(
-        io.BytesIO(output.getvalue().encode("utf-8")),
+    # The generator runs after this view returns; keep the request context
+    # (and its database session) alive until the last chunk is sent
+    return Response(
+        stream_with_context(_stream_csv(*report)),
         mimetype="text/csv",
-        as_attachment=True,
-        download_name=filename,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
-def export_pdf(report_type, category, start_date, end_date, estate_id):
-    """Export report data as PDF"""
-    buffer = io.BytesIO()
-
+def render_report_pdf(report_type, category, start_date, end_date, estate_id, output):
+    """Render a report as PDF into a binary file object"""
     # Use landscape orientation for reports with many columns
     landscape_reports = [
         "bulk_sub_comparison",
@@ -1323,9 +1358,9 @@ def export_pdf(report_type, category, start_date, end_date, estate_id):
         "low_balance_alerts",
     ]
     if report_type in landscape_reports:
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
+        doc = SimpleDocTemplate(output, pagesize=landscape(A4))
     else:
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        doc = SimpleDocTemplate(output, pagesize=A4)
 
     story = []
 
@@ -1925,6 +1960,12 @@ def export_pdf(report_type, category, start_date, end_date, estate_id):
 
     # Build PDF
     doc.build(story)
+
+
+def export_pdf(report_type, category, start_date, end_date, estate_id):
+    """Export report data as PDF"""
+    buffer = io.BytesIO()
+    render_report_pdf(report_type, category, start_date, end_date, estate_id, buffer)
     buffer.seek(0)
 
     filename = f"{report_type}_{category}_{start_date}_{end_date}.pdf"
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from datetime import datetime
 from flask import jsonify
+from flask_login import login_required
 
 from ...models import Meter
+from ...utils import report_cache, task_lock
 from . import api_v1
 
 
@@ -24,3 +26,17 @@ def system_health():
             }
         }
     )
+
+
+@api_v1.get("/system/report-cache")
+@login_required
+def report_cache_stats():
+    # Hit/miss counters of the reports page cache, per report
+    return jsonify({"data": report_cache.stats()})
+
+
+@api_v1.get("/system/task-locks")
+@login_required
+def task_lock_stats():
+    # Lease acquisitions, skipped overlapping runs and lock wait times, per task
+    return jsonify({"data": task_lock.stats()})
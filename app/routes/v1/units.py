@@ -21,6 +21,7 @@ from ...services.units import (
     UnitDeleteError,
 )
 from ...services.meters import list_available_by_type as svc_list_available_meters
+from ...services.latest_telemetry import get_latest, get_latest_many
 from ...services.persons import (
     list_persons_for_dropdown as svc_list_persons_for_dropdown,
 )
@@ -152,8 +153,6 @@ def list_units():
 def wallet_statement_page(unit_id: int):
     """Render the wallet statement page"""
     from ...models import Unit, Wallet, Estate, Transaction
-    from ...db import db
-    from sqlalchemy import func
     from datetime import datetime, date, timedelta
 
     # Get unit and wallet data
@@ -229,29 +228,23 @@ def wallet_statement_page(unit_id: int):
     )
 
     # Calculate usage statistics (in physical units via meter readings)
-    # Sum meter readings for the current month
-    from ...models.meter_reading import MeterReading
-    from ...db import db
-    from sqlalchemy import func
-
-    def sum_month_usage_for_meter(meter_id: int):
-        if not meter_id:
-            return 0.0
-        total = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .filter_by(meter_id=meter_id)
-            .filter(
-                MeterReading.reading_date >= month_start,
-                MeterReading.reading_date <= now,
-            )
-            .scalar()
-        ) or 0.0
-        return float(total)
-
-    electricity_kwh = sum_month_usage_for_meter(unit.electricity_meter_id)
-    water_kl = sum_month_usage_for_meter(unit.water_meter_id)
-    hot_water_kwh = sum_month_usage_for_meter(unit.hot_water_meter_id)
-    solar_kwh = sum_month_usage_for_meter(unit.solar_meter_id)
+    # Month-to-date totals for all unit meters in one rollup query
+    from ...services.consumption_rollups import meter_consumption_totals
+
+    usage = meter_consumption_totals(
+        [
+            unit.electricity_meter_id,
+            unit.water_meter_id,
+            unit.hot_water_meter_id,
+            unit.solar_meter_id,
+        ],
+        month_start,
+        now,
+    )
+    electricity_kwh = usage.get(unit.electricity_meter_id, 0.0)
+    water_kl = usage.get(unit.water_meter_id, 0.0)
+    hot_water_kwh = usage.get(unit.hot_water_meter_id, 0.0)
+    solar_kwh = usage.get(unit.solar_meter_id, 0.0)
 
     # Daily averages per utility (units/day)
     days_in_period = now.day if now.day > 0 else 1
@@ -273,44 +266,18 @@ def wallet_statement_page(unit_id: int):
     projected_balance = float(wallet.balance)
 
     # Get meter readings for consumption display
-    from ...models.meter_reading import MeterReading
-
-    meter_readings = {}
-    if unit.electricity_meter_id:
-        latest = (
-            MeterReading.query.filter_by(meter_id=unit.electricity_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest:
-            meter_readings["electricity"] = latest
-
-    if unit.water_meter_id:
-        latest = (
-            MeterReading.query.filter_by(meter_id=unit.water_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest:
-            meter_readings["water"] = latest
-
-    if unit.hot_water_meter_id:
-        latest = (
-            MeterReading.query.filter_by(meter_id=unit.hot_water_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest:
-            meter_readings["hot_water"] = latest
-
-    if unit.solar_meter_id:
-        latest = (
-            MeterReading.query.filter_by(meter_id=unit.solar_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest:
-            meter_readings["solar"] = latest
+    meter_ids = {
+        "electricity": unit.electricity_meter_id,
+        "water": unit.water_meter_id,
+        "hot_water": unit.hot_water_meter_id,
+        "solar": unit.solar_meter_id,
+    }
+    latest = get_latest_many(meter_ids.values())
+    meter_readings = {
+        utility: latest[meter_id]
+        for utility, meter_id in meter_ids.items()
+        if meter_id in latest
+    }
 
     # Calculate balance history for trend chart (last 10 days)
     from datetime import timedelta
@@ -488,11 +455,7 @@ def unit_visual_page(unit_id: int):
             return None
 
         # Latest reading
-        latest_reading = (
-            MeterReading.query.filter_by(meter_id=meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
+        latest_reading = get_latest(meter_id)
 
         # Total usage/generation (sum of all consumption_since_last)
         total_usage = (
@@ -621,29 +584,23 @@ def wallet_statement_pdf(unit_id: int):
     now = datetime.now()
     month_start = datetime(now.year, now.month, 1)
 
-    # Sum usage from meter readings
-    from ...models.meter_reading import MeterReading
-    from ...db import db
-    from sqlalchemy import func
-
-    def sum_month_usage_for_meter(meter_id: int) -> float:
-        if not meter_id:
-            return 0.0
-        total = (
-            db.session.query(func.sum(MeterReading.consumption_since_last))
-            .filter_by(meter_id=meter_id)
-            .filter(
-                MeterReading.reading_date >= month_start,
-                MeterReading.reading_date <= now,
-            )
-            .scalar()
-        ) or 0.0
-        return float(total)
-
-    electricity_kwh = sum_month_usage_for_meter(unit.electricity_meter_id)
-    water_kl = sum_month_usage_for_meter(unit.water_meter_id)
-    hot_water_kwh = sum_month_usage_for_meter(unit.hot_water_meter_id)
-    solar_kwh = sum_month_usage_for_meter(unit.solar_meter_id)
+    # Sum usage from the consumption rollups
+    from ...services.consumption_rollups import meter_consumption_totals
+
+    usage = meter_consumption_totals(
+        [
+            unit.electricity_meter_id,
+            unit.water_meter_id,
+            unit.hot_water_meter_id,
+            unit.solar_meter_id,
+        ],
+        month_start,
+        now,
+    )
+    electricity_kwh = usage.get(unit.electricity_meter_id, 0.0)
+    water_kl = usage.get(unit.water_meter_id, 0.0)
+    hot_water_kwh = usage.get(unit.hot_water_meter_id, 0.0)
+    solar_kwh = usage.get(unit.solar_meter_id, 0.0)
 
     # Gather this month's transactions
     month_txns = (
@@ -798,8 +755,6 @@ def unit_details_page(unit_id: int):
         )
 
     # Get latest meter readings for all 4 meters
-    meter_readings = {}
-    from ...models.meter_reading import MeterReading
     from ...models.meter import Meter
 
     # Get actual Meter objects for status information
@@ -813,41 +768,18 @@ def unit_details_page(unit_id: int):
     if unit.solar_meter_id:
         meters["solar"] = Meter.query.get(unit.solar_meter_id)
 
-    if unit.electricity_meter_id:
-        latest_electricity = (
-            MeterReading.query.filter_by(meter_id=unit.electricity_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest_electricity:
-            meter_readings["electricity"] = latest_electricity
-
-    if unit.water_meter_id:
-        latest_water = (
-            MeterReading.query.filter_by(meter_id=unit.water_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest_water:
-            meter_readings["water"] = latest_water
-
-    if unit.hot_water_meter_id:
-        latest_hot_water = (
-            MeterReading.query.filter_by(meter_id=unit.hot_water_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest_hot_water:
-            meter_readings["hot_water"] = latest_hot_water
-
-    if unit.solar_meter_id:
-        latest_solar = (
-            MeterReading.query.filter_by(meter_id=unit.solar_meter_id)
-            .order_by(MeterReading.reading_date.desc())
-            .first()
-        )
-        if latest_solar:
-            meter_readings["solar"] = latest_solar
+    meter_ids = {
+        "electricity": unit.electricity_meter_id,
+        "water": unit.water_meter_id,
+        "hot_water": unit.hot_water_meter_id,
+        "solar": unit.solar_meter_id,
+    }
+    latest = get_latest_many(meter_ids.values())
+    meter_readings = {
+        utility: latest[meter_id]
+        for utility, meter_id in meter_ids.items()
+        if meter_id in latest
+    }
 
     # Get all persons for dropdown
     persons = [
@@ -0,0 +1,354 @@
+"""
+ChirpStack uplink ingestion.
+
+Uplink events received by the ChirpStack HTTP integration webhook are parsed
+into MeterReading rows and held in an in-process buffer. Raw frames are
+decoded per device type by app.utils.payload_decoders at flush time. The buffer is
+flushed to the database as one multi-row INSERT whenever it reaches
+CHIRPSTACK_INGEST_BATCH_SIZE rows, or CHIRPSTACK_INGEST_FLUSH_MS after the
+first buffered row, whichever comes first.
+
+Each gunicorn worker owns its own buffer. Rows still buffered when a worker
+dies are lost; ChirpStack does not redeliver HTTP integration events it got
+a 200 for, so the flush interval bounds the amount of telemetry at risk.
+
+When the database write fails (pool timeout, deadlock, failover) the rows
+go back into the buffer and the next flush waits for an exponential
+backoff. The buffer holds at most CHIRPSTACK_INGEST_MAX_PENDING rows: once
+it is full, and whenever a request's own flush fails, the request is
+answered 503 (IngestUnavailable) without keeping its rows, so ChirpStack
+sends it again.
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import binascii
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..db import db
+from ..models import Meter
+from ..utils.payload_decoders import decode_batch, get_decoder
+from .meter_readings import BULK_INSERT_COLUMNS, bulk_insert_readings
+
+logger = logging.getLogger(__name__)
+
+
+# Keys emitted by ChirpStack codecs that map onto MeterReading columns under
+# a different name. Keys that already match a column name are copied as-is.
+OBJECT_FIELD_ALIASES = {
+    "battery": "battery_level",
+    "pulse": "pulse_count",
+    "pulses": "pulse_count",
+    "value": "reading_value",
+    "reading": "reading_value",
+}
+
+# How long a device EUI -> meter resolution is trusted before re-querying.
+METER_CACHE_TTL_SECONDS = 300
+
+# Wait before retrying a failed database write, doubled per consecutive failure.
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_BACKOFF_MAX_SECONDS = 30.0
+
+# (meter_id, lorawan_device_type, pulse_factor)
+MeterInfo = Tuple[int, Optional[str], Optional[float]]
+
+
+class IngestUnavailable(Exception):
+    """The database cannot take uplinks right now; the sender should retry."""
+
+
+def _parse_event_time(value: Optional[str]) -> datetime:
+    """Parse a ChirpStack RFC3339 timestamp into a naive UTC datetime."""
+    if not value:
+        return datetime.utcnow()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.utcnow()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_uplink(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a ChirpStack v4 uplink event into a buffered reading row.
+
+    The row carries ``dev_eui`` and ``fport`` alongside MeterReading column
+    values; the meter id is resolved in bulk when the buffer is flushed.
+
+    Returns:
+        Row dict, or None if the event has no device EUI
+    """
+    device_info = event.get("deviceInfo") or {}
+    dev_eui = (device_info.get("devEui") or event.get("devEUI") or "").lower()
+    if not dev_eui:
+        return None
+
+    raw_payload = None
+    if event.get("data"):
+        try:
+            raw_payload = base64.b64decode(event["data"]).hex()
+        except (binascii.Error, ValueError):
+            raw_payload = None
+
+    row: Dict[str, Any] = {
+        "dev_eui": dev_eui,
+        "fport": event.get("fPort"),
+        "reading_date": _parse_event_time(event.get("time")),
+        "raw_payload": raw_payload,
+    }
+
+    # Strongest gateway wins for signal metrics
+    rx_info = [rx for rx in (event.get("rxInfo") or []) if rx.get("rssi") is not None]
+    if rx_info:
+        best = max(rx_info, key=lambda rx: rx["rssi"])
+        row["rssi"] = best.get("rssi")
+        row["snr"] = best.get("snr")
+
+    # Values already decoded by the ChirpStack device-profile codec
+    decoded = event.get("object") or {}
+    for key, value in decoded.items():
+        column = OBJECT_FIELD_ALIASES.get(key, key)
+        if column in BULK_INSERT_COLUMNS and column != "meter_id" and value is not None:
+            row[column] = value
+
+    return row
+
+
+class UplinkBuffer:
+    """Thread-safe buffer that batches uplink rows into multi-row INSERTs."""
+
+    def __init__(self, max_rows: int = 500, max_age_ms: int = 1000, max_pending: int = 10000):
+        self.max_rows = max_rows
+        self.max_age_ms = max_age_ms
+        self.max_pending = max_pending
+        self._rows: List[Dict[str, Any]] = []
+        self._first_row_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._app = None
+        self._timer: Optional[threading.Thread] = None
+        self._meter_cache: Dict[str, MeterInfo] = {}
+        self._meter_cache_loaded_at = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self.stats = {
+            "received": 0,
+            "inserted": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "db_errors": 0,
+            "rejected": 0,
+        }
+
+    def init_app(self, app) -> None:
+        """Bind the buffer to an app; the flush thread starts with the first uplink."""
+        self._app = app
+        self.max_rows = app.config.get("CHIRPSTACK_INGEST_BATCH_SIZE", self.max_rows)
+        self.max_age_ms = app.config.get("CHIRPSTACK_INGEST_FLUSH_MS", self.max_age_ms)
+        self.max_pending = app.config.get("CHIRPSTACK_INGEST_MAX_PENDING", self.max_pending)
+
+    def _ensure_timer(self) -> None:
+        if self._timer is not None or self._app is None or self.max_age_ms <= 0:
+            return
+        self._timer = threading.Thread(
+            target=self._run_timer, name="chirpstack-uplink-flush", daemon=True
+        )
+        self._timer.start()
+        atexit.register(self._flush_in_app)
+
+    def _run_timer(self) -> None:
+        interval = self.max_age_ms / 1000.0
+        while True:
+            time.sleep(interval / 2)
+            if self._is_due():
+                self._flush_in_app()
+
+    def _flush_in_app(self) -> None:
+        try:
+            with self._app.app_context():
+                self.flush()
+        except IngestUnavailable:
+            pass  # already logged; the rows wait for the next attempt
+        except Exception as e:
+            logger.error("Background uplink flush failed: %s", e)
+
+    def _is_due(self) -> bool:
+        with self._lock:
+            if not self._rows or time.monotonic() < self._retry_at:
+                return False
+            if len(self._rows) >= self.max_rows:
+                return True
+            age_ms = (time.monotonic() - self._first_row_at) * 1000
+            return age_ms >= self.max_age_ms
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def add(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Queue rows for insertion.
+
+        Returns:
+            True if the buffer is due for a flush
+
+        Raises:
+            IngestUnavailable: the buffer is full of rows waiting for the
+                database; none of ``rows`` were queued
+        """
+        if not rows:
+            return False
+        self._ensure_timer()
+        with self._lock:
+            if len(self._rows) + len(rows) > self.max_pending:
+                self.stats["rejected"] += len(rows)
+                raise IngestUnavailable(f"{len(self._rows)} uplinks already waiting")
+            if not self._rows:
+                self._first_row_at = time.monotonic()
+            self._rows.extend(rows)
+            self.stats["received"] += len(rows)
+        return self._is_due()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._first_row_at = None
+        return rows
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Put rows from a failed write back in front of newer ones and back off."""
+        with self._lock:
+            self._rows = rows + self._rows
+            if self._rows:
+                self._first_row_at = time.monotonic()
+            self._failures += 1
+            backoff = RETRY_BACKOFF_SECONDS * 2 ** (self._failures - 1)
+            self._retry_at = time.monotonic() + min(backoff, RETRY_BACKOFF_MAX_SECONDS)
+
+    def _resolve_meters(self, dev_euis: List[str]) -> Dict[str, MeterInfo]:
+        """Map device EUIs to (meter_id, lorawan_device_type, pulse_factor) with one query for misses."""
+        now = time.monotonic()
+        if now - self._meter_cache_loaded_at > METER_CACHE_TTL_SECONDS:
+            self._meter_cache = {}
+            self._meter_cache_loaded_at = now
+
+        missing = [eui for eui in set(dev_euis) if eui not in self._meter_cache]
+        if missing:
+            found = (
+                db.session.query(
+                    Meter.device_eui,
+                    Meter.id,
+                    Meter.lorawan_device_type,
+                    Meter.pulse_factor,
+                )
+                .filter(Meter.device_eui.in_(missing))
+                .all()
+            )
+            for device_eui, meter_id, device_type, pulse_factor in found:
+                self._meter_cache[device_eui.lower()] = (
+                    meter_id,
+                    device_type,
+                    float(pulse_factor) if pulse_factor is not None else None,
+                )
+
+        return {eui: self._meter_cache[eui] for eui in dev_euis if eui in self._meter_cache}
+
+    @staticmethod
+    def _decode_rows(rows: List[Dict[str, Any]], meters: Dict[str, MeterInfo]) -> None:
+        """Fill in columns from raw payloads, one decode_batch() per device type.
+
+        Values already supplied by the ChirpStack codec are kept.
+        """
+        by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            meter = meters.get(row["dev_eui"])
+            if meter and row.get("raw_payload") and get_decoder(meter[1]):
+                by_type[meter[1]].append(row)
+
+        for device_type, typed_rows in by_type.items():
+            decoded = decode_batch(
+                device_type,
+                [row["raw_payload"] for row in typed_rows],
+                [meters[row["dev_eui"]][2] for row in typed_rows],
+            )
+            for row, values in zip(typed_rows, decoded):
+                for column, value in values.items():
+                    row.setdefault(column, value)
+
+    def flush(self, hold_back: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Write all buffered rows with one bulk INSERT.
+
+        Rows for unknown devices or without a reading value are dropped.
+        If the database write fails, the rows are put back for a retry after
+        a backoff, except ``hold_back`` (the calling request's own rows),
+        which the caller answers with a 503 instead.
+
+        Returns:
+            Number of readings inserted
+
+        Raises:
+            IngestUnavailable: the database write failed
+        """
+        with self._flush_lock:
+            rows = self._take()
+            if not rows:
+                return 0
+
+            try:
+                meters = self._resolve_meters([row["dev_eui"] for row in rows])
+                self._decode_rows(rows, meters)
+                ready = []
+                for row in rows:
+                    meter = meters.get(row["dev_eui"])
+                    if meter is None or row.get("reading_value") is None:
+                        continue
+                    row["meter_id"] = meter[0]
+                    ready.append(row)
+                inserted = bulk_insert_readings(ready)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                held = {id(row) for row in hold_back or ()}
+                retry = [row for row in rows if id(row) not in held]
+                self._requeue(retry)
+                self.stats["db_errors"] += 1
+                self.stats["flushes"] += 1
+                logger.error(
+                    "Database write of %d uplinks failed, %d kept for retry: %s",
+                    len(rows),
+                    len(retry),
+                    e,
+                )
+                raise IngestUnavailable(str(e)) from e
+            except Exception:
+                # Not a database outage: retrying the same rows would fail again
+                logger.exception("Dropping %d uplinks after an unexpected ingest error", len(rows))
+                self.stats["dropped"] += len(rows)
+                self.stats["flushes"] += 1
+                return 0
+
+            with self._lock:
+                self._failures = 0
+                self._retry_at = 0.0
+            dropped = len(rows) - len(ready)
+            self.stats["inserted"] += inserted
+            self.stats["dropped"] += dropped
+            self.stats["flushes"] += 1
+            if dropped:
+                logger.warning("Dropped %d uplinks (unknown device or no value)", dropped)
+            return inserted
+
+
+# Per-process buffer shared by all requests handled by this worker
+uplink_buffer = UplinkBuffer()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, case, select, update
+
+from app.db import db
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.utils.payload_decoders import register_max
+
+
+# consumption_since_last is the difference between a reading and the
+# meter's previous reading. Cumulative registers can go backwards:
+#
+# - rollover: the register wrapped past its maximum. Detected when the
+#   previous value was within ROLLOVER_MARGIN of the device's register_max;
+#   the delta continues through zero.
+# - reset: the counter was cleared or the meter replaced. Detected when the
+#   new value is below RESET_RATIO of the previous one; everything counted
+#   since the reset (the new value) is the consumption.
+# - anything else (a small step backwards, e.g. an estimate corrected by a
+#   real reading) is treated as zero consumption.
+ROLLOVER_MARGIN = 0.1
+RESET_RATIO = 0.5
+
+
+def reading_delta(
+    previous: Optional[float], current: float, register_max: Optional[float] = None
+) -> Optional[float]:
+    """Consumption between two consecutive cumulative readings."""
+    if previous is None:
+        return None
+    delta = current - previous
+    if delta >= 0:
+        return round(delta, 3)
+    if register_max and previous >= register_max * (1 - ROLLOVER_MARGIN):
+        return round(register_max - previous + current, 3)
+    if current <= previous * RESET_RATIO:
+        return round(current, 3)
+    return 0.0
+
+
+def compute_deltas(
+    values: Sequence[float],
+    previous: Optional[float] = None,
+    register_max: Optional[float] = None,
+) -> List[Optional[float]]:
+    """Pairwise deltas over one meter's readings, sorted by reading_date.
+
+    ``previous`` is the stored reading immediately before ``values[0]``;
+    without it the first delta is None.
+    """
+    deltas: List[Optional[float]] = []
+    append = deltas.append
+    for value in values:
+        append(reading_delta(previous, value, register_max))
+        previous = value
+    return deltas
+
+
+def _meter_context(conn, cutoffs: Dict[int, datetime]) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+    """Previous reading value and register_max for each meter, in one query.
+
+    ``cutoffs`` maps meter_id to the earliest reading_date in the batch; the
+    previous reading is the latest stored reading strictly before it.
+    """
+    readings = MeterReading.__table__
+    before = case(cutoffs, value=Meter.id)
+    previous_value = (
+        select(readings.c.reading_value)
+        .where(readings.c.meter_id == Meter.id, readings.c.reading_date < before)
+        .order_by(readings.c.reading_date.desc())
+        .limit(1)
+        .correlate(Meter.__table__)
+        .scalar_subquery()
+    )
+    rows = conn.execute(
+        select(Meter.id, Meter.lorawan_device_type, Meter.pulse_factor, previous_value)
+        .where(Meter.id.in_(list(cutoffs)))
+    )
+    context = {}
+    for meter_id, device_type, pulse_factor, value in rows:
+        factor = float(pulse_factor) if pulse_factor is not None else None
+        context[meter_id] = (
+            float(value) if value is not None else None,
+            register_max(device_type, factor),
+        )
+    return context
+
+
+def fill_consumption(conn, rows: List[Dict[str, Any]]) -> None:
+    """Set consumption_since_last on a batch of new readings, in place.
+
+    Rows that already carry a value are left alone. Each meter's rows are
+    ordered by reading_date and diffed against each other and against the
+    meter's latest stored reading, which is fetched for every meter in the
+    batch with a single query. Readings that arrive older than the meter's
+    latest stored reading are diffed against their true predecessor, but
+    the stored reading after them is not revisited; use
+    recalculate_consumption() to repair such windows.
+    """
+    by_meter: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        if row.get("consumption_since_last") is None and row.get("reading_value") is not None:
+            by_meter[row["meter_id"]].append(row)
+    if not by_meter:
+        return
+
+    for meter_rows in by_meter.values():
+        meter_rows.sort(key=lambda row: row["reading_date"])
+    context = _meter_context(
+        conn, {meter_id: meter_rows[0]["reading_date"] for meter_id, meter_rows in by_meter.items()}
+    )
+
+    for meter_id, meter_rows in by_meter.items():
+        previous, limit = context.get(meter_id, (None, None))
+        deltas = compute_deltas([float(row["reading_value"]) for row in meter_rows], previous, limit)
+        for row, delta in zip(meter_rows, deltas):
+            row["consumption_since_last"] = delta
+
+
+def recalculate_consumption(
+    meter_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = 10000,
+) -> int:
+    """Recompute consumption_since_last for one meter's stored readings.
+
+    Walks the meter's readings in (reading_date, id) order, ``chunk_size``
+    plain tuples at a time, carrying the previous value across chunks. Only
+    rows whose value changes are written, with one executemany UPDATE per
+    chunk keyed on (id, reading_date) so each statement prunes to a single
+    partition. Each chunk is committed; reruns are idempotent.
+
+    Returns:
+        Number of readings updated
+    """
+    meter = db.session.get(Meter, meter_id)
+    if meter is None:
+        return 0
+    limit = register_max(
+        meter.lorawan_device_type,
+        float(meter.pulse_factor) if meter.pulse_factor is not None else None,
+    )
+
+    readings = MeterReading.__table__
+    previous = None
+    if start:
+        previous = db.session.execute(
+            select(readings.c.reading_value)
+            .where(readings.c.meter_id == meter_id, readings.c.reading_date < start)
+            .order_by(readings.c.reading_date.desc())
+            .limit(1)
+        ).scalar()
+        previous = float(previous) if previous is not None else None
+
+    base = select(
+        readings.c.id,
+        readings.c.reading_date,
+        readings.c.reading_value,
+        readings.c.consumption_since_last,
+    ).where(readings.c.meter_id == meter_id)
+    if start:
+        base = base.where(readings.c.reading_date >= start)
+    if end:
+        base = base.where(readings.c.reading_date <= end)
+    base = base.order_by(readings.c.reading_date, readings.c.id).limit(chunk_size)
+
+    stmt = (
+        update(readings)
+        .where(
+            readings.c.id == bindparam("b_id"),
+            readings.c.reading_date == bindparam("b_date"),
+        )
+        .values(consumption_since_last=bindparam("b_delta"))
+    )
+
+    updated = 0
+    last_key = None
+    while True:
+        query = base
+        if last_key is not None:
+            last_date, last_id = last_key
+            query = query.where(
+                (readings.c.reading_date > last_date)
+                | and_(readings.c.reading_date == last_date, readings.c.id > last_id)
+            )
+        chunk = db.session.execute(query).all()
+        if not chunk:
+            break
+        last_key = (chunk[-1][1], chunk[-1][0])
+
+        deltas = compute_deltas([float(row[2]) for row in chunk], previous, limit)
+        previous = float(chunk[-1][2])
+        params = [
+            {"b_id": reading_id, "b_date": reading_date, "b_delta": delta}
+            for (reading_id, reading_date, _, stored), delta in zip(chunk, deltas)
+            if (float(stored) if stored is not None else None) != delta
+        ]
+        if params:
+            db.session.execute(stmt, params)
+            updated += len(params)
+        db.session.commit()
+
+    return updated
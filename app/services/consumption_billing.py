@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import bindparam, false, func, insert, literal, select, union_all, update
+
+from app.db import db
+from app.models.estate import Estate
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.models.transaction import Transaction
+from app.models.unit import Unit
+from app.models.wallet import Wallet
+from app.utils.rate_cache import default_rate_entry, rate_entry
+from app.utils.report_cache import invalidate_for_wallets
+from app.utils.rates import CompiledTariff, TimeOfUseTariff, apply_markup
+
+logger = logging.getLogger(__name__)
+
+
+# Batch consumption billing.
+#
+# Each batch claims up to ``batch_size`` unbilled readings with
+# ``FOR UPDATE SKIP LOCKED``, so any number of workers can run side by side
+# without billing a reading twice. The batch is priced per unit and utility,
+# written as one consumption Transaction per wallet per utility, debited from
+# the wallets with one UPDATE statement and marked billed in bulk, all in a
+# single database transaction. Rate tables with time-of-use periods are
+# priced per reading, by the period its reading date falls in.
+#
+# Only readings of meters assigned to a unit with a wallet are claimed;
+# bulk meters and unassigned meters stay unbilled, and so do readings dated
+# before BILLING_START_DATE.
+
+# Unit meter slot -> (wallet balance column, rate utility)
+UTILITIES: Dict[str, Tuple[str, str]] = {
+    "electricity": ("electricity_balance", "electricity"),
+    "water": ("water_balance", "water"),
+    "solar": ("solar_balance", "solar"),
+    "hot_water": ("hot_water_balance", "water"),
+}
+
+UNIT_LABELS = {"electricity": "kWh", "water": "kL", "solar": "kWh", "hot_water": "kL"}
+
+CONSUMPTION_TYPES = tuple(f"consumption_{utility}" for utility in UTILITIES)
+
+
+def _meter_slots():
+    return (
+        ("electricity", Unit.electricity_meter_id),
+        ("water", Unit.water_meter_id),
+        ("solar", Unit.solar_meter_id),
+        ("hot_water", Unit.hot_water_meter_id),
+    )
+
+
+def _billable_meters():
+    """Meter ids assigned to a unit that has a wallet."""
+    return union_all(
+        *(
+            select(column)
+            .select_from(Unit)
+            .join(Wallet, Wallet.unit_id == Unit.id)
+            .where(column.isnot(None))
+            for _, column in _meter_slots()
+        )
+    )
+
+
+def _billing_start() -> Optional[datetime]:
+    """BILLING_START_DATE as a datetime, or None to bill every unbilled reading."""
+    start = current_app.config.get("BILLING_START_DATE")
+    if not start:
+        return None
+    if isinstance(start, str):
+        return datetime.fromisoformat(start)
+    if not isinstance(start, datetime):
+        start = datetime.combine(start, datetime.min.time())
+    return start
+
+
+def _meter_accounts(meter_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Wallet, utility, rate table and markup for each meter, in one query."""
+    parts = []
+    for utility, column in _meter_slots():
+        water = utility in ("water", "hot_water")
+        if utility == "solar":
+            rate_table_id = literal(None)
+            markup = literal(None)
+        elif water:
+            rate_table_id = func.coalesce(Unit.water_rate_table_id, Estate.water_rate_table_id)
+            markup = Estate.water_markup_percentage
+        else:
+            rate_table_id = func.coalesce(
+                Unit.electricity_rate_table_id, Estate.electricity_rate_table_id
+            )
+            markup = Estate.electricity_markup_percentage
+        parts.append(
+            select(
+                column.label("meter_id"),
+                literal(utility).label("utility"),
+                Wallet.id.label("wallet_id"),
+                rate_table_id.label("rate_table_id"),
+                markup.label("markup"),
+                Meter.serial_number.label("serial_number"),
+            )
+            .select_from(Unit)
+            .join(Wallet, Wallet.unit_id == Unit.id)
+            .join(Estate, Estate.id == Unit.estate_id)
+            .join(Meter, Meter.id == column)
+            .where(column.in_(meter_ids))
+        )
+
+    accounts: Dict[int, Dict[str, Any]] = {}
+    for row in db.session.execute(union_all(*parts)).mappings():
+        accounts.setdefault(row["meter_id"], dict(row))
+    return accounts
+
+
+def _tariffs(accounts: Dict[int, Dict[str, Any]]) -> Dict[Any, Any]:
+    """Tariffs keyed by rate table id, plus a default per utility.
+
+    Rate tables with time-of-use periods get a TimeOfUseTariff, everything
+    else a CompiledTariff. Both come from the process-local rate cache.
+    """
+    tariffs: Dict[Any, Any] = {}
+    for account in accounts.values():
+        table_id = account["rate_table_id"]
+        if table_id and table_id not in tariffs:
+            entry = rate_entry(table_id)
+            if entry and entry.time_of_use:
+                tariffs[table_id] = entry.time_of_use
+            elif entry and entry.structure:
+                tariffs[table_id] = entry.tariff
+        rate_utility = UTILITIES[account["utility"]][1]
+        if rate_utility not in tariffs:
+            tariffs[rate_utility] = default_rate_entry(rate_utility).tariff
+    return tariffs
+
+
+def _month_to_date(wallet_ids: List[int], now: datetime) -> Dict[Tuple[int, str], float]:
+    """Consumption already billed this month per (wallet, utility).
+
+    Tiered structures are cumulative over the month, so each batch is
+    priced as the marginal cost on top of what has been billed so far.
+    """
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    rows = db.session.execute(
+        select(
+            Transaction.wallet_id,
+            Transaction.transaction_type,
+            func.sum(Transaction.consumption_kwh),
+        )
+        .where(
+            Transaction.wallet_id.in_(wallet_ids),
+            Transaction.transaction_type.in_(CONSUMPTION_TYPES),
+            Transaction.status == "completed",
+            Transaction.completed_at >= month_start,
+        )
+        .group_by(Transaction.wallet_id, Transaction.transaction_type)
+    )
+    return {
+        (wallet_id, txn_type[len("consumption_"):]): float(total or 0)
+        for wallet_id, txn_type, total in rows
+    }
+
+
+def price_consumption(
+    quantity: float,
+    tariff: CompiledTariff,
+    markup_percent: Optional[float] = None,
+    already_billed: float = 0.0,
+) -> float:
+    """Charge for ``quantity`` on top of ``already_billed`` this period."""
+    if quantity <= 0:
+        return 0.0
+    base = tariff.price(already_billed + quantity) - tariff.price(already_billed)
+    return apply_markup(round(base, 2), float(markup_percent) if markup_percent else None)
+
+
+def bill_batch(batch_size: int = 5000) -> Dict[str, Any]:
+    """Claim and bill one batch of unbilled readings.
+
+    A claimed reading whose meter lost its wallet after the claim is logged
+    and left unbilled rather than failing the batch.
+
+    Returns:
+        Dict with the number of readings billed, transactions written and
+        total amount charged. ``readings`` is 0 when nothing was left.
+    """
+    readings = MeterReading.__table__
+    unbilled = [readings.c.is_billed == false(), readings.c.meter_id.in_(_billable_meters())]
+    start = _billing_start()
+    if start is not None:
+        unbilled.append(readings.c.reading_date >= start)
+    claimed = db.session.execute(
+        select(
+            readings.c.id,
+            readings.c.reading_date,
+            readings.c.meter_id,
+            readings.c.consumption_since_last,
+        )
+        .where(*unbilled)
+        .order_by(readings.c.meter_id, readings.c.reading_date)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True, of=readings)
+    ).all()
+    if not claimed:
+        db.session.rollback()
+        return {"readings": 0, "transactions": 0, "amount": 0.0}
+
+    accounts = _meter_accounts(sorted({row.meter_id for row in claimed}))
+
+    # (wallet_id, utility) -> consumption, meter ids, reading keys
+    groups: Dict[Tuple[int, str], Dict[str, Any]] = defaultdict(
+        lambda: {"consumption": 0.0, "meters": set(), "keys": [], "intervals": []}
+    )
+    unassigned = set()
+    billed = 0
+    for reading_id, reading_date, meter_id, consumption in claimed:
+        account = accounts.get(meter_id)
+        if account is None:
+            # Unassigned since the claim: leave the reading for a later run
+            unassigned.add(meter_id)
+            continue
+        billed += 1
+        group = groups[(account["wallet_id"], account["utility"])]
+        quantity = max(float(consumption or 0), 0.0)
+        group["consumption"] += quantity
+        group["intervals"].append((reading_date, quantity))
+        group["meters"].add(meter_id)
+        group["keys"].append((reading_id, reading_date))
+    if unassigned:
+        logger.warning(
+            "Skipped %s readings from meters with no wallet: %s",
+            len(claimed) - billed,
+            sorted(unassigned),
+        )
+    if not groups:
+        db.session.rollback()
+        return {"readings": 0, "transactions": 0, "amount": 0.0}
+
+    wallet_ids = sorted({wallet_id for wallet_id, _ in groups})
+    # Lock wallets in id order so concurrent batches queue instead of deadlocking
+    balances = {
+        row.id: row
+        for row in db.session.execute(
+            select(
+                Wallet.id,
+                Wallet.electricity_balance,
+                Wallet.water_balance,
+                Wallet.solar_balance,
+                Wallet.hot_water_balance,
+            )
+            .where(Wallet.id.in_(wallet_ids))
+            .order_by(Wallet.id)
+            .with_for_update()
+        )
+    }
+
+    now = datetime.utcnow()
+    billed_so_far = _month_to_date(wallet_ids, now)
+    tariffs = _tariffs(accounts)
+    token = uuid.uuid4().hex[:6].upper()
+
+    txn_rows = []
+    txn_groups = []
+    debits: Dict[int, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(UTILITIES, 0.0))
+    for (wallet_id, utility), group in sorted(groups.items()):
+        quantity = round(group["consumption"], 3)
+        if quantity <= 0:
+            continue
+        account = accounts[next(iter(group["meters"]))]
+        balance_column, rate_utility = UTILITIES[utility]
+        tariff = tariffs.get(account["rate_table_id"]) or tariffs[rate_utility]
+        if isinstance(tariff, TimeOfUseTariff):
+            base = tariff.price_intervals(group["intervals"])["amount"]
+            amount = apply_markup(base, float(account["markup"]) if account["markup"] else None)
+        else:
+            amount = price_consumption(
+                quantity,
+                tariff,
+                account["markup"],
+                billed_so_far.get((wallet_id, utility), 0.0),
+            )
+        balance_before = float(getattr(balances[wallet_id], balance_column) or 0)
+        rate = round(amount / quantity, 4)
+        label = UNIT_LABELS[utility]
+        single_meter = len(group["meters"]) == 1
+
+        debits[wallet_id][utility] = amount
+        txn_groups.append(group)
+        txn_rows.append(
+            {
+                "transaction_number": f"CON{now:%Y%m%d%H%M%S}{token}{wallet_id}{utility[0].upper()}",
+                "wallet_id": wallet_id,
+                "transaction_type": f"consumption_{utility}",
+                "amount": amount,
+                "balance_before": balance_before,
+                "balance_after": round(balance_before - amount, 2),
+                "reference": f"Meter: {account['serial_number']}" if single_meter else None,
+                "description": f"Consumption: {quantity:.3f} {label} @ R{rate:.4f}/{label}",
+                "payment_method": "system",
+                "status": "completed",
+                "initiated_at": now,
+                "completed_at": now,
+                "meter_id": account["meter_id"] if single_meter else None,
+                "consumption_kwh": quantity,
+                "rate_applied": rate,
+                "created_at": now,
+            }
+        )
+
+    if txn_rows:
+        txn_table = Transaction.__table__
+        txn_ids = db.session.execute(
+            insert(txn_table).returning(txn_table.c.id, sort_by_parameter_order=True),
+            txn_rows,
+        ).scalars().all()
+        for group, txn_id in zip(txn_groups, txn_ids):
+            group["transaction_id"] = txn_id
+
+        wallets = Wallet.__table__
+        db.session.execute(
+            update(wallets)
+            .where(wallets.c.id == bindparam("b_wallet"))
+            .values(
+                balance=wallets.c.balance - bindparam("b_total"),
+                updated_at=now,
+                **{
+                    column: wallets.c[column] - bindparam(f"b_{utility}")
+                    for utility, (column, _) in UTILITIES.items()
+                },
+            ),
+            [
+                {
+                    "b_wallet": wallet_id,
+                    "b_total": round(sum(amounts.values()), 2),
+                    **{f"b_{utility}": amount for utility, amount in amounts.items()},
+                }
+                for wallet_id, amounts in sorted(debits.items())
+            ],
+        )
+
+    for group in groups.values():
+        keys = group["keys"]
+        db.session.execute(
+            update(readings)
+            .where(
+                readings.c.id.in_([reading_id for reading_id, _ in keys]),
+                readings.c.reading_date.between(
+                    min(date for _, date in keys), max(date for _, date in keys)
+                ),
+            )
+            .values(is_billed=True, billed_at=now, transaction_id=group.get("transaction_id"))
+        )
+
+    db.session.commit()
+    invalidate_for_wallets(list(debits))
+    return {
+        "readings": billed,
+        "transactions": len(txn_rows),
+        "amount": round(sum(row["amount"] for row in txn_rows), 2),
+    }
+
+
+def bill_unbilled_readings(
+    batch_size: int = 5000,
+    max_batches: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Bill batches until nothing is left, or a batch/time budget runs out.
+
+    Each batch commits on its own, so an interrupted run loses at most the
+    batch in flight and a rerun picks up where it stopped.
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    totals = {"batches": 0, "readings": 0, "transactions": 0, "amount": 0.0}
+    while max_batches is None or totals["batches"] < max_batches:
+        try:
+            result = bill_batch(batch_size)
+        except Exception:
+            db.session.rollback()
+            raise
+        if not result["readings"]:
+            break
+        totals["batches"] += 1
+        totals["readings"] += result["readings"]
+        totals["transactions"] += result["transactions"]
+        totals["amount"] = round(totals["amount"] + result["amount"], 2)
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    return totals
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import Date, case, cast, delete, func, insert, literal, select, union_all
+
+from app.db import db
+from app.models.estate import Estate
+from app.models.meter_consumption_daily import MeterConsumptionDaily
+from app.models.meter_consumption_hourly import MeterConsumptionHourly
+from app.models.meter_reading import MeterReading
+from app.models.unit import Unit
+from app.services.latest_telemetry import clear_cache, refresh_last_readings
+
+
+# Hourly and daily rollups of meter_readings.consumption_since_last.
+#
+# Ingest adds each batch of new readings to both tables with an upsert in
+# the same transaction as the insert (apply_readings). Read paths sum the
+# rollups instead of raw readings: whole days come from the daily table
+# and the partial first/last day from the hourly table, so a month for
+# one meter is ~30 rows instead of ~3,000. Range bounds are therefore
+# resolved to whole hours.
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+DateLike = Union[date, datetime]
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil_hour(value: datetime) -> datetime:
+    floored = _floor_hour(value)
+    return floored if floored == value else floored + HOUR
+
+
+def resolve_bounds(start: DateLike, end: DateLike) -> Tuple[datetime, datetime]:
+    """Turn a report range into hour-aligned ``[start, end)`` datetimes.
+
+    A plain ``date`` as ``end`` includes that whole day; a ``datetime`` end
+    includes the hour it falls in (so ``now`` covers the current hour and
+    an exclusive midnight bound stays exclusive).
+    """
+    if not isinstance(start, datetime):
+        start = datetime.combine(start, time.min)
+    if not isinstance(end, datetime):
+        end = datetime.combine(end, time.min) + DAY
+    else:
+        end = _ceil_hour(end)
+    return _floor_hour(start), end
+
+
+def consumption_source(start: DateLike, end: DateLike, name: str = "consumption_rollup"):
+    """Subquery of ``(meter_id, consumption)`` rows covering a date range.
+
+    Join it to Meter on ``meter_id`` and ``func.sum(.c.consumption)`` in
+    place of summing MeterReading.consumption_since_last.
+    """
+    start, end = resolve_bounds(start, end)
+    hourly = MeterConsumptionHourly
+    daily = MeterConsumptionDaily
+
+    first_day = start if start.hour == 0 else datetime.combine(start.date(), time.min) + DAY
+    last_day = datetime.combine(end.date(), time.min)
+
+    def hours(lo, hi):
+        return select(hourly.meter_id, hourly.consumption).where(
+            hourly.bucket >= lo, hourly.bucket < hi
+        )
+
+    if first_day >= last_day:
+        parts = [hours(start, end)]
+    else:
+        parts = [
+            select(daily.meter_id, daily.consumption).where(
+                daily.bucket >= first_day.date(), daily.bucket < last_day.date()
+            )
+        ]
+        if start < first_day:
+            parts.append(hours(start, first_day))
+        if last_day < end:
+            parts.append(hours(last_day, end))
+
+    return union_all(*parts).subquery(name)
+
+
+def meter_consumption_totals(
+    meter_ids: Iterable[Optional[int]], start: DateLike, end: DateLike
+) -> Dict[int, float]:
+    """Total consumption per meter over a range, in one query."""
+    ids = [meter_id for meter_id in meter_ids if meter_id]
+    if not ids:
+        return {}
+    src = consumption_source(start, end)
+    rows = (
+        db.session.query(src.c.meter_id, func.sum(src.c.consumption))
+        .filter(src.c.meter_id.in_(ids))
+        .group_by(src.c.meter_id)
+        .all()
+    )
+    totals = {meter_id: 0.0 for meter_id in ids}
+    totals.update({meter_id: float(total or 0) for meter_id, total in rows})
+    return totals
+
+
+def estate_bulk_sub_totals(
+    start: DateLike, end: DateLike, estate_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Bulk, sub-meter and communal totals for every active estate, in one query.
+
+    Each estate's bulk meters and its units' electricity/water meters are
+    tagged with a role, joined to per-meter consumption for the range and
+    summed per role. Communal usage is bulk minus sub-meters.
+    """
+    src = consumption_source(start, end)
+    per_meter = (
+        select(src.c.meter_id, func.sum(src.c.consumption).label("consumption"))
+        .group_by(src.c.meter_id)
+        .subquery("meter_usage")
+    )
+    roles = union_all(
+        select(
+            Estate.id.label("estate_id"),
+            Estate.bulk_electricity_meter_id.label("meter_id"),
+            literal("bulk_electricity").label("role"),
+        ),
+        select(Estate.id, Estate.bulk_water_meter_id, literal("bulk_water")),
+        select(Unit.estate_id, Unit.electricity_meter_id, literal("sub_electricity")),
+        select(Unit.estate_id, Unit.water_meter_id, literal("sub_water")),
+    ).subquery("meter_roles")
+
+    def total(role):
+        return func.coalesce(
+            func.sum(case((roles.c.role == role, per_meter.c.consumption), else_=0)), 0
+        ).label(role)
+
+    query = (
+        select(
+            Estate.id,
+            Estate.name,
+            total("bulk_electricity"),
+            total("sub_electricity"),
+            total("bulk_water"),
+            total("sub_water"),
+        )
+        .outerjoin(roles, roles.c.estate_id == Estate.id)
+        .outerjoin(per_meter, per_meter.c.meter_id == roles.c.meter_id)
+        .where(Estate.is_active == True)
+        .group_by(Estate.id, Estate.name)
+        .order_by(Estate.id)
+    )
+    if estate_id:
+        query = query.where(Estate.id == estate_id)
+
+    totals = []
+    for row in db.session.execute(query):
+        bulk_electricity = float(row.bulk_electricity)
+        sub_electricity = float(row.sub_electricity)
+        bulk_water = float(row.bulk_water)
+        sub_water = float(row.sub_water)
+        totals.append(
+            {
+                "estate_id": row.id,
+                "estate_name": row.name,
+                "bulk_electricity": bulk_electricity,
+                "sub_electricity": sub_electricity,
+                "communal_electricity": bulk_electricity - sub_electricity,
+                "bulk_water": bulk_water,
+                "sub_water": sub_water,
+                "communal_water": bulk_water - sub_water,
+            }
+        )
+    return totals
+
+
+def _upsert_statement(conn, model):
+    """INSERT ... ON CONFLICT DO UPDATE that adds to the existing bucket."""
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    table = model.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.meter_id, table.c.bucket],
+        set_={
+            "consumption": table.c.consumption + stmt.excluded.consumption,
+            "reading_count": table.c.reading_count + stmt.excluded.reading_count,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def apply_readings(conn, rows: List[Dict[str, Any]]) -> None:
+    """Add newly inserted readings to the hourly and daily rollups.
+
+    ``rows`` are the dicts just written to meter_readings. Must run on the
+    same connection/transaction as the insert so the rollups never drift
+    from the raw table. Keys are upserted in sorted order to keep
+    concurrent ingest workers from deadlocking on each other.
+    """
+    if not rows:
+        return
+
+    hourly: Dict[Tuple[int, datetime], List[float]] = defaultdict(lambda: [0.0, 0])
+    daily: Dict[Tuple[int, date], List[float]] = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        consumption = float(row.get("consumption_since_last") or 0)
+        reading_date = row["reading_date"]
+        for key, totals in (
+            ((row["meter_id"], _floor_hour(reading_date)), hourly),
+            ((row["meter_id"], reading_date.date()), daily),
+        ):
+            totals[key][0] += consumption
+            totals[key][1] += 1
+
+    now = datetime.utcnow()
+    for model, totals in ((MeterConsumptionHourly, hourly), (MeterConsumptionDaily, daily)):
+        params = [
+            {
+                "meter_id": meter_id,
+                "bucket": bucket,
+                "consumption": round(consumption, 3),
+                "reading_count": count,
+                "updated_at": now,
+            }
+            for (meter_id, bucket), (consumption, count) in sorted(totals.items())
+        ]
+        conn.execute(_upsert_statement(conn, model), params)
+
+
+def _bucket_expressions(dialect_name: str):
+    """SQL expressions truncating reading_date to the hour and the day."""
+    column = MeterReading.reading_date
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", column), cast(column, Date)
+    # SQLite stores DateTime as text; match SQLAlchemy's storage format so
+    # the rebuilt buckets compare equal to bound datetimes.
+    return func.strftime("%Y-%m-%d %H:00:00.000000", column), func.date(column)
+
+
+def rebuild_rollups(
+    start: date,
+    end: date,
+    meter_id: Optional[int] = None,
+) -> int:
+    """Recompute both rollups from meter_readings for ``[start, end)`` days.
+
+    Works a month at a time: deletes the rollup rows in the window and
+    re-inserts them with one ``INSERT ... SELECT ... GROUP BY`` per table,
+    then commits. Safe to rerun. Run for historical ranges, or with
+    ingestion paused, since readings arriving mid-rebuild for the same
+    window would be counted twice. Afterwards the meters' Meter.last_*
+    columns are reset from their newest reading.
+
+    Returns:
+        Number of daily rollup rows written
+    """
+    hour_expr, day_expr = _bucket_expressions(db.engine.dialect.name)
+    consumption = func.coalesce(func.sum(MeterReading.consumption_since_last), 0)
+    now = datetime.utcnow()
+
+    written = 0
+    chunk_start = start
+    while chunk_start < end:
+        next_month = (chunk_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        chunk_end = min(next_month, end)
+        lo = datetime.combine(chunk_start, time.min)
+        hi = datetime.combine(chunk_end, time.min)
+
+        for model, bucket_expr, bucket_lo, bucket_hi in (
+            (MeterConsumptionHourly, hour_expr, lo, hi),
+            (MeterConsumptionDaily, day_expr, chunk_start, chunk_end),
+        ):
+            purge = delete(model).where(model.bucket >= bucket_lo, model.bucket < bucket_hi)
+            source = (
+                select(
+                    MeterReading.meter_id,
+                    bucket_expr,
+                    consumption,
+                    func.count(MeterReading.id),
+                    literal(now),
+                )
+                .where(MeterReading.reading_date >= lo, MeterReading.reading_date < hi)
+                .group_by(MeterReading.meter_id, bucket_expr)
+            )
+            if meter_id:
+                purge = purge.where(model.meter_id == meter_id)
+                source = source.where(MeterReading.meter_id == meter_id)
+
+            db.session.execute(purge)
+            result = db.session.execute(
+                insert(model).from_select(
+                    ["meter_id", "bucket", "consumption", "reading_count", "updated_at"],
+                    source,
+                )
+            )
+            if model is MeterConsumptionDaily:
+                written += result.rowcount or 0
+
+        db.session.commit()
+        chunk_start = chunk_end
+
+    # Readings rebuilt from have usually bypassed the ingest path too
+    refresh_last_readings(meter_id)
+    db.session.commit()
+    clear_cache([meter_id] if meter_id else None)
+    return written
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import String, and_, delete, func, literal, select, union_all
+
+from app.db import db
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.models.estate import Estate
+from app.models.meter import Meter
+from app.models.meter_alert import MeterAlert
+from app.models.transaction import Transaction
+from app.models.unit import Unit
+from app.models.unit_tenancy import UnitTenancy
+from app.models.wallet import Wallet
+from app.services.consumption_rollups import consumption_source
+
+logger = logging.getLogger(__name__)
+
+
+# Precomputed admin dashboard metrics.
+#
+# Each refresh computes every estate at once with a few grouped queries
+# per period (consumption per estate and meter role, transactions per
+# estate/day/type, residents per estate, open meter alerts ranked per
+# estate) and upserts one DashboardSnapshot row per (estate, period), plus
+# estate_id 0 for the all-estates view. The refresh_dashboard_snapshots
+# beat task keeps them fresh; the dashboard reads a single row and only
+# computes in the request when there is no snapshot for the period yet.
+# A snapshot older than DASHBOARD_SNAPSHOT_MAX_AGE is still served, with
+# its computed_at, and queues the refresh task (at most once a minute per
+# process) instead of recomputing every estate in the request.
+
+PERIODS = ("current-month", "previous-month", "past-3-months")
+DEFAULT_PERIOD = "current-month"
+ALL_ESTATES = 0
+
+UNIT_METER_ROLES = ("electricity", "water", "hot_water", "solar")
+
+# Consumption transaction type -> (revenue label, usage chart key)
+CONSUMPTION_TYPES = {
+    "consumption_electricity": ("Electricity", "electricity"),
+    "consumption_water": ("Water", "water"),
+    "consumption_hot_water": ("Hot Water", "hot_water"),
+    "consumption_solar": ("Solar", "solar"),
+}
+ALERT_TYPES = ("tamper_detected", "meter_fault", "communication_loss")
+ALERTS_PER_SCOPE = 5
+
+# Seconds between refresh tasks queued by one process for stale snapshots
+REFRESH_REQUEST_INTERVAL = 60
+_last_refresh_request = 0.0
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def period_bounds(period: str, now: Optional[datetime] = None) -> Tuple[datetime, datetime, str]:
+    """``(start, end, label)`` of a dashboard period; ``end`` is exclusive."""
+    now = now or datetime.now()
+    this_month = _month_start(now)
+    if period == "previous-month":
+        start = _month_start(this_month - timedelta(days=1))
+        return start, this_month, start.strftime("%B %Y")
+    if period == "past-3-months":
+        start = _month_start(now.replace(day=1) - timedelta(days=90))
+        label = f"Past 3 Months ({start.strftime('%b')} - {now.strftime('%b %Y')})"
+        return start, this_month, label
+    return this_month, _month_start(this_month + timedelta(days=32)), now.strftime("%B %Y")
+
+
+def _as_date(value: Any) -> date:
+    # func.date() comes back as a string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _usage_by_estate(start: datetime, end: datetime) -> Dict[int, Dict[str, float]]:
+    """Consumption per estate and unit meter role over ``[start, end)``."""
+    src = consumption_source(start, end)
+    per_meter = (
+        select(src.c.meter_id, func.sum(src.c.consumption).label("consumption"))
+        .group_by(src.c.meter_id)
+        .cte("meter_usage")
+    )
+    roles = union_all(
+        *(
+            select(
+                Unit.estate_id.label("estate_id"),
+                getattr(Unit, f"{role}_meter_id").label("meter_id"),
+                literal(role).label("role"),
+            )
+            for role in UNIT_METER_ROLES
+        )
+    ).cte("meter_roles")
+
+    query = (
+        select(roles.c.estate_id, roles.c.role, func.sum(per_meter.c.consumption))
+        .join(Meter, and_(Meter.id == roles.c.meter_id, Meter.meter_type == roles.c.role))
+        .join(per_meter, per_meter.c.meter_id == roles.c.meter_id)
+        .group_by(roles.c.estate_id, roles.c.role)
+    )
+    usage: Dict[int, Dict[str, float]] = defaultdict(dict)
+    for estate_id, role, total in db.session.execute(query):
+        usage[estate_id][role] = float(total or 0)
+    return usage
+
+
+def _transactions_by_estate(start: datetime, end: datetime):
+    """Completed top-up and consumption amounts per estate, day and type."""
+    day = func.date(Transaction.completed_at).label("day")
+    query = (
+        select(
+            Unit.estate_id,
+            day,
+            Transaction.transaction_type,
+            func.sum(Transaction.amount),
+        )
+        .join(Wallet, Wallet.id == Transaction.wallet_id)
+        .join(Unit, Unit.id == Wallet.unit_id)
+        .where(
+            Transaction.transaction_type.in_(["topup", *CONSUMPTION_TYPES]),
+            Transaction.status == "completed",
+            Transaction.completed_at >= start,
+            Transaction.completed_at < end,
+        )
+        .group_by(Unit.estate_id, day, Transaction.transaction_type)
+    )
+    return [
+        (estate_id, _as_date(day), transaction_type, float(amount or 0))
+        for estate_id, day, transaction_type, amount in db.session.execute(query)
+    ]
+
+
+def _residents_by_estate() -> Dict[int, int]:
+    query = (
+        select(Unit.estate_id, func.count(func.distinct(UnitTenancy.person_id)))
+        .join(Unit, Unit.id == UnitTenancy.unit_id)
+        .where(UnitTenancy.status == "active")
+        .group_by(Unit.estate_id)
+    )
+    return dict(db.session.execute(query).all())
+
+
+def _open_alerts() -> List[Dict[str, Any]]:
+    """Newest unresolved tamper/fault alerts, at most ALERTS_PER_SCOPE per estate.
+
+    Alerts on meters not assigned to a unit or bulk feed have no estate
+    and only show in the all-estates view.
+    """
+    alert_meters = union_all(
+        *(
+            select(
+                Unit.estate_id.label("estate_id"),
+                Unit.unit_number.label("unit_number"),
+                getattr(Unit, f"{role}_meter_id").label("meter_id"),
+            )
+            for role in UNIT_METER_ROLES
+        ),
+        select(Estate.id, literal(None, String), Estate.bulk_electricity_meter_id),
+        select(Estate.id, literal(None, String), Estate.bulk_water_meter_id),
+    ).cte("alert_meters")
+
+    ranked = (
+        select(
+            MeterAlert.alert_type,
+            MeterAlert.severity,
+            MeterAlert.created_at,
+            alert_meters.c.estate_id,
+            alert_meters.c.unit_number,
+            func.row_number()
+            .over(
+                partition_by=alert_meters.c.estate_id,
+                order_by=(MeterAlert.created_at.desc(), MeterAlert.id.desc()),
+            )
+            .label("position"),
+        )
+        .outerjoin(alert_meters, alert_meters.c.meter_id == MeterAlert.meter_id)
+        .where(MeterAlert.alert_type.in_(ALERT_TYPES), MeterAlert.is_resolved == False)
+        .subquery("ranked_alerts")
+    )
+    query = select(ranked).where(ranked.c.position <= ALERTS_PER_SCOPE)
+    return [dict(row._mapping) for row in db.session.execute(query)]
+
+
+def _empty_metrics() -> Dict[str, Any]:
+    return {
+        "usage": {role: 0.0 for role in UNIT_METER_ROLES},
+        "revenue": 0.0,
+        "revenue_by_utility": {label: 0.0 for label, _ in CONSUMPTION_TYPES.values()},
+        "residents": 0,
+        "estate_usage": [],
+        "daily": {},
+        "alerts": [],
+    }
+
+
+def _finalize(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn accumulated totals into the values the dashboard renders."""
+    usage = metrics["usage"]
+    electricity_and_solar = usage["electricity"] + usage["solar"]
+    residents = metrics["residents"]
+    metrics["alerts"].sort(key=lambda alert: alert["timestamp"] or "", reverse=True)
+    return {
+        "kpis": {
+            "electricity_used_kwh": usage["electricity"],
+            "cold_water_kL": usage["water"] / 1000.0,
+            "hot_water_kL": usage["hot_water"] / 1000.0,
+            "solar_kwh": usage["solar"],
+            "solar_contribution_percent": (
+                usage["solar"] / electricity_and_solar * 100 if electricity_and_solar > 0 else 0
+            ),
+            "total_revenue": metrics["revenue"],
+        },
+        "revenue_by_utility": [
+            {"utility": label, "revenue": revenue}
+            for label, revenue in metrics["revenue_by_utility"].items()
+        ],
+        "avg_spend_per_resident": metrics["revenue"] / residents if residents else 0.0,
+        "estate_usage": sorted(metrics["estate_usage"], key=lambda row: row["name"]),
+        "daily_consumption": [
+            {"date": day, **totals} for day, totals in sorted(metrics["daily"].items())
+        ],
+        "alerts": metrics["alerts"][:ALERTS_PER_SCOPE],
+    }
+
+
+def compute_period_metrics(period: str, now: Optional[datetime] = None) -> Dict[int, Dict[str, Any]]:
+    """Dashboard metrics for every estate, and ALL_ESTATES, over one period."""
+    start, end, _ = period_bounds(period, now)
+    estate_names = dict(db.session.execute(select(Estate.id, Estate.name)).all())
+    scopes = {estate_id: _empty_metrics() for estate_id in [ALL_ESTATES, *estate_names]}
+
+    def targets(estate_id):
+        # Every estate's figures also count towards the all-estates view
+        if estate_id in scopes and estate_id != ALL_ESTATES:
+            return (scopes[estate_id], scopes[ALL_ESTATES])
+        return (scopes[ALL_ESTATES],)
+
+    for estate_id, roles in _usage_by_estate(start, end).items():
+        for metrics in targets(estate_id):
+            for role, total in roles.items():
+                metrics["usage"][role] += total
+
+    estate_usage: Dict[int, Dict[str, float]] = {}
+    for estate_id, day, transaction_type, amount in _transactions_by_estate(start, end):
+        if transaction_type == "topup":
+            for metrics in targets(estate_id):
+                metrics["revenue"] += amount
+            continue
+        label, key = CONSUMPTION_TYPES[transaction_type]
+        row = estate_usage.setdefault(
+            estate_id,
+            {"name": estate_names.get(estate_id), **{k: 0.0 for _, k in CONSUMPTION_TYPES.values()}},
+        )
+        row[key] += amount
+        for metrics in targets(estate_id):
+            metrics["revenue_by_utility"][label] += amount
+            daily = metrics["daily"].setdefault(
+                day.isoformat(), {k: 0.0 for _, k in CONSUMPTION_TYPES.values()}
+            )
+            daily[key] += amount
+    for estate_id, row in estate_usage.items():
+        for metrics in targets(estate_id):
+            metrics["estate_usage"].append(row)
+
+    for estate_id, residents in _residents_by_estate().items():
+        for metrics in targets(estate_id):
+            metrics["residents"] += residents
+
+    for alert in _open_alerts():
+        entry = {
+            "alert_type": "system",
+            "title": f"{alert['alert_type'].replace('_', ' ').title()} Alert",
+            "estate_name": estate_names.get(alert["estate_id"]),
+            "unit_number": alert["unit_number"],
+            "timestamp": alert["created_at"].isoformat() if alert["created_at"] else None,
+            "severity": alert["severity"] or "warning",
+        }
+        for metrics in targets(alert["estate_id"]):
+            metrics["alerts"].append(entry)
+
+    return {estate_id: _finalize(metrics) for estate_id, metrics in scopes.items()}
+
+
+def _upsert_statement(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    table = DashboardSnapshot.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.estate_id, table.c.period],
+        set_={
+            "period_start": stmt.excluded.period_start,
+            "period_end": stmt.excluded.period_end,
+            "metrics": stmt.excluded.metrics,
+            "computed_at": stmt.excluded.computed_at,
+        },
+    )
+
+
+def refresh_snapshots(
+    periods: Iterable[str] = PERIODS, now: Optional[datetime] = None
+) -> int:
+    """Recompute and store the snapshots of every estate for ``periods``.
+
+    Snapshots of estates that no longer exist are deleted. Returns the
+    number of rows written.
+    """
+    now = now or datetime.now()
+    computed_at = datetime.utcnow()
+    written = 0
+    for period in periods:
+        start, end, _ = period_bounds(period, now)
+        metrics = compute_period_metrics(period, now)
+        rows = [
+            {
+                "estate_id": estate_id,
+                "period": period,
+                "period_start": start,
+                "period_end": end,
+                "metrics": json.dumps(values),
+                "computed_at": computed_at,
+            }
+            for estate_id, values in metrics.items()
+        ]
+        db.session.execute(_upsert_statement(db.session.connection()), rows)
+        db.session.execute(
+            delete(DashboardSnapshot).where(
+                DashboardSnapshot.period == period,
+                DashboardSnapshot.estate_id.not_in(list(metrics)),
+            )
+        )
+        written += len(rows)
+    db.session.commit()
+    return written
+
+
+def _is_fresh(snapshot: DashboardSnapshot, max_age: int) -> bool:
+    return snapshot.computed_at > datetime.utcnow() - timedelta(seconds=max_age)
+
+
+def _request_refresh() -> None:
+    """Queue refresh_dashboard_snapshots, at most once per interval."""
+    global _last_refresh_request
+    now = time.monotonic()
+    if now - _last_refresh_request < REFRESH_REQUEST_INTERVAL:
+        return
+    _last_refresh_request = now
+    try:
+        from app.tasks.report_tasks import refresh_dashboard_snapshots
+
+        refresh_dashboard_snapshots.delay()
+    except Exception as exc:
+        logger.warning("Could not queue a dashboard snapshot refresh: %s", exc)
+
+
+def get_dashboard_metrics(
+    estate_id: Optional[int], period: str, now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Dashboard metrics for one estate (``None`` for all) from its snapshot.
+
+    Computes the period in the request only when it has no snapshot yet,
+    or the snapshot covers a different window (a month rollover). A
+    snapshot older than DASHBOARD_SNAPSHOT_MAX_AGE seconds is served as is
+    and a background refresh is queued. ``computed_at`` and ``stale`` in
+    the result say how old the figures are.
+    """
+    if period not in PERIODS:
+        period = DEFAULT_PERIOD
+    estate_id = estate_id or ALL_ESTATES
+    start, _, _ = period_bounds(period, now)
+    max_age = current_app.config.get("DASHBOARD_SNAPSHOT_MAX_AGE", 900)
+
+    snapshot = db.session.get(DashboardSnapshot, (estate_id, period))
+    if snapshot is None or snapshot.period_start != start:
+        # Nothing to show for this window yet
+        refresh_snapshots([period], now)
+        snapshot = db.session.get(DashboardSnapshot, (estate_id, period))
+    if snapshot is None:
+        # Unknown estate
+        return {**_finalize(_empty_metrics()), "computed_at": None, "stale": False}
+
+    stale = not _is_fresh(snapshot, max_age)
+    if stale:
+        _request_refresh()
+
+    metrics = json.loads(snapshot.metrics)
+    metrics["computed_at"] = snapshot.computed_at
+    metrics["stale"] = stale
+    for alert in metrics["alerts"]:
+        if alert["timestamp"]:
+            alert["timestamp"] = datetime.fromisoformat(alert["timestamp"])
+    for row in metrics["daily_consumption"]:
+        row["date"] = date.fromisoformat(row["date"]).strftime("%b %d")
+    return metrics
@@ -6,6 +6,7 @@ from sqlalchemy import or_, func
 
 from app.db import db
 from app.models import Estate, Unit, Wallet, Meter, RateTable
+from app.utils.rate_cache import invalidate_unit_rates
 
 
 def list_estates(search: Optional[str] = None, is_active: Optional[bool] = None):
@@ -107,6 +108,7 @@ def update_estate(estate: Estate, payload: dict, user_id: Optional[int] = None):
             ):
                 unit.water_rate_table_id = estate.water_rate_table_id
         db.session.commit()
+    invalidate_unit_rates()
     return estate
 
 
@@ -120,6 +122,7 @@ def delete_estate(estate: Estate):
         db.session.delete(unit)
     db.session.delete(estate)
     db.session.commit()
+    invalidate_unit_rates()
 
 
 def count_estates() -> int:
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+from flask import current_app, has_app_context
+from sqlalchemy import and_, bindparam, case, exists, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.db import db
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# Latest reading per meter.
+#
+# bulk_insert_readings writes each meter's newest reading through to
+# Meter.last_reading / last_reading_date / last_communication in the same
+# transaction as the insert (only when it is newer than what is stored),
+# and after commit to Redis, one ``meter-latest:<id>`` JSON key per meter
+# with the full telemetry that expires after LATEST_READING_CACHE_TTL
+# seconds. Readers use get_latest_many(): one MGET for the whole list, with
+# misses (or no Redis) answered by an exact (meter_id, reading_date =
+# Meter.last_reading_date) index lookup and written back to Redis.
+#
+# Readings written some other way (seed data, the external LoRaWAN server
+# writing straight to the table) do not move Meter.last_*, so a meter whose
+# last_reading_date is NULL or has a newer reading behind it falls back to
+# an index-ordered ``ORDER BY reading_date DESC LIMIT 1`` lookup.
+# rebuild_rollups() resets the columns with refresh_last_readings().
+
+KEY_PREFIX = "meter-latest"
+
+TELEMETRY_FIELDS = (
+    "consumption_since_last",
+    "pulse_count",
+    "temperature",
+    "humidity",
+    "rssi",
+    "snr",
+    "battery_level",
+    "voltage",
+    "current",
+    "power",
+    "power_factor",
+    "frequency",
+    "flow_rate",
+    "pressure",
+    "status",
+)
+
+
+@dataclass
+class LatestReading:
+    """A meter's newest reading, attribute-compatible with MeterReading."""
+
+    meter_id: int
+    reading_value: float
+    reading_date: datetime
+    consumption_since_last: Optional[float] = None
+    pulse_count: Optional[int] = None
+    temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    rssi: Optional[int] = None
+    snr: Optional[float] = None
+    battery_level: Optional[int] = None
+    voltage: Optional[float] = None
+    current: Optional[float] = None
+    power: Optional[float] = None
+    power_factor: Optional[float] = None
+    frequency: Optional[float] = None
+    flow_rate: Optional[float] = None
+    pressure: Optional[float] = None
+    status: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Any) -> "LatestReading":
+        """Build from a reading dict or MeterReading, normalising Decimals."""
+        get = row.get if isinstance(row, dict) else lambda key: getattr(row, key, None)
+        values = {}
+        for key in ("reading_value", *TELEMETRY_FIELDS):
+            value = get(key)
+            if value is not None and key not in ("pulse_count", "rssi", "battery_level", "status"):
+                value = float(value)
+            values[key] = value
+        return cls(meter_id=get("meter_id"), reading_date=get("reading_date"), **values)
+
+    def to_json(self) -> str:
+        payload = asdict(self)
+        payload["reading_date"] = self.reading_date.isoformat()
+        return json.dumps(payload)
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "LatestReading":
+        payload = json.loads(raw)
+        payload["reading_date"] = datetime.fromisoformat(payload["reading_date"])
+        return cls(**payload)
+
+
+def newest_per_meter(rows: Iterable[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """The newest row for each meter in a batch of reading dicts."""
+    newest: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        current = newest.get(row["meter_id"])
+        if current is None or row["reading_date"] >= current["reading_date"]:
+            newest[row["meter_id"]] = row
+    return newest
+
+
+def apply_latest(conn, rows: List[Dict[str, Any]]) -> None:
+    """Advance the Meter.last_* columns for a batch of inserted readings.
+
+    Must run in the insert's transaction. Meters whose stored reading is
+    already newer (late or backfilled data) are left alone. Meters are
+    updated in id order, like the rollups, to avoid deadlocks.
+    """
+    newest = newest_per_meter(rows)
+    if not newest:
+        return
+    meters = Meter.__table__
+    reading_date = bindparam("b_reading_date")
+    stmt = (
+        update(meters)
+        .where(meters.c.id == bindparam("b_meter_id"))
+        .where(or_(meters.c.last_reading_date.is_(None), meters.c.last_reading_date <= reading_date))
+        .values(
+            last_reading=bindparam("b_reading_value"),
+            last_reading_date=reading_date,
+            last_communication=case(
+                (meters.c.last_communication > reading_date, meters.c.last_communication),
+                else_=reading_date,
+            ),
+        )
+    )
+    conn.execute(
+        stmt,
+        [
+            {
+                "b_meter_id": meter_id,
+                "b_reading_value": row["reading_value"],
+                "b_reading_date": row["reading_date"],
+            }
+            for meter_id, row in sorted(newest.items())
+        ],
+    )
+
+
+def _key(meter_id: int) -> str:
+    return f"{KEY_PREFIX}:{meter_id}"
+
+
+def _ttl() -> int:
+    if has_app_context():
+        return current_app.config.get("LATEST_READING_CACHE_TTL", 300)
+    return 300
+
+
+def _cached(client: redis.Redis, meter_ids: List[int]) -> Dict[int, LatestReading]:
+    raw = client.mget([_key(meter_id) for meter_id in meter_ids])
+    found = {}
+    for meter_id, value in zip(meter_ids, raw):
+        if value is None:
+            continue
+        try:
+            found[meter_id] = LatestReading.from_json(value)
+        except (ValueError, TypeError, KeyError):
+            continue
+    return found
+
+
+def _store(client: redis.Redis, readings: Iterable[LatestReading]) -> None:
+    ttl = _ttl()
+    pipe = client.pipeline(transaction=False)
+    for reading in readings:
+        pipe.set(_key(reading.meter_id), reading.to_json(), ex=ttl)
+    pipe.execute()
+
+
+def publish_latest(rows: List[Dict[str, Any]]) -> None:
+    """Write a committed batch's newest readings through to Redis.
+
+    Entries already holding a newer reading are kept.
+    """
+    newest = newest_per_meter(rows)
+    client = get_redis()
+    if not newest or client is None:
+        return
+    try:
+        current = _cached(client, sorted(newest))
+        _store(
+            client,
+            (
+                LatestReading.from_row(row)
+                for meter_id, row in newest.items()
+                if meter_id not in current or current[meter_id].reading_date <= row["reading_date"]
+            ),
+        )
+    except redis.RedisError as exc:
+        logger.warning("Could not update latest readings cache: %s", exc)
+
+
+def _newest_date(meter_id_column):
+    """Correlated top-1 lookup of a meter's newest reading_date."""
+    later = aliased(MeterReading)
+    return (
+        select(later.reading_date)
+        .where(later.meter_id == meter_id_column)
+        .order_by(later.reading_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _load(meter_ids: List[int]) -> Dict[int, LatestReading]:
+    # Exact index lookups on the stored last_reading_date, trusted only
+    # while no newer reading exists
+    later = aliased(MeterReading)
+    newer = exists().where(
+        later.meter_id == Meter.id,
+        later.reading_date > Meter.last_reading_date,
+    )
+    query = select(MeterReading).join(
+        Meter,
+        and_(
+            Meter.id == MeterReading.meter_id,
+            MeterReading.reading_date == Meter.last_reading_date,
+        ),
+    ).where(Meter.id.in_(meter_ids), ~newer).order_by(MeterReading.id)
+    found = {
+        reading.meter_id: LatestReading.from_row(reading)
+        for reading in db.session.execute(query).scalars()
+    }
+
+    missing = [meter_id for meter_id in meter_ids if meter_id not in found]
+    if missing:
+        # Meter.last_* is unset or behind: ORDER BY reading_date DESC LIMIT 1
+        query = (
+            select(MeterReading)
+            .join(Meter, Meter.id == MeterReading.meter_id)
+            .where(Meter.id.in_(missing), MeterReading.reading_date == _newest_date(Meter.id))
+            .order_by(MeterReading.id)
+        )
+        found.update(
+            (reading.meter_id, LatestReading.from_row(reading))
+            for reading in db.session.execute(query).scalars()
+        )
+    return found
+
+
+def refresh_last_readings(meter_id: Optional[int] = None) -> int:
+    """Reset Meter.last_* from meter_readings for one meter, or all of them.
+
+    For readings that bypassed bulk_insert_readings (seed data, direct
+    writes, re-decoded payloads). last_communication only moves forward.
+    The caller commits. Returns the number of meters updated.
+    """
+    meters = Meter.__table__
+    newest = _newest_date(meters.c.id)
+    value = (
+        select(MeterReading.reading_value)
+        .where(MeterReading.meter_id == meters.c.id)
+        .order_by(MeterReading.reading_date.desc(), MeterReading.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(meters)
+        .where(exists().where(MeterReading.meter_id == meters.c.id))
+        .values(
+            last_reading=value,
+            last_reading_date=newest,
+            last_communication=case(
+                (meters.c.last_communication > newest, meters.c.last_communication),
+                else_=newest,
+            ),
+        )
+    )
+    if meter_id:
+        stmt = stmt.where(meters.c.id == meter_id)
+    return db.session.execute(stmt).rowcount or 0
+
+
+def get_latest_many(meter_ids: Iterable[Optional[int]]) -> Dict[int, LatestReading]:
+    """Latest reading per meter id; meters without readings are omitted."""
+    ids = sorted({meter_id for meter_id in meter_ids if meter_id})
+    if not ids:
+        return {}
+    client = get_redis()
+    found: Dict[int, LatestReading] = {}
+    if client is not None:
+        try:
+            found = _cached(client, ids)
+        except redis.RedisError as exc:
+            logger.warning("Latest readings cache unavailable: %s", exc)
+            client = None
+
+    missing = [meter_id for meter_id in ids if meter_id not in found]
+    if missing:
+        loaded = _load(missing)
+        found.update(loaded)
+        if client is not None:
+            try:
+                _store(client, loaded.values())
+            except redis.RedisError as exc:
+                logger.warning("Could not update latest readings cache: %s", exc)
+    return found
+
+
+def clear_cache(meter_ids: Optional[Iterable[int]] = None) -> None:
+    """Drop cached entries (every meter's by default); readers reload them."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        if meter_ids is None:
+            keys = list(client.scan_iter(match=f"{KEY_PREFIX}:*", count=1000))
+        else:
+            keys = [_key(meter_id) for meter_id in meter_ids]
+        if keys:
+            client.delete(*keys)
+    except redis.RedisError as exc:
+        logger.warning("Could not clear latest readings cache: %s", exc)
+
+
+def get_latest(meter_id: Optional[int]) -> Optional[LatestReading]:
+    """Latest reading for one meter, or None."""
+    return get_latest_many([meter_id]).get(meter_id)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+
+from app.db import db
+from app.models.meter import Meter
+from app.models.meter_consumption_hourly import MeterConsumptionHourly
+from app.models.meter_reading import MeterReading
+from app.utils.downsample import lttb
+from app.utils.rates import SAST_OFFSET_MINUTES
+
+
+# Chart series for the meter details page.
+#
+# Buckets are computed in SQL on local (SAST) clock time, so a chart
+# request returns one row per bucket instead of every reading. Consumption
+# per bucket is max(reading_value) - min(reading_value) over the raw
+# readings; the long periods (quarter, year) sum the hourly consumption
+# rollups instead. Telemetry series (voltage, power, ...) are reduced to
+# at most ``points`` points with LTTB, after averaging per hour in SQL for
+# the long periods.
+
+SAST_OFFSET = timedelta(minutes=SAST_OFFSET_MINUTES)
+
+# period -> (bucket unit, number of buckets)
+CHART_PERIODS = {
+    "hour": ("hour", 24),
+    "day": ("hour", 24),
+    "week": ("day", 7),
+    "month": ("day", 30),
+    "quarter": ("week", 13),
+    "year": ("month", 12),
+}
+DEFAULT_PERIOD = "day"
+ROLLUP_PERIODS = ("quarter", "year")
+LABEL_FORMATS = {"hour": "%H:00", "day": "%b %d", "week": "%b %d", "month": "%b %Y"}
+
+TELEMETRY_UNITS = {
+    "voltage": "V",
+    "current": "A",
+    "power": "kW",
+    "power_factor": "",
+    "frequency": "Hz",
+    "flow_rate": "L/h",
+    "pressure": "bar",
+    "temperature": "°C",
+    "humidity": "%",
+    "rssi": "dBm",
+    "snr": "dB",
+    "battery_level": "%",
+}
+DEFAULT_POINTS = 500
+MAX_POINTS = 2000
+
+# SQLite: strftime() formats and modifiers truncating a shifted timestamp
+_SQLITE_TRUNCATE = {
+    "hour": ("%Y-%m-%d %H:00:00", ()),
+    "day": ("%Y-%m-%d 00:00:00", ()),
+    "week": ("%Y-%m-%d 00:00:00", ("weekday 0", "-6 days")),
+    "month": ("%Y-%m-01 00:00:00", ()),
+}
+
+
+def local_bucket(column, unit: str):
+    """SQL expression truncating a UTC timestamp column to a SAST bucket.
+
+    The result is the bucket start in local time, as a timestamp on
+    PostgreSQL and a string on SQLite (see ``_as_datetime``).
+    """
+    if db.engine.dialect.name == "postgresql":
+        return func.date_trunc(unit, column + SAST_OFFSET)
+    fmt, modifiers = _SQLITE_TRUNCATE[unit]
+    return func.strftime(fmt, column, f"+{SAST_OFFSET_MINUTES} minutes", *modifiers)
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(value)
+
+
+def _bucket_starts(unit: str, count: int, local_now: datetime) -> List[datetime]:
+    """Start of each of the last ``count`` buckets, oldest first."""
+    if unit == "month":
+        month = local_now.year * 12 + local_now.month - 1
+        return [
+            datetime(m // 12, m % 12 + 1, 1) for m in range(month - count + 1, month + 1)
+        ]
+    if unit == "hour":
+        current, step = local_now.replace(minute=0, second=0, microsecond=0), timedelta(hours=1)
+    else:
+        current = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        step = timedelta(days=1)
+        if unit == "week":
+            current -= timedelta(days=current.weekday())
+            step = timedelta(weeks=1)
+    return [current - step * i for i in range(count - 1, -1, -1)]
+
+
+def _window(period: str, now: Optional[datetime]):
+    unit, count = CHART_PERIODS[period]
+    now = now or datetime.utcnow()
+    buckets = _bucket_starts(unit, count, now + SAST_OFFSET)
+    return unit, buckets, buckets[0] - SAST_OFFSET, now
+
+
+def consumption_series(
+    meter: Meter, period: str = DEFAULT_PERIOD, now: Optional[datetime] = None
+) -> Dict[str, List]:
+    """Consumption per local-time bucket over a chart period.
+
+    Returns ``{"labels": [...], "data": [...]}`` with a zero for every
+    bucket without readings.
+    """
+    unit, buckets, start, now = _window(period, now)
+    if period in ROLLUP_PERIODS:
+        hourly = MeterConsumptionHourly
+        bucket = local_bucket(hourly.bucket, unit)
+        query = select(bucket, func.sum(hourly.consumption)).where(
+            hourly.meter_id == meter.id, hourly.bucket >= start, hourly.bucket <= now
+        )
+    else:
+        bucket = local_bucket(MeterReading.reading_date, unit)
+        query = select(
+            bucket, func.max(MeterReading.reading_value) - func.min(MeterReading.reading_value)
+        ).where(
+            MeterReading.meter_id == meter.id,
+            MeterReading.reading_date >= start,
+            MeterReading.reading_date <= now,
+        )
+
+    totals = {
+        _as_datetime(key): float(value or 0)
+        for key, value in db.session.execute(query.group_by(bucket))
+    }
+    return {
+        "labels": [key.strftime(LABEL_FORMATS[unit]) for key in buckets],
+        "data": [round(totals.get(key, 0.0), 2) for key in buckets],
+    }
+
+
+def telemetry_series(
+    meter: Meter,
+    field: str,
+    period: str = DEFAULT_PERIOD,
+    points: int = DEFAULT_POINTS,
+    now: Optional[datetime] = None,
+) -> Dict[str, List]:
+    """A raw telemetry column over a chart period, downsampled to ``points``.
+
+    Quarter and year are averaged per hour in SQL first, so at most one
+    row per hour leaves the database.
+    """
+    if field not in TELEMETRY_UNITS:
+        raise ValueError(f"Unsupported series: {field}")
+    column = getattr(MeterReading, field)
+    _, _, start, now = _window(period, now)
+    window = (
+        MeterReading.meter_id == meter.id,
+        MeterReading.reading_date >= start,
+        MeterReading.reading_date <= now,
+        column.isnot(None),
+    )
+
+    if period in ROLLUP_PERIODS:
+        bucket = local_bucket(MeterReading.reading_date, "hour")
+        query = select(bucket, func.avg(column)).where(*window).group_by(bucket).order_by(bucket)
+        rows = [(_as_datetime(key), value) for key, value in db.session.execute(query)]
+    else:
+        query = select(MeterReading.reading_date, column).where(*window)
+        rows = [
+            (reading_date + SAST_OFFSET, value)
+            for reading_date, value in db.session.execute(query.order_by(MeterReading.reading_date))
+        ]
+
+    series = lttb([(key.timestamp(), float(value)) for key, value in rows], points)
+    return {
+        "labels": [datetime.fromtimestamp(x).strftime("%b %d %H:%M") for x, _ in series],
+        "data": [round(y, 3) for _, y in series],
+    }
@@ -1,9 +1,44 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
 
+from sqlalchemy import update
+
+from app.db import db
+from app.models.meter import Meter
 from app.models.meter_reading import MeterReading
+from app.services.consumption import fill_consumption, recalculate_consumption
+from app.services.consumption_rollups import apply_readings, rebuild_rollups
+from app.services.latest_telemetry import apply_latest, clear_cache, publish_latest
+from app.utils.payload_decoders import decode_batch
+from app.utils.report_cache import invalidate_for_readings
+
+
+# Columns written by bulk inserts. Every row passed to executemany() must
+# carry the same keys, so rows are normalised against this list.
+BULK_INSERT_COLUMNS = (
+    "meter_id",
+    "reading_value",
+    "reading_date",
+    "reading_type",
+    "consumption_since_last",
+    "pulse_count",
+    "temperature",
+    "humidity",
+    "rssi",
+    "snr",
+    "battery_level",
+    "raw_payload",
+    "voltage",
+    "current",
+    "power",
+    "power_factor",
+    "frequency",
+    "flow_rate",
+    "pressure",
+    "status",
+)
 
 
 def list_for_meter(
@@ -15,3 +50,152 @@ def list_for_meter(
     if end:
         q = q.filter(MeterReading.reading_date <= end)
     return q.order_by(MeterReading.reading_date.desc())
+
+
+def bulk_insert_readings(rows: List[Dict[str, Any]]) -> int:
+    """Insert many readings in a single round trip.
+
+    Uses a Core executemany, which SQLAlchemy renders as multi-row
+    ``INSERT ... VALUES (...), (...)`` statements on PostgreSQL instead of
+    one statement per reading. Rows are plain dicts keyed by MeterReading
+    column names; ``meter_id``, ``reading_value`` and ``reading_date`` are
+    required.
+
+    Missing consumption_since_last values are computed against each
+    meter's previous reading (app/services/consumption.py), and the
+    hourly/daily consumption rollups and each meter's latest reading are
+    updated in the same transaction (app/services/consumption_rollups.py,
+    app/services/latest_telemetry.py).
+
+    Runs on its own connection and commits immediately, so it is safe to
+    call from a background thread with only an app context pushed.
+
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    payload = []
+    for row in rows:
+        record = {col: row.get(col) for col in BULK_INSERT_COLUMNS}
+        record["reading_type"] = record["reading_type"] or "automatic"
+        record["is_validated"] = False
+        record["is_billed"] = False
+        record["created_at"] = now
+        payload.append(record)
+
+    with db.engine.begin() as conn:
+        fill_consumption(conn, payload)
+        conn.execute(MeterReading.__table__.insert(), payload)
+        apply_readings(conn, payload)
+        apply_latest(conn, payload)
+
+    publish_latest(payload)
+    invalidate_for_readings(payload)
+    return len(payload)
+
+
+def redecode_readings(
+    device_type: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    meter_id: Optional[int] = None,
+    chunk_size: int = 5000,
+) -> int:
+    """Re-run the payload decoder over stored raw payloads.
+
+    Walks matching readings in primary-key order, ``chunk_size`` rows at a
+    time: each chunk is fetched as plain tuples, decoded with one
+    decode_batch() call and written back with one bulk UPDATE, then
+    committed. Interrupted runs can simply be restarted.
+
+    Afterwards every affected meter's consumption_since_last is recomputed
+    over the re-decoded window (plus the reading that follows it), the
+    hourly/daily rollups for those days are rebuilt, and cached reports
+    and latest readings are invalidated. As with rebuild_rollups(), run it
+    over historical ranges or with ingestion paused.
+
+    Returns:
+        Number of readings updated
+    """
+    base = (
+        db.session.query(
+            MeterReading.id,
+            MeterReading.raw_payload,
+            Meter.pulse_factor,
+            MeterReading.meter_id,
+            MeterReading.reading_date,
+        )
+        .join(Meter, Meter.id == MeterReading.meter_id)
+        .filter(
+            Meter.lorawan_device_type == device_type,
+            MeterReading.raw_payload.isnot(None),
+        )
+    )
+    if meter_id:
+        base = base.filter(MeterReading.meter_id == meter_id)
+    if start:
+        base = base.filter(MeterReading.reading_date >= start)
+    if end:
+        base = base.filter(MeterReading.reading_date <= end)
+
+    updated = 0
+    last_id = 0
+    # meter_id -> (first, last) reading_date of re-decoded readings
+    windows: Dict[int, Tuple[datetime, datetime]] = {}
+    while True:
+        chunk = (
+            base.filter(MeterReading.id > last_id)
+            .order_by(MeterReading.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        decoded = decode_batch(
+            device_type,
+            [row[1] for row in chunk],
+            [float(row[2]) if row[2] is not None else None for row in chunk],
+        )
+        params = []
+        for (reading_id, _, _, reading_meter_id, reading_date), values in zip(chunk, decoded):
+            if not values:
+                continue
+            params.append({"id": reading_id, **values})
+            first, last = windows.get(reading_meter_id, (reading_date, reading_date))
+            windows[reading_meter_id] = (min(first, reading_date), max(last, reading_date))
+        if params:
+            db.session.execute(update(MeterReading), params)
+            updated += len(params)
+        db.session.commit()
+
+    if updated:
+        _refresh_derived(windows)
+    return updated
+
+
+def _refresh_derived(windows: Dict[int, Tuple[datetime, datetime]]) -> None:
+    """Bring consumption, rollups and caches in line with rewritten readings."""
+    for window_meter_id, (first, last) in windows.items():
+        # The next reading's delta is taken against the last rewritten one
+        following = (
+            db.session.query(MeterReading.reading_date)
+            .filter(MeterReading.meter_id == window_meter_id, MeterReading.reading_date > last)
+            .order_by(MeterReading.reading_date)
+            .limit(1)
+            .scalar()
+        )
+        last = following or last
+        recalculate_consumption(window_meter_id, first, last)
+        rebuild_rollups(first.date(), last.date() + timedelta(days=1), meter_id=window_meter_id)
+
+    # Cached latest readings may carry the old decoded values
+    clear_cache(windows)
+    invalidate_for_readings(
+        {"meter_id": window_meter_id, "reading_date": first}
+        for window_meter_id, (first, _) in windows.items()
+    )
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.db import db
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.services.latest_telemetry import LatestReading, get_latest_many
+from app.utils.rates import SAST_OFFSET_MINUTES, calculate_consumption_charge
+
+
+# Realtime stats for the meter details page and meter list views.
+#
+# Today's consumption is max(reading_value) - min(reading_value) over
+# today's readings (SAST day), computed for all requested meters with one
+# grouped range aggregate on (meter_id, reading_date), which the covering
+# ix_meter_readings_meter_id_reading_date index answers without touching
+# the table. Latest readings come from app/services/latest_telemetry.py,
+# and costs use the process-cached default tariffs
+# (app/utils/rate_cache.py), so polling does not reload rate tables.
+
+SAST_OFFSET = timedelta(minutes=SAST_OFFSET_MINUTES)
+MAX_BATCH_METERS = 200
+
+
+def today_window(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """UTC ``[start, end)`` of the current SAST day."""
+    now = now or datetime.utcnow()
+    local_midnight = (now + SAST_OFFSET).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = local_midnight - SAST_OFFSET
+    return start, start + timedelta(days=1)
+
+
+def today_consumption(
+    meter_ids: Iterable[int], now: Optional[datetime] = None
+) -> Dict[int, float]:
+    """Today's consumption per meter, in one index-range aggregate."""
+    ids = [meter_id for meter_id in meter_ids if meter_id]
+    if not ids:
+        return {}
+    start, end = today_window(now)
+    rows = db.session.execute(
+        select(
+            MeterReading.meter_id,
+            func.max(MeterReading.reading_value) - func.min(MeterReading.reading_value),
+        )
+        .where(
+            MeterReading.meter_id.in_(ids),
+            MeterReading.reading_date >= start,
+            MeterReading.reading_date < end,
+        )
+        .group_by(MeterReading.meter_id)
+    )
+    totals = {meter_id: 0.0 for meter_id in ids}
+    totals.update({meter_id: float(value or 0) for meter_id, value in rows})
+    return totals
+
+
+def _cost(meter: Meter, consumption: float) -> Tuple[Optional[float], Optional[str]]:
+    # Determine utility type based on meter type
+    utility_type = meter.meter_type
+    if utility_type == "hot_water":
+        utility_type = "water"  # Use water rates for hot water
+    elif utility_type not in ("electricity", "water"):
+        utility_type = "electricity"  # Default to electricity for solar/bulk
+
+    if consumption <= 0:
+        return 0, "No consumption today"
+    try:
+        return calculate_consumption_charge(consumption=consumption, utility_type=utility_type), None
+    except Exception as e:
+        return None, f"Cost calculation error: {str(e)}"
+
+
+def _reading_payload(reading: Optional[LatestReading]) -> Optional[Dict[str, Any]]:
+    if reading is None:
+        return None
+    return {
+        "timestamp": reading.reading_date.isoformat(),
+        "value": float(reading.reading_value) if reading.reading_value else 0.0,
+        "pulse_count": reading.pulse_count,
+        "temperature": float(reading.temperature) if reading.temperature else None,
+        "humidity": float(reading.humidity) if reading.humidity else None,
+        "battery_level": reading.battery_level,
+        "rssi": reading.rssi,
+        "snr": float(reading.snr) if reading.snr else None,
+    }
+
+
+def realtime_stats(
+    meters: List[Meter], now: Optional[datetime] = None
+) -> Dict[int, Dict[str, Any]]:
+    """Realtime stats payload per meter id, with a fixed number of queries."""
+    ids = [meter.id for meter in meters]
+    consumption = today_consumption(ids, now)
+    latest = get_latest_many(ids)
+
+    stats = {}
+    for meter in meters:
+        unit = "kWh" if meter.meter_type in ["electricity", "solar"] else "m³"
+        today = round(consumption.get(meter.id, 0.0), 2)
+        if meter.unit_id is not None:
+            cost, cost_message = _cost(meter, consumption.get(meter.id, 0.0))
+        else:
+            cost, cost_message = None, "Meter not assigned to unit"
+
+        stats[meter.id] = {
+            "meter_id": meter.device_eui,
+            "meter_type": meter.meter_type,
+            "device_type": meter.lorawan_device_type,
+            # Determine device capabilities based on device type
+            "capabilities": {
+                "measures_power": False,
+                "measures_voltage": False,
+                "measures_flow": False,
+                "measures_temperature": meter.lorawan_device_type == "milesight_em300",
+                "unit": unit,
+            },
+            "latest_reading": _reading_payload(latest.get(meter.id)),
+            "today": {
+                "consumption": today,
+                "cost": cost,
+                "unit": unit,
+                "cost_message": cost_message,
+            },
+            "communication": {
+                "last_communication": meter.last_communication.isoformat()
+                if meter.last_communication
+                else None,
+                "status": "online" if meter.communication_status == "online" else "offline",
+            },
+        }
+    return stats
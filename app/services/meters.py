@@ -41,19 +41,11 @@ def list_meters_paginated(
     BulkWaterEstate = aliased(Estate)
 
     # Build base query with all necessary joins
-    # Join meters to units (a meter can be assigned via any of the 4 meter_id columns)
+    # Join meters to units through the denormalized Meter.unit_id
     # Also join to estates for bulk meters
     query = (
         db.session.query(Meter, Unit, Wallet, Estate, BulkElecEstate, BulkWaterEstate)
-        .outerjoin(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-            ),
-        )
+        .outerjoin(Unit, Unit.id == Meter.unit_id)
         .outerjoin(Wallet, Wallet.unit_id == Unit.id)
         .outerjoin(Estate, Estate.id == Unit.estate_id)
         # Join for bulk electricity meters
@@ -251,6 +243,7 @@ def create_meter(payload: dict):
         # LoRaWAN device fields
         device_eui=payload.get("device_eui"),
         lorawan_device_type=payload.get("lorawan_device_type"),
+        pulse_factor=payload.get("pulse_factor"),
     )
     db.session.add(meter)
     db.session.commit()
@@ -260,16 +253,7 @@ def create_meter(payload: dict):
 def list_available_by_type(meter_type: str):
     return (
         Meter.query.filter(Meter.meter_type == meter_type, Meter.is_active == True)
-        .outerjoin(
-            Unit,
-            or_(
-                Unit.electricity_meter_id == Meter.id,
-                Unit.water_meter_id == Meter.id,
-                Unit.solar_meter_id == Meter.id,
-                Unit.hot_water_meter_id == Meter.id,
-            ),
-        )
-        .filter(Unit.id.is_(None))
+        .filter(Meter.unit_id.is_(None))
         .all()
     )
 
@@ -10,11 +10,24 @@ This service handles:
 """
 from __future__ import annotations
 from datetime import datetime, timedelta
-from typing import Optional, List
+from math import sqrt
+from typing import Any, Dict, Iterable, Iterator, Optional, List, Tuple
 from decimal import Decimal
 
+from sqlalchemy import Float, cast, exists, func, insert, select
+
 from ..db import db
-from ..models import Notification, Wallet, Person, Unit, Transaction, MeterReading
+from ..models import (
+    Meter,
+    MeterConsumptionDaily,
+    Notification,
+    Wallet,
+    Person,
+    Unit,
+    UnitOwnership,
+    UnitTenancy,
+    Transaction,
+)
 
 
 class NotificationService:
@@ -30,8 +43,21 @@ class NotificationService:
     TYPE_MAINTENANCE = 'maintenance'
     TYPE_SOLAR_REPORT = 'solar_report'
 
-    @staticmethod
+    # Low credit classification: below the wallet's threshold (default 50)
+    # is low, below CRITICAL_FRACTION of it is critical
+    DEFAULT_LOW_BALANCE_THRESHOLD = 50.0
+    CRITICAL_FRACTION = 0.2
+    LOW_CREDIT_CHUNK_SIZE = 1000
+    HIGH_USAGE_CHUNK_SIZE = 1000
+
+    # High usage: yesterday against the trailing daily baseline
+    HIGH_USAGE_BASELINE_DAYS = 28
+    HIGH_USAGE_MIN_BASELINE_DAYS = 7
+    HIGH_USAGE_MIN_Z_SCORE = 2.0
+
+    @classmethod
     def create_notification(
+        cls,
         recipient_id: int,
         notification_type: str,
         subject: str,
@@ -39,8 +65,9 @@ class NotificationService:
         recipient_type: str = 'resident',
         channel: str = 'in_app',
         priority: str = 'normal',
-        metadata: Optional[dict] = None
-    ) -> Notification:
+        metadata: Optional[dict] = None,
+        dedupe_since: Optional[datetime] = None,
+    ) -> Optional[Notification]:
         """
         Create a new notification.
 
@@ -51,28 +78,102 @@ class NotificationService:
             message: Full notification message
             recipient_type: Type of recipient ('resident', 'user', 'system')
             channel: Delivery channel ('in_app', 'email', 'sms', 'push')
-            priority: Priority level ('low', 'normal', 'high', 'urgent')
+            priority: Priority level ('low', 'normal', 'high', 'critical')
             metadata: Optional additional data as dict
+            dedupe_since: Skip if the recipient already has a notification
+                of this type created since then
 
         Returns:
-            Created Notification object
+            Created Notification object, or None if skipped as a duplicate
         """
-        notification = Notification(
-            recipient_type=recipient_type,
-            recipient_id=recipient_id,
-            notification_type=notification_type,
-            subject=subject,
-            message=message,
-            channel=channel,
-            priority=priority,
-            status='sent',
-            sent_at=datetime.utcnow(),
+        rows = cls.create_notifications(
+            [
+                {
+                    'recipient_id': recipient_id,
+                    'notification_type': notification_type,
+                    'subject': subject,
+                    'message': message,
+                    'recipient_type': recipient_type,
+                    'channel': channel,
+                    'priority': priority,
+                }
+            ],
+            dedupe_since=dedupe_since,
         )
+        return db.session.get(Notification, rows[0]['id']) if rows else None
 
-        db.session.add(notification)
+    @classmethod
+    def create_notifications(
+        cls,
+        specs: Iterable[Dict[str, Any]],
+        dedupe_since: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert many notifications with one multi-row INSERT and one commit.
+
+        Each spec needs recipient_id, notification_type, subject and message;
+        recipient_type, channel and priority default as in create_notification.
+        With ``dedupe_since``, a spec is dropped when its recipient already has
+        a notification of that type created since then, or when an earlier
+        spec in the batch has the same recipient and type. Existing rows are
+        checked with one query on ix_notifications_recipient_type_created.
+
+        Returns:
+            The inserted rows, each with its new ``id``
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                'recipient_type': spec.get('recipient_type', 'resident'),
+                'recipient_id': spec['recipient_id'],
+                'notification_type': spec['notification_type'],
+                'subject': spec.get('subject'),
+                'message': spec['message'],
+                'channel': spec.get('channel', 'in_app'),
+                'priority': spec.get('priority', 'normal'),
+                'status': 'sent',
+                'sent_at': now,
+                'created_at': now,
+            }
+            for spec in specs
+        ]
+        if dedupe_since is not None:
+            rows = cls._drop_already_sent(rows, dedupe_since)
+        if not rows:
+            return []
+
+        ids = db.session.execute(
+            insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+            rows,
+        ).scalars().all()
         db.session.commit()
+        for row, notification_id in zip(rows, ids):
+            row['id'] = notification_id
+        return rows
 
-        return notification
+    @staticmethod
+    def _drop_already_sent(rows: List[Dict[str, Any]], since: datetime) -> List[Dict[str, Any]]:
+        if not rows:
+            return rows
+        sent = {
+            tuple(existing)
+            for existing in db.session.execute(
+                select(Notification.recipient_id, Notification.notification_type)
+                .where(
+                    Notification.recipient_id.in_({row['recipient_id'] for row in rows}),
+                    Notification.notification_type.in_({row['notification_type'] for row in rows}),
+                    Notification.created_at >= since,
+                )
+                .distinct()
+            )
+        }
+        kept = []
+        for row in rows:
+            key = (row['recipient_id'], row['notification_type'])
+            if key not in sent:
+                sent.add(key)
+                kept.append(row)
+        return kept
 
     @classmethod
     def notify_low_credit(
@@ -92,69 +193,45 @@ class NotificationService:
         Returns:
             Created notification or None if no recipient found
         """
-        # Get the person associated with this unit
-        unit = Unit.query.get(wallet.unit_id)
-        if not unit:
-            return None
-
-        # Find resident/owner for this unit
-        person_id = None
-
-        # Check unit ownerships
-        if unit.ownerships:
-            for ownership in unit.ownerships:
-                if ownership.person_id:
-                    person_id = ownership.person_id
-                    break
-
-        # Check unit tenancies if no owner found
-        if not person_id and unit.tenancies:
-            for tenancy in unit.tenancies:
-                if tenancy.person_id:
-                    person_id = tenancy.person_id
-                    break
-
+        person_id = cls._get_wallet_person_id(wallet)
         if not person_id:
             return None
 
-        # Check if we already sent this notification today
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        notification_type = cls.TYPE_CRITICAL_CREDIT if is_critical else cls.TYPE_LOW_CREDIT
-
-        existing = Notification.query.filter(
-            Notification.recipient_id == person_id,
-            Notification.notification_type == notification_type,
-            Notification.created_at >= today_start,
-        ).first()
-
-        if existing:
-            return None  # Already notified today
-
-        # Create notification
         balance = float(wallet.balance) if wallet.balance else 0.0
+        subject, message, priority = cls._low_credit_content(balance, threshold, is_critical)
 
-        if is_critical:
-            subject = 'Critical Credit Warning'
-            message = (
-                f'Your wallet balance is critically low at R {balance:.2f}. '
-                f'Please top up immediately to avoid service interruption.'
-            )
-            priority = 'urgent'
-        else:
-            subject = 'Low Credit Warning'
-            message = (
-                f'Your wallet balance (R {balance:.2f}) has fallen below '
-                f'your alert threshold of R {threshold:.2f}. '
-                f'Consider topping up soon to ensure uninterrupted service.'
-            )
-            priority = 'high'
-
+        # Once per recipient and type per day
         return cls.create_notification(
             recipient_id=person_id,
-            notification_type=notification_type,
+            notification_type=cls.TYPE_CRITICAL_CREDIT if is_critical else cls.TYPE_LOW_CREDIT,
             subject=subject,
             message=message,
             priority=priority,
+            dedupe_since=cls._day_start(),
+        )
+
+    @staticmethod
+    def _day_start(now: Optional[datetime] = None) -> datetime:
+        return (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _low_credit_content(
+        balance: float, threshold: float, is_critical: bool
+    ) -> Tuple[str, str, str]:
+        """Subject, message and priority of a low/critical credit notification."""
+        if is_critical:
+            return (
+                'Critical Credit Warning',
+                f'Your wallet balance is critically low at R {balance:.2f}. '
+                f'Please top up immediately to avoid service interruption.',
+                'critical',
+            )
+        return (
+            'Low Credit Warning',
+            f'Your wallet balance (R {balance:.2f}) has fallen below '
+            f'your alert threshold of R {threshold:.2f}. '
+            f'Consider topping up soon to ensure uninterrupted service.',
+            'high',
         )
 
     @classmethod
@@ -283,136 +360,318 @@ class NotificationService:
         if not person_id:
             return None
 
-        # Check if we already sent this notification today
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        existing = Notification.query.filter(
-            Notification.recipient_id == person_id,
-            Notification.notification_type == cls.TYPE_HIGH_USAGE,
-            Notification.created_at >= today_start,
-        ).first()
-
-        if existing:
-            return None
+        subject, message = cls._high_usage_content(
+            utility_type, current_usage, average_usage, percentage_increase
+        )
+        # Once per recipient per day
+        return cls.create_notification(
+            recipient_id=person_id,
+            notification_type=cls.TYPE_HIGH_USAGE,
+            subject=subject,
+            message=message,
+            priority='high',
+            dedupe_since=cls._day_start(),
+        )
 
+    @staticmethod
+    def _high_usage_content(
+        utility_type: str,
+        current_usage: float,
+        average_usage: float,
+        percentage_increase: float,
+    ) -> Tuple[str, str]:
+        """Subject and message of a high usage notification."""
         utility_display = utility_type.replace('_', ' ').title()
         unit_label = 'kWh' if utility_type == 'electricity' else 'kL'
-
-        message = (
+        return (
+            f'High {utility_display} Usage Alert',
             f'Your {utility_display} usage is {percentage_increase:.0f}% higher than usual. '
             f'Current: {current_usage:.2f} {unit_label}, '
             f'Average: {average_usage:.2f} {unit_label}. '
-            f'Please check for any issues or leaks.'
+            f'Please check for any issues or leaks.',
         )
 
-        return cls.create_notification(
-            recipient_id=person_id,
-            notification_type=cls.TYPE_HIGH_USAGE,
-            subject=f'High {utility_display} Usage Alert',
-            message=message,
-            priority='high',
+    @staticmethod
+    def _usage_utility_type(meter_type: Optional[str]) -> str:
+        """Utility named in a high usage notification for a meter type."""
+        meter_type = (meter_type or '').lower()
+        if 'water' in meter_type:
+            return 'water'
+        if 'solar' in meter_type:
+            return 'solar'
+        if 'gas' in meter_type:
+            return 'gas'
+        return 'electricity'
+
+    @staticmethod
+    def _recipient_of(unit_id):
+        """SQL for a unit's notification recipient: first owner, else first tenant."""
+        first_owner = (
+            select(UnitOwnership.person_id)
+            .where(UnitOwnership.unit_id == unit_id, UnitOwnership.person_id.isnot(None))
+            .order_by(UnitOwnership.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        first_tenant = (
+            select(UnitTenancy.person_id)
+            .where(UnitTenancy.unit_id == unit_id, UnitTenancy.person_id.isnot(None))
+            .order_by(UnitTenancy.id)
+            .limit(1)
+            .scalar_subquery()
         )
+        return func.coalesce(first_owner, first_tenant)
+
+    @staticmethod
+    def _in_estates(unit_id, estate_ids: Optional[Iterable[int]]) -> list:
+        """WHERE clauses limiting ``unit_id`` to units of ``estate_ids`` (all when None)."""
+        if estate_ids is None:
+            return []
+        return [unit_id.in_(select(Unit.id).where(Unit.estate_id.in_(list(estate_ids))))]
 
     @classmethod
     def _get_wallet_person_id(cls, wallet: Wallet) -> Optional[int]:
         """Get the person ID associated with a wallet's unit."""
-        unit = Unit.query.get(wallet.unit_id)
-        if not unit:
+        if not wallet.unit_id:
             return None
+        return db.session.execute(select(cls._recipient_of(wallet.unit_id))).scalar()
 
-        # Check unit ownerships
-        if unit.ownerships:
-            for ownership in unit.ownerships:
-                if ownership.person_id:
-                    return ownership.person_id
-
-        # Check unit tenancies
-        if unit.tenancies:
-            for tenancy in unit.tenancies:
-                if tenancy.person_id:
-                    return tenancy.person_id
+    @classmethod
+    def iter_low_credit_wallets(
+        cls,
+        is_critical: bool,
+        now: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+        estate_ids: Optional[Iterable[int]] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Wallets to notify about low (or critical) credit, in chunks.
+
+        Each chunk is one statement that classifies balances against the
+        wallet's threshold, resolves the recipient (_recipient_of) and
+        anti-joins recipients already sent this notification type today.
+        Chunks are keyset-paged on wallet id. ``estate_ids`` limits the scan
+        to those estates' units (one fan-out shard). Rows have wallet_id,
+        unit_id, person_id, balance and threshold.
+        """
+        chunk_size = chunk_size or cls.LOW_CREDIT_CHUNK_SIZE
+        today_start = cls._day_start(now)
+        notification_type = cls.TYPE_CRITICAL_CREDIT if is_critical else cls.TYPE_LOW_CREDIT
 
-        return None
+        balance = func.coalesce(Wallet.balance, 0)
+        threshold = func.coalesce(Wallet.low_balance_threshold, cls.DEFAULT_LOW_BALANCE_THRESHOLD)
+        critical_below = threshold * cls.CRITICAL_FRACTION
+        band = (
+            [balance < critical_below]
+            if is_critical
+            else [balance >= critical_below, balance < threshold]
+        )
+        in_estates = cls._in_estates(Wallet.unit_id, estate_ids)
+
+        after = 0
+        while True:
+            candidates = (
+                select(
+                    Wallet.id.label('wallet_id'),
+                    Wallet.unit_id,
+                    cls._recipient_of(Wallet.unit_id).label('person_id'),
+                    balance.label('balance'),
+                    threshold.label('threshold'),
+                )
+                .where(Wallet.id > after, Wallet.is_suspended.isnot(True), *band, *in_estates)
+                .subquery()
+            )
+            already_notified = exists().where(
+                Notification.recipient_id == candidates.c.person_id,
+                Notification.notification_type == notification_type,
+                Notification.created_at >= today_start,
+            )
+            rows = db.session.execute(
+                select(candidates)
+                .where(candidates.c.person_id.isnot(None), ~already_notified)
+                .order_by(candidates.c.wallet_id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1].wallet_id
 
     @classmethod
-    def get_wallets_below_threshold(cls) -> List[dict]:
+    def send_low_credit_notifications(
+        cls,
+        is_critical: bool,
+        now: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+        estate_ids: Optional[Iterable[int]] = None,
+    ) -> Dict[str, int]:
         """
-        Get all wallets with balance below their alert threshold.
+        Notify every wallet in the low (or critical) band not yet notified today.
 
-        Returns:
-            List of dicts with wallet info and threshold status
+        One notification per recipient per day (a person with several wallets
+        gets one), written with create_notifications per chunk. ``estate_ids``
+        restricts the run to those estates. Returns counts of wallets matched
+        and notifications created.
         """
-        results = []
-
-        wallets = Wallet.query.filter(Wallet.status == 'active').all()
+        notification_type = cls.TYPE_CRITICAL_CREDIT if is_critical else cls.TYPE_LOW_CREDIT
+        today_start = cls._day_start(now)
+        matched = created = 0
+
+        for rows in cls.iter_low_credit_wallets(
+            is_critical, now=now, chunk_size=chunk_size, estate_ids=estate_ids
+        ):
+            matched += len(rows)
+            specs = []
+            for row in rows:
+                subject, message, priority = cls._low_credit_content(
+                    float(row.balance), float(row.threshold), is_critical
+                )
+                specs.append({
+                    'recipient_id': row.person_id,
+                    'notification_type': notification_type,
+                    'subject': subject,
+                    'message': message,
+                    'priority': priority,
+                })
+            created += len(cls.create_notifications(specs, dedupe_since=today_start))
 
-        for wallet in wallets:
-            threshold = float(wallet.low_balance_threshold or 50.0)
-            balance = float(wallet.balance or 0.0)
+        return {'wallets_matched': matched, 'notifications_created': created}
 
-            if balance < threshold:
-                # Determine if critical (less than 20% of threshold)
-                is_critical = balance < (threshold * 0.2)
+    @classmethod
+    def send_high_usage_notifications(
+        cls,
+        items: List[dict],
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """
+        Notify the recipients of meters flagged by get_high_usage_units.
 
-                results.append({
-                    'wallet': wallet,
-                    'balance': balance,
-                    'threshold': threshold,
-                    'is_critical': is_critical,
+        Items already carry the meter type and recipient, so this only writes:
+        one create_notifications call per chunk. Items without a recipient
+        are skipped; one notification per recipient per day.
+        """
+        today_start = cls._day_start(now)
+        created = 0
+
+        for offset in range(0, len(items), cls.HIGH_USAGE_CHUNK_SIZE):
+            specs = []
+            for item in items[offset:offset + cls.HIGH_USAGE_CHUNK_SIZE]:
+                if not item.get('person_id'):
+                    continue
+                subject, message = cls._high_usage_content(
+                    cls._usage_utility_type(item['meter_type']),
+                    item['current_usage'],
+                    item['average_usage'],
+                    item['percentage_increase'],
+                )
+                specs.append({
+                    'recipient_id': item['person_id'],
+                    'notification_type': cls.TYPE_HIGH_USAGE,
+                    'subject': subject,
+                    'message': message,
+                    'priority': 'high',
                 })
+            created += len(cls.create_notifications(specs, dedupe_since=today_start))
 
-        return results
+        return {'meters_flagged': len(items), 'notifications_created': created}
 
     @classmethod
-    def get_high_usage_units(cls, threshold_percentage: float = 50.0) -> List[dict]:
+    def get_high_usage_units(
+        cls,
+        threshold_percentage: float = 50.0,
+        min_z_score: Optional[float] = None,
+        now: Optional[datetime] = None,
+        estate_ids: Optional[Iterable[int]] = None,
+    ) -> List[dict]:
         """
-        Get units with usage significantly above their average.
+        Get unit meters whose consumption yesterday was anomalously high.
+
+        One statement over the daily rollups (meter_consumption_daily): a
+        window partitioned by meter gives each day's trailing baseline (mean
+        and variance of the preceding days in the last HIGH_USAGE_BASELINE_DAYS,
+        days without readings left out), and yesterday's row is flagged when
+        it is more than ``threshold_percentage`` above the baseline mean and
+        at least ``min_z_score`` standard deviations above it. Meters need
+        HIGH_USAGE_MIN_BASELINE_DAYS of history. The meter's unit, wallet and
+        notification recipient are joined in the same pass.
 
         Args:
             threshold_percentage: Percentage above average to flag as high usage
+            min_z_score: Standard deviations above the baseline mean required
+            now: Reference time; yesterday is the UTC day before it
+            estate_ids: Only meters of units in these estates (all when None)
 
         Returns:
-            List of dicts with unit info and usage details
+            List of dicts with meter_id, meter_type, unit_id, wallet_id,
+            person_id, current_usage, average_usage, percentage_increase
+            and z_score (None for a flat baseline)
         """
-        results = []
-
-        # Get readings from the last 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        month_ago = datetime.utcnow() - timedelta(days=30)
-
-        # This is a simplified version - in production you'd want more sophisticated
-        # usage analysis based on meter readings
-
-        from sqlalchemy import func
-
-        # Get recent readings grouped by meter
-        recent_readings = db.session.query(
-            MeterReading.meter_id,
-            func.sum(MeterReading.reading_value).label('total_reading')
-        ).filter(
-            MeterReading.reading_date >= week_ago
-        ).group_by(MeterReading.meter_id).all()
-
-        # Get historical average for comparison
-        for meter_id, current_total in recent_readings:
-            historical = db.session.query(
-                func.avg(MeterReading.reading_value)
-            ).filter(
-                MeterReading.meter_id == meter_id,
-                MeterReading.reading_date >= month_ago,
-                MeterReading.reading_date < week_ago
-            ).scalar()
-
-            if historical and current_total:
-                # Calculate percentage increase
-                avg_weekly = float(historical) * 7  # Rough weekly average
-                if avg_weekly > 0:
-                    percentage = ((float(current_total) - avg_weekly) / avg_weekly) * 100
-                    if percentage > threshold_percentage:
-                        results.append({
-                            'meter_id': meter_id,
-                            'current_usage': float(current_total),
-                            'average_usage': avg_weekly,
-                            'percentage_increase': percentage,
-                        })
+        now = now or datetime.utcnow()
+        min_z_score = cls.HIGH_USAGE_MIN_Z_SCORE if min_z_score is None else min_z_score
+        day = now.date() - timedelta(days=1)
+        baseline_start = day - timedelta(days=cls.HIGH_USAGE_BASELINE_DAYS)
+
+        daily = MeterConsumptionDaily
+        consumption = cast(daily.consumption, Float)
+        preceding = {
+            'partition_by': daily.meter_id,
+            'order_by': daily.bucket,
+            'rows': (None, -1),
+        }
+        series = (
+            select(
+                daily.meter_id,
+                daily.bucket,
+                consumption.label('consumption'),
+                func.count().over(**preceding).label('baseline_days'),
+                func.avg(consumption).over(**preceding).label('baseline_mean'),
+                func.avg(consumption * consumption).over(**preceding).label('baseline_square'),
+            )
+            .where(daily.bucket >= baseline_start, daily.bucket <= day)
+            .subquery('usage_series')
+        )
+        current = series.c.consumption
+        mean = series.c.baseline_mean
+        variance = series.c.baseline_square - mean * mean
+        rows = db.session.execute(
+            select(
+                series.c.meter_id,
+                Meter.meter_type,
+                Meter.unit_id,
+                Wallet.id.label('wallet_id'),
+                cls._recipient_of(Meter.unit_id).label('person_id'),
+                current.label('current_usage'),
+                mean.label('average_usage'),
+                variance.label('variance'),
+            )
+            .join(Meter, Meter.id == series.c.meter_id)
+            .join(Wallet, Wallet.unit_id == Meter.unit_id)
+            .where(
+                series.c.bucket == day,
+                series.c.baseline_days >= cls.HIGH_USAGE_MIN_BASELINE_DAYS,
+                mean > 0,
+                current > mean * (1 + threshold_percentage / 100.0),
+                # z >= min_z_score without a square root (SQLite has none)
+                (current - mean) * (current - mean) >= min_z_score * min_z_score * variance,
+                *cls._in_estates(Meter.unit_id, estate_ids),
+            )
+            .order_by(series.c.meter_id)
+        ).all()
 
+        results = []
+        for row in rows:
+            spread = sqrt(row.variance) if row.variance and row.variance > 0 else 0.0
+            results.append({
+                'meter_id': row.meter_id,
+                'meter_type': row.meter_type,
+                'unit_id': row.unit_id,
+                'wallet_id': row.wallet_id,
+                'person_id': row.person_id,
+                'current_usage': float(row.current_usage),
+                'average_usage': float(row.average_usage),
+                'percentage_increase': (row.current_usage - row.average_usage) / row.average_usage * 100,
+                'z_score': (row.current_usage - row.average_usage) / spread if spread else None,
+            })
         return results
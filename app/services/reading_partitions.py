@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import db
+
+
+logger = logging.getLogger(__name__)
+
+# meter_readings is range-partitioned by reading_date on PostgreSQL, one
+# partition per calendar month (see migration z5a6b7c8d901). Partitions are
+# named meter_readings_yYYYYmMM; rows outside every monthly range land in
+# meter_readings_default.
+PARENT_TABLE = "meter_readings"
+DEFAULT_PARTITION = "meter_readings_default"
+_PARTITION_RE = re.compile(r"^meter_readings_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Return the month a partition covers, or None if ``name`` is not monthly."""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """Inclusive lower / exclusive upper reading_date bounds for a month."""
+    start = month_start(month)
+    return start, add_months(start, 1)
+
+
+def is_partitioned() -> bool:
+    """True when meter_readings is a partitioned table on this database."""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    relkind = db.session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": PARENT_TABLE},
+    ).scalar()
+    return relkind == "p"
+
+
+def list_partitions() -> List[str]:
+    """Names of partitions currently attached to meter_readings."""
+    if not is_partitioned():
+        return []
+    rows = db.session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:name) ORDER BY c.relname"
+        ),
+        {"name": PARENT_TABLE},
+    )
+    return [row[0] for row in rows]
+
+
+def create_partition(month: date) -> int:
+    """Create one month's partition; the caller commits.
+
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows in its range (future-dated device clocks, a missed run), so
+    those rows are moved: the default partition is detached, the new
+    partition created, the rows moved into it and the default re-attached.
+    Returns the number of rows moved.
+    """
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = "reading_date >= :start AND reading_date < :end"
+    params = {"start": start, "end": end}
+
+    stranded = db.session.execute(
+        text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"), params
+    ).scalar()
+    if not stranded:
+        db.session.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}")
+        )
+        return 0
+
+    db.session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+    db.session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        params,
+    )
+    db.session.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    return stranded
+
+
+def ensure_partitions(months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from the current month to ``months_ahead``.
+
+    Idempotent; returns the names of partitions that were created. Each
+    partition is created in its own transaction, so a month that fails is
+    logged and retried on the next run without holding back the others.
+    Does nothing on databases where meter_readings is not partitioned.
+    """
+    if not is_partitioned():
+        return []
+
+    current = month_start(today or datetime.utcnow().date())
+    existing = set(list_partitions())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            moved = create_partition(month)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception("Could not create meter_readings partition %s", name)
+            continue
+        created.append(name)
+        if moved:
+            logger.warning("Moved %d readings from %s into %s", moved, DEFAULT_PARTITION, name)
+        logger.info("Created meter_readings partition %s", name)
+    return created
+
+
+def expire_partitions(
+    retention_months: int, drop: bool = False, today: Optional[date] = None
+) -> List[str]:
+    """Detach (and optionally drop) monthly partitions past the retention window.
+
+    A partition is expired once its whole month lies more than
+    ``retention_months`` before the current month. Detached tables are left
+    in place for archiving unless ``drop`` is set. Returns affected names.
+    """
+    if retention_months <= 0 or not is_partitioned():
+        return []
+
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+    expired = [
+        name
+        for name in list_partitions()
+        if (partition_month(name) or cutoff) < cutoff
+    ]
+    for name in expired:
+        db.session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            db.session.execute(text(f"DROP TABLE {name}"))
+    db.session.commit()
+
+    for name in expired:
+        logger.info("%s meter_readings partition %s", "Dropped" if drop else "Detached", name)
+    return expired
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app.db import db
+from app.models.report_job import ReportJob
+
+
+# Background report rendering.
+#
+# A request creates (or reuses) a ReportJob row and queues
+# app.tasks.report_tasks.generate_report, which renders the CSV/PDF into
+# REPORT_STORAGE_DIR and records the artifact on the job. Jobs are keyed by
+# a hash of everything that determines the output, so an identical request
+# joins a job that is still in flight or reuses a finished artifact until it
+# expires after REPORT_ARTIFACT_TTL seconds. REPORT_STORAGE_DIR must be
+# shared by the web and worker hosts.
+
+REPORT_FORMATS = ("csv", "pdf")
+METERS_CATEGORY = "meters"
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def job_key(report_type: str, category: str, fmt: str, parameters: Dict[str, Any]) -> str:
+    """Stable hash of a report request"""
+    payload = json.dumps(
+        [report_type, category, fmt, parameters], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def storage_dir() -> str:
+    path = current_app.config["REPORT_STORAGE_DIR"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _reusable(job: ReportJob, now: datetime) -> bool:
+    if job.status in ACTIVE_STATUSES:
+        # A job whose worker died is not worth waiting for
+        timeout = current_app.config.get("REPORT_JOB_TIMEOUT", 1800)
+        return job.created_at is not None and job.created_at > now - timedelta(
+            seconds=timeout
+        )
+    if job.status == "completed":
+        return (
+            job.expires_at is not None
+            and job.expires_at > now
+            and bool(job.file_path)
+            and os.path.exists(job.file_path)
+        )
+    return False
+
+
+def find_reusable_job(key: str, now: Optional[datetime] = None) -> Optional[ReportJob]:
+    """Newest in-flight or unexpired completed job for a request key"""
+    now = now or datetime.utcnow()
+    job = (
+        ReportJob.query.filter(ReportJob.job_key == key)
+        .filter(ReportJob.status.in_(ACTIVE_STATUSES + ("completed",)))
+        .order_by(ReportJob.created_at.desc(), ReportJob.id.desc())
+        .first()
+    )
+    if job is not None and _reusable(job, now):
+        return job
+    return None
+
+
+def request_report(
+    report_type: str,
+    category: str,
+    fmt: str,
+    parameters: Dict[str, Any],
+    requested_by: Optional[int] = None,
+) -> Tuple[ReportJob, bool]:
+    """Return (job, created). Only newly created jobs need to be queued."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    key = job_key(report_type, category, fmt, parameters)
+    job = find_reusable_job(key)
+    if job is not None:
+        return job, False
+
+    job = ReportJob(
+        job_key=key,
+        report_type=report_type,
+        category=category,
+        format=fmt,
+        parameters=json.dumps(parameters, sort_keys=True, default=str),
+        status="pending",
+        progress=0,
+        requested_by=requested_by,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job, True
+
+
+def submit_report(
+    report_type: str,
+    category: str,
+    fmt: str,
+    parameters: Dict[str, Any],
+    requested_by: Optional[int] = None,
+) -> Tuple[ReportJob, bool]:
+    """Create or reuse a job, queueing generate_report for new ones"""
+    job, created = request_report(report_type, category, fmt, parameters, requested_by)
+    if created:
+        from app.tasks.report_tasks import generate_report
+
+        try:
+            generate_report.delay(job.id)
+        except Exception as exc:
+            job.status = "failed"
+            job.error_message = f"Could not queue report job: {exc}"
+            db.session.commit()
+    return job, created
+
+
+def _download_name(job: ReportJob, parameters: Dict[str, Any]) -> str:
+    if job.category == METERS_CATEGORY:
+        return f"meters_report_{job.created_at.strftime('%Y%m%d_%H%M%S')}.pdf"
+    return (
+        f"{job.report_type}_{job.category}_{parameters['start_date']}_"
+        f"{parameters['end_date']}.{job.format}"
+    )
+
+
+def _render(job: ReportJob, parameters: Dict[str, Any], path: str) -> None:
+    # The renderers live with the routes that also serve them synchronously
+    if job.category == METERS_CATEGORY:
+        from app.routes.v1.meters import render_meters_pdf
+
+        with open(path, "wb") as output:
+            render_meters_pdf(parameters, output)
+        return
+
+    from app.routes.v1.reports import render_report_pdf, write_report_csv
+
+    args = (
+        job.report_type,
+        job.category,
+        date.fromisoformat(parameters["start_date"]),
+        date.fromisoformat(parameters["end_date"]),
+        parameters.get("estate_id"),
+    )
+    if job.format == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            if not write_report_csv(*args, output):
+                raise ValueError(f"Unsupported report: {job.category}/{job.report_type}")
+    else:
+        with open(path, "wb") as output:
+            render_report_pdf(*args, output)
+
+
+def claim_job(job_id: int, now: Optional[datetime] = None) -> bool:
+    """Mark a job running if it is pending, or running but stale.
+
+    The conditional UPDATE lets exactly one worker claim a job when its task
+    is delivered twice. A running job is only taken over once it started
+    more than REPORT_JOB_TIMEOUT seconds ago.
+    """
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get("REPORT_JOB_TIMEOUT", 1800))
+    claimed = (
+        ReportJob.query.filter(ReportJob.id == job_id)
+        .filter(
+            or_(
+                ReportJob.status == "pending",
+                and_(
+                    ReportJob.status == "running",
+                    or_(ReportJob.started_at.is_(None), ReportJob.started_at <= stale),
+                ),
+            )
+        )
+        .update(
+            {"status": "running", "started_at": now, "progress": 10},
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def run_report_job(job_id: int) -> Optional[ReportJob]:
+    """Render a job's artifact and record the result on the job"""
+    if not claim_job(job_id):
+        # Missing, finished, or being rendered by another worker
+        return db.session.get(ReportJob, job_id)
+    job = db.session.get(ReportJob, job_id)
+
+    parameters = json.loads(job.parameters or "{}")
+    path = os.path.join(storage_dir(), f"{job.id}_{job.job_key[:16]}.{job.format}")
+    partial = f"{path}.part"
+    try:
+        _render(job, parameters, partial)
+        job.progress = 90
+        db.session.commit()
+        os.replace(partial, path)
+    except Exception as exc:
+        db.session.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        job.status = "failed"
+        job.error_message = str(exc)
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        raise
+
+    now = datetime.utcnow()
+    job.status = "completed"
+    job.progress = 100
+    job.file_path = path
+    job.file_name = _download_name(job, parameters)
+    job.file_size = os.path.getsize(path)
+    job.completed_at = now
+    job.expires_at = now + timedelta(
+        seconds=current_app.config.get("REPORT_ARTIFACT_TTL", 3600)
+    )
+    db.session.commit()
+    return job
+
+
+def purge_expired_jobs(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete expired artifacts and fail jobs abandoned by their worker"""
+    now = now or datetime.utcnow()
+    expired = (
+        ReportJob.query.filter(ReportJob.status == "completed")
+        .filter(ReportJob.expires_at <= now)
+        .all()
+    )
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.status = "expired"
+        job.file_path = None
+
+    timeout = current_app.config.get("REPORT_JOB_TIMEOUT", 1800)
+    abandoned = (
+        ReportJob.query.filter(ReportJob.status.in_(ACTIVE_STATUSES))
+        .filter(ReportJob.created_at <= now - timedelta(seconds=timeout))
+        .update(
+            {"status": "failed", "error_message": "Timed out"},
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    return {"expired": len(expired), "abandoned": abandoned}
@@ -6,6 +6,7 @@ from sqlalchemy import desc
 
 from app.db import db
 from app.models.transaction import Transaction
+from app.utils.report_cache import invalidate_for_wallets
 
 
 def list_transactions(
@@ -108,4 +109,5 @@ def create_transaction(
     )
     db.session.add(txn)
     db.session.commit()
+    invalidate_for_wallets([wallet_id])
     return txn
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from typing import Optional
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import or_
+from sqlalchemy import func, or_, select, tuple_, union
 
 from app.db import db
-from app.models import Unit, Estate, Person, UnitTenancy
+from app.models import Meter, Unit, Estate, Person, UnitTenancy
+from app.utils.rate_cache import invalidate_unit_rates
 
 
 def list_units(
@@ -119,6 +123,7 @@ def update_unit(unit: Unit, payload: dict, user_id: Optional[int] = None):
     if user_id is not None:
         unit.updated_by = user_id
     db.session.commit()
+    invalidate_unit_rates(unit.id)
     return unit
 
 
@@ -162,8 +167,10 @@ def delete_unit(unit: Unit):
     unit.hot_water_meter_id = None
 
     # Now delete the unit
+    unit_id = unit.id
     db.session.delete(unit)
     db.session.commit()
+    invalidate_unit_rates(unit_id)
 
 
 def decommission_unit(unit: Unit):
@@ -211,11 +218,128 @@ def count_units():
 def find_unit_by_meter_id(meter_id: int):
     if not meter_id:
         return None
-    return Unit.query.filter(
-        or_(
-            Unit.electricity_meter_id == meter_id,
-            Unit.water_meter_id == meter_id,
-            Unit.solar_meter_id == meter_id,
-            Unit.hot_water_meter_id == meter_id,
+    return Unit.query.join(Meter, Meter.unit_id == Unit.id).filter(Meter.id == meter_id).first()
+
+
+# Unit column holding each meter type's slot
+METER_SLOTS = {
+    "electricity": Unit.electricity_meter_id,
+    "water": Unit.water_meter_id,
+    "solar": Unit.solar_meter_id,
+    "hot_water": Unit.hot_water_meter_id,
+}
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_unit_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the unit picker: (estate name, unit number, id)."""
+    key = [row["estate_name"], row["unit_number"], row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_unit_cursor(cursor: str) -> Tuple[str, str, int]:
+    """Inverse of encode_unit_cursor(); raises ValueError for a bad cursor."""
+    try:
+        estate_name, unit_number, unit_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return str(estate_name), str(unit_number), int(unit_id)
+    except (TypeError, ValueError, binascii.Error) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _unit_search_query(
+    q: Optional[str],
+    meter_type: Optional[str],
+    estate_id: Optional[int],
+    include_unit_id: Optional[int],
+    after: Optional[str],
+    limit: int,
+):
+    """The picker's SELECT; see search_units_for_meter()."""
+    columns = (
+        Unit.id.label("id"),
+        Unit.unit_number.label("unit_number"),
+        Unit.estate_id.label("estate_id"),
+        Estate.name.label("estate_name"),
+        Unit.electricity_meter_id,
+        Unit.water_meter_id,
+        Unit.solar_meter_id,
+        Unit.hot_water_meter_id,
+    )
+    order = (Estate.name.asc(), Unit.unit_number.asc(), Unit.id.asc())
+
+    base = (
+        select(*columns)
+        .join(Estate, Unit.estate_id == Estate.id)
+        .where(Unit.is_active.isnot(False))
+    )
+    if estate_id:
+        base = base.where(Unit.estate_id == estate_id)
+    slot = METER_SLOTS.get(meter_type)
+    if slot is not None:
+        free = slot.is_(None)
+        base = base.where(or_(free, Unit.id == include_unit_id) if include_unit_id else free)
+    if after:
+        base = base.where(
+            tuple_(Estate.name, Unit.unit_number, Unit.id) > tuple_(*decode_unit_cursor(after))
         )
-    ).first()
+
+    q = (q or "").strip()
+    if q:
+        term = _like_escape(q.lower())
+        branches = [
+            base.where(func.lower(Unit.unit_number).like(f"{term}%", escape="\\")),
+            base.where(func.lower(Estate.name).like(f"%{term}%", escape="\\")),
+        ]
+        # Each branch is limited on its own before the UNION removes units
+        # matched by both
+        matched = union(
+            *(select(branch.order_by(*order).limit(limit).subquery()) for branch in branches)
+        ).subquery()
+        query = select(matched).order_by(matched.c.estate_name, matched.c.unit_number, matched.c.id)
+    else:
+        query = base.order_by(*order)
+    return query.limit(limit)
+
+
+def search_units_for_meter(
+    q: Optional[str] = None,
+    meter_type: Optional[str] = None,
+    estate_id: Optional[int] = None,
+    include_unit_id: Optional[int] = None,
+    after: Optional[str] = None,
+    per_page: int = 20,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of units for the meter assignment picker.
+
+    ``q`` matches a unit_number prefix (ix_units_unit_number_prefix) or part
+    of the estate name (ix_estates_name_trgm). The two matches run as
+    separate queries, each able to use its own index, combined with UNION;
+    an OR across the join would scan and sort every active unit. With
+    ``meter_type`` only units whose slot for that type is free are
+    returned, plus ``include_unit_id`` (the meter's current unit).
+
+    Pages are keyset-paged on (estate name, unit number, id): ``after`` is
+    the previous page's cursor. No COUNT is run; returns (items,
+    next_cursor), with next_cursor None on the last page.
+    """
+    query = _unit_search_query(q, meter_type, estate_id, include_unit_id, after, per_page + 1)
+    rows = db.session.execute(query).mappings().all()
+    items = [
+        {
+            "id": row["id"],
+            "unit_number": row["unit_number"],
+            "estate_id": row["estate_id"],
+            "estate_name": row["estate_name"] or "",
+            "has_electricity": bool(row["electricity_meter_id"]),
+            "has_water": bool(row["water_meter_id"]),
+            "has_solar": bool(row["solar_meter_id"]),
+            "has_hot_water": bool(row["hot_water_meter_id"]),
+        }
+        for row in rows[:per_page]
+    ]
+    next_cursor = encode_unit_cursor(items[-1]) if len(rows) > per_page else None
+    return items, next_cursor
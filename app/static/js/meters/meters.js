@@ -1,6 +1,7 @@
 const BASE_URL = "/api/v1/meters";
 const API_URL = "/api/v1/api/meters";
-const UNITS_API_URL = "/api/v1/api/meters/units-availability";
+const UNIT_SEARCH_URL = "/api/v1/api/meters/unit-search";
+const UNIT_SEARCH_PAGE_SIZE = 20;
 
 // Global table filter instance
 let metersTableFilter = null;
@@ -164,16 +165,11 @@ function openEditMeterFromData(data) {
   } else {
     form.elements.estate_id.value = "";
   }
-  // Filter units by estate first, then set the unit value
-  filterUnitsByEstate(form);
-  if (data.unit && data.unit.id) {
-    form.elements.unit_id.value = data.unit.id;
-  } else {
-    form.elements.unit_id.value = "";
-  }
+  // Start from the current unit, then fetch the first page of candidates
+  resetUnitPicker(form, data.unit);
   editModal.classList.remove("hidden");
   editModal.classList.add("flex");
-  refreshUnitDisableState(form);
+  loadUnitOptions(form);
 }
 
 // Refresh the table after CRUD operations
@@ -185,50 +181,81 @@ function refreshMetersTable() {
   }
 }
 
-// Refresh unit dropdowns with fresh data from server
-async function refreshUnitDropdowns() {
+let unitSearchTimer = null;
+let unitSearchSeq = 0;
+
+function unitOption(u) {
+  const opt = new Option(`Unit ${u.unit_number} (${u.estate_name || ''})`, u.id);
+  opt.setAttribute('data-estate-id', u.estate_id);
+  return opt;
+}
+
+// Reset the unit picker to just "Unassigned" and the meter's current unit
+function resetUnitPicker(form, unit) {
+  const unitSelect = form.elements.unit_id;
+  const input = document.getElementById("unitSearchInput");
+  if (input) input.value = "";
+  while (unitSelect.options.length > 1) {
+    unitSelect.remove(1);
+  }
+  if (unit && unit.id) {
+    unitSelect.appendChild(unitOption(unit));
+    unitSelect.value = String(unit.id);
+    unitSelect.dataset.currentUnitId = unit.id;
+  } else {
+    unitSelect.value = "";
+    delete unitSelect.dataset.currentUnitId;
+  }
+}
+
+// Fetch one page of assignable units for the search text, estate and meter type.
+// The server only returns units with a free slot for the meter type.
+async function loadUnitOptions(form) {
+  if (!form || !form.elements.unit_id) return;
+  const unitSelect = form.elements.unit_id;
+  const input = document.getElementById("unitSearchInput");
+  const params = new URLSearchParams({ per_page: UNIT_SEARCH_PAGE_SIZE });
+  const q = input ? input.value.trim() : "";
+  if (q) params.set("q", q);
+  if (form.elements.estate_id.value) params.set("estate_id", form.elements.estate_id.value);
+  if (form.elements.meter_type.value) params.set("meter_type", form.elements.meter_type.value);
+  if (unitSelect.dataset.currentUnitId) params.set("unit_id", unitSelect.dataset.currentUnitId);
+
+  // Ignore responses that arrive after a newer search was started
+  const seq = ++unitSearchSeq;
   try {
-    const resp = await fetch(UNITS_API_URL);
-    if (!resp.ok) return;
-    const data = await resp.json();
-    const units = data.units || [];
-
-    // Update both create and edit form dropdowns
-    ['createMeterForm', 'editMeterForm'].forEach(formId => {
-      const form = document.getElementById(formId);
-      if (!form) return;
-      const unitSelect = form.elements.unit_id;
-      if (!unitSelect) return;
-
-      // Preserve current selection
-      const currentValue = unitSelect.value;
-
-      // Clear existing options except the first "Unassigned" option
-      while (unitSelect.options.length > 1) {
-        unitSelect.remove(1);
-      }
-
-      // Add fresh unit options
-      units.forEach(u => {
-        const opt = document.createElement('option');
-        opt.value = u.id;
-        opt.textContent = `Unit ${u.unit_number} (${u.estate_name})`;
-        opt.setAttribute('data-estate-id', u.estate_id);
-        opt.setAttribute('data-has-electricity', u.has_electricity ? '1' : '0');
-        opt.setAttribute('data-has-water', u.has_water ? '1' : '0');
-        opt.setAttribute('data-has-solar', u.has_solar ? '1' : '0');
-        opt.setAttribute('data-has-hot-water', u.has_hot_water ? '1' : '0');
-        unitSelect.appendChild(opt);
-      });
-
-      // Restore selection if it still exists
-      if (currentValue) {
-        unitSelect.value = currentValue;
-      }
-    });
+    const resp = await fetch(`${UNIT_SEARCH_URL}?${params}`);
+    if (!resp.ok || seq !== unitSearchSeq) return;
+    const result = await resp.json();
+    if (seq !== unitSearchSeq) return;
+    const units = result.data || [];
+
+    // Keep the selected unit even when it is not on this page of results
+    const selected = unitSelect.value;
+    const selectedOption = selected ? unitSelect.options[unitSelect.selectedIndex] : null;
+    while (unitSelect.options.length > 1) {
+      unitSelect.remove(1);
+    }
+    units.forEach((u) => unitSelect.appendChild(unitOption(u)));
+    if (selectedOption && !units.some((u) => String(u.id) === selected)) {
+      unitSelect.appendChild(selectedOption);
+    }
+    unitSelect.value = selected;
+    document.getElementById("unitSearchHint")?.classList.toggle("hidden", !result.has_more);
   } catch (e) {
-    console.error('Error refreshing unit dropdowns:', e);
+    console.error('Error searching units:', e);
+  }
+}
+
+// Drop a selected unit that belongs to another estate, then search again
+function onUnitFiltersChanged(form) {
+  const unitSelect = form.elements.unit_id;
+  const estateId = form.elements.estate_id.value;
+  const selectedOption = unitSelect.value ? unitSelect.options[unitSelect.selectedIndex] : null;
+  if (estateId && selectedOption && selectedOption.getAttribute("data-estate-id") !== estateId) {
+    unitSelect.value = "";
   }
+  loadUnitOptions(form);
 }
 
 function openEditMeter(btn) {
@@ -251,16 +278,11 @@ function openEditMeter(btn) {
   } else {
     form.elements.estate_id.value = "";
   }
-  // Filter units by estate first, then set the unit value
-  filterUnitsByEstate(form);
-  if (data.unit && data.unit.id) {
-    form.elements.unit_id.value = data.unit.id;
-  } else {
-    form.elements.unit_id.value = "";
-  }
+  // Start from the current unit, then fetch the first page of candidates
+  resetUnitPicker(form, data.unit);
   editModal.classList.remove("hidden");
   editModal.classList.add("flex");
-  refreshUnitDisableState(form);
+  loadUnitOptions(form);
 }
 
 function hideEditMeter() {
@@ -284,66 +306,23 @@ function hideDeleteMeter() {
   deleteModal.classList.remove("flex");
 }
 
-function refreshUnitDisableState(scope) {
-  const form = scope || document.getElementById("editMeterForm");
-  if (!form || !form.elements.meter_type || !form.elements.unit_id) return;
-  const type = form.elements.meter_type.value;
-  const unitSelect = form.elements.unit_id;
-  Array.from(unitSelect.options).forEach((opt) => {
-    if (!opt.value) return;
-    const hasElec = opt.getAttribute("data-has-electricity") === "1";
-    const hasWater = opt.getAttribute("data-has-water") === "1";
-    const hasSolar = opt.getAttribute("data-has-solar") === "1";
-    const hasHotWater = opt.getAttribute("data-has-hot-water") === "1";
-    let disabled = false;
-    if (type === "electricity" && hasElec) disabled = true;
-    if (type === "water" && hasWater) disabled = true;
-    if (type === "solar" && hasSolar) disabled = true;
-    if (type === "hot_water" && hasHotWater) disabled = true;
-    opt.disabled = disabled;
-  });
-}
-
-// Filter units dropdown by selected estate
-function filterUnitsByEstate(form) {
-  const estateSelect = form.elements.estate_id;
-  const unitSelect = form.elements.unit_id;
-  const selectedEstateId = estateSelect.value;
-  const currentUnitId = unitSelect.value;
-
-  // Show/hide unit options based on estate
-  Array.from(unitSelect.options).forEach((opt) => {
-    if (!opt.value) {
-      // Always show the "-- Unassigned --" option
-      opt.style.display = "";
-      return;
-    }
-    const optEstateId = opt.getAttribute("data-estate-id");
-    if (!selectedEstateId || optEstateId === selectedEstateId) {
-      opt.style.display = "";
-    } else {
-      opt.style.display = "none";
-      // If currently selected unit is now hidden, reset selection
-      if (opt.value === currentUnitId) {
-        unitSelect.value = "";
-      }
-    }
-  });
-
-  // Also refresh the disable state based on meter type
-  refreshUnitDisableState(form);
-}
-
 document
   .getElementById("editMeterForm")
   ?.elements.meter_type?.addEventListener("change", () =>
-    refreshUnitDisableState(document.getElementById("editMeterForm"))
+    onUnitFiltersChanged(document.getElementById("editMeterForm"))
   );
 document
   .getElementById("editMeterForm")
   ?.elements.estate_id?.addEventListener("change", () =>
-    filterUnitsByEstate(document.getElementById("editMeterForm"))
+    onUnitFiltersChanged(document.getElementById("editMeterForm"))
   );
+document.getElementById("unitSearchInput")?.addEventListener("input", () => {
+  clearTimeout(unitSearchTimer);
+  unitSearchTimer = setTimeout(
+    () => loadUnitOptions(document.getElementById("editMeterForm")),
+    300
+  );
+});
 
 async function submitEditMeter() {
   const form = document.getElementById("editMeterForm");
@@ -362,12 +341,11 @@ async function submitEditMeter() {
     const result = await resp.json();
 
     if (resp.ok) {
-      // Success - hide modal and refresh table and unit dropdowns
+      // Success - hide modal and refresh table
       hideEditMeter();
       const successMessage = result.message || "Meter updated successfully";
       showFlashMessage(successMessage, "success", false);
       refreshMetersTable();
-      refreshUnitDropdowns();
     } else {
       // Error - show message immediately WITHOUT reload
       const errorMessage = result.error || result.message || "Failed to update meter. Please try again.";
@@ -390,11 +368,10 @@ async function performDeleteMeter() {
     const result = await resp.json();
 
     if (resp.ok && result.success) {
-      // Success - hide modal and refresh table and unit dropdowns
+      // Success - hide modal and refresh table
       hideDeleteMeter();
       showFlashMessage("Meter deleted successfully", "success", false);
       refreshMetersTable();
-      refreshUnitDropdowns();
     } else {
       // Error - show message immediately WITHOUT reload
       hideDeleteMeter();
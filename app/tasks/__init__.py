@@ -2,7 +2,9 @@
 from .notification_tasks import (
     check_low_credit_wallets,
     check_critical_credit_wallets,
+    send_low_credit_shard,
     analyze_high_usage,
+    analyze_high_usage_shard,
     send_topup_notification,
     send_purchase_notification,
 )
@@ -10,15 +12,36 @@ from .payment_tasks import (
     expire_stale_payfast_transactions,
     send_topup_receipt_email,
     reconcile_payfast_transactions,
+    reconcile_payfast_shard,
+    finish_payfast_reconciliation,
+)
+from .fanout import aggregate_shard_results
+from .maintenance_tasks import maintain_meter_reading_partitions
+from .consumption_tasks import bill_unbilled_readings, dispatch_consumption_billing
+from .report_tasks import (
+    generate_report,
+    purge_expired_report_artifacts,
+    refresh_dashboard_snapshots,
 )
 
 __all__ = [
     'check_low_credit_wallets',
     'check_critical_credit_wallets',
+    'send_low_credit_shard',
     'analyze_high_usage',
+    'analyze_high_usage_shard',
     'send_topup_notification',
     'send_purchase_notification',
     'expire_stale_payfast_transactions',
     'send_topup_receipt_email',
     'reconcile_payfast_transactions',
+    'reconcile_payfast_shard',
+    'finish_payfast_reconciliation',
+    'aggregate_shard_results',
+    'maintain_meter_reading_partitions',
+    'bill_unbilled_readings',
+    'dispatch_consumption_billing',
+    'generate_report',
+    'purge_expired_report_artifacts',
+    'refresh_dashboard_snapshots',
 ]
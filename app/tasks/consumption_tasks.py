@@ -0,0 +1,59 @@
+"""Celery tasks for consumption billing.
+
+Prices unbilled meter readings and debits unit wallets. Billing batches
+claim readings with SKIP LOCKED, so several workers can drain the backlog
+in parallel without double-billing.
+"""
+from celery import group, shared_task
+from celery.utils.log import get_task_logger
+
+from app.utils.task_lock import single_instance
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def bill_unbilled_readings(self):
+    """Bill unbilled meter readings in batches until none are left.
+
+    Each batch of ``BILLING_BATCH_SIZE`` readings is billed and committed
+    on its own. The run stops after ``BILLING_RUN_SECONDS`` so it finishes
+    well inside the worker time limit; whatever is left is picked up by
+    the next run.
+    """
+    from flask import current_app
+    from app.services.consumption_billing import bill_unbilled_readings as run_billing
+
+    config = current_app.config
+    try:
+        totals = run_billing(
+            batch_size=config.get("BILLING_BATCH_SIZE", 5000),
+            time_budget=config.get("BILLING_RUN_SECONDS", 240),
+        )
+    except Exception as exc:
+        logger.error("Consumption billing failed: %s", exc)
+        raise self.retry(exc=exc)
+
+    if totals["readings"]:
+        logger.info(
+            "Billed %s readings in %s batches: %s transactions, R%.2f",
+            totals["readings"],
+            totals["batches"],
+            totals["transactions"],
+            totals["amount"],
+        )
+    return totals
+
+
+@shared_task
+@single_instance(cooldown=300)
+def dispatch_consumption_billing():
+    """Start ``BILLING_WORKERS`` billing runs in parallel.
+
+    Runs every 15 minutes via Celery Beat.
+    """
+    from flask import current_app
+
+    workers = max(1, current_app.config.get("BILLING_WORKERS", 4))
+    group(bill_unbilled_readings.s() for _ in range(workers)).apply_async()
+    return {"workers": workers}
@@ -0,0 +1,117 @@
+"""Estate-sharded fan-out for nightly Celery jobs.
+
+A beat-scheduled coordinator splits its work into shards (groups of estate
+ids, or of row ids), dispatches one shard task per shard as a Celery
+``group`` on the job's queue, and a ``chord`` callback merges the shard
+results. Adding workers to a queue then shortens the run instead of the
+whole job racing the worker time limit.
+
+When the coordinator runs under ``single_instance`` its lease is handed on
+to the shards and the callback (see app/utils/task_lock.py): every shard
+task takes a ``lease`` keyword and calls keep_lease(lease) first, and the
+callback releases it, so the next scheduled run is skipped until this one
+has finished rather than only until it was dispatched.
+
+Shard tasks must be idempotent: a retried or re-run shard recomputes its
+work from current database state (notifications are deduplicated per
+recipient per day), so nothing is done twice. A shard that exhausts its
+retries reports itself failed rather than raising, so the callback still
+aggregates the shards that did finish and the next scheduled run picks
+up what was missed.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from celery import chord, group, shared_task
+from celery.utils.log import get_task_logger
+
+logger = get_task_logger(__name__)
+
+
+def chunked(ids: Iterable[int], size: int) -> List[List[int]]:
+    """Split ``ids`` into consecutive lists of at most ``size`` ids."""
+    ids = list(ids)
+    size = max(1, size)
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
+
+def estate_shards(size: Optional[int] = None) -> List[List[int]]:
+    """Every estate id, ordered, in shards of ``FANOUT_ESTATES_PER_SHARD``."""
+    from flask import current_app
+    from sqlalchemy import select
+    from app.db import db
+    from app.models import Estate
+
+    size = size or current_app.config.get("FANOUT_ESTATES_PER_SHARD", 10)
+    ids = db.session.execute(select(Estate.id).order_by(Estate.id)).scalars()
+    return chunked(ids, size)
+
+
+def fan_out(job: str, shard_task, shards: List[Any], queue: str, callback=None, **kwargs) -> Dict[str, Any]:
+    """Run ``shard_task(shard, **kwargs)`` for every shard, then ``callback``.
+
+    The callback (default aggregate_shard_results) receives the list of
+    shard results and ``job``. Inside a single_instance task, the shards
+    and the callback also get the task's ``lease``. Returns a summary for
+    the coordinator.
+    """
+    from app.utils.task_lock import hand_off
+
+    if not shards:
+        logger.info("%s: nothing to shard", job)
+        return {"job": job, "status": "empty", "shards": 0}
+
+    callback = callback or aggregate_shard_results
+    lease = hand_off()
+    if lease:
+        kwargs["lease"] = lease
+    header = group(shard_task.s(shard, **kwargs).set(queue=queue) for shard in shards)
+    result = chord(header)(callback.s(job, lease=lease).set(queue=queue))
+    logger.info("%s: dispatched %s shards on %s", job, len(shards), queue)
+    return {"job": job, "status": "dispatched", "shards": len(shards), "result_id": result.id}
+
+
+def shard_failed(task, exc: Exception, job: str, shard: Any) -> Dict[str, Any]:
+    """Retry a failing shard; once retries are exhausted, report it failed.
+
+    Call from a shard task's ``except`` block as ``return shard_failed(...)``.
+    """
+    if task.request.retries < task.max_retries:
+        raise task.retry(exc=exc)
+    logger.error("%s: shard %s failed after %s retries: %s", job, shard, task.max_retries, exc)
+    return {"status": "failed", "shards_failed": 1, "failed": [shard]}
+
+
+def merge_shard_results(results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Combine shard result dicts: numbers are summed and lists concatenated.
+
+    ``shards`` counts the results and ``shards_failed`` the failed ones;
+    other values keep the first shard's.
+    """
+    merged: Dict[str, Any] = {"shards": 0, "shards_failed": 0}
+    for result in results:
+        merged["shards"] += 1
+        for key, value in (result or {}).items():
+            if key in ("status", "shards"):
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float, list)):
+                merged.setdefault(key, value)
+            elif key in merged:
+                merged[key] += value
+            else:
+                merged[key] = list(value) if isinstance(value, list) else value
+    merged["status"] = "partial" if merged["shards_failed"] else "success"
+    return merged
+
+
+@shared_task
+def aggregate_shard_results(results, job, lease=None):
+    """Chord callback: merge and log the results of one fan-out run."""
+    from app.utils.task_lock import release_lease
+
+    try:
+        merged = merge_shard_results(results)
+        log = logger.warning if merged["shards_failed"] else logger.info
+        log("%s complete: %s", job, {k: v for k, v in merged.items() if not isinstance(v, list)})
+        return merged
+    finally:
+        release_lease(lease)
@@ -0,0 +1,44 @@
+"""Celery tasks for database maintenance.
+
+Keeps the monthly meter_readings partitions ahead of incoming data and
+applies the reading retention policy.
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from app.utils.task_lock import single_instance
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=300)
+@single_instance(cooldown=3600)
+def maintain_meter_reading_partitions(self):
+    """Create future meter_readings partitions and expire old ones.
+
+    Runs daily at 1 AM via Celery Beat. Creates partitions up to
+    ``READING_PARTITION_MONTHS_AHEAD`` months ahead so inserts never fall
+    into the default partition, then detaches (or drops, when
+    ``READING_RETENTION_DROP`` is set) partitions older than
+    ``READING_RETENTION_MONTHS``. Does nothing when meter_readings is not
+    partitioned (e.g. SQLite in development).
+    """
+    from flask import current_app
+    from app.services.reading_partitions import ensure_partitions, expire_partitions
+
+    config = current_app.config
+    try:
+        created = ensure_partitions(config.get("READING_PARTITION_MONTHS_AHEAD", 3))
+        expired = expire_partitions(
+            config.get("READING_RETENTION_MONTHS", 0),
+            drop=config.get("READING_RETENTION_DROP", False),
+        )
+    except Exception as exc:
+        logger.error("meter_readings partition maintenance failed: %s", exc)
+        raise self.retry(exc=exc)
+
+    if created or expired:
+        logger.info(
+            "meter_readings partitions: created %s, expired %s", created, expired
+        )
+    return {"created": created, "expired": expired}
@@ -6,189 +6,150 @@ These tasks handle:
 - High usage analysis
 - Real-time notification delivery
 """
+from datetime import datetime
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
 
+from ..utils.task_lock import single_instance
+
 logger = get_task_logger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@single_instance(cooldown=3600)
 def check_low_credit_wallets(self):
     """
     Scheduled task to check all wallets for low credit.
     Runs nightly at 6 AM.
 
-    Creates notifications for wallets below their threshold.
+    Fans out one send_low_credit_shard per group of estates; critical
+    balances are handled by check_critical_credit_wallets.
     """
-    from ..services.notification_service import NotificationService
+    from .fanout import estate_shards, fan_out
 
     logger.info("Starting low credit wallet check...")
 
     try:
-        low_credit_wallets = NotificationService.get_wallets_below_threshold()
-        notifications_created = 0
-
-        for item in low_credit_wallets:
-            wallet = item['wallet']
-            threshold = item['threshold']
-            is_critical = item['is_critical']
-
-            # Skip critical ones - they're handled by check_critical_credit_wallets
-            if is_critical:
-                continue
-
-            notification = NotificationService.notify_low_credit(
-                wallet=wallet,
-                threshold=threshold,
-                is_critical=False
-            )
-
-            if notification:
-                notifications_created += 1
-                logger.info(
-                    f"Created low credit notification for wallet {wallet.id} "
-                    f"(balance: {item['balance']}, threshold: {threshold})"
-                )
-
-        logger.info(
-            f"Low credit check complete. "
-            f"Checked {len(low_credit_wallets)} wallets, "
-            f"created {notifications_created} notifications."
+        return fan_out(
+            'low_credit', send_low_credit_shard, estate_shards(), 'notifications',
+            is_critical=False, now=datetime.utcnow().isoformat(),
         )
-
-        return {
-            'status': 'success',
-            'wallets_checked': len(low_credit_wallets),
-            'notifications_created': notifications_created,
-        }
-
     except Exception as e:
         logger.error(f"Error in low credit check: {str(e)}")
         raise self.retry(exc=e)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@single_instance(cooldown=3600)
 def check_critical_credit_wallets(self):
     """
     Scheduled task to check for critically low credit wallets.
     Runs every 4 hours.
 
-    Creates urgent notifications for wallets with very low balance.
+    Fans out one send_low_credit_shard per group of estates.
     """
-    from ..services.notification_service import NotificationService
+    from .fanout import estate_shards, fan_out
 
     logger.info("Starting critical credit wallet check...")
 
     try:
-        low_credit_wallets = NotificationService.get_wallets_below_threshold()
-        notifications_created = 0
-
-        for item in low_credit_wallets:
-            if not item['is_critical']:
-                continue
+        return fan_out(
+            'critical_credit', send_low_credit_shard, estate_shards(), 'notifications',
+            is_critical=True, now=datetime.utcnow().isoformat(),
+        )
+    except Exception as e:
+        logger.error(f"Error in critical credit check: {str(e)}")
+        raise self.retry(exc=e)
 
-            wallet = item['wallet']
-            threshold = item['threshold']
 
-            notification = NotificationService.notify_low_credit(
-                wallet=wallet,
-                threshold=threshold,
-                is_critical=True
-            )
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_low_credit_shard(self, estate_ids, is_critical, now, lease=None):
+    """
+    Low (or critical) credit notifications for one shard of estates.
 
-            if notification:
-                notifications_created += 1
-                logger.warning(
-                    f"Created CRITICAL credit notification for wallet {wallet.id} "
-                    f"(balance: {item['balance']})"
-                )
+    ``now`` is the coordinator's start time, so a retried shard still
+    deduplicates against the same day's notifications.
+    """
+    from ..services.notification_service import NotificationService
+    from ..utils.task_lock import keep_lease
+    from .fanout import shard_failed
 
-        logger.info(
-            f"Critical credit check complete. "
-            f"Created {notifications_created} urgent notifications."
+    keep_lease(lease)
+    job = 'critical_credit' if is_critical else 'low_credit'
+    try:
+        result = NotificationService.send_low_credit_notifications(
+            is_critical=is_critical,
+            now=datetime.fromisoformat(now),
+            estate_ids=estate_ids,
         )
-
-        return {
-            'status': 'success',
-            'notifications_created': notifications_created,
-        }
-
     except Exception as e:
-        logger.error(f"Error in critical credit check: {str(e)}")
-        raise self.retry(exc=e)
+        return shard_failed(self, e, job, estate_ids)
+
+    if is_critical and result['notifications_created']:
+        logger.warning(
+            f"Created {result['notifications_created']} CRITICAL credit notifications "
+            f"for {result['wallets_matched']} wallets in estates {estate_ids}"
+        )
+    return {
+        'status': 'success',
+        'wallets_checked': result['wallets_matched'],
+        'notifications_created': result['notifications_created'],
+    }
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@single_instance(cooldown=3600)
 def analyze_high_usage(self):
     """
     Scheduled task to analyze usage patterns and detect anomalies.
     Runs nightly at 7 AM.
 
-    Creates notifications for units with unusually high usage.
+    Fans out one analyze_high_usage_shard per group of estates.
     """
-    from ..services.notification_service import NotificationService
-    from ..models import Meter, Wallet, Unit
+    from .fanout import estate_shards, fan_out
 
     logger.info("Starting high usage analysis...")
 
     try:
-        high_usage_items = NotificationService.get_high_usage_units(
-            threshold_percentage=50.0  # Flag if 50% above average
+        return fan_out(
+            'high_usage', analyze_high_usage_shard, estate_shards(), 'notifications',
+            now=datetime.utcnow().isoformat(),
         )
-        notifications_created = 0
-
-        for item in high_usage_items:
-            meter_id = item['meter_id']
-            meter = Meter.query.get(meter_id)
-
-            if not meter or not meter.unit_id:
-                continue
-
-            # Get wallet for this unit
-            wallet = Wallet.query.filter_by(unit_id=meter.unit_id).first()
-            if not wallet:
-                continue
-
-            # Determine utility type from meter type
-            utility_type = 'electricity'  # Default
-            if meter.meter_type:
-                if 'water' in meter.meter_type.lower():
-                    utility_type = 'water'
-                elif 'solar' in meter.meter_type.lower():
-                    utility_type = 'solar'
-                elif 'gas' in meter.meter_type.lower():
-                    utility_type = 'gas'
-
-            notification = NotificationService.notify_high_usage(
-                wallet=wallet,
-                utility_type=utility_type,
-                current_usage=item['current_usage'],
-                average_usage=item['average_usage'],
-                percentage_increase=item['percentage_increase']
-            )
+    except Exception as e:
+        logger.error(f"Error in high usage analysis: {str(e)}")
+        raise self.retry(exc=e)
 
-            if notification:
-                notifications_created += 1
-                logger.info(
-                    f"Created high usage notification for meter {meter_id} "
-                    f"({item['percentage_increase']:.0f}% above average)"
-                )
 
-        logger.info(
-            f"High usage analysis complete. "
-            f"Analyzed {len(high_usage_items)} meters, "
-            f"created {notifications_created} notifications."
-        )
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def analyze_high_usage_shard(self, estate_ids, now, lease=None):
+    """
+    High usage detection and notifications for one shard of estates.
 
-        return {
-            'status': 'success',
-            'meters_flagged': len(high_usage_items),
-            'notifications_created': notifications_created,
-        }
+    ``now`` is the coordinator's start time, so every shard (and retry)
+    evaluates the same day.
+    """
+    from ..services.notification_service import NotificationService
+    from ..utils.task_lock import keep_lease
+    from .fanout import shard_failed
 
+    keep_lease(lease)
+    now = datetime.fromisoformat(now)
+    try:
+        high_usage_items = NotificationService.get_high_usage_units(
+            threshold_percentage=50.0,  # Flag if 50% above average
+            now=now,
+            estate_ids=estate_ids,
+        )
+        result = NotificationService.send_high_usage_notifications(high_usage_items, now=now)
     except Exception as e:
-        logger.error(f"Error in high usage analysis: {str(e)}")
-        raise self.retry(exc=e)
+        return shard_failed(self, e, 'high_usage', estate_ids)
+
+    return {
+        'status': 'success',
+        'meters_flagged': result['meters_flagged'],
+        'notifications_created': result['notifications_created'],
+    }
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
@@ -1,11 +1,14 @@
 """Celery tasks for payment processing.
 
-Handles expiry of stale pending PayFast transactions and receipt emails.
+Handles expiry of stale pending PayFast transactions, the sharded daily
+reconciliation, and receipt emails.
 """
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from datetime import datetime, timedelta
 
+from app.utils.task_lock import keep_lease, release_lease, single_instance
+
 logger = get_task_logger(__name__)
 
 
@@ -71,6 +74,7 @@ def send_topup_receipt_email(self, wallet_id: int, amount: float,
 
 
 @shared_task(bind=True, max_retries=1, default_retry_delay=60)
+@single_instance(cooldown=600)
 def expire_stale_payfast_transactions(self):
     """Mark pending PayFast transactions older than 1 hour as expired.
 
@@ -103,30 +107,67 @@ def expire_stale_payfast_transactions(self):
 
 
 @shared_task(bind=True, max_retries=1, default_retry_delay=120)
+@single_instance(cooldown=3600)
 def reconcile_payfast_transactions(self):
     """Daily reconciliation of PayFast transactions.
 
     Checks all PayFast transactions from the last 48 hours that have a
     ``payment_gateway_ref`` against the PayFast validate endpoint.
 
+    The transactions are split into shards of FANOUT_TRANSACTIONS_PER_SHARD
+    ids, each checked by reconcile_payfast_shard; finish_payfast_reconciliation
+    merges the shard results. Runs daily at midnight via Celery Beat.
+    """
+    from flask import current_app
+    from sqlalchemy import select
+    from app.db import db
+    from app.models.transaction import Transaction
+    from app.tasks.fanout import chunked, fan_out
+
+    cutoff = datetime.utcnow() - timedelta(hours=48)
+    try:
+        # Get all PayFast transactions from the last 48 hours
+        ids = db.session.execute(
+            select(Transaction.id)
+            .where(
+                Transaction.payment_gateway == "payfast",
+                Transaction.created_at >= cutoff,
+            )
+            .order_by(Transaction.id)
+        ).scalars()
+        # One (empty) shard when there is nothing to check, so the daily
+        # summary notification is still written
+        shards = chunked(ids, current_app.config.get("FANOUT_TRANSACTIONS_PER_SHARD", 200)) or [[]]
+        return fan_out(
+            "payfast_reconciliation",
+            reconcile_payfast_shard,
+            shards,
+            "payments",
+            callback=finish_payfast_reconciliation,
+        )
+    except Exception as exc:
+        logger.error("PayFast reconciliation dispatch failed: %s", exc)
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=1, default_retry_delay=120)
+def reconcile_payfast_shard(self, transaction_ids, lease=None):
+    """Reconcile one shard of PayFast transactions.
+
     Auto-fixes:
     - PayFast says VALID but local is pending/failed → credit wallet + complete.
 
     Flags:
     - PayFast says INVALID but local is completed → mismatch flagged.
 
-    Creates an in-app Notification for admin users with the summary.
-    Runs daily at midnight via Celery Beat.
+    Completed transactions are never credited again, so a retried shard
+    only fixes what is still pending.
     """
-    import json
     from flask import current_app
-    from app.db import db
     from app.models.transaction import Transaction
-    from app.models.notification import Notification
-    from app.utils.payfast import verify_itn_with_payfast
-    from app.routes.payfast import _complete_transaction
+    from app.tasks.fanout import shard_failed
 
-    cutoff = datetime.utcnow() - timedelta(hours=48)
+    keep_lease(lease)
     validate_url = current_app.config.get("PAYFAST_VALIDATE_URL")
     is_sandbox = current_app.config.get("PAYFAST_SANDBOX", True)
 
@@ -134,11 +175,24 @@ def reconcile_payfast_transactions(self):
     # transactions.  Skip server-to-server verify and just report status.
     skip_verify = is_sandbox
 
-    # Get all PayFast transactions from the last 48 hours
-    txns = Transaction.query.filter(
-        Transaction.payment_gateway == "payfast",
-        Transaction.created_at >= cutoff,
-    ).all()
+    try:
+        txns = (
+            Transaction.query.filter(Transaction.id.in_(transaction_ids))
+            .order_by(Transaction.id)
+            .all()
+        )
+        return _reconcile_payfast(txns, validate_url, skip_verify)
+    except Exception as exc:
+        return shard_failed(self, exc, "payfast_reconciliation", transaction_ids)
+
+
+def _reconcile_payfast(txns, validate_url, skip_verify):
+    """Check ``txns`` against PayFast and return the reconciliation counts."""
+    import json
+    from app.db import db
+    from app.utils.payfast import verify_itn_with_payfast
+    from app.routes.payfast import _complete_transaction
+    from app.utils.report_cache import invalidate_for_wallets
 
     results = {
         "total_checked": 0,
@@ -197,6 +251,7 @@ def reconcile_payfast_transactions(self):
                                 txn.reconciled = True
                                 txn.reconciled_at = datetime.utcnow()
                                 db.session.commit()
+                                invalidate_for_wallets([txn.wallet_id])
                                 results["auto_fixed"] += 1
                                 results["details"].append({
                                     "txn": txn.transaction_number,
@@ -224,6 +279,25 @@ def reconcile_payfast_transactions(self):
         elif txn.status in ("pending", "failed"):
             results["pending_no_ref"] += 1
 
+    return results
+
+
+@shared_task
+def finish_payfast_reconciliation(shard_results, job, lease=None):
+    """Chord callback: merge the shard results and notify admins.
+
+    Creates an in-app Notification for admin users with the summary.
+    """
+    from app.db import db
+    from app.models.notification import Notification
+    from app.tasks.fanout import merge_shard_results
+
+    results = merge_shard_results(shard_results)
+    for key in ("total_checked", "already_completed", "auto_fixed", "mismatches",
+                "pending_no_ref", "errors"):
+        results.setdefault(key, 0)
+    results.setdefault("details", [])
+
     # Create admin notification with summary
     summary_parts = [
         f"Checked {results['total_checked']} PayFast txn(s) (last 48h).",
@@ -236,8 +310,10 @@ def reconcile_payfast_transactions(self):
         summary_parts.append(f"{results['pending_no_ref']} pending without PayFast reference.")
     if results["errors"]:
         summary_parts.append(f"{results['errors']} error(s) during reconciliation.")
+    if results["shards_failed"]:
+        summary_parts.append(f"{results['shards_failed']} shard(s) could not be checked.")
 
-    if results["auto_fixed"] or results["mismatches"] or results["errors"]:
+    if results["auto_fixed"] or results["mismatches"] or results["errors"] or results["shards_failed"]:
         priority = "high"
     else:
         priority = "low"
@@ -259,5 +335,6 @@ def reconcile_payfast_transactions(self):
     except Exception as e:
         logger.error("Failed to create reconciliation notification: %s", e)
 
-    logger.info("PayFast reconciliation complete: %s", results)
+    release_lease(lease)
+    logger.info("%s complete: %s", job, results)
     return results
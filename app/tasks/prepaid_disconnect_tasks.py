@@ -14,33 +14,64 @@ from celery import shared_task
 from celery.utils.log import get_task_logger
 from datetime import datetime
 
+from ..utils.task_lock import single_instance
+
 logger = get_task_logger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@single_instance(cooldown=3600)
 def disconnect_zero_balance_meters(self):
     """
     Scheduled task to disconnect electricity meters with zero or negative credit.
     Runs daily at 6 AM.
 
+    Fans out one disconnect_zero_balance_shard per group of estates; the
+    shard results are merged by the fan-out chord callback.
+
+    Returns:
+        dict: Summary of the shards dispatched
+    """
+    from .fanout import estate_shards, fan_out
+
+    logger.info("=" * 60)
+    logger.info("Starting zero balance meter disconnect check...")
+    logger.info(f"Timestamp: {datetime.now().isoformat()}")
+    logger.info("=" * 60)
+
+    try:
+        return fan_out(
+            'zero_balance_disconnect', disconnect_zero_balance_shard, estate_shards(), 'prepaid'
+        )
+    except Exception as e:
+        logger.error(f"Error in zero balance disconnect check: {str(e)}")
+        raise self.retry(exc=e)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def disconnect_zero_balance_shard(self, estate_ids, lease=None):
+    """
+    Disconnect zero balance electricity meters in one shard of estates.
+
     This task:
-    1. Finds all electricity meters linked to units with zero/negative wallet balance
+    1. Finds the shard's electricity meters linked to units with zero/negative wallet balance
     2. Filters for meters that have device_eui (LoRaWAN controllable)
     3. Sends relay OFF command to disconnect power
     4. Logs all actions for audit trail
 
+    Balances are re-read on every run, so a retried shard only acts on
+    meters that are still at zero.
+
     Returns:
         dict: Summary of meters checked and disconnected
     """
     from ..models import Meter, Unit, Wallet
     from ..services.chirpstack_service import send_relay_command
     from ..db import db
+    from ..utils.task_lock import keep_lease
+    from .fanout import shard_failed
 
-    logger.info("=" * 60)
-    logger.info("Starting zero balance meter disconnect check...")
-    logger.info(f"Timestamp: {datetime.now().isoformat()}")
-    logger.info("=" * 60)
-
+    keep_lease(lease)
     try:
         # Find all units with electricity meters that have zero or negative balance
         # Join: Unit -> Wallet (for balance) and Unit -> Meter (for device_eui)
@@ -53,11 +84,15 @@ def disconnect_zero_balance_meters(self):
                 Meter.device_eui.isnot(None),     # Has LoRaWAN device
                 Meter.is_active == True,          # Meter is active
                 Unit.is_active == True,           # Unit is active
+                Unit.estate_id.in_(estate_ids),   # This shard's estates
             )
             .all()
         )
 
-        logger.info(f"Found {len(zero_balance_units)} meters with zero/negative balance")
+        logger.info(
+            f"Found {len(zero_balance_units)} meters with zero/negative balance "
+            f"in estates {estate_ids}"
+        )
 
         meters_processed = 0
         meters_disconnected = 0
@@ -123,12 +158,10 @@ def disconnect_zero_balance_meters(self):
 
             disconnect_details.append(detail)
 
-        logger.info("=" * 60)
-        logger.info("Zero balance disconnect check complete.")
-        logger.info(f"  Meters processed: {meters_processed}")
-        logger.info(f"  Meters disconnected: {meters_disconnected}")
-        logger.info(f"  Meters failed: {meters_failed}")
-        logger.info("=" * 60)
+        logger.info(
+            f"Zero balance shard {estate_ids}: processed {meters_processed}, "
+            f"disconnected {meters_disconnected}, failed {meters_failed}"
+        )
 
         return {
             'status': 'success',
@@ -141,8 +174,7 @@ def disconnect_zero_balance_meters(self):
         }
 
     except Exception as e:
-        logger.error(f"Error in zero balance disconnect check: {str(e)}")
-        raise self.retry(exc=e)
+        return shard_failed(self, e, 'zero_balance_disconnect', estate_ids)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
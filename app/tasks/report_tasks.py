@@ -0,0 +1,77 @@
+"""Celery tasks for background report generation.
+
+Renders CSV/PDF report artifacts off the web workers and expires them once
+their reuse window has passed, and keeps the dashboard snapshots fresh.
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from app.utils.task_lock import single_instance
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True, time_limit=1800, soft_time_limit=1740)
+def generate_report(self, job_id):
+    """Render one queued ReportJob to REPORT_STORAGE_DIR.
+
+    Rendering failures are recorded on the job (status ``failed``) and not
+    retried; the user can request the report again.
+    """
+    from app.services.report_jobs import run_report_job
+
+    try:
+        job = run_report_job(job_id)
+    except Exception as exc:
+        logger.error("Report job %s failed: %s", job_id, exc)
+        return {"job_id": job_id, "status": "failed"}
+
+    if job is None:
+        logger.warning("Report job %s not found", job_id)
+        return {"job_id": job_id, "status": "missing"}
+    return {"job_id": job_id, "status": job.status}
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=300)
+@single_instance(cooldown=600)
+def purge_expired_report_artifacts(self):
+    """Delete report artifacts past REPORT_ARTIFACT_TTL.
+
+    Runs hourly via Celery Beat. Also fails jobs that have been pending or
+    running longer than REPORT_JOB_TIMEOUT so they are no longer reused.
+    """
+    from app.services.report_jobs import purge_expired_jobs
+
+    try:
+        result = purge_expired_jobs()
+    except Exception as exc:
+        logger.error("Report artifact purge failed: %s", exc)
+        raise self.retry(exc=exc)
+
+    if result["expired"] or result["abandoned"]:
+        logger.info(
+            "Report jobs: expired %s artifacts, failed %s abandoned jobs",
+            result["expired"],
+            result["abandoned"],
+        )
+    return result
+
+
+@shared_task(bind=True, max_retries=1, default_retry_delay=60)
+@single_instance(cooldown=60)
+def refresh_dashboard_snapshots(self):
+    """Recompute the dashboard snapshot of every estate and period.
+
+    Runs every 5 minutes via Celery Beat so the dashboard reads one
+    precomputed row instead of aggregating on each request.
+    """
+    from app.services.dashboard_metrics import refresh_snapshots
+
+    try:
+        written = refresh_snapshots()
+    except Exception as exc:
+        logger.error("Dashboard snapshot refresh failed: %s", exc)
+        raise self.retry(exc=exc)
+
+    logger.info("Refreshed %s dashboard snapshots", written)
+    return {"snapshots": written}
@@ -0,0 +1,322 @@
+"""
+LoRaWAN payload decoders keyed by Meter.lorawan_device_type.
+
+Each decoder turns one raw uplink frame (the bytes behind
+MeterReading.raw_payload) into a dict of MeterReading column values.
+Fixed-width fields are unpacked with precompiled struct.Struct objects, and
+decode_batch() looks the decoder up once and walks a whole list of frames in
+a single pass, so re-decoding stored payloads is a bulk operation.
+
+Supported device types:
+- milesight_em300: Milesight EM300-DI pulse counter (channel/type TLV)
+- qalcosonic_w1:   Axioma Qalcosonic W1 ultrasonic water meter
+- eastron_sdm:     Eastron SDM320C/SDM630 via Milesight UC100 Modbus bridge
+- ivy_em114:       IVY EM114039-02 onboard LoRaWAN (Modbus RTU response)
+"""
+from __future__ import annotations
+
+import struct
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Pulses per kWh (electricity/solar) or per m³ (water) when the meter has no
+# pulse_factor of its own.
+DEFAULT_PULSE_FACTOR = 1000.0
+
+# Precompiled layouts shared by the decoders
+_U8 = struct.Struct("<B")
+_I16_LE = struct.Struct("<h")
+_U16_LE = struct.Struct("<H")
+_U32_LE = struct.Struct("<I")
+_F32_LE = struct.Struct("<f")
+
+# Cumulative uint32 registers wrap after this many counts
+_U32_MAX = 2 ** 32
+
+PulseFactors = Union[None, float, Sequence[Optional[float]]]
+
+
+class PayloadDecoder:
+    """Base class for device payload decoders."""
+
+    device_type: str = ""
+
+    def decode(self, frame: bytes, pulse_factor: Optional[float] = None) -> Dict[str, Any]:
+        """Decode one frame into MeterReading column values."""
+        raise NotImplementedError
+
+    def register_max(self, pulse_factor: Optional[float] = None) -> Optional[float]:
+        """reading_value at which the cumulative register wraps to zero.
+
+        None for registers that do not roll over (e.g. float energy).
+        """
+        return None
+
+
+_DECODERS: Dict[str, PayloadDecoder] = {}
+
+
+def register_decoder(cls):
+    """Class decorator that registers a decoder under its device_type."""
+    _DECODERS[cls.device_type] = cls()
+    return cls
+
+
+def register_max(
+    device_type: Optional[str], pulse_factor: Optional[float] = None
+) -> Optional[float]:
+    """Rollover point of a device type's cumulative register, if known."""
+    decoder = get_decoder(device_type)
+    return decoder.register_max(pulse_factor) if decoder else None
+
+
+def get_decoder(device_type: Optional[str]) -> Optional[PayloadDecoder]:
+    """Return the decoder for a lorawan_device_type, or None if unsupported."""
+    if not device_type:
+        return None
+    return _DECODERS.get(device_type)
+
+
+def supported_device_types() -> List[str]:
+    return sorted(_DECODERS)
+
+
+def decode_payload(
+    device_type: Optional[str],
+    payload_hex: Optional[str],
+    pulse_factor: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Decode a single hex payload. Returns {} if it cannot be decoded."""
+    return decode_batch(device_type, [payload_hex], pulse_factor)[0]
+
+
+def decode_batch(
+    device_type: Optional[str],
+    payloads: Sequence[Optional[str]],
+    pulse_factors: PulseFactors = None,
+) -> List[Dict[str, Any]]:
+    """
+    Decode a batch of hex payloads for one device type in a single pass.
+
+    Args:
+        device_type: Meter.lorawan_device_type shared by all payloads
+        payloads: Hex strings (MeterReading.raw_payload); None entries allowed
+        pulse_factors: One factor for the whole batch, or one per payload
+
+    Returns:
+        List of column dicts aligned with ``payloads``; undecodable frames
+        yield an empty dict
+    """
+    decoder = get_decoder(device_type)
+    if decoder is None:
+        return [{} for _ in payloads]
+
+    if pulse_factors is None or isinstance(pulse_factors, (int, float)):
+        factors: Iterable[Optional[float]] = repeat(pulse_factors)
+    else:
+        factors = pulse_factors
+
+    decode = decoder.decode
+    fromhex = bytes.fromhex
+    results: List[Dict[str, Any]] = []
+    for payload, factor in zip(payloads, factors):
+        if not payload:
+            results.append({})
+            continue
+        try:
+            results.append(decode(fromhex(payload), factor))
+        except (ValueError, struct.error):
+            results.append({})
+    return results
+
+
+def _pulses_to_units(pulse_count: int, pulse_factor: Optional[float]) -> float:
+    factor = float(pulse_factor) if pulse_factor else DEFAULT_PULSE_FACTOR
+    return round(pulse_count / factor, 3)
+
+
+@register_decoder
+class MilesightEM300Decoder(PayloadDecoder):
+    """
+    Milesight EM300-DI: sequence of [channel_id][channel_type][value] items.
+
+    The cumulative pulse counter is converted to kWh / m³ with the meter's
+    pulse factor.
+    """
+
+    device_type = "milesight_em300"
+
+    # (channel_id, channel_type) -> (column, layout, scale)
+    CHANNELS: Dict[Tuple[int, int], Tuple[Optional[str], struct.Struct, float]] = {
+        (0x01, 0x75): ("battery_level", _U8, 1),
+        (0x03, 0x67): ("temperature", _I16_LE, 0.1),
+        (0x04, 0x68): ("humidity", _U8, 0.5),
+        (0x05, 0x00): (None, _U8, 1),  # GPIO state, not stored
+        (0x05, 0xC8): ("pulse_count", _U32_LE, 1),
+    }
+
+    def decode(self, frame: bytes, pulse_factor: Optional[float] = None) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        channels = self.CHANNELS
+        i, size = 0, len(frame)
+        while i + 2 <= size:
+            spec = channels.get((frame[i], frame[i + 1]))
+            if spec is None:
+                break  # Unknown channel: its length is unknown, stop here
+            column, layout, scale = spec
+            value = layout.unpack_from(frame, i + 2)[0]
+            if column:
+                values[column] = value if scale == 1 else round(value * scale, 2)
+            i += 2 + layout.size
+
+        if "pulse_count" in values:
+            values["reading_value"] = _pulses_to_units(values["pulse_count"], pulse_factor)
+        return values
+
+    def register_max(self, pulse_factor: Optional[float] = None) -> Optional[float]:
+        return _pulses_to_units(_U32_MAX, pulse_factor)
+
+
+@register_decoder
+class QalcosonicW1Decoder(PayloadDecoder):
+    """
+    Axioma Qalcosonic W1 current-volume frame.
+
+    Layout (little endian): frame time (uint32, unix), status flags (uint8),
+    accumulated volume (uint32, litres), optionally followed by the current
+    flow rate (uint16, L/h).
+    """
+
+    device_type = "qalcosonic_w1"
+
+    FRAME = struct.Struct("<IBI")
+    FLOW = _U16_LE
+
+    STATUS_FLAGS = (
+        (0x04, "burst"),
+        (0x08, "leak"),
+        (0x10, "backflow"),
+        (0x02, "low_battery"),
+    )
+
+    def decode(self, frame: bytes, pulse_factor: Optional[float] = None) -> Dict[str, Any]:
+        _frame_time, status, volume_litres = self.FRAME.unpack_from(frame, 0)
+        values: Dict[str, Any] = {
+            "reading_value": round(volume_litres / 1000.0, 3),  # m³
+            "status": "online",
+        }
+        for mask, name in self.STATUS_FLAGS:
+            if status & mask:
+                values["status"] = name
+                break
+        if len(frame) >= self.FRAME.size + self.FLOW.size:
+            values["flow_rate"] = self.FLOW.unpack_from(frame, self.FRAME.size)[0]
+        return values
+
+    def register_max(self, pulse_factor: Optional[float] = None) -> Optional[float]:
+        return round(_U32_MAX / 1000.0, 3)
+
+
+@register_decoder
+class EastronSDMDecoder(PayloadDecoder):
+    """
+    Eastron SDM320C/SDM630 polled by a Milesight UC100 bridge.
+
+    The UC100 reports each configured Modbus channel as
+    [0xFF][0x0E][channel][data_type][value]. Channels are configured on the
+    bridge to read these SDM input registers (IEEE-754 floats):
+    1 total active energy (kWh), 2 voltage (V), 3 current (A),
+    4 active power (W), 5 power factor, 6 frequency (Hz).
+    """
+
+    device_type = "eastron_sdm"
+
+    CHANNEL_COLUMNS = {
+        1: ("reading_value", 1),
+        2: ("voltage", 1),
+        3: ("current", 1),
+        4: ("power", 0.001),  # W -> kW
+        5: ("power_factor", 1),
+        6: ("frequency", 1),
+    }
+
+    # UC100 data type -> layout
+    DATA_TYPES = {
+        0: _U8,  # coil
+        1: _U8,  # discrete input
+        2: _U16_LE,  # input register
+        3: _U16_LE,  # holding register
+        4: _U32_LE,  # holding register (32-bit)
+        5: _F32_LE,  # holding register (float)
+        6: _U32_LE,  # input register (32-bit)
+        7: _F32_LE,  # input register (float)
+    }
+
+    def decode(self, frame: bytes, pulse_factor: Optional[float] = None) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        i, size = 0, len(frame)
+        while i + 4 <= size:
+            if frame[i] != 0xFF or frame[i + 1] != 0x0E:
+                break
+            channel, data_type = frame[i + 2], frame[i + 3] & 0x07
+            layout = self.DATA_TYPES.get(data_type)
+            if layout is None:
+                break
+            value = layout.unpack_from(frame, i + 4)[0]
+            mapping = self.CHANNEL_COLUMNS.get(channel)
+            if mapping:
+                column, scale = mapping
+                values[column] = round(value * scale, 3)
+            i += 4 + layout.size
+        return values
+
+
+def _modbus_crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+@register_decoder
+class IvyEM114Decoder(PayloadDecoder):
+    """
+    IVY EM114039-02 onboard LoRaWAN meter.
+
+    Uplinks are Modbus RTU read responses: slave (01), function (03), byte
+    count, register block, CRC16. The register block (big endian) is total
+    active energy (uint32, 0.01 kWh), voltage (uint16, 0.1 V), current
+    (uint16, 0.01 A), active power (int16, W), power factor (uint16, 0.001)
+    and frequency (uint16, 0.01 Hz).
+    """
+
+    device_type = "ivy_em114"
+
+    HEADER = struct.Struct(">BBB")
+    REGISTERS = struct.Struct(">IHHhHH")
+    CRC = _U16_LE
+
+    def decode(self, frame: bytes, pulse_factor: Optional[float] = None) -> Dict[str, Any]:
+        _slave, function, byte_count = self.HEADER.unpack_from(frame, 0)
+        end = self.HEADER.size + byte_count
+        if function != 0x03 or byte_count < self.REGISTERS.size or len(frame) < end + 2:
+            return {}
+        if self.CRC.unpack_from(frame, end)[0] != _modbus_crc16(frame[:end]):
+            return {}
+
+        energy, voltage, current, power, power_factor, frequency = (
+            self.REGISTERS.unpack_from(frame, self.HEADER.size)
+        )
+        return {
+            "reading_value": round(energy * 0.01, 3),
+            "voltage": round(voltage * 0.1, 2),
+            "current": round(current * 0.01, 3),
+            "power": round(power / 1000.0, 3),
+            "power_factor": round(power_factor * 0.001, 3),
+            "frequency": round(frequency * 0.01, 2),
+        }
+
+    def register_max(self, pulse_factor: Optional[float] = None) -> Optional[float]:
+        return round(_U32_MAX * 0.01, 3)
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Process-local cache of parsed and compiled rate tables and of each unit's
+# rate-table/markup resolution.
+#
+# Rate table entries are keyed by (rate_table_id, updated_at), so an edit
+# always produces a new key. Lookups by id alone go through the latest
+# updated_at seen for that id. Edits made through the app call
+# invalidate_rate_table() / invalidate_unit_rates(), which drop the local
+# entries and publish a message on INVALIDATION_CHANNEL; every other
+# gunicorn and Celery process listens on a background thread and drops its
+# copies too. Entries also expire after RATE_CACHE_TTL seconds, which bounds
+# staleness when Redis is unavailable or a message is missed.
+
+INVALIDATION_CHANNEL = "rate-cache:invalidate"
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a per-entry time to live."""
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, stored_at = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RateEntry(NamedTuple):
+    """A rate table's parsed structure with its compiled tariffs."""
+
+    structure: Dict[str, Any]
+    tariff: Any  # CompiledTariff
+    time_of_use: Any  # TimeOfUseTariff or None
+
+
+class UnitRates(NamedTuple):
+    """Rate tables and markups that apply to a unit (unit override, else estate)."""
+
+    estate_id: int
+    electricity_rate_table_id: Optional[int]
+    water_rate_table_id: Optional[int]
+    electricity_markup: Optional[float]
+    water_markup: Optional[float]
+
+
+def _config(key: str, default: int) -> int:
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+_rate_tables = LRUCache()
+_latest: Dict[int, Any] = {}
+_units = LRUCache()
+_defaults = LRUCache()
+_subscriber: Dict[str, Any] = {"pid": None, "thread": None, "retry_at": 0.0}
+_subscriber_lock = threading.Lock()
+
+
+def _configure() -> None:
+    size = _config("RATE_CACHE_SIZE", 512)
+    ttl = _config("RATE_CACHE_TTL", 300)
+    for cache in (_rate_tables, _units, _defaults):
+        cache.maxsize = size
+        cache.ttl = ttl
+    _ensure_subscriber()
+
+
+def _build_entry(rate_table_id: Optional[int], structure: Any) -> RateEntry:
+    from .rates import compile_tariff, load_time_of_use_tariffs
+
+    if isinstance(structure, str):
+        structure = json.loads(structure) if structure else {}
+    structure = structure or {}
+    time_of_use = None
+    if rate_table_id:
+        time_of_use = load_time_of_use_tariffs([rate_table_id], {rate_table_id: structure}).get(
+            rate_table_id
+        )
+    return RateEntry(structure, compile_tariff(structure), time_of_use)
+
+
+def rate_entry(rate_table_id: Optional[int]) -> Optional[RateEntry]:
+    """Cached entry for a rate table id, loading it on a miss."""
+    if not rate_table_id:
+        return None
+    _configure()
+    updated_at = _latest.get(rate_table_id)
+    if rate_table_id in _latest:
+        entry = _rate_tables.get((rate_table_id, updated_at))
+        if entry is not None:
+            return entry
+
+    from ..models import RateTable
+
+    row = (
+        RateTable.query.with_entities(RateTable.updated_at, RateTable.rate_structure)
+        .filter(RateTable.id == rate_table_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return _store(rate_table_id, row.updated_at, row.rate_structure)
+
+
+def rate_entry_for(rate_table) -> RateEntry:
+    """Cached entry for a RateTable row already loaded by the caller."""
+    _configure()
+    entry = _rate_tables.get((rate_table.id, rate_table.updated_at))
+    if entry is not None:
+        return entry
+    return _store(rate_table.id, rate_table.updated_at, rate_table.rate_structure)
+
+
+def _store(rate_table_id: int, updated_at: Any, structure: Any) -> RateEntry:
+    entry = _build_entry(rate_table_id, structure)
+    previous = _latest.get(rate_table_id)
+    if previous is not None and previous != updated_at:
+        _rate_tables.discard(lambda key: key == (rate_table_id, previous))
+    _latest[rate_table_id] = updated_at
+    _rate_tables.set((rate_table_id, updated_at), entry)
+    return entry
+
+
+def default_rate_entry(utility_type: str) -> RateEntry:
+    """Entry for the first active rate table of a utility, else the fallback flat rate."""
+    _configure()
+    entry = _defaults.get(utility_type)
+    if entry is not None:
+        return entry
+
+    from ..models import RateTable
+
+    rate_table = RateTable.query.filter_by(utility_type=utility_type, is_active=True).first()
+    if rate_table and rate_table.rate_structure:
+        entry = rate_entry_for(rate_table)
+    elif utility_type == "electricity":
+        entry = _build_entry(None, {"flat_rate": 2.50})  # R2.50/kWh
+    elif utility_type == "water":
+        entry = _build_entry(None, {"flat_rate": 15.00})  # R15.00/kL
+    else:
+        entry = _build_entry(None, {"flat_rate": 0.00})
+    _defaults.set(utility_type, entry)
+    return entry
+
+
+def unit_rates(unit_id: int) -> Optional[UnitRates]:
+    """Rate table ids and markups for a unit, resolved with one query."""
+    _configure()
+    rates = _units.get(unit_id)
+    if rates is not None:
+        return rates
+
+    from ..db import db
+    from ..models import Estate, Unit
+
+    row = (
+        db.session.query(
+            Unit.estate_id,
+            db.func.coalesce(Unit.electricity_rate_table_id, Estate.electricity_rate_table_id),
+            db.func.coalesce(Unit.water_rate_table_id, Estate.water_rate_table_id),
+            Estate.electricity_markup_percentage,
+            Estate.water_markup_percentage,
+        )
+        .join(Estate, Estate.id == Unit.estate_id)
+        .filter(Unit.id == unit_id)
+        .first()
+    )
+    if row is None:
+        return None
+    rates = UnitRates(
+        row[0],
+        row[1],
+        row[2],
+        float(row[3]) if row[3] is not None else None,
+        float(row[4]) if row[4] is not None else None,
+    )
+    _units.set(unit_id, rates)
+    return rates
+
+
+def _drop_local(kind: str, target_id: Optional[int]) -> None:
+    if kind == "rate_table":
+        if target_id is None:
+            _rate_tables.clear()
+            _latest.clear()
+        else:
+            _rate_tables.discard(lambda key: key[0] == target_id)
+            _latest.pop(target_id, None)
+        # Any rate table change can change which table is the default
+        _defaults.clear()
+    elif kind == "units":
+        if target_id is None:
+            _units.clear()
+        else:
+            _units.discard(lambda key: key == target_id)
+
+
+def _publish(kind: str, target_id: Optional[int]) -> None:
+    from .redis_client import get_redis
+
+    client = get_redis()
+    if client is None:
+        return
+    message = json.dumps({"kind": kind, "id": target_id, "pid": os.getpid()})
+    try:
+        client.publish(INVALIDATION_CHANNEL, message)
+    except Exception as exc:
+        logger.warning("Could not publish rate cache invalidation: %s", exc)
+
+
+def invalidate_rate_table(rate_table_id: Optional[int] = None) -> None:
+    """Drop a rate table (or all of them) here and in every other process."""
+    _drop_local("rate_table", rate_table_id)
+    _publish("rate_table", rate_table_id)
+
+
+def invalidate_unit_rates(unit_id: Optional[int] = None) -> None:
+    """Drop a unit's (or every unit's) rate resolution here and everywhere."""
+    _drop_local("units", unit_id)
+    _publish("units", unit_id)
+
+
+def clear() -> None:
+    """Empty all local caches without notifying other processes."""
+    _rate_tables.clear()
+    _latest.clear()
+    _units.clear()
+    _defaults.clear()
+
+
+def _on_message(message: Dict[str, Any]) -> None:
+    try:
+        payload = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    if payload.get("pid") == os.getpid():
+        return
+    _drop_local(payload.get("kind"), payload.get("id"))
+
+
+def _on_subscriber_error(exc, pubsub, thread) -> None:
+    logger.warning("Rate cache invalidation listener stopped: %s", exc)
+    thread.stop()
+    with _subscriber_lock:
+        _subscriber["pid"] = None
+        _subscriber["retry_at"] = time.monotonic() + 60
+    # Whatever was missed while disconnected is unknown
+    clear()
+
+
+def _ensure_subscriber() -> None:
+    """Start this process's invalidation listener once (per fork)."""
+    pid = os.getpid()
+    if _subscriber["pid"] == pid or time.monotonic() < _subscriber["retry_at"]:
+        return
+    from .redis_client import get_redis
+
+    with _subscriber_lock:
+        if _subscriber["pid"] == pid:
+            return
+        client = get_redis()
+        if client is None:
+            _subscriber["retry_at"] = float("inf")
+            return
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_message})
+            _subscriber["thread"] = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=_on_subscriber_error
+            )
+        except Exception as exc:
+            logger.warning("Rate cache invalidation listener unavailable: %s", exc)
+            _subscriber["retry_at"] = time.monotonic() + 60
+            return
+        _subscriber["pid"] = pid
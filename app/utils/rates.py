@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 
 
 def _compute_tiered_amount(
@@ -51,6 +52,241 @@ def compute_from_structure(quantity: float, structure: Dict[str, Any]) -> float:
     return 0.0
 
 
+class CompiledTariff:
+    """A rate structure prepared once for repeated pricing.
+
+    Tiers are sorted and parsed up front into parallel lists of tier widths,
+    rates and the cumulative cost of every tier before them, so pricing a
+    quantity only walks the tiers it actually spans. Results are identical to
+    compute_from_structure() for the same structure.
+    """
+
+    __slots__ = ("flat_rate", "widths", "rates", "cumulative")
+
+    def __init__(self, structure: Optional[Dict[str, Any]]):
+        self.flat_rate: Optional[float] = None
+        self.widths: List[float] = []
+        self.rates: List[float] = []
+        # cumulative[i] is the cost of fully consuming tiers 0..i-1
+        self.cumulative: List[float] = [0.0]
+        if not isinstance(structure, dict):
+            return
+        if "flat_rate" in structure:
+            self.flat_rate = float(structure.get("flat_rate", 0.0))
+            return
+        tiers = structure.get("tiers")
+        if not isinstance(tiers, list):
+            return
+        total = 0.0
+        for tier in sorted(tiers, key=lambda t: float(t.get("from", 0))):
+            start = float(tier.get("from", 0))
+            end = tier.get("to")
+            rate = float(tier.get("rate", 0))
+            width = float("inf") if end is None else max(0.0, float(end) - start + 1e-9)
+            if width > 0:
+                total += width * rate
+            self.widths.append(width)
+            self.rates.append(rate)
+            self.cumulative.append(total)
+
+    def price(self, quantity: float) -> float:
+        """Amount for one quantity, before markup."""
+        if quantity <= 0:
+            return 0.0
+        quantity = float(quantity)
+        if self.flat_rate is not None:
+            return round(self.flat_rate * quantity, 2)
+        widths = self.widths
+        count = len(widths)
+        if not count:
+            return 0.0
+        i = 0
+        while i < count and quantity > widths[i]:
+            quantity -= widths[i]
+            i += 1
+        if i == count:
+            return round(self.cumulative[count], 2)
+        return round(self.cumulative[i] + quantity * self.rates[i], 2)
+
+    def price_many(self, quantities: Iterable[float]) -> List[float]:
+        """Amounts for a sequence of quantities, in one call."""
+        flat_rate = self.flat_rate
+        if flat_rate is not None:
+            return [round(flat_rate * float(q), 2) if q > 0 else 0.0 for q in quantities]
+        widths, rates, cumulative = self.widths, self.rates, self.cumulative
+        count = len(widths)
+        if not count:
+            return [0.0 for _ in quantities]
+        capped = round(cumulative[count], 2)
+        amounts = []
+        append = amounts.append
+        for quantity in quantities:
+            if quantity <= 0:
+                append(0.0)
+                continue
+            remaining = float(quantity)
+            i = 0
+            while i < count and remaining > widths[i]:
+                remaining -= widths[i]
+                i += 1
+            append(capped if i == count else round(cumulative[i] + remaining * rates[i], 2))
+        return amounts
+
+
+def compile_tariff(structure: Any) -> CompiledTariff:
+    """Compile a rate structure dict, or its JSON text as stored on RateTable."""
+    if isinstance(structure, str):
+        structure = json.loads(structure) if structure else None
+    return CompiledTariff(structure)
+
+
+# Time-of-use periods are defined in local (SAST, UTC+2) clock time while
+# reading dates are stored in UTC.
+SAST_OFFSET_MINUTES = 120
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _clock_minutes(value: Any) -> int:
+    """Minutes after midnight for a time or an "HH:MM" string."""
+    if isinstance(value, str):
+        hours, minutes = value.split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    return value.hour * 60 + value.minute
+
+
+def _period_fields(period: Any) -> Tuple[str, int, int, bool, bool, float]:
+    """Normalize a TimeOfUseRate row or a rate_structure time_of_use dict."""
+    if isinstance(period, dict):
+        get = period.get
+    else:
+        def get(key, default=None):
+            return getattr(period, key, default)
+    rate = get("rate_per_kwh")
+    if rate is None:
+        rate = get("rate", 0)
+    weekdays = get("weekdays")
+    weekends = get("weekends")
+    return (
+        get("period_name") or "",
+        _clock_minutes(get("start_time")),
+        _clock_minutes(get("end_time")),
+        True if weekdays is None else bool(weekdays),
+        False if weekends is None else bool(weekends),
+        float(rate or 0),
+    )
+
+
+class TimeOfUseTariff:
+    """Time-of-use periods expanded into a minute-of-week lookup.
+
+    ``slots`` holds one period index for every minute of the week (Monday
+    00:00 first, local time), so finding the rate for a reading is a single
+    index instead of a scan over periods. A period whose end is not after
+    its start wraps past midnight on the same day type (22:00-06:00 covers
+    both ends of each day it applies to). Where periods overlap the first
+    one listed wins; minutes no period covers fall to the cheapest period.
+    """
+
+    __slots__ = ("names", "rates", "slots", "utc_offset")
+
+    def __init__(self, periods: Iterable[Any], utc_offset_minutes: int = SAST_OFFSET_MINUTES):
+        fields = [_period_fields(period) for period in periods]
+        self.names: List[str] = [name for name, *_ in fields]
+        self.rates: List[float] = [rate for *_, rate in fields]
+        self.utc_offset = utc_offset_minutes
+        slots: List[Optional[int]] = [None] * MINUTES_PER_WEEK
+        for index, (_, start, end, weekdays, weekends, _) in enumerate(fields):
+            for day in range(7):
+                if not (weekends if day >= 5 else weekdays):
+                    continue
+                base = day * MINUTES_PER_DAY
+                spans = [(start, end)] if start < end else [(start, MINUTES_PER_DAY), (0, end)]
+                for lo, hi in spans:
+                    for minute in range(base + lo, base + hi):
+                        if slots[minute] is None:
+                            slots[minute] = index
+        fallback = min(range(len(self.rates)), key=self.rates.__getitem__) if fields else None
+        self.slots = [fallback if slot is None else slot for slot in slots]
+
+    def __bool__(self) -> bool:
+        return bool(self.names)
+
+    def period_index(self, when: datetime) -> int:
+        """Index into ``names``/``rates`` for a UTC reading date."""
+        minute = when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+        return self.slots[(minute + self.utc_offset) % MINUTES_PER_WEEK]
+
+    def rate_at(self, when: datetime) -> float:
+        return self.rates[self.period_index(when)]
+
+    def price_intervals(self, intervals: Iterable[Tuple[datetime, float]]) -> Dict[str, Any]:
+        """Bucket ``(reading_date, consumption)`` pairs by period and price each bucket.
+
+        Each interval's consumption is attributed to the period its reading
+        date falls in.
+
+        Returns:
+            Dict with per-period ``consumption``/``rate``/``amount`` under
+            ``periods`` plus the overall ``consumption`` and ``amount``.
+        """
+        if not self.names:
+            return {"periods": {}, "consumption": 0.0, "amount": 0.0}
+        slots = self.slots
+        offset = self.utc_offset
+        totals = [0.0] * len(self.names)
+        for when, quantity in intervals:
+            if not quantity or quantity <= 0:
+                continue
+            minute = when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+            totals[slots[(minute + offset) % MINUTES_PER_WEEK]] += float(quantity)
+
+        periods: Dict[str, Dict[str, float]] = {}
+        for name, rate, quantity in zip(self.names, self.rates, totals):
+            if quantity <= 0:
+                continue
+            bucket = periods.setdefault(name, {"consumption": 0.0, "rate": rate, "amount": 0.0})
+            bucket["consumption"] = round(bucket["consumption"] + quantity, 3)
+            bucket["amount"] = round(bucket["amount"] + quantity * rate, 2)
+        return {
+            "periods": periods,
+            "consumption": round(sum(totals), 3),
+            "amount": round(sum(bucket["amount"] for bucket in periods.values()), 2),
+        }
+
+
+def load_time_of_use_tariffs(
+    rate_table_ids: Iterable[int], structures: Optional[Dict[int, Any]] = None
+) -> Dict[int, TimeOfUseTariff]:
+    """TOU tariffs for the given rate tables, with one query.
+
+    Periods come from the TimeOfUseRate rows of each table, or failing that
+    from a ``time_of_use`` list in its rate structure (``structures`` maps
+    rate table id to the parsed structure). Tables with neither are left out.
+    """
+    from ..models import TimeOfUseRate
+
+    ids = [rate_table_id for rate_table_id in set(rate_table_ids) if rate_table_id]
+    periods: Dict[int, List[Any]] = {}
+    if ids:
+        rows = (
+            TimeOfUseRate.query.filter(TimeOfUseRate.rate_table_id.in_(ids))
+            .order_by(TimeOfUseRate.rate_table_id, TimeOfUseRate.start_time, TimeOfUseRate.id)
+            .all()
+        )
+        for row in rows:
+            periods.setdefault(row.rate_table_id, []).append(row)
+    for rate_table_id, structure in (structures or {}).items():
+        if rate_table_id not in periods and isinstance(structure, dict):
+            listed = structure.get("time_of_use")
+            if isinstance(listed, list) and listed:
+                periods[rate_table_id] = listed
+    return {
+        rate_table_id: TimeOfUseTariff(table_periods)
+        for rate_table_id, table_periods in periods.items()
+    }
+
+
 def apply_markup(amount: float, markup_percent: Optional[float]) -> float:
     if not amount:
         return 0.0
@@ -99,41 +335,28 @@ def calculate_unit_bill(
     service_fee: Optional[float] = None,
 ) -> Dict[str, Any]:
     """Calculate bill for a specific unit using its rate table assignments."""
-    from ..models import Unit, Estate, RateTable
+    from .rate_cache import rate_entry, unit_rates
 
-    unit = Unit.get_by_id(unit_id)
-    if not unit:
+    # Unit's rate table assignments, falling back to the estate's
+    resolved = unit_rates(unit_id)
+    if not resolved:
         raise ValueError(f"Unit {unit_id} not found")
 
-    estate = Estate.get_by_id(unit.estate_id)
-    if not estate:
-        raise ValueError(f"Estate {unit.estate_id} not found")
-
-    # Use unit's rate table assignments, fall back to estate if unit has None
-    electricity_rate_table_id = (
-        unit.electricity_rate_table_id or estate.electricity_rate_table_id
-    )
-    water_rate_table_id = unit.water_rate_table_id or estate.water_rate_table_id
-
     # Get rate structures from rate tables
     electricity_structure = electricity_structure or {}
     water_structure = water_structure or {}
 
-    if electricity_rate_table_id:
-        electricity_rate_table = RateTable.get_by_id(electricity_rate_table_id)
-        if electricity_rate_table and electricity_rate_table.rate_structure:
-            electricity_structure = electricity_rate_table.rate_structure
+    electricity_entry = rate_entry(resolved.electricity_rate_table_id)
+    if electricity_entry and electricity_entry.structure:
+        electricity_structure = electricity_entry.structure
 
-    if water_rate_table_id:
-        water_rate_table = RateTable.get_by_id(water_rate_table_id)
-        if water_rate_table and water_rate_table.rate_structure:
-            water_structure = water_rate_table.rate_structure
+    water_entry = rate_entry(resolved.water_rate_table_id)
+    if water_entry and water_entry.structure:
+        water_structure = water_entry.structure
 
     # Use estate markups if not provided
-    electricity_markup_percent = (
-        electricity_markup_percent or estate.electricity_markup_percentage
-    )
-    water_markup_percent = water_markup_percent or estate.water_markup_percentage
+    electricity_markup_percent = electricity_markup_percent or resolved.electricity_markup
+    water_markup_percent = water_markup_percent or resolved.water_markup
 
     return calculate_estate_bill(
         electricity_kwh=electricity_kwh,
@@ -174,33 +397,18 @@ def get_default_rate_structure(utility_type: str) -> Dict[str, Any]:
     """Get default rate structure from system settings or first active rate table.
     Falls back to hardcoded values if no rate tables exist.
 
+    The structure comes from the process-local rate cache and is shared
+    between callers; do not modify it.
+
     Args:
         utility_type: 'electricity' or 'water'
 
     Returns:
         Rate structure dict with 'flat_rate' or 'tiers'
     """
-    from ..models import RateTable
-
-    # Try to get a default rate table for this utility type
-    rate_table = RateTable.query.filter_by(
-        utility_type=utility_type,
-        is_active=True
-    ).first()
-
-    if rate_table and rate_table.rate_structure:
-        # rate_structure is stored as JSON text in the database, need to parse it
-        if isinstance(rate_table.rate_structure, str):
-            return json.loads(rate_table.rate_structure)
-        return rate_table.rate_structure
-
-    # Fallback to simple flat rates if no rate tables exist
-    if utility_type == "electricity":
-        return {"flat_rate": 2.50}  # R2.50/kWh
-    elif utility_type == "water":
-        return {"flat_rate": 15.00}  # R15.00/kL
-    else:
-        return {"flat_rate": 0.00}
+    from .rate_cache import default_rate_entry
+
+    return default_rate_entry(utility_type).structure
 
 
 def calculate_consumption_charge(
@@ -221,9 +429,11 @@ def calculate_consumption_charge(
         Total charge amount
     """
     if not rate_structure:
-        rate_structure = get_default_rate_structure(utility_type)
+        from .rate_cache import default_rate_entry
 
-    base_amount = compute_from_structure(consumption, rate_structure)
+        base_amount = default_rate_entry(utility_type).tariff.price(consumption)
+    else:
+        base_amount = compute_from_structure(consumption, rate_structure)
     total_amount = apply_markup(base_amount, markup_percent)
 
     return total_amount
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+import redis
+from flask import current_app, has_app_context
+
+# One client (and connection pool) per process and URL. Clients are not
+# shared across fork, so gunicorn and Celery workers each build their own.
+_clients = {}
+_lock = threading.Lock()
+
+
+def redis_url() -> Optional[str]:
+    if has_app_context():
+        return current_app.config.get("REDIS_URL")
+    from config import Config
+
+    return Config.REDIS_URL
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Shared Redis client, or None when REDIS_URL is not configured.
+
+    Callers treat Redis as an accelerator: every use must tolerate None and
+    redis.RedisError and fall back to the database.
+    """
+    url = redis_url()
+    if not url:
+        return None
+    key = (os.getpid(), url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = redis.Redis.from_url(
+                    url, socket_timeout=2, socket_connect_timeout=2, health_check_interval=30
+                )
+                _clients[key] = client
+    return client
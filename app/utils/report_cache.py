@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import logging
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache, wraps
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import redis
+from flask import current_app, has_app_context
+from sqlalchemy.engine import Row
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis cache of the reports page datasets (the get_*_reports functions).
+#
+# Entries are keyed by report name, the normalized call arguments and
+# today's date, plus a generation counter: per estate for estate-filtered
+# views, and a global one for all-estate views. Invalidation increments
+# the counters, so stale entries are never read again and simply expire.
+#
+# Windows that include today get REPORT_CACHE_TTL_OPEN (short), closed
+# periods REPORT_CACHE_TTL_CLOSED (long). Transactions invalidate their
+# estates immediately. Readings invalidate only when they are dated before
+# today (late or backfilled data); today's readings are covered by the
+# short TTL, since meters report continuously and would otherwise empty
+# the cache on every ingest batch.
+#
+# Hits and misses are counted per report in a Redis hash; see stats().
+#
+# Results are stored as JSON, never pickled, so whoever can write to Redis
+# cannot run code in the web process. Dates, datetimes and Decimals (which
+# jsonify also handles), query result rows and SimpleNamespaces are tagged
+# so they come back with the same types and attributes (rows as named
+# tuples).
+# Anything else is not cached; an entry that fails to decode is a miss.
+
+KEY_PREFIX = "report-cache"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+GLOBAL_GENERATION_KEY = f"{KEY_PREFIX}:gen:all"
+
+
+def _estate_generation_key(estate_id: int) -> str:
+    return f"{KEY_PREFIX}:gen:estate:{estate_id}"
+
+
+def _config(key: str, default: int) -> int:
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def _ttl(params: Dict[str, Any], live: bool) -> int:
+    end = _as_date(params.get("end_date"))
+    if live or end is None or end >= date.today():
+        return _config("REPORT_CACHE_TTL_OPEN", 120)
+    return _config("REPORT_CACHE_TTL_CLOSED", 21600)
+
+
+@lru_cache(maxsize=256)
+def _row_type(fields: Tuple[str, ...]):
+    return namedtuple("CachedRow", fields, rename=True)
+
+
+def _encode(value: Any) -> Any:
+    """json.dumps default: tag the types report datasets contain."""
+    if isinstance(value, Row):
+        return {"__row__": list(value._fields), "values": list(value)}
+    if isinstance(value, SimpleNamespace):
+        return {"__namespace__": vars(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    """json.loads object_hook reversing _encode."""
+    if "__row__" in obj:
+        return _row_type(tuple(obj["__row__"]))(*obj["values"])
+    if "__namespace__" in obj:
+        return SimpleNamespace(**obj["__namespace__"])
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    if "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dumps(result: Any) -> bytes:
+    return json.dumps(result, default=_encode, separators=(",", ":")).encode("utf-8")
+
+
+def loads(payload: bytes) -> Any:
+    return json.loads(payload, object_hook=_decode)
+
+
+def _cache_key(client: redis.Redis, name: str, params: Dict[str, Any]) -> str:
+    estate_id = params.get("estate_id")
+    generation_key = (
+        _estate_generation_key(estate_id) if estate_id else GLOBAL_GENERATION_KEY
+    )
+    generation = client.get(generation_key) or b"0"
+    digest = hashlib.sha1(
+        json.dumps([params, date.today()], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    scope = f"estate:{estate_id}" if estate_id else "all"
+    return f"{KEY_PREFIX}:{name}:{scope}:{generation.decode()}:{digest}"
+
+
+def _count(client: redis.Redis, name: str, outcome: str) -> None:
+    try:
+        client.hincrby(STATS_KEY, f"{name}:{outcome}", 1)
+    except redis.RedisError:
+        pass
+
+
+def cached_report(name: str, live: bool = False) -> Callable:
+    """Cache a report function's result in Redis.
+
+    The wrapped function must take ``start_date``/``end_date`` and
+    ``estate_id`` arguments (``end_date`` may be absent for ``live``
+    reports). ``live`` reports depend on the current time rather than the
+    period and always use the short TTL. Without Redis the function is
+    called directly.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            client = get_redis()
+            if client is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            try:
+                key = _cache_key(client, name, params)
+                cached = client.get(key)
+            except redis.RedisError as exc:
+                logger.warning("Report cache unavailable: %s", exc)
+                return func(*args, **kwargs)
+
+            if cached is not None:
+                try:
+                    result = loads(cached)
+                except (ValueError, TypeError, KeyError) as exc:
+                    logger.warning("Discarding unreadable cached report %s: %s", name, exc)
+                else:
+                    _count(client, name, "hits")
+                    return result
+
+            _count(client, name, "misses")
+            result = func(*args, **kwargs)
+            try:
+                client.set(key, dumps(result), ex=_ttl(params, live))
+            except (redis.RedisError, TypeError, ValueError) as exc:
+                logger.warning("Could not cache report %s: %s", name, exc)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_estates(estate_ids: Iterable[int]) -> None:
+    """Make every cached report covering these estates stale."""
+    estate_ids = sorted({estate_id for estate_id in estate_ids if estate_id})
+    if not estate_ids:
+        return
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for estate_id in estate_ids:
+            pipe.incr(_estate_generation_key(estate_id))
+        pipe.incr(GLOBAL_GENERATION_KEY)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not invalidate report cache: %s", exc)
+
+
+def invalidate_for_wallets(wallet_ids: Iterable[int]) -> None:
+    """Invalidate the estates of wallets that gained or changed transactions."""
+    wallet_ids = list({wallet_id for wallet_id in wallet_ids if wallet_id})
+    if not wallet_ids or get_redis() is None:
+        return
+
+    from ..db import db
+    from ..models import Unit, Wallet
+
+    rows = (
+        db.session.query(Unit.estate_id)
+        .join(Wallet, Wallet.unit_id == Unit.id)
+        .filter(Wallet.id.in_(wallet_ids))
+        .distinct()
+    )
+    invalidate_estates(row[0] for row in rows)
+
+
+def invalidate_for_readings(rows: Iterable[Dict[str, Any]]) -> None:
+    """Invalidate the estates of meters that received readings before today."""
+    today = date.today()
+    meter_ids = {
+        row["meter_id"]
+        for row in rows
+        if _as_date(row.get("reading_date")) is not None
+        and _as_date(row["reading_date"]) < today
+    }
+    if not meter_ids or get_redis() is None:
+        return
+
+    from sqlalchemy import or_
+
+    from ..db import db
+    from ..models import Estate, Meter, Unit
+
+    unit_estates = (
+        db.session.query(Unit.estate_id)
+        .join(Meter, Meter.unit_id == Unit.id)
+        .filter(Meter.id.in_(meter_ids))
+    )
+    bulk_estates = db.session.query(Estate.id).filter(
+        or_(
+            Estate.bulk_electricity_meter_id.in_(meter_ids),
+            Estate.bulk_water_meter_id.in_(meter_ids),
+        )
+    )
+    invalidate_estates(row[0] for row in unit_estates.union(bulk_estates))
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters per report since the counters were last reset."""
+    client = get_redis()
+    if client is None:
+        return {}
+    try:
+        raw = client.hgetall(STATS_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Report cache stats unavailable: %s", exc)
+        return {}
+
+    result: Dict[str, Dict[str, Any]] = {}
+    for field, value in raw.items():
+        name, _, outcome = field.decode().rpartition(":")
+        result.setdefault(name, {"hits": 0, "misses": 0})[outcome] = int(value)
+    for counts in result.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / total, 3) if total else 0.0
+    return result
+
+
+def reset_stats() -> None:
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(STATS_KEY)
+        except redis.RedisError as exc:
+            logger.warning("Could not reset report cache stats: %s", exc)
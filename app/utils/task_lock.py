@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+import redis
+from flask import current_app, has_app_context
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis leases that keep a scheduled task from running twice at once.
+#
+# A task wrapped in single_instance() takes the lease ``task-lock:<name>``
+# (SET NX with a TTL and a random token) before it runs. While the task
+# runs, a heartbeat thread extends the TTL every third of it, so a slow run
+# keeps its lease but a crashed worker's lease expires on its own. Another
+# run that finds the lease taken waits up to ``wait`` seconds and is then
+# skipped, returning {"status": "skipped"}. Renewal and release only touch
+# the lease if it still holds our token.
+#
+# ``cooldown`` keeps the lease for that many seconds from the start of a
+# run even after it finishes, so a second beat node firing the same
+# schedule slot is skipped too.
+#
+# A coordinator that fans its work out to other tasks (app/tasks/fanout.py)
+# returns long before the work is done. It calls hand_off() instead, which
+# stops the heartbeat and returns the lease as a dict for the shard tasks
+# and the chord callback: each shard extends it to TASK_LOCK_FANOUT_TTL with
+# keep_lease() and the callback gives it up with release_lease(), so the
+# next run is skipped until the last shard has finished. If the callback
+# never runs, the lease expires TASK_LOCK_FANOUT_TTL after the last shard
+# started.
+#
+# Without Redis the task runs unlocked. Acquisitions, skips, lost leases
+# and time spent waiting are counted per task in a Redis hash; see stats().
+
+KEY_PREFIX = "task-lock"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+# Extend the TTL only while the lease still holds our token
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lease (or shorten it to the cooldown) if it is still ours
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    if tonumber(ARGV[2]) > 0 then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+_current = threading.local()
+
+
+def _lock_key(name: str) -> str:
+    return f"{KEY_PREFIX}:{name}"
+
+
+def _config(key: str, default: int) -> int:
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _count(client: redis.Redis, name: str, **amounts: int) -> None:
+    try:
+        pipe = client.pipeline(transaction=False)
+        for field, amount in amounts.items():
+            pipe.hincrby(STATS_KEY, f"{name}:{field}", amount)
+        pipe.execute()
+    except redis.RedisError:
+        pass
+
+
+class TaskLease:
+    """One held lease, renewed by a heartbeat thread until released."""
+
+    def __init__(self, client: redis.Redis, name: str, ttl: int):
+        self.client = client
+        self.name = name
+        self.key = _lock_key(name)
+        self.ttl_ms = ttl * 1000
+        self.token = uuid.uuid4().hex
+        self.lost = False
+        self.handed_off = False
+        self.cooldown = 0
+        self.started = time.monotonic()
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self, wait: float = 0, poll: float = 0.5) -> bool:
+        """Take the lease, retrying for up to ``wait`` seconds."""
+        deadline = time.monotonic() + wait
+        while True:
+            if self.client.set(self.key, self.token, nx=True, px=self.ttl_ms):
+                self.started = time.monotonic()
+                self.started_at = time.time()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll, remaining))
+
+    def renew(self) -> bool:
+        """Extend the lease to a full TTL; False once it is no longer ours."""
+        return bool(self.client.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    def start_heartbeat(self) -> None:
+        self._heartbeat = threading.Thread(
+            target=self._beat, name=f"task-lock-{self.name}", daemon=True
+        )
+        self._heartbeat.start()
+
+    def _beat(self) -> None:
+        interval = self.ttl_ms / 3000
+        while not self._stop.wait(interval):
+            try:
+                renewed = self.renew()
+            except redis.RedisError as exc:
+                # Keep trying: the lease survives until its TTL runs out
+                logger.warning("Could not renew task lock %s: %s", self.name, exc)
+                continue
+            if not renewed:
+                self.lost = True
+                logger.error("Task lock %s was lost while the task was running", self.name)
+                return
+
+    def _stop_heartbeat(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def hand_off(self) -> Dict[str, Any]:
+        """Stop renewing here and extend the lease for the tasks taking it over."""
+        self._stop_heartbeat()
+        info = {
+            "name": self.name,
+            "token": self.token,
+            "started_at": self.started_at,
+            "cooldown": self.cooldown,
+        }
+        keep_lease(info, client=self.client)
+        self.handed_off = True
+        return info
+
+    def release(self, cooldown: int = 0) -> None:
+        """Stop the heartbeat and give the lease up (or keep it for ``cooldown``)."""
+        self._stop_heartbeat()
+        keep_ms = int(cooldown * 1000 - (time.monotonic() - self.started) * 1000)
+        try:
+            self.client.eval(RELEASE_SCRIPT, 1, self.key, self.token, max(keep_ms, 0))
+        except redis.RedisError as exc:
+            logger.warning("Could not release task lock %s: %s", self.name, exc)
+
+
+def single_instance(
+    name: Optional[str] = None,
+    ttl: Optional[int] = None,
+    wait: float = 0,
+    cooldown: int = 0,
+) -> Callable:
+    """Run a task only while holding its Redis lease; skip it otherwise.
+
+    Apply below ``@shared_task``. ``name`` defaults to the task's module
+    and function name, ``ttl`` (seconds) to TASK_LOCK_TTL. A run that
+    cannot take the lease within ``wait`` seconds returns
+    ``{"status": "skipped", "reason": "already_running"}``. ``cooldown``
+    holds the lease for that long from the start of a successful run. A
+    task that fans out keeps the lease past its return via hand_off().
+    """
+
+    def decorator(func: Callable) -> Callable:
+        lock_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            client = get_redis()
+            if client is None:
+                return func(*args, **kwargs)
+
+            lease = TaskLease(client, lock_name, ttl or _config("TASK_LOCK_TTL", 60))
+            asked = time.monotonic()
+            try:
+                acquired = lease.acquire(wait=wait)
+            except redis.RedisError as exc:
+                logger.warning("Task lock unavailable, running %s unlocked: %s", lock_name, exc)
+                return func(*args, **kwargs)
+            waited_ms = int((time.monotonic() - asked) * 1000)
+
+            if not acquired:
+                _count(client, lock_name, skipped=1, wait_ms=waited_ms)
+                logger.info("Skipping %s: already running elsewhere", lock_name)
+                return {"status": "skipped", "reason": "already_running", "task": lock_name}
+
+            _count(client, lock_name, acquired=1, wait_ms=waited_ms)
+            lease.cooldown = cooldown
+            lease.start_heartbeat()
+            _current.lease = lease
+            succeeded = False
+            try:
+                result = func(*args, **kwargs)
+                succeeded = True
+                return result
+            finally:
+                _current.lease = None
+                if succeeded and lease.handed_off:
+                    # The chord callback releases it and records the hold time
+                    _count(client, lock_name, lost=int(lease.lost))
+                else:
+                    lease.release(cooldown=cooldown if succeeded else 0)
+                    held_ms = int((time.monotonic() - lease.started) * 1000)
+                    _count(client, lock_name, held_ms=held_ms, lost=int(lease.lost))
+
+        return wrapper
+
+    return decorator
+
+
+def hand_off() -> Optional[Dict[str, Any]]:
+    """Hand the running task's lease on to the tasks it dispatches.
+
+    Returns None outside a single_instance() task or without Redis. Pass the
+    returned dict to keep_lease() in every dispatched task and to
+    release_lease() once the last one has finished.
+    """
+    lease = getattr(_current, "lease", None)
+    if lease is None:
+        return None
+    try:
+        return lease.hand_off()
+    except redis.RedisError as exc:
+        logger.warning("Could not hand off task lock %s: %s", lease.name, exc)
+        return None
+
+
+def keep_lease(info: Optional[Dict[str, Any]], client: Optional[redis.Redis] = None) -> bool:
+    """Extend a handed-off lease to TASK_LOCK_FANOUT_TTL; False once it is lost."""
+    if not info:
+        return True
+    client = client or get_redis()
+    if client is None:
+        return True
+    ttl_ms = _config("TASK_LOCK_FANOUT_TTL", 1800) * 1000
+    try:
+        renewed = client.eval(RENEW_SCRIPT, 1, _lock_key(info["name"]), info["token"], ttl_ms)
+    except redis.RedisError as exc:
+        logger.warning("Could not renew task lock %s: %s", info["name"], exc)
+        return True
+    if not renewed:
+        _count(client, info["name"], lost=1)
+        logger.error("Task lock %s expired before its work finished", info["name"])
+    return bool(renewed)
+
+
+def release_lease(info: Optional[Dict[str, Any]]) -> None:
+    """Give up a handed-off lease, keeping it for what is left of its cooldown."""
+    client = get_redis() if info else None
+    if client is None:
+        return
+    held = time.time() - info["started_at"]
+    keep_ms = int((info.get("cooldown", 0) - held) * 1000)
+    try:
+        client.eval(RELEASE_SCRIPT, 1, _lock_key(info["name"]), info["token"], max(keep_ms, 0))
+    except redis.RedisError as exc:
+        logger.warning("Could not release task lock %s: %s", info["name"], exc)
+    _count(client, info["name"], held_ms=int(held * 1000))
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Lease counters and wait/hold times per task since the last reset."""
+    client = get_redis()
+    if client is None:
+        return {}
+    try:
+        raw = client.hgetall(STATS_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Task lock stats unavailable: %s", exc)
+        return {}
+
+    fields = ("acquired", "skipped", "lost", "wait_ms", "held_ms")
+    result: Dict[str, Dict[str, Any]] = {}
+    for field, value in raw.items():
+        name, _, counter = field.decode().rpartition(":")
+        result.setdefault(name, dict.fromkeys(fields, 0))[counter] = int(value)
+    for counts in result.values():
+        attempts = counts["acquired"] + counts["skipped"]
+        counts["avg_wait_ms"] = round(counts["wait_ms"] / attempts, 1) if attempts else 0.0
+        counts["avg_held_ms"] = (
+            round(counts["held_ms"] / counts["acquired"], 1) if counts["acquired"] else 0.0
+        )
+    return result
+
+
+def reset_stats() -> None:
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(STATS_KEY)
+        except redis.RedisError as exc:
+            logger.warning("Could not reset task lock stats: %s", exc)
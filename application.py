@@ -158,6 +158,12 @@ def create_app() -> Flask:
         from app.routes.payfast import payfast_bp
         app.register_blueprint(payfast_bp)
 
+        # Register ChirpStack HTTP integration webhook blueprint
+        from app.routes.chirpstack import chirpstack_bp
+        from app.services.chirpstack_uplinks import uplink_buffer
+        app.register_blueprint(chirpstack_bp)
+        uplink_buffer.init_app(app)
+
         # Configure session timeout from settings
         configure_session_timeout(app)
 
@@ -26,6 +26,10 @@ def make_celery(app_name: str = __name__) -> Celery:
             'app.tasks.notification_tasks',
             'app.tasks.prepaid_disconnect_tasks',
             'app.tasks.payment_tasks',
+            'app.tasks.maintenance_tasks',
+            'app.tasks.consumption_tasks',
+            'app.tasks.report_tasks',
+            'app.tasks.fanout',
         ]
     )
 
@@ -81,12 +85,39 @@ def make_celery(app_name: str = __name__) -> Celery:
             'schedule': crontab(hour=0, minute=0),
             'options': {'queue': 'payments'}
         },
+        # Create upcoming meter_readings partitions and expire old ones at 1 AM
+        'maintain-reading-partitions': {
+            'task': 'app.tasks.maintenance_tasks.maintain_meter_reading_partitions',
+            'schedule': crontab(hour=1, minute=0),
+            'options': {'queue': 'maintenance'}
+        },
+        # Bill unbilled meter readings every 15 minutes
+        'bill-consumption': {
+            'task': 'app.tasks.consumption_tasks.dispatch_consumption_billing',
+            'schedule': crontab(minute='*/15'),
+            'options': {'queue': 'consumption'}
+        },
+        # Delete expired report artifacts every hour
+        'purge-report-artifacts': {
+            'task': 'app.tasks.report_tasks.purge_expired_report_artifacts',
+            'schedule': crontab(minute=45),
+            'options': {'queue': 'reports'}
+        },
+        # Recompute dashboard snapshots every 5 minutes
+        'refresh-dashboard-snapshots': {
+            'task': 'app.tasks.report_tasks.refresh_dashboard_snapshots',
+            'schedule': crontab(minute='*/5'),
+            'options': {'queue': 'reports'}
+        },
     }
 
     celery.conf.task_routes = {
         'app.tasks.notification_tasks.*': {'queue': 'notifications'},
         'app.tasks.prepaid_disconnect_tasks.*': {'queue': 'prepaid'},
         'app.tasks.payment_tasks.*': {'queue': 'payments'},
+        'app.tasks.maintenance_tasks.*': {'queue': 'maintenance'},
+        'app.tasks.consumption_tasks.*': {'queue': 'consumption'},
+        'app.tasks.report_tasks.*': {'queue': 'reports'},
     }
 
     return celery
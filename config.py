@@ -22,6 +22,68 @@ class Config:
     CELERY_TIMEZONE = os.getenv("CELERY_TIMEZONE", "Africa/Johannesburg")
     CELERY_ENABLE_UTC = True
 
+    # Redis for application caches and cross-process invalidation messages.
+    # Empty disables them; everything falls back to the database.
+    REDIS_URL = os.getenv("REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+
+    # meter_readings monthly partitions (PostgreSQL only)
+    # Future partitions kept ready ahead of the current month.
+    READING_PARTITION_MONTHS_AHEAD = int(os.getenv("READING_PARTITION_MONTHS_AHEAD", "3"))
+    # Partitions older than this many months are detached; 0 keeps everything.
+    READING_RETENTION_MONTHS = int(os.getenv("READING_RETENTION_MONTHS", "0"))
+    # Drop detached partitions instead of leaving them for archiving.
+    READING_RETENTION_DROP = os.getenv("READING_RETENTION_DROP", "false").lower() in ("true", "1", "yes")
+
+    # Consumption billing
+    # Readings claimed, priced and committed per batch.
+    BILLING_BATCH_SIZE = int(os.getenv("BILLING_BATCH_SIZE", "5000"))
+    # Parallel billing runs started every 15 minutes.
+    BILLING_WORKERS = int(os.getenv("BILLING_WORKERS", "4"))
+    # Each run stops starting new batches after this many seconds.
+    BILLING_RUN_SECONDS = int(os.getenv("BILLING_RUN_SECONDS", "240"))
+    # Readings dated before this ISO date (e.g. 2026-11-01) are never billed.
+    BILLING_START_DATE = os.getenv("BILLING_START_DATE") or None
+
+    # Nightly job fan-out (app/tasks/fanout.py)
+    # Estates handled by one shard task of the credit, usage and disconnect jobs.
+    FANOUT_ESTATES_PER_SHARD = int(os.getenv("FANOUT_ESTATES_PER_SHARD", "10"))
+    # PayFast transactions checked by one reconciliation shard task.
+    FANOUT_TRANSACTIONS_PER_SHARD = int(os.getenv("FANOUT_TRANSACTIONS_PER_SHARD", "200"))
+
+    # Beat task overlap protection (app/utils/task_lock.py)
+    # Redis lease of a beat-scheduled task (seconds), renewed by a heartbeat
+    # while the task runs; a crashed worker's lease expires after this long.
+    TASK_LOCK_TTL = int(os.getenv("TASK_LOCK_TTL", "60"))
+    # A fanned-out job's lease, renewed as each shard starts, lasts this long.
+    TASK_LOCK_FANOUT_TTL = int(os.getenv("TASK_LOCK_FANOUT_TTL", "1800"))
+
+    # Process-local cache of parsed rate tables and unit rate assignments
+    RATE_CACHE_SIZE = int(os.getenv("RATE_CACHE_SIZE", "512"))
+    # Upper bound on staleness if an invalidation message is missed
+    RATE_CACHE_TTL = int(os.getenv("RATE_CACHE_TTL", "300"))
+    # Seconds a meter's cached latest reading is served before reloading it.
+    LATEST_READING_CACHE_TTL = int(os.getenv("LATEST_READING_CACHE_TTL", "300"))
+
+    # Redis cache of reports page datasets (seconds). Windows that include
+    # today use the short TTL; closed periods the long one.
+    REPORT_CACHE_TTL_OPEN = int(os.getenv("REPORT_CACHE_TTL_OPEN", "120"))
+    REPORT_CACHE_TTL_CLOSED = int(os.getenv("REPORT_CACHE_TTL_CLOSED", "21600"))
+
+    # Background report jobs
+    # Where workers write CSV/PDF artifacts; must be shared with the web hosts.
+    REPORT_STORAGE_DIR = os.getenv(
+        "REPORT_STORAGE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "reports"),
+    )
+    # Identical report requests reuse a finished artifact for this many seconds.
+    REPORT_ARTIFACT_TTL = int(os.getenv("REPORT_ARTIFACT_TTL", "3600"))
+    # Jobs pending or running longer than this are treated as abandoned.
+    REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", "1800"))
+
+    # Dashboard snapshots older than this many seconds are recomputed on read.
+    # The refresh_dashboard_snapshots beat task runs every 5 minutes.
+    DASHBOARD_SNAPSHOT_MAX_AGE = int(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE", "900"))
+
     # SMS configuration (Clickatell)
     CLICKATELL_API_KEY = os.getenv("CLICKATELL_API_KEY", "")
 
@@ -31,6 +93,22 @@ class Config:
     CHIRPSTACK_TENANT_ID = os.getenv("CHIRPSTACK_TENANT_ID", "")
     CHIRPSTACK_PASSTHROUGH_PORT = int(os.getenv("CHIRPSTACK_PASSTHROUGH_PORT", "5"))
 
+    # ChirpStack HTTP integration (uplink ingestion webhook)
+    # Shared secret sent by ChirpStack as "Authorization: Bearer <token>".
+    # Without a token the webhook refuses every event (503).
+    CHIRPSTACK_WEBHOOK_TOKEN = os.getenv("CHIRPSTACK_WEBHOOK_TOKEN", "")
+    # Development/test only: accept unauthenticated events when no token is set.
+    CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED = os.getenv(
+        "CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED", "false"
+    ).lower() in ("true", "1", "yes")
+    # Uplinks are buffered per worker and flushed as one multi-row INSERT
+    # when either limit is reached.
+    CHIRPSTACK_INGEST_BATCH_SIZE = int(os.getenv("CHIRPSTACK_INGEST_BATCH_SIZE", "500"))
+    CHIRPSTACK_INGEST_FLUSH_MS = int(os.getenv("CHIRPSTACK_INGEST_FLUSH_MS", "1000"))
+    # Rows a worker keeps buffered while the database is failing; beyond
+    # this the webhook answers 503 so ChirpStack retries.
+    CHIRPSTACK_INGEST_MAX_PENDING = int(os.getenv("CHIRPSTACK_INGEST_MAX_PENDING", "10000"))
+
     # PayFast payment gateway configuration
     PAYFAST_MERCHANT_ID = os.getenv("PAYFAST_MERCHANT_ID", "10000100")
     PAYFAST_MERCHANT_KEY = os.getenv("PAYFAST_MERCHANT_KEY", "46f0cd694581a")
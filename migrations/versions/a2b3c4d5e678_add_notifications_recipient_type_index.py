@@ -0,0 +1,40 @@
+"""add notifications (recipient_id, notification_type, created_at) index
+
+Revision ID: a2b3c4d5e678
+Revises: f1a2b3c4d567
+Create Date: 2026-10-17 22:00:00.000000
+
+Backs the "already sent this type today" check in
+NotificationService.create_notifications and the low credit anti-join.
+Built CONCURRENTLY on PostgreSQL to avoid locking the table.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2b3c4d5e678'
+down_revision = 'f1a2b3c4d567'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_recipient_type_created',
+            'notifications',
+            ['recipient_id', 'notification_type', 'created_at'],
+            unique=False,
+            postgresql_concurrently=is_postgres,
+        )
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notifications_recipient_type_created',
+            table_name='notifications',
+            postgresql_concurrently=is_postgres,
+        )
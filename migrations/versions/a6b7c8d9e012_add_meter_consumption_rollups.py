@@ -0,0 +1,51 @@
+"""add meter consumption rollup tables
+
+Revision ID: a6b7c8d9e012
+Revises: z5a6b7c8d901
+Create Date: 2026-10-17 14:00:00.000000
+
+Adds meter_consumption_hourly and meter_consumption_daily, keyed by
+(meter_id, bucket). New readings are added incrementally at ingest; run
+scripts/backfill_consumption_rollups.py once after upgrading to populate
+them from existing meter_readings.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6b7c8d9e012'
+down_revision = 'z5a6b7c8d901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meter_consumption_hourly',
+    sa.Column('meter_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('consumption', sa.Numeric(precision=15, scale=3), nullable=False, server_default='0'),
+    sa.Column('reading_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['meter_id'], ['meters.id'], ),
+    sa.PrimaryKeyConstraint('meter_id', 'bucket')
+    )
+    op.create_table('meter_consumption_daily',
+    sa.Column('meter_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Date(), nullable=False),
+    sa.Column('consumption', sa.Numeric(precision=15, scale=3), nullable=False, server_default='0'),
+    sa.Column('reading_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['meter_id'], ['meters.id'], ),
+    sa.PrimaryKeyConstraint('meter_id', 'bucket')
+    )
+    # Range scans across all meters (estate/dashboard totals) filter on bucket alone
+    op.create_index('ix_meter_consumption_hourly_bucket', 'meter_consumption_hourly', ['bucket'], unique=False)
+    op.create_index('ix_meter_consumption_daily_bucket', 'meter_consumption_daily', ['bucket'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_meter_consumption_daily_bucket', table_name='meter_consumption_daily')
+    op.drop_index('ix_meter_consumption_hourly_bucket', table_name='meter_consumption_hourly')
+    op.drop_table('meter_consumption_daily')
+    op.drop_table('meter_consumption_hourly')
@@ -0,0 +1,51 @@
+"""create report_jobs table
+
+Revision ID: b7c8d9e0f123
+Revises: a6b7c8d9e012
+Create Date: 2026-10-17 16:00:00.000000
+
+Background CSV/PDF report jobs. Artifacts are written under
+REPORT_STORAGE_DIR by the Celery worker and reused for identical requests
+until expires_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c8d9e0f123'
+down_revision = 'a6b7c8d9e012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_jobs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('job_key', sa.String(length=64), nullable=False),
+    sa.Column('report_type', sa.String(length=50), nullable=False),
+    sa.Column('category', sa.String(length=20), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('parameters', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+    sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('file_path', sa.String(length=500), nullable=True),
+    sa.Column('file_name', sa.String(length=255), nullable=True),
+    sa.Column('file_size', sa.Integer(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("format IN ('csv','pdf')", name='ck_report_jobs_format'),
+    sa.CheckConstraint("status IN ('pending','running','completed','failed','expired')", name='ck_report_jobs_status'),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_jobs_job_key_created_at', 'report_jobs', ['job_key', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_jobs_job_key_created_at', table_name='report_jobs')
+    op.drop_table('report_jobs')
@@ -0,0 +1,35 @@
+"""create dashboard_snapshots table
+
+Revision ID: c8d9e0f1a234
+Revises: b7c8d9e0f123
+Create Date: 2026-10-17 18:00:00.000000
+
+Precomputed dashboard metrics per (estate, period); estate_id 0 is the
+all-estates view. Filled by the refresh_dashboard_snapshots beat task, or
+on first dashboard load.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d9e0f1a234'
+down_revision = 'b7c8d9e0f123'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dashboard_snapshots',
+    sa.Column('estate_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('period', sa.String(length=20), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('period_end', sa.DateTime(), nullable=False),
+    sa.Column('metrics', sa.Text(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('estate_id', 'period')
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_snapshots')
@@ -0,0 +1,52 @@
+"""backfill meter last reading columns
+
+Revision ID: d9e0f1a2b345
+Revises: c8d9e0f1a234
+Create Date: 2026-10-17 19:00:00.000000
+
+meters.last_reading / last_reading_date / last_communication are now kept
+current by ingest (app/services/latest_telemetry.py) but were never
+written before. Fill them from each meter's newest reading; each lookup is
+a (meter_id, reading_date DESC) index seek.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e0f1a2b345'
+down_revision = 'c8d9e0f1a234'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE meters SET last_reading_date = (
+            SELECT max(r.reading_date) FROM meter_readings r
+            WHERE r.meter_id = meters.id
+        )
+        WHERE EXISTS (SELECT 1 FROM meter_readings r WHERE r.meter_id = meters.id)
+        """
+    )
+    op.execute(
+        """
+        UPDATE meters SET
+            last_reading = (
+                SELECT r.reading_value FROM meter_readings r
+                WHERE r.meter_id = meters.id
+                  AND r.reading_date = meters.last_reading_date
+                ORDER BY r.id DESC LIMIT 1
+            ),
+            last_communication = CASE
+                WHEN last_communication > last_reading_date THEN last_communication
+                ELSE last_reading_date
+            END
+        WHERE last_reading_date IS NOT NULL
+        """
+    )
+
+
+def downgrade():
+    # The columns existed before; the backfilled values are left in place
+    pass
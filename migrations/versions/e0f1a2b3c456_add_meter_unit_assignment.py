@@ -0,0 +1,52 @@
+"""add meters.unit_id and utility_role
+
+Revision ID: e0f1a2b3c456
+Revises: d9e0f1a2b345
+Create Date: 2026-10-17 20:00:00.000000
+
+Denormalized meter -> unit assignment so joins can use Meter.unit_id ==
+Unit.id (an indexed equality) instead of OR-ing over the four
+units.*_meter_id columns. Kept current by the Unit after_flush hook in
+app/models/unit.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e0f1a2b3c456'
+down_revision = 'd9e0f1a2b345'
+branch_labels = None
+depends_on = None
+
+METER_ROLES = (
+    ('electricity_meter_id', 'electricity'),
+    ('water_meter_id', 'water'),
+    ('solar_meter_id', 'solar'),
+    ('hot_water_meter_id', 'hot_water'),
+)
+
+
+def upgrade():
+    op.add_column('meters', sa.Column('unit_id', sa.Integer(), nullable=True))
+    op.add_column('meters', sa.Column('utility_role', sa.String(length=20), nullable=True))
+    op.create_foreign_key(
+        'fk_meters_unit_id', 'meters', 'units', ['unit_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_meters_unit_id', 'meters', ['unit_id'], unique=False)
+
+    for column, role in METER_ROLES:
+        op.execute(
+            f"""
+            UPDATE meters SET unit_id = u.id, utility_role = '{role}'
+            FROM units u
+            WHERE u.{column} = meters.id
+            """
+        )
+
+
+def downgrade():
+    op.drop_index('ix_meters_unit_id', table_name='meters')
+    op.drop_constraint('fk_meters_unit_id', 'meters', type_='foreignkey')
+    op.drop_column('meters', 'utility_role')
+    op.drop_column('meters', 'unit_id')
@@ -0,0 +1,48 @@
+"""add unit search indexes
+
+Revision ID: f1a2b3c4d567
+Revises: e0f1a2b3c456
+Create Date: 2026-10-17 21:00:00.000000
+
+Indexes for the meters page unit picker (search_units_for_meter in
+app/services/units.py), which matches a unit_number prefix or part of
+the estate name:
+
+- ix_units_unit_number_prefix: lower(unit_number) text_pattern_ops, for
+  lower(unit_number) LIKE 'q%'.
+- ix_estates_name_trgm: pg_trgm GIN on lower(name), for
+  lower(name) LIKE '%q%'.
+
+PostgreSQL only; built CONCURRENTLY to avoid locking the tables.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a2b3c4d567'
+down_revision = 'e0f1a2b3c456'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_units_unit_number_prefix '
+            'ON units (lower(unit_number) text_pattern_ops)'
+        )
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_estates_name_trgm '
+            'ON estates USING gin (lower(name) gin_trgm_ops)'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_estates_name_trgm')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_units_unit_number_prefix')
@@ -0,0 +1,25 @@
+"""add pulse_factor to meters
+
+Revision ID: x3y4z5a6b789
+Revises: w2x3y4z5a678
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'x3y4z5a6b789'
+down_revision = 'w2x3y4z5a678'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Pulses per kWh / m³ used by the payload decoders for pulse counters
+    op.add_column('meters', sa.Column('pulse_factor', sa.Numeric(precision=10, scale=3), nullable=True))
+
+
+def downgrade():
+    op.drop_column('meters', 'pulse_factor')
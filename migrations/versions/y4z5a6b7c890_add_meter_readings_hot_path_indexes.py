@@ -0,0 +1,89 @@
+"""add meter_readings hot path indexes
+
+Revision ID: y4z5a6b7c890
+Revises: x3y4z5a6b789
+Create Date: 2026-10-17 10:00:00.000000
+
+Every hot read path (meter realtime stats, chart data, paginated readings,
+dashboard and reports) filters meter_readings on (meter_id, reading_date).
+This adds:
+
+- ix_meter_readings_meter_id_reading_date: (meter_id, reading_date DESC)
+  covering reading_value and consumption_since_last, so "latest reading",
+  "readings in window" and "consumption in window" are index-only scans.
+- ix_meter_readings_unbilled: partial index on (meter_id, reading_date)
+  WHERE is_billed = false, as described in the consumption billing plan.
+
+The billing columns (is_billed, billed_at, transaction_id) are on the model
+but were never added by a migration, so they are created here if missing.
+Readings that already exist when is_billed is added are marked billed, so
+the first billing run does not charge wallets for their reading history.
+
+On PostgreSQL the indexes are built CONCURRENTLY to avoid locking the table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'y4z5a6b7c890'
+down_revision = 'x3y4z5a6b789'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns():
+    inspector = sa.inspect(op.get_bind())
+    return {col['name'] for col in inspector.get_columns('meter_readings')}
+
+
+def upgrade():
+    columns = _existing_columns()
+    if 'is_billed' not in columns:
+        # Readings from before automatic billing count as billed; only new
+        # rows default to unbilled.
+        op.add_column('meter_readings', sa.Column('is_billed', sa.Boolean(), nullable=False, server_default=sa.true()))
+        op.alter_column('meter_readings', 'is_billed', server_default=sa.false())
+    if 'billed_at' not in columns:
+        op.add_column('meter_readings', sa.Column('billed_at', sa.DateTime(), nullable=True))
+    if 'transaction_id' not in columns:
+        op.add_column('meter_readings', sa.Column('transaction_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'fk_meter_readings_transaction_id', 'meter_readings', 'transactions',
+            ['transaction_id'], ['id'],
+        )
+
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_meter_readings_meter_id_reading_date',
+            'meter_readings',
+            ['meter_id', sa.text('reading_date DESC')],
+            unique=False,
+            postgresql_include=['reading_value', 'consumption_since_last'],
+            postgresql_concurrently=is_postgres,
+        )
+        op.create_index(
+            'ix_meter_readings_unbilled',
+            'meter_readings',
+            ['meter_id', 'reading_date'],
+            unique=False,
+            postgresql_where=sa.text('is_billed = false'),
+            postgresql_concurrently=is_postgres,
+        )
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_meter_readings_unbilled',
+            table_name='meter_readings',
+            postgresql_concurrently=is_postgres,
+        )
+        op.drop_index(
+            'ix_meter_readings_meter_id_reading_date',
+            table_name='meter_readings',
+            postgresql_concurrently=is_postgres,
+        )
+    # Billing columns are left in place: the model depends on them.
@@ -0,0 +1,135 @@
+"""partition meter_readings by month
+
+Revision ID: z5a6b7c8d901
+Revises: y4z5a6b7c890
+Create Date: 2026-10-17 12:00:00.000000
+
+Converts meter_readings into a PostgreSQL table range-partitioned by
+reading_date, one partition per calendar month (meter_readings_yYYYYmMM)
+plus a DEFAULT partition for out-of-range timestamps. Partitions are
+created for every month that already holds data and three months ahead;
+the maintain_meter_reading_partitions beat task keeps creating future
+ones and detaches partitions past the retention window.
+
+A partitioned table's primary key must contain the partition key, so the
+database primary key becomes (id, reading_date). id keeps its sequence
+and remains unique in practice; nothing references meter_readings.id.
+
+Existing rows are copied into the new table inside the migration
+transaction. On large installs run this during a maintenance window.
+
+No-op on databases other than PostgreSQL.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'z5a6b7c8d901'
+down_revision = 'y4z5a6b7c890'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes():
+    op.create_index(
+        'ix_meter_readings_meter_id_reading_date',
+        'meter_readings',
+        ['meter_id', sa.text('reading_date DESC')],
+        unique=False,
+        postgresql_include=['reading_value', 'consumption_since_last'],
+    )
+    op.create_index(
+        'ix_meter_readings_unbilled',
+        'meter_readings',
+        ['meter_id', 'reading_date'],
+        unique=False,
+        postgresql_where=sa.text('is_billed = false'),
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # The sequence must outlive the old table it is OWNED BY.
+    op.execute("ALTER SEQUENCE meter_readings_id_seq OWNED BY NONE")
+    op.execute(
+        "CREATE TABLE meter_readings_partitioned "
+        "(LIKE meter_readings INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (reading_date)"
+    )
+
+    bounds = bind.execute(
+        sa.text("SELECT min(reading_date), max(reading_date) FROM meter_readings")
+    ).one()
+    today = date.today()
+    earliest = bounds[0] or today
+    first = date(earliest.year, earliest.month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    if bounds[1] is not None:
+        last = max(last, date(bounds[1].year, bounds[1].month, 1))
+
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE meter_readings_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF meter_readings_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(
+        "CREATE TABLE meter_readings_default PARTITION OF meter_readings_partitioned DEFAULT"
+    )
+
+    op.execute("INSERT INTO meter_readings_partitioned SELECT * FROM meter_readings")
+    op.drop_table('meter_readings')
+    op.rename_table('meter_readings_partitioned', 'meter_readings')
+    op.execute("ALTER SEQUENCE meter_readings_id_seq OWNED BY meter_readings.id")
+
+    op.create_primary_key('meter_readings_pkey', 'meter_readings', ['id', 'reading_date'])
+    op.create_foreign_key(
+        'meter_readings_meter_id_fkey', 'meter_readings', 'meters', ['meter_id'], ['id'],
+    )
+    op.create_foreign_key(
+        'fk_meter_readings_transaction_id', 'meter_readings', 'transactions',
+        ['transaction_id'], ['id'],
+    )
+    _create_indexes()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER SEQUENCE meter_readings_id_seq OWNED BY NONE")
+    op.execute(
+        "CREATE TABLE meter_readings_plain "
+        "(LIKE meter_readings INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.execute("INSERT INTO meter_readings_plain SELECT * FROM meter_readings")
+    # Dropping the parent drops every attached partition with it.
+    op.drop_table('meter_readings')
+    op.rename_table('meter_readings_plain', 'meter_readings')
+    op.execute("ALTER SEQUENCE meter_readings_id_seq OWNED BY meter_readings.id")
+
+    op.create_primary_key('meter_readings_pkey', 'meter_readings', ['id'])
+    op.create_foreign_key(
+        'meter_readings_meter_id_fkey', 'meter_readings', 'meters', ['meter_id'], ['id'],
+    )
+    op.create_foreign_key(
+        'fk_meter_readings_transaction_id', 'meter_readings', 'transactions',
+        ['transaction_id'], ['id'],
+    )
+    _create_indexes()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Recompute meter_readings.consumption_since_last from the stored readings.
+
+Processes one meter at a time, reading and updating in chunks, so millions
+of rows can be repaired without loading them into the ORM. Counter
+rollovers and resets are handled as at ingest. The consumption rollups for
+the processed window are rebuilt afterwards.
+
+Usage:
+    python scripts/backfill_consumption.py
+    python scripts/backfill_consumption.py --meter-id 12 --since 2026-01-01
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from application import create_app
+from app.db import db
+from app.models import Meter, MeterReading
+from app.services.consumption import recalculate_consumption
+from app.services.consumption_rollups import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", help="Only readings on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only readings before this date (YYYY-MM-DD)")
+    parser.add_argument("--meter-id", type=int, help="Limit to a single meter")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--skip-rollups", action="store_true", help="Do not rebuild consumption rollups")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.since, "%Y-%m-%d") if args.since else None
+    end = datetime.strptime(args.until, "%Y-%m-%d") if args.until else None
+
+    app = create_app()
+    with app.app_context():
+        if args.meter_id:
+            meter_ids = [args.meter_id]
+        else:
+            meter_ids = [row[0] for row in db.session.query(Meter.id).order_by(Meter.id)]
+
+        total = 0
+        for index, meter_id in enumerate(meter_ids, 1):
+            updated = recalculate_consumption(
+                meter_id,
+                start=start,
+                end=end - timedelta(microseconds=1) if end else None,
+                chunk_size=args.chunk_size,
+            )
+            total += updated
+            if updated:
+                print(f"  meter {meter_id}: {updated} readings updated ({index}/{len(meter_ids)})")
+        print(f"✓ Updated consumption on {total} readings across {len(meter_ids)} meters")
+
+        if total and not args.skip_rollups:
+            rollup_start = start.date() if start else None
+            if rollup_start is None:
+                earliest = db.session.query(func.min(MeterReading.reading_date)).scalar()
+                rollup_start = earliest.date()
+            rollup_end = end.date() if end else datetime.utcnow().date() + timedelta(days=1)
+            written = rebuild_rollups(rollup_start, rollup_end, meter_id=args.meter_id)
+            print(f"✓ Rebuilt consumption rollups {rollup_start} → {rollup_end} ({written} meter-days)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly/daily consumption rollups from meter_readings.
+
+Run once after the rollup migration, and again for any window whose raw
+readings were edited outside the ingest path (seed data, manual fixes,
+consumption recalculation).
+
+Usage:
+    python scripts/backfill_consumption_rollups.py
+    python scripts/backfill_consumption_rollups.py --since 2026-01-01 --until 2026-02-01 --meter-id 12
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from application import create_app
+from app.db import db
+from app.models import MeterReading
+from app.services.consumption_rollups import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD); default: earliest reading")
+    parser.add_argument("--until", help="Day to stop before (YYYY-MM-DD); default: tomorrow")
+    parser.add_argument("--meter-id", type=int, help="Limit to a single meter")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.since:
+            start = datetime.strptime(args.since, "%Y-%m-%d").date()
+        else:
+            earliest = db.session.query(func.min(MeterReading.reading_date)).scalar()
+            if earliest is None:
+                print("No meter readings to roll up")
+                return
+            start = earliest.date()
+        if args.until:
+            end = datetime.strptime(args.until, "%Y-%m-%d").date()
+        else:
+            end = datetime.utcnow().date() + timedelta(days=1)
+
+        written = rebuild_rollups(start, end, meter_id=args.meter_id)
+        print(f"✓ Rebuilt consumption rollups {start} → {end} ({written} meter-days)")
+
+
+if __name__ == "__main__":
+    main()
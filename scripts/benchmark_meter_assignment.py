@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Benchmark the meters page's meter -> unit join: the old OR over the four
+units.*_meter_id columns against the denormalized meters.unit_id equality.
+
+Seeds a synthetic estate portfolio (default 50,000 meters, four per unit,
+every unit with a wallet) into a THROWAWAY PostgreSQL database, records
+EXPLAIN ANALYZE timings for both join shapes, then times
+list_meters_paginated() end to end as the meters page calls it.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg2://localhost/quantify_bench \\
+        python scripts/benchmark_meter_assignment.py --meters 50000
+
+    # Reuse already-seeded data
+    python scripts/benchmark_meter_assignment.py --skip-seed --output bench.json
+
+WARNING: unless --skip-seed is given, every table in the target database is
+dropped and recreated.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from application import create_app
+from app.db import db
+from app.services.meters import list_meters_paginated
+
+METER_TYPES = ("electricity", "water", "solar", "hot_water")
+
+OR_JOIN = """
+    LEFT JOIN units u ON (
+        u.electricity_meter_id = m.id OR u.water_meter_id = m.id
+        OR u.solar_meter_id = m.id OR u.hot_water_meter_id = m.id
+    )
+"""
+EQ_JOIN = "LEFT JOIN units u ON u.id = m.unit_id"
+
+# The meters page's count and first page, with and without a search term
+PAGE_QUERIES = {
+    "count": """
+        SELECT count(*) FROM meters m {join}
+        LEFT JOIN wallets w ON w.unit_id = u.id
+        LEFT JOIN estates e ON e.id = u.estate_id
+    """,
+    "page1": """
+        SELECT m.id, u.unit_number, w.id, e.name FROM meters m {join}
+        LEFT JOIN wallets w ON w.unit_id = u.id
+        LEFT JOIN estates e ON e.id = u.estate_id
+        ORDER BY e.name NULLS LAST, u.unit_number, m.serial_number
+        LIMIT 20
+    """,
+    "estate_page1": """
+        SELECT m.id, u.unit_number FROM meters m {join}
+        LEFT JOIN estates e ON e.id = u.estate_id
+        WHERE e.id = :estate_id
+        ORDER BY u.unit_number, m.serial_number
+        LIMIT 20
+    """,
+    "unassigned": """
+        SELECT count(*) FROM meters m {join}
+        WHERE m.meter_type = 'water' AND u.id IS NULL
+    """,
+}
+
+
+def seed(meters: int, units_per_estate: int, assigned_fraction: float):
+    """Recreate the schema and bulk-load estates, units, wallets and meters."""
+    units = int(meters * assigned_fraction) // len(METER_TYPES)
+    estates = max(1, units // units_per_estate)
+    print(f"Seeding {meters} meters, {units} units across {estates} estates...")
+    db.drop_all()
+    db.create_all()
+    with db.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO meters (serial_number, meter_type, communication_type, "
+                "communication_status, is_active, is_prepaid) "
+                "SELECT 'BENCH-' || g, "
+                "  (ARRAY['electricity','water','solar','hot_water'])[1 + (g - 1) % 4], "
+                "  'lora', 'online', true, true FROM generate_series(1, :n) g"
+            ),
+            {"n": meters},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO estates (name, total_units, is_active) "
+                "SELECT 'Bench Estate ' || g, :per_estate, true FROM generate_series(1, :n) g"
+            ),
+            {"n": estates, "per_estate": units_per_estate},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO units (estate_id, unit_number, occupancy_status, is_active, "
+                "  electricity_meter_id, water_meter_id, solar_meter_id, hot_water_meter_id) "
+                "SELECT e.id, 'U' || g, 'occupied', true, "
+                "  (SELECT id FROM meters WHERE serial_number = 'BENCH-' || (4 * g - 3)), "
+                "  (SELECT id FROM meters WHERE serial_number = 'BENCH-' || (4 * g - 2)), "
+                "  (SELECT id FROM meters WHERE serial_number = 'BENCH-' || (4 * g - 1)), "
+                "  (SELECT id FROM meters WHERE serial_number = 'BENCH-' || (4 * g)) "
+                "FROM generate_series(1, :n) g "
+                "JOIN estates e ON e.name = 'Bench Estate ' || (1 + (g - 1) % :estates)"
+            ),
+            {"n": units, "estates": estates},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO wallets (unit_id, balance, electricity_balance, water_balance, "
+                "  hot_water_balance, solar_balance, low_balance_threshold) "
+                "SELECT id, 100, 100, 100, 0, 0, 50 FROM units"
+            )
+        )
+        # Same backfill as migration e0f1a2b3c456
+        for column, role in zip(
+            ("electricity_meter_id", "water_meter_id", "solar_meter_id", "hot_water_meter_id"),
+            METER_TYPES,
+        ):
+            conn.execute(
+                text(
+                    f"UPDATE meters SET unit_id = u.id, utility_role = '{role}' "
+                    f"FROM units u WHERE u.{column} = meters.id"
+                )
+            )
+        for table in ("meters", "units", "wallets", "estates"):
+            conn.execute(text(f"ANALYZE {table}"))
+
+
+def explain(sql: str, params: dict, runs: int):
+    """Return (best execution ms, plan node for the units join) over ``runs``."""
+    best, node = None, None
+    for _ in range(runs):
+        plan = db.session.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), params
+        ).scalar()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        elapsed = plan["Execution Time"]
+        if best is None or elapsed < best:
+            best, node = elapsed, _join_node(plan["Plan"])
+    db.session.rollback()
+    return best, node
+
+
+def _join_node(plan: dict) -> str:
+    """Name the first join node in the plan, e.g. 'Hash Left Join'."""
+    stack = [plan]
+    while stack:
+        current = stack.pop(0)
+        if "Join" in current["Node Type"] or current["Node Type"] == "Nested Loop":
+            return current["Node Type"]
+        stack.extend(current.get("Plans", []))
+    return plan["Node Type"]
+
+
+def time_page(runs: int, **filters) -> float:
+    """Best wall-clock ms for one list_meters_paginated() call."""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        list_meters_paginated(page=1, per_page=20, **filters)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+        db.session.rollback()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="meter -> unit join benchmark")
+    parser.add_argument("--meters", type=int, default=50000)
+    parser.add_argument("--units-per-estate", type=int, default=250)
+    parser.add_argument("--assigned-fraction", type=float, default=0.8)
+    parser.add_argument("--runs", type=int, default=3, help="runs per query (best kept)")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            sys.exit("This benchmark requires PostgreSQL (set DATABASE_URL)")
+
+        if not args.skip_seed:
+            seed(args.meters, args.units_per_estate, args.assigned_fraction)
+
+        estate_id = db.session.execute(text("SELECT min(id) FROM estates")).scalar()
+        params = {"estate_id": estate_id}
+
+        print()
+        print(f"{'query':14} {'or ms':>10} {'equality ms':>12} {'speedup':>8}  plans (or / equality)")
+        results = []
+        for name, sql in PAGE_QUERIES.items():
+            or_ms, or_plan = explain(sql.format(join=OR_JOIN), params, args.runs)
+            eq_ms, eq_plan = explain(sql.format(join=EQ_JOIN), params, args.runs)
+            speedup = or_ms / eq_ms if eq_ms else float("inf")
+            print(f"{name:14} {or_ms:10.2f} {eq_ms:12.2f} {speedup:7.1f}x  {or_plan} / {eq_plan}")
+            results.append({
+                "query": name,
+                "or_ms": or_ms,
+                "or_plan": or_plan,
+                "equality_ms": eq_ms,
+                "equality_plan": eq_plan,
+            })
+
+        page = {
+            "page1": time_page(args.runs),
+            "estate_page1": time_page(args.runs, estate_id=estate_id),
+            "search": time_page(args.runs, search="BENCH-4999"),
+        }
+        print()
+        for name, elapsed in page.items():
+            print(f"list_meters_paginated {name:14} {elapsed:10.2f} ms")
+
+        if args.output:
+            with open(args.output, "w") as fh:
+                json.dump(
+                    {
+                        "generated_at": datetime.utcnow().isoformat(),
+                        "meters": args.meters,
+                        "results": results,
+                        "list_meters_paginated_ms": page,
+                    },
+                    fh,
+                    indent=2,
+                )
+            print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark the meter_readings hot-path queries with and without the
+(meter_id, reading_date DESC) covering index and the unbilled partial index.
+
+Seeds a synthetic fleet into a THROWAWAY PostgreSQL database, then records
+EXPLAIN ANALYZE timings for each query before and after the indexes exist.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg2://localhost/quantify_bench \\
+        python scripts/benchmark_reading_indexes.py --meters 500 --days 60
+
+    # Reuse already-seeded data
+    python scripts/benchmark_reading_indexes.py --skip-seed --output bench.json
+
+WARNING: unless --skip-seed is given, every table in the target database is
+dropped and recreated.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from application import create_app
+from app.db import db
+
+INDEX_DDL = {
+    "ix_meter_readings_meter_id_reading_date": (
+        "CREATE INDEX ix_meter_readings_meter_id_reading_date "
+        "ON meter_readings (meter_id, reading_date DESC) "
+        "INCLUDE (reading_value, consumption_since_last)"
+    ),
+    "ix_meter_readings_unbilled": (
+        "CREATE INDEX ix_meter_readings_unbilled "
+        "ON meter_readings (meter_id, reading_date) WHERE is_billed = false"
+    ),
+}
+
+# Representative versions of the hot queries, named after their call sites.
+QUERIES = {
+    "meter_realtime_stats.latest": """
+        SELECT reading_value, reading_date FROM meter_readings
+        WHERE meter_id = :meter_id ORDER BY reading_date DESC LIMIT 1
+    """,
+    "meter_realtime_stats.today": """
+        SELECT max(reading_value) - min(reading_value) FROM meter_readings
+        WHERE meter_id = :meter_id
+          AND reading_date >= :today_start AND reading_date < :today_end
+    """,
+    "meter_chart_data.month": """
+        SELECT reading_date, reading_value FROM meter_readings
+        WHERE meter_id = :meter_id AND reading_date >= :month_ago
+        ORDER BY reading_date
+    """,
+    "meter_readings_paginated.page1": """
+        SELECT * FROM meter_readings WHERE meter_id = :meter_id
+        ORDER BY reading_date DESC LIMIT 20 OFFSET 0
+    """,
+    "dashboard.month_consumption": """
+        SELECT sum(mr.consumption_since_last) FROM meter_readings mr
+        JOIN meters m ON m.id = mr.meter_id
+        WHERE m.meter_type = 'electricity' AND mr.reading_date >= :month_start
+    """,
+    "reports.consumption_by_meter": """
+        SELECT meter_id, sum(consumption_since_last) FROM meter_readings
+        WHERE meter_id = ANY(:meter_ids)
+          AND reading_date >= :month_ago AND reading_date <= :now
+        GROUP BY meter_id
+    """,
+    "billing.unbilled_batch": """
+        SELECT id, meter_id, consumption_since_last FROM meter_readings
+        WHERE is_billed = false ORDER BY meter_id, reading_date LIMIT 1000
+    """,
+}
+
+
+def seed(meters: int, days: int, billed_fraction: float):
+    """Recreate the schema and bulk-load a synthetic 15-minute reading history."""
+    print(f"Seeding {meters} meters x {days} days of 15-minute readings...")
+    db.drop_all()
+    db.create_all()
+    with db.engine.begin() as conn:
+        for name in INDEX_DDL:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(
+            text(
+                "INSERT INTO meters (serial_number, meter_type, communication_type, "
+                "communication_status, is_active, is_prepaid) "
+                "SELECT 'BENCH-' || g, CASE WHEN g % 2 = 0 THEN 'electricity' ELSE 'water' END, "
+                "'lora', 'online', true, true FROM generate_series(1, :n) g"
+            ),
+            {"n": meters},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO meter_readings (meter_id, reading_value, reading_date, "
+                "reading_type, consumption_since_last, is_validated, is_billed, created_at) "
+                "SELECT m.id, "
+                "  extract(epoch FROM ts - :start) / 900 * 0.25, ts, 'automatic', 0.25, false, "
+                "  ts < :billed_until, now() "
+                "FROM meters m CROSS JOIN generate_series(:start, :end, interval '15 minutes') ts"
+            ),
+            {
+                "start": datetime.utcnow() - timedelta(days=days),
+                "end": datetime.utcnow(),
+                "billed_until": datetime.utcnow() - timedelta(days=days * (1 - billed_fraction)),
+            },
+        )
+        conn.execute(text("ANALYZE meters"))
+        conn.execute(text("ANALYZE meter_readings"))
+    count = db.session.execute(text("SELECT count(*) FROM meter_readings")).scalar()
+    print(f"  {count:,} readings loaded")
+
+
+def explain(sql: str, params: dict, runs: int):
+    """Return (best execution ms, top plan node) over ``runs`` executions."""
+    best, node = None, None
+    for _ in range(runs):
+        plan = db.session.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), params
+        ).scalar()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        elapsed = plan["Execution Time"]
+        if best is None or elapsed < best:
+            best, node = elapsed, _describe(plan["Plan"])
+    db.session.rollback()
+    return best, node
+
+
+def _describe(plan: dict) -> str:
+    """Name the first scan node in the plan, e.g. 'Index Only Scan (ix_...)'."""
+    stack = [plan]
+    while stack:
+        current = stack.pop(0)
+        if "Scan" in current["Node Type"]:
+            index = current.get("Index Name")
+            return f"{current['Node Type']} ({index})" if index else current["Node Type"]
+        stack.extend(current.get("Plans", []))
+    return plan["Node Type"]
+
+
+def run_suite(params: dict, runs: int) -> dict:
+    return {name: explain(sql, params, runs) for name, sql in QUERIES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="meter_readings index benchmark")
+    parser.add_argument("--meters", type=int, default=500)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--billed-fraction", type=float, default=0.95)
+    parser.add_argument("--runs", type=int, default=3, help="EXPLAIN runs per query (best kept)")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            sys.exit("This benchmark requires PostgreSQL (set DATABASE_URL)")
+
+        if not args.skip_seed:
+            seed(args.meters, args.days, args.billed_fraction)
+
+        now = datetime.utcnow()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        meter_ids = [
+            row[0]
+            for row in db.session.execute(text("SELECT id FROM meters ORDER BY id LIMIT 50"))
+        ]
+        params = {
+            "meter_id": meter_ids[len(meter_ids) // 2],
+            "meter_ids": meter_ids,
+            "now": now,
+            "today_start": today_start,
+            "today_end": today_start + timedelta(days=1),
+            "month_ago": now - timedelta(days=30),
+            "month_start": today_start.replace(day=1),
+        }
+
+        with db.engine.begin() as conn:
+            for name in INDEX_DDL:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text("ANALYZE meter_readings"))
+        before = run_suite(params, args.runs)
+
+        with db.engine.begin() as conn:
+            for ddl in INDEX_DDL.values():
+                conn.execute(text(ddl))
+            conn.execute(text("ANALYZE meter_readings"))
+        after = run_suite(params, args.runs)
+
+        print()
+        print(f"{'query':36} {'before ms':>10} {'after ms':>10} {'speedup':>8}  plan after")
+        results = []
+        for name in QUERIES:
+            before_ms, before_plan = before[name]
+            after_ms, after_plan = after[name]
+            speedup = before_ms / after_ms if after_ms else float("inf")
+            print(f"{name:36} {before_ms:10.2f} {after_ms:10.2f} {speedup:7.1f}x  {after_plan}")
+            results.append({
+                "query": name,
+                "before_ms": before_ms,
+                "before_plan": before_plan,
+                "after_ms": after_ms,
+                "after_plan": after_plan,
+            })
+
+        if args.output:
+            with open(args.output, "w") as fh:
+                json.dump({"generated_at": now.isoformat(), "results": results}, fh, indent=2)
+            print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark the meter assignment picker's unit search: the old OR of the
+unit-number prefix and estate-name matches across the units/estates join,
+sorted and paged with OFFSET, against the UNION of two separately indexed
+matches paged by keyset (app/services/units.py).
+
+Seeds the same synthetic portfolio as benchmark_meter_assignment.py into a
+THROWAWAY PostgreSQL database, creates the search indexes from migration
+f1a2b3c4d567, then records EXPLAIN ANALYZE timings for both query shapes
+and which of the two search indexes each plan uses.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg2://localhost/quantify_bench \\
+        python scripts/benchmark_unit_search.py --meters 50000
+
+    # Reuse already-seeded data
+    python scripts/benchmark_unit_search.py --skip-seed --output bench.json
+
+WARNING: unless --skip-seed is given, every table in the target database is
+dropped and recreated.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from application import create_app
+from app.db import db
+from app.services.units import _unit_search_query, encode_unit_cursor
+from scripts.benchmark_meter_assignment import seed
+
+SEARCH_INDEXES = ("ix_units_unit_number_prefix", "ix_estates_name_trgm")
+
+# Same DDL as migration f1a2b3c4d567
+INDEX_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_units_unit_number_prefix "
+    "ON units (lower(unit_number) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_estates_name_trgm "
+    "ON estates USING gin (lower(name) gin_trgm_ops)",
+)
+
+# The search before the UNION rewrite
+OR_QUERY = """
+    SELECT u.id, u.unit_number, u.estate_id, e.name FROM units u
+    JOIN estates e ON e.id = u.estate_id
+    WHERE u.is_active IS NOT false AND u.water_meter_id IS NULL
+      AND (lower(u.unit_number) LIKE :prefix OR lower(e.name) LIKE :contains)
+    ORDER BY e.name, u.unit_number, u.id
+    LIMIT 21 OFFSET :offset
+"""
+
+# (label, search text, page); page 5 shows what OFFSET costs deeper in
+SEARCHES = (
+    ("unit_prefix", "u12", 1),
+    ("estate_name", "estate 7", 1),
+    ("estate_name_p5", "estate 7", 5),
+)
+
+
+def explain(sql: str, params: dict, runs: int):
+    """Return (best execution ms, search indexes used) over ``runs``."""
+    best, used = None, None
+    for _ in range(runs):
+        plan = db.session.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), params
+        ).scalar()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        elapsed = plan["Execution Time"]
+        if best is None or elapsed < best:
+            best, used = elapsed, _indexes_used(plan["Plan"])
+    db.session.rollback()
+    return best, used
+
+
+def _indexes_used(plan: dict) -> list:
+    """Which of SEARCH_INDEXES the plan scans."""
+    used, stack = set(), [plan]
+    while stack:
+        current = stack.pop()
+        if current.get("Index Name") in SEARCH_INDEXES:
+            used.add(current["Index Name"])
+        stack.extend(current.get("Plans", []))
+    return sorted(used)
+
+
+def union_sql(term: str, page: int) -> str:
+    """The service's query for ``page``, keyset-paged from the page before."""
+    after = None
+    for _ in range(page - 1):
+        rows = db.session.execute(
+            _unit_search_query(term, "water", None, None, after, 21)
+        ).mappings().all()
+        if len(rows) < 21:
+            break
+        after = encode_unit_cursor(dict(rows[19]))
+    query = _unit_search_query(term, "water", None, None, after, 21)
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="unit search benchmark")
+    parser.add_argument("--meters", type=int, default=50000)
+    parser.add_argument("--units-per-estate", type=int, default=250)
+    parser.add_argument("--assigned-fraction", type=float, default=0.8)
+    parser.add_argument("--runs", type=int, default=3, help="runs per query (best kept)")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            sys.exit("This benchmark requires PostgreSQL (set DATABASE_URL)")
+
+        if not args.skip_seed:
+            seed(args.meters, args.units_per_estate, args.assigned_fraction)
+            # Free water slots, so the picker has candidates to page through
+            with db.engine.begin() as conn:
+                conn.execute(text("UPDATE units SET water_meter_id = NULL WHERE id % 2 = 0"))
+        with db.engine.begin() as conn:
+            for ddl in INDEX_DDL:
+                conn.execute(text(ddl))
+            conn.execute(text("ANALYZE units"))
+            conn.execute(text("ANALYZE estates"))
+
+        print()
+        print(f"{'search':16} {'or ms':>10} {'union ms':>10} {'speedup':>8}  indexes (or / union)")
+        results = []
+        for label, term, page in SEARCHES:
+            params = {"prefix": f"{term}%", "contains": f"%{term}%", "offset": (page - 1) * 20}
+            or_ms, or_used = explain(OR_QUERY, params, args.runs)
+            union_ms, union_used = explain(union_sql(term, page), {}, args.runs)
+            speedup = or_ms / union_ms if union_ms else float("inf")
+            print(
+                f"{label:16} {or_ms:10.2f} {union_ms:10.2f} {speedup:7.1f}x  "
+                f"{','.join(or_used) or '-'} / {','.join(union_used) or '-'}"
+            )
+            results.append({
+                "search": label,
+                "term": term,
+                "page": page,
+                "or_ms": or_ms,
+                "or_indexes": or_used,
+                "union_ms": union_ms,
+                "union_indexes": union_used,
+            })
+
+        missing = [r["search"] for r in results if not r["union_indexes"]]
+        if missing:
+            print(f"\n✗ No search index used by the UNION query for: {', '.join(missing)}")
+
+        if args.output:
+            with open(args.output, "w") as fh:
+                json.dump(
+                    {
+                        "generated_at": datetime.utcnow().isoformat(),
+                        "meters": args.meters,
+                        "results": results,
+                    },
+                    fh,
+                    indent=2,
+                )
+            print(f"\n✓ Results written to {args.output}")
+        if missing:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
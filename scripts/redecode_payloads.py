@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Re-decode stored meter_readings.raw_payload values for a device type.
+
+Run after a decoder or firmware change to rewrite the decoded columns
+(reading_value, pulse_count, voltage, flow_rate, battery_level, ...) of
+historical readings in bulk.
+
+Usage:
+    python scripts/redecode_payloads.py --device-type milesight_em300
+    python scripts/redecode_payloads.py --device-type qalcosonic_w1 --since 2026-01-01 --meter-id 12
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.meter_readings import redecode_readings
+from app.utils.payload_decoders import supported_device_types
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--device-type", required=True, choices=supported_device_types())
+    parser.add_argument("--since", help="Only readings on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only readings on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--meter-id", type=int, help="Limit to a single meter")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.since, "%Y-%m-%d") if args.since else None
+    end = datetime.strptime(args.until, "%Y-%m-%d") if args.until else None
+
+    app = create_app()
+    with app.app_context():
+        updated = redecode_readings(
+            args.device_type,
+            start=start,
+            end=end,
+            meter_id=args.meter_id,
+            chunk_size=args.chunk_size,
+        )
+        print(f"✓ Re-decoded {updated} {args.device_type} readings")
+
+
+if __name__ == "__main__":
+    main()
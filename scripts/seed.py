@@ -30,7 +30,7 @@ from app.models import (
     # Resident,  # DEPRECATED - Use Person model instead
     Transaction,
 )
-from sqlalchemy import text
+from sqlalchemy import func, text
 
 import random
 from datetime import datetime, timedelta
@@ -1475,6 +1475,19 @@ def create_persons_and_assign(admin_user: User) -> dict[str, int]:
     return {"persons_created": created, "assigned": assigned}
 
 
+def rebuild_seeded_rollups() -> None:
+    """Seeded readings bypass the ingest path, so rebuild the rollups and latest readings."""
+    from app.services.consumption_rollups import rebuild_rollups
+
+    earliest, latest = db.session.query(
+        func.min(MeterReading.reading_date), func.max(MeterReading.reading_date)
+    ).one()
+    if earliest is None:
+        return
+    written = rebuild_rollups(earliest.date(), latest.date() + timedelta(days=1))
+    logging.info("Rebuilt consumption rollups: %d meter-days", written)
+
+
 def reset_database_data() -> None:
     engine_name = db.engine.name
     logging.info("Resetting database data using engine='%s'", engine_name)
@@ -1527,6 +1540,7 @@ def main():
         ra_counts = create_readings_and_alerts()
         historical_transactions = create_historical_transactions()
         monthly_counts = create_monthly_readings_and_transactions()
+        rebuild_seeded_rollups()
         summary = {
             "users_total": User.query.count(),
             "estates_total": Estate.query.count(),
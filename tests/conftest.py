@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import itertools
 import os
 import tempfile
+from collections import defaultdict
+
 import pytest
 
 import sys
@@ -14,7 +17,7 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from application import create_app
 from app.db import db
-from app.models import User, Role
+from app.models import Estate, Meter, Person, Role, Unit, User, Wallet
 from scripts.seed import ensure_roles_and_super_admin
 
 
@@ -33,6 +36,7 @@ def app():
             "PRESERVE_CONTEXT_ON_EXCEPTION": False,
             "SECRET_KEY": "test-secret",
             "LOGIN_DISABLED": False,
+            "REDIS_URL": None,
         }
     )
     with app.app_context():
@@ -72,3 +76,133 @@ def login(client):
     return client.post(
         "/api/v1/auth/login", json={"username": "takudzwa", "password": "takudzwa"}
     )
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for the report cache, latest readings and task locks"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.hashes = defaultdict(dict)
+        self.scripts = []
+
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = self._bytes(value)
+        self.ttls[key] = ex if px is None else px
+        return True
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def scan_iter(self, match=None, count=None):
+        prefix = (match or "*").rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+    def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.hashes.pop(key, None)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes[key]
+        fields[field.encode()] = str(int(fields.get(field.encode(), b"0")) + amount).encode()
+
+    def hgetall(self, key):
+        return dict(self.hashes[key])
+
+    def hmget(self, key, fields):
+        values = self.hashes.get(key, {})
+        return [values.get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        self.hashes[key].update({field: self._bytes(value) for field, value in mapping.items()})
+
+    def eval(self, script, numkeys, key, token, ms):
+        """The task lock's token-checked renew/release: PEXPIRE, or DEL when ms is 0."""
+        self.scripts.append(script)
+        if self.data.get(key) != self._bytes(token):
+            return 0
+        if int(ms) > 0:
+            self.ttls[key] = int(ms)
+        else:
+            self.delete(key)
+        return 1
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    """A FakeRedis handed to every module that talks to Redis."""
+    from app.services import latest_telemetry
+    from app.utils import report_cache, task_lock
+
+    client = FakeRedis()
+    for module in (latest_telemetry, report_cache, task_lock):
+        monkeypatch.setattr(module, "get_redis", lambda: client)
+    return client
+
+
+_unique = itertools.count(1)
+
+
+class Factory:
+    """Adds model rows with unique names, serials, emails and phones.
+
+    Rows are added to the session and flushed, not committed; keyword
+    arguments override the defaults. Use inside an app context.
+    """
+
+    @staticmethod
+    def _add(row):
+        db.session.add(row)
+        db.session.flush()
+        return row
+
+    def estate(self, **fields):
+        return self._add(Estate(**{"name": f"Test Estate {next(_unique)}", **fields}))
+
+    def person(self, **fields):
+        n = next(_unique)
+        defaults = {
+            "first_name": "Test",
+            "last_name": f"Person{n}",
+            "email": f"person-{n}@example.com",
+            "phone": f"+2784{n:07d}",
+        }
+        return self._add(Person(**{**defaults, **fields}))
+
+    def meter(self, meter_type="electricity", **fields):
+        serial = f"TEST-{next(_unique)}"
+        return self._add(Meter(**{"serial_number": serial, "meter_type": meter_type, **fields}))
+
+    def unit(self, estate, **fields):
+        number = f"U{next(_unique)}"
+        return self._add(Unit(**{"estate_id": estate.id, "unit_number": number, **fields}))
+
+    def wallet(self, unit, **fields):
+        return self._add(Wallet(unit_id=unit.id, **fields))
+
+
+@pytest.fixture()
+def factory():
+    return Factory()
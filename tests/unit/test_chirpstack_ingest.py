@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import base64
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db import db
+from app.models import Meter, MeterReading
+from app.services import chirpstack_uplinks
+from app.services.chirpstack_uplinks import (
+    IngestUnavailable,
+    UplinkBuffer,
+    parse_uplink,
+    uplink_buffer,
+)
+
+
+TOKEN = "secret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture(autouse=True)
+def webhook_token(app):
+    app.config["CHIRPSTACK_WEBHOOK_TOKEN"] = TOKEN
+    yield
+    app.config["CHIRPSTACK_WEBHOOK_TOKEN"] = ""
+
+
+def _uplink(dev_eui, value=None, data=b"\x01\x02"):
+    event = {
+        "time": "2026-03-01T10:15:00.000+02:00",
+        "deviceInfo": {"devEui": dev_eui},
+        "fPort": 85,
+        "data": base64.b64encode(data).decode(),
+        "rxInfo": [{"rssi": -110, "snr": 2.5}, {"rssi": -95, "snr": 7.0}],
+    }
+    if value is not None:
+        event["object"] = {"reading_value": value, "battery": 90}
+    return event
+
+
+def _make_meter(app, dev_eui):
+    with app.app_context():
+        meter = Meter(
+            serial_number=f"SN-{dev_eui}",
+            meter_type="electricity",
+            communication_type="lora",
+            device_eui=dev_eui,
+            lorawan_device_type="milesight_em300",
+        )
+        db.session.add(meter)
+        db.session.commit()
+        return meter.id
+
+
+def test_parse_uplink_extracts_telemetry():
+    row = parse_uplink(_uplink("A1B2C3D4E5F60708", value=12.5))
+    assert row["dev_eui"] == "a1b2c3d4e5f60708"
+    assert row["raw_payload"] == "0102"
+    assert row["rssi"] == -95
+    assert row["snr"] == 7.0
+    assert row["reading_value"] == 12.5
+    assert row["battery_level"] == 90
+    # Converted to naive UTC
+    assert row["reading_date"].hour == 8
+    assert row["reading_date"].tzinfo is None
+
+
+def test_parse_uplink_requires_dev_eui():
+    assert parse_uplink({"data": "AQI="}) is None
+
+
+def test_webhook_ignores_non_uplink_events(client):
+    r = client.post("/api/chirpstack/events?event=join", json={"deviceInfo": {}}, headers=AUTH)
+    assert r.status_code == 200
+    assert r.get_json()["status"] == "ignored"
+
+
+def test_webhook_rejects_invalid_token(client):
+    r = client.post("/api/chirpstack/events?event=up", json=_uplink("00000000000000aa", 1))
+    assert r.status_code == 401
+    r = client.post(
+        "/api/chirpstack/events?event=up",
+        json=_uplink("00000000000000aa", 1),
+        headers={"Authorization": "Bearer wrong"},
+    )
+    assert r.status_code == 401
+    r = client.post(
+        "/api/chirpstack/events?event=up", json=_uplink("00000000000000aa", 1), headers=AUTH
+    )
+    assert r.status_code == 200
+
+
+def test_webhook_without_a_token_fails_closed(app, client):
+    app.config["CHIRPSTACK_WEBHOOK_TOKEN"] = ""
+    r = client.post("/api/chirpstack/events?event=up", json=_uplink("00000000000000ab", 1))
+    assert r.status_code == 503
+    r = client.post("/api/chirpstack/events?event=join", json={}, headers=AUTH)
+    assert r.status_code == 503
+
+    # Explicit development opt-out
+    app.config["CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED"] = True
+    try:
+        r = client.post("/api/chirpstack/events?event=join", json={})
+        assert r.status_code == 200
+    finally:
+        app.config["CHIRPSTACK_WEBHOOK_ALLOW_UNAUTHENTICATED"] = False
+
+
+def test_webhook_batches_uplinks_into_readings(app, client):
+    meter_id = _make_meter(app, "1122334455667788")
+    events = [_uplink("1122334455667788", value=100 + i) for i in range(5)]
+    events.append(_uplink("ffffffffffffffff", value=1))  # unknown device
+    events.append(_uplink("1122334455667788"))  # nothing decodable
+
+    r = client.post("/api/chirpstack/events?event=up", json=events, headers=AUTH)
+    assert r.status_code == 200
+    assert r.get_json()["accepted"] == 7
+
+    with app.app_context():
+        uplink_buffer.flush()
+        readings = MeterReading.query.filter_by(meter_id=meter_id).all()
+        assert sorted(float(r.reading_value) for r in readings) == [100, 101, 102, 103, 104]
+        assert all(r.is_billed is False for r in readings)
+        assert all(r.raw_payload == "0102" for r in readings)
+
+
+def test_flush_decodes_raw_payload_by_device_type(app, client):
+    meter_id = _make_meter(app, "8877665544332211")
+    frame = bytes([0x01, 0x75, 64, 0x05, 0xC8]) + (250000).to_bytes(4, "little")
+
+    r = client.post("/api/chirpstack/events?event=up", json=_uplink("8877665544332211", data=frame), headers=AUTH)
+    assert r.status_code == 200
+
+    with app.app_context():
+        uplink_buffer.flush()
+        reading = MeterReading.query.filter_by(meter_id=meter_id).one()
+        assert float(reading.reading_value) == 250.0
+        assert reading.pulse_count == 250000
+        assert reading.battery_level == 64
+
+
+def _failing_insert(rows):
+    raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+
+
+def test_failed_flush_keeps_rows_for_a_retry(app, monkeypatch):
+    meter_id = _make_meter(app, "5566778899aabbcc")
+    buffer = UplinkBuffer(max_rows=10, max_age_ms=0)
+    buffer.add([parse_uplink(_uplink("5566778899aabbcc", value=v)) for v in (7, 8)])
+
+    with app.app_context():
+        monkeypatch.setattr(chirpstack_uplinks, "bulk_insert_readings", _failing_insert)
+        with pytest.raises(IngestUnavailable):
+            buffer.flush()
+        assert len(buffer) == 2
+        assert buffer.stats["db_errors"] == 1 and buffer.stats["dropped"] == 0
+        # Backing off: not due even though the batch is over its age limit
+        assert not buffer._is_due()
+
+        monkeypatch.undo()
+        assert buffer.flush() == 2
+        assert len(buffer) == 0
+        readings = MeterReading.query.filter_by(meter_id=meter_id).all()
+        assert sorted(float(r.reading_value) for r in readings) == [7, 8]
+
+
+def test_webhook_answers_503_when_its_flush_fails(app, client, monkeypatch):
+    _make_meter(app, "99aabbccddeeff00")
+    monkeypatch.setattr(uplink_buffer, "max_rows", 1)
+    monkeypatch.setattr(uplink_buffer, "_failures", 0)
+    monkeypatch.setattr(uplink_buffer, "_retry_at", 0.0)
+    monkeypatch.setattr(chirpstack_uplinks, "bulk_insert_readings", _failing_insert)
+
+    r = client.post("/api/chirpstack/events?event=up", json=_uplink("99aabbccddeeff00", 1), headers=AUTH)
+    assert r.status_code == 503
+    # ChirpStack resends the event, so the buffer does not keep it
+    assert len(uplink_buffer) == 0
+
+
+def test_full_buffer_rejects_new_uplinks(app):
+    buffer = UplinkBuffer(max_rows=10, max_age_ms=0, max_pending=2)
+    buffer.add([parse_uplink(_uplink("0011223344556677", value=v)) for v in (1, 2)])
+    with pytest.raises(IngestUnavailable):
+        buffer.add([parse_uplink(_uplink("0011223344556677", value=3))])
+    assert len(buffer) == 2 and buffer.stats["rejected"] == 1
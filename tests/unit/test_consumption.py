@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.db import db
+from app.models import Meter, MeterReading
+from app.services.consumption import compute_deltas, reading_delta, recalculate_consumption
+from app.services.consumption_rollups import meter_consumption_totals
+from app.services.meter_readings import bulk_insert_readings
+from app.utils.payload_decoders import register_max
+
+
+def _meter(serial, device_type=None):
+    meter = Meter(serial_number=serial, meter_type="water", lorawan_device_type=device_type)
+    db.session.add(meter)
+    db.session.commit()
+    return meter.id
+
+
+def _values(meter_id):
+    return [
+        (float(r.reading_value), r.consumption_since_last and float(r.consumption_since_last))
+        for r in MeterReading.query.filter_by(meter_id=meter_id).order_by(MeterReading.reading_date)
+    ]
+
+
+def test_reading_delta_handles_rollover_and_reset():
+    limit = register_max("qalcosonic_w1")
+    assert limit == 4294967.296
+    assert reading_delta(None, 10.0) is None
+    assert reading_delta(10.0, 12.5) == 2.5
+    # Register wrapped past its maximum
+    assert reading_delta(limit - 1.0, 2.0, limit) == 3.0
+    # Counter cleared / meter replaced
+    assert reading_delta(5000.0, 3.0, limit) == 3.0
+    # Small step backwards is noise
+    assert reading_delta(100.0, 99.5, limit) == 0.0
+    assert compute_deltas([1.0, 2.0, 4.0], previous=0.5) == [0.5, 1.0, 2.0]
+
+
+def test_bulk_insert_computes_consumption_against_previous_reading(app):
+    with app.app_context():
+        meter_id = _meter("SN-DELTA-1", "qalcosonic_w1")
+        other_id = _meter("SN-DELTA-2")
+        bulk_insert_readings([
+            {"meter_id": meter_id, "reading_value": 100, "reading_date": datetime(2026, 3, 1, 0)},
+        ])
+        # Out of order within the batch, two meters
+        bulk_insert_readings([
+            {"meter_id": meter_id, "reading_value": 104, "reading_date": datetime(2026, 3, 1, 2)},
+            {"meter_id": other_id, "reading_value": 7, "reading_date": datetime(2026, 3, 1, 1)},
+            {"meter_id": meter_id, "reading_value": 101.5, "reading_date": datetime(2026, 3, 1, 1)},
+        ])
+
+        assert _values(meter_id) == [(100.0, None), (101.5, 1.5), (104.0, 2.5)]
+        assert _values(other_id) == [(7.0, None)]
+        totals = meter_consumption_totals([meter_id], datetime(2026, 3, 1), datetime(2026, 3, 2))
+        assert totals == {meter_id: 4.0}
+
+
+def test_recalculate_consumption_repairs_history_in_chunks(app):
+    with app.app_context():
+        meter_id = _meter("SN-DELTA-3")
+        for hour, value in enumerate([10, 12, 15, 3, 4]):
+            db.session.add(
+                MeterReading(
+                    meter_id=meter_id,
+                    reading_value=value,
+                    reading_date=datetime(2026, 4, 1, hour),
+                    consumption_since_last=99,
+                )
+            )
+        db.session.commit()
+
+        assert recalculate_consumption(meter_id, chunk_size=2) == 5
+        assert [c for _, c in _values(meter_id)] == [None, 2.0, 3.0, 3.0, 1.0]
+        # Nothing left to change on a rerun
+        assert recalculate_consumption(meter_id, chunk_size=2) == 0
+        # Window start seeds the delta from the reading before it
+        assert recalculate_consumption(meter_id, start=datetime(2026, 4, 1, 2)) == 0
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+
+import pytest
+
+from app.db import db
+from app.models import (
+    Estate,
+    Meter,
+    MeterReading,
+    RateTable,
+    TimeOfUseRate,
+    Transaction,
+    Unit,
+    Wallet,
+)
+from app.services.consumption_billing import (
+    CONSUMPTION_TYPES,
+    bill_unbilled_readings,
+    price_consumption,
+)
+from app.services.meter_readings import bulk_insert_readings
+from app.utils.rates import compile_tariff
+
+
+@pytest.fixture(autouse=True)
+def _drop_billing_transactions(app):
+    # Other modules share the session database and expect no transactions
+    yield
+    with app.app_context():
+        MeterReading.query.filter(MeterReading.transaction_id.isnot(None)).update(
+            {"transaction_id": None}
+        )
+        Transaction.query.filter(Transaction.transaction_type.in_(CONSUMPTION_TYPES)).delete()
+        db.session.commit()
+
+
+def _unit(name, *, markup=0):
+    tiers = {"tiers": [{"from": 0, "to": 10, "rate": 1.0}, {"from": 10, "to": None, "rate": 2.0}]}
+    rate_table = RateTable(
+        name=f"{name} tiers",
+        utility_type="electricity",
+        rate_structure=json.dumps(tiers),
+        effective_from=date(2026, 1, 1),
+    )
+    estate = Estate(name=name, electricity_markup_percentage=markup)
+    db.session.add_all([rate_table, estate])
+    db.session.flush()
+    estate.electricity_rate_table_id = rate_table.id
+
+    electricity = Meter(serial_number=f"{name}-E", meter_type="electricity")
+    water = Meter(serial_number=f"{name}-W", meter_type="water")
+    bulk = Meter(serial_number=f"{name}-B", meter_type="bulk_electricity")
+    db.session.add_all([electricity, water, bulk])
+    db.session.flush()
+
+    unit = Unit(
+        estate_id=estate.id,
+        unit_number="1",
+        electricity_meter_id=electricity.id,
+        water_meter_id=water.id,
+    )
+    db.session.add(unit)
+    db.session.flush()
+    wallet = Wallet(unit_id=unit.id, balance=100, electricity_balance=80, water_balance=20)
+    db.session.add(wallet)
+    db.session.commit()
+    return wallet.id, electricity.id, water.id, bulk.id
+
+
+def _readings(meter_id, values):
+    bulk_insert_readings(
+        [
+            {"meter_id": meter_id, "reading_value": value, "reading_date": datetime(2026, 5, 1, hour)}
+            for hour, value in enumerate(values)
+        ]
+    )
+
+
+def test_price_consumption_is_marginal_within_the_month():
+    tiers = compile_tariff(
+        {"tiers": [{"from": 0, "to": 10, "rate": 1.0}, {"from": 10, "to": None, "rate": 2.0}]}
+    )
+    assert price_consumption(4, tiers) == 4.0
+    # 8 already billed: 2 units at tier 1, 2 at tier 2
+    assert price_consumption(4, tiers, already_billed=8) == 6.0
+    assert price_consumption(4, compile_tariff({"flat_rate": 2.5}), markup_percent=10) == 11.0
+    assert price_consumption(0, tiers) == 0.0
+
+
+def test_batches_aggregate_per_wallet_and_utility(app):
+    with app.app_context():
+        wallet_id, electricity_id, water_id, bulk_id = _unit("Billing Estate A")
+        _readings(electricity_id, [100, 104, 110])  # 10 kWh
+        _readings(water_id, [5, 5.5])  # 0.5 kL at the default R15/kL
+        _readings(bulk_id, [1000, 2000])
+
+        totals = bill_unbilled_readings(batch_size=2)
+        assert totals["batches"] >= 3
+
+        txns = Transaction.query.filter_by(wallet_id=wallet_id).order_by(Transaction.id).all()
+        assert [t.transaction_type for t in txns] == [
+            "consumption_electricity",
+            "consumption_electricity",
+            "consumption_water",
+        ]
+        # 4 kWh in the first batch, 6 in the second priced on top of it
+        assert [float(t.consumption_kwh) for t in txns] == [4.0, 6.0, 0.5]
+        assert [float(t.amount) for t in txns] == [4.0, 6.0, 7.5]
+
+        wallet = db.session.get(Wallet, wallet_id)
+        db.session.refresh(wallet)
+        assert float(wallet.electricity_balance) == 70.0
+        assert float(wallet.water_balance) == 12.5
+        assert float(wallet.balance) == 82.5
+
+        unbilled = MeterReading.query.filter_by(is_billed=False)
+        assert unbilled.filter(MeterReading.meter_id.in_([electricity_id, water_id])).count() == 0
+        assert unbilled.filter_by(meter_id=bulk_id).count() == 2
+
+        # Nothing left to bill for this wallet
+        bill_unbilled_readings()
+        assert Transaction.query.filter_by(wallet_id=wallet_id).count() == 3
+
+
+def test_tiers_continue_across_runs_with_markup(app):
+    with app.app_context():
+        wallet_id, electricity_id, _, _ = _unit("Billing Estate B", markup=10)
+        _readings(electricity_id, [0, 8])
+        bill_unbilled_readings()
+        bulk_insert_readings(
+            [{"meter_id": electricity_id, "reading_value": 12, "reading_date": datetime(2026, 5, 1, 5)}]
+        )
+        bill_unbilled_readings()
+
+        txns = (
+            Transaction.query.filter_by(wallet_id=wallet_id)
+            .order_by(Transaction.id)
+            .all()
+        )
+        assert [float(t.amount) for t in txns] == [8.8, 6.6]
+        assert float(txns[1].balance_before) == float(txns[0].balance_after) == 71.2
+        assert txns[1].reference == "Meter: Billing Estate B-E"
+        assert len({t.transaction_number for t in txns}) == 2
+
+
+def test_time_of_use_rate_tables_price_each_reading_by_period(app):
+    with app.app_context():
+        wallet_id, electricity_id, _, _ = _unit("Billing Estate C")
+        rate_table_id = Estate.query.filter_by(name="Billing Estate C").one().electricity_rate_table_id
+        db.session.add_all(
+            [
+                TimeOfUseRate(rate_table_id=rate_table_id, period_name="Off-peak",
+                              start_time=time(22, 0), end_time=time(6, 0),
+                              weekdays=True, weekends=True, rate_per_kwh=2),
+                TimeOfUseRate(rate_table_id=rate_table_id, period_name="Peak",
+                              start_time=time(6, 0), end_time=time(22, 0),
+                              weekdays=True, weekends=True, rate_per_kwh=5),
+            ]
+        )
+        db.session.commit()
+        # 2026-05-01 00:00 UTC is 02:00 SAST (off-peak), 06:00 UTC is 08:00 (peak)
+        bulk_insert_readings(
+            [
+                {"meter_id": electricity_id, "reading_value": value, "reading_date": when}
+                for value, when in [
+                    (0, datetime(2026, 5, 1, 0)),
+                    (3, datetime(2026, 5, 1, 1)),
+                    (4, datetime(2026, 5, 1, 6)),
+                ]
+            ]
+        )
+        bill_unbilled_readings()
+
+        txn = Transaction.query.filter_by(wallet_id=wallet_id).one()
+        assert float(txn.consumption_kwh) == 4.0
+        assert float(txn.amount) == 11.0
+
+
+def test_meters_unassigned_after_the_claim_are_left_unbilled(app, monkeypatch):
+    from app.services import consumption_billing
+
+    with app.app_context():
+        wallet_id, electricity_id, water_id, _ = _unit("Billing Estate Unassigned")
+        _readings(electricity_id, [100, 104])
+        _readings(water_id, [5, 6])
+
+        meter_accounts = consumption_billing._meter_accounts
+
+        def lose_water_meter(meter_ids):
+            accounts = meter_accounts(meter_ids)
+            accounts.pop(water_id, None)
+            return accounts
+
+        monkeypatch.setattr(consumption_billing, "_meter_accounts", lose_water_meter)
+        totals = bill_unbilled_readings()
+
+        txns = Transaction.query.filter_by(wallet_id=wallet_id).all()
+        assert [t.transaction_type for t in txns] == ["consumption_electricity"]
+        assert totals["readings"] == MeterReading.query.filter_by(
+            meter_id=electricity_id, is_billed=True
+        ).count()
+        assert MeterReading.query.filter_by(meter_id=water_id, is_billed=False).count() == 2
+
+
+def test_readings_before_the_billing_start_date_are_not_billed(app, monkeypatch):
+    with app.app_context():
+        wallet_id, electricity_id, _, _ = _unit("Billing Estate History")
+        # Three hourly readings from 2026-05-01 00:00, 4 and 6 kWh apart
+        _readings(electricity_id, [100, 104, 110])
+        monkeypatch.setitem(app.config, "BILLING_START_DATE", "2026-05-01T02:00:00")
+
+        bill_unbilled_readings()
+
+        txn = Transaction.query.filter_by(wallet_id=wallet_id).one()
+        assert float(txn.consumption_kwh) == 6.0
+        history = MeterReading.query.filter(
+            MeterReading.meter_id == electricity_id,
+            MeterReading.reading_date < datetime(2026, 5, 1, 2),
+        )
+        assert history.count() == 2
+        assert history.filter_by(is_billed=False).count() == 2
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from app.db import db
+from app.models import Meter, MeterConsumptionDaily, MeterConsumptionHourly
+from app.services.consumption_rollups import (
+    meter_consumption_totals,
+    rebuild_rollups,
+    resolve_bounds,
+)
+from app.services.meter_readings import bulk_insert_readings
+
+
+def _meter(serial):
+    meter = Meter(serial_number=serial, meter_type="electricity")
+    db.session.add(meter)
+    db.session.commit()
+    return meter.id
+
+
+def _rows(meter_id, times, consumption=1.5):
+    return [
+        {
+            "meter_id": meter_id,
+            "reading_value": 100 + i,
+            "reading_date": when,
+            "consumption_since_last": consumption,
+        }
+        for i, when in enumerate(times)
+    ]
+
+
+def test_resolve_bounds_aligns_to_hours():
+    assert resolve_bounds(date(2026, 3, 1), date(2026, 3, 31)) == (
+        datetime(2026, 3, 1),
+        datetime(2026, 4, 1),
+    )
+    assert resolve_bounds(datetime(2026, 3, 1, 8, 20), datetime(2026, 3, 2, 9, 5)) == (
+        datetime(2026, 3, 1, 8),
+        datetime(2026, 3, 2, 10),
+    )
+    # An exclusive midnight bound stays exclusive
+    assert resolve_bounds(datetime(2026, 3, 1), datetime(2026, 4, 1))[1] == datetime(2026, 4, 1)
+
+
+def test_bulk_insert_accumulates_rollups(app):
+    with app.app_context():
+        meter_id = _meter("SN-ROLLUP-1")
+        bulk_insert_readings(
+            _rows(meter_id, [datetime(2026, 3, 1, 10, 0), datetime(2026, 3, 1, 10, 15)])
+        )
+        bulk_insert_readings(
+            _rows(meter_id, [datetime(2026, 3, 1, 10, 30), datetime(2026, 3, 2, 1, 0)])
+        )
+
+        hour = db.session.get(MeterConsumptionHourly, (meter_id, datetime(2026, 3, 1, 10)))
+        assert float(hour.consumption) == 4.5
+        assert hour.reading_count == 3
+        day = db.session.get(MeterConsumptionDaily, (meter_id, date(2026, 3, 2)))
+        assert float(day.consumption) == 1.5
+
+
+def test_totals_combine_daily_and_partial_hours(app):
+    with app.app_context():
+        meter_id = _meter("SN-ROLLUP-2")
+        times = [
+            datetime(2026, 4, 1, 6),   # before the window
+            datetime(2026, 4, 1, 9),   # leading partial day
+            datetime(2026, 4, 2, 12),  # whole day
+            datetime(2026, 4, 3, 7),   # trailing partial day
+            datetime(2026, 4, 3, 20),  # after the window
+        ]
+        bulk_insert_readings(_rows(meter_id, times, consumption=2))
+
+        totals = meter_consumption_totals(
+            [meter_id, None], datetime(2026, 4, 1, 8), datetime(2026, 4, 3, 7, 30)
+        )
+        assert totals == {meter_id: 6.0}
+
+
+def test_rebuild_rollups_matches_incremental(app):
+    with app.app_context():
+        meter_id = _meter("SN-ROLLUP-3")
+        bulk_insert_readings(
+            _rows(meter_id, [datetime(2026, 5, 1, 1), datetime(2026, 5, 1, 1, 30), datetime(2026, 6, 2, 3)])
+        )
+        before = meter_consumption_totals([meter_id], date(2026, 5, 1), date(2026, 6, 30))
+
+        MeterConsumptionHourly.query.filter_by(meter_id=meter_id).delete()
+        MeterConsumptionDaily.query.filter_by(meter_id=meter_id).delete()
+        db.session.commit()
+
+        assert rebuild_rollups(date(2026, 5, 1), date(2026, 7, 1), meter_id=meter_id) == 2
+        hour = db.session.get(MeterConsumptionHourly, (meter_id, datetime(2026, 5, 1, 1)))
+        assert hour.reading_count == 2
+        after = meter_consumption_totals([meter_id], date(2026, 5, 1), date(2026, 6, 30))
+        assert after == before == {meter_id: 4.5}
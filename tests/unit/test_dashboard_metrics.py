@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import db
+from app.models import DashboardSnapshot, Estate, Meter, MeterAlert, Transaction, Unit, Wallet
+from app.services.dashboard_metrics import (
+    ALL_ESTATES,
+    get_dashboard_metrics,
+    period_bounds,
+    refresh_snapshots,
+)
+from app.services.meter_readings import bulk_insert_readings
+from app.services.transactions import create_transaction
+from tests.conftest import login
+
+
+@pytest.fixture()
+def estate(app):
+    with app.app_context():
+        meter = Meter(serial_number="DASH-SNAP-E", meter_type="electricity")
+        db.session.add(meter)
+        db.session.flush()
+        estate = Estate(name="Dashboard Snapshot Estate")
+        db.session.add(estate)
+        db.session.flush()
+        unit = Unit(estate_id=estate.id, unit_number="DS1", electricity_meter_id=meter.id)
+        db.session.add(unit)
+        db.session.flush()
+        wallet = Wallet(unit_id=unit.id)
+        db.session.add(wallet)
+        db.session.add(
+            MeterAlert(meter_id=meter.id, alert_type="tamper_detected", severity="critical")
+        )
+        db.session.commit()
+        yield estate.id, meter.id, wallet.id
+        Transaction.query.filter_by(wallet_id=wallet.id).delete()
+        MeterAlert.query.filter_by(meter_id=meter.id).delete()
+        db.session.commit()
+
+
+def test_snapshot_matches_live_data_and_renders(app, client, estate):
+    estate_id, meter_id, wallet_id = estate
+    start, _, _ = period_bounds("current-month")
+    with app.app_context():
+        bulk_insert_readings(
+            [
+                {"meter_id": meter_id, "reading_value": 100, "reading_date": start},
+                {
+                    "meter_id": meter_id,
+                    "reading_value": 112.5,
+                    "reading_date": start + timedelta(minutes=30),
+                },
+            ]
+        )
+        create_transaction(wallet_id, "topup", 80, payment_method="cash")
+        db.session.add(
+            Transaction(
+                transaction_number=f"DASH-SNAP-{wallet_id}",
+                wallet_id=wallet_id,
+                transaction_type="consumption_electricity",
+                amount=30,
+                balance_before=80,
+                balance_after=50,
+                status="completed",
+                completed_at=datetime.now(),
+            )
+        )
+        db.session.commit()
+
+        assert refresh_snapshots(["current-month"]) >= 2
+        snapshot = db.session.get(DashboardSnapshot, (estate_id, "current-month"))
+        assert snapshot is not None and snapshot.period_start == start
+
+        metrics = get_dashboard_metrics(estate_id, "current-month")
+        assert metrics["kpis"]["electricity_used_kwh"] == pytest.approx(12.5)
+        assert metrics["kpis"]["total_revenue"] == pytest.approx(80)
+        revenue = {row["utility"]: row["revenue"] for row in metrics["revenue_by_utility"]}
+        assert revenue == {"Electricity": 30, "Water": 0, "Hot Water": 0, "Solar": 0}
+        assert metrics["estate_usage"] == [
+            {
+                "name": "Dashboard Snapshot Estate",
+                "electricity": 30,
+                "water": 0,
+                "hot_water": 0,
+                "solar": 0,
+            }
+        ]
+        alert = metrics["alerts"][0]
+        assert alert["title"] == "Tamper Detected Alert" and alert["unit_number"] == "DS1"
+        assert isinstance(alert["timestamp"], datetime)
+
+        # The all-estates view includes this estate's figures
+        everything = get_dashboard_metrics(ALL_ESTATES, "current-month")
+        assert everything["kpis"]["total_revenue"] >= 80
+
+    login(client)
+    r = client.get(f"/api/v1/dashboard?estate={estate_id}")
+    assert r.status_code == 200
+    assert "Tamper Detected Alert" in r.get_data(as_text=True)
+
+
+def test_stale_snapshot_is_served_and_refreshed_in_the_background(app, monkeypatch):
+    from app.services import dashboard_metrics
+
+    queued = []
+    monkeypatch.setattr(dashboard_metrics, "_request_refresh", lambda: queued.append(1))
+    with app.app_context():
+        refresh_snapshots(["previous-month"])
+        snapshot = db.session.get(DashboardSnapshot, (ALL_ESTATES, "previous-month"))
+        old = datetime.utcnow() - timedelta(hours=1)
+        snapshot.computed_at = old
+        db.session.commit()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("recomputed in the request")
+
+        monkeypatch.setattr(dashboard_metrics, "refresh_snapshots", fail)
+        metrics = get_dashboard_metrics(None, "previous-month")
+        assert metrics["stale"] is True and metrics["computed_at"] == old
+        assert queued == [1]
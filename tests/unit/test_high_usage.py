@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from app.db import db
+from app.models import Estate, Meter, MeterConsumptionDaily, Person, Unit, UnitOwnership, Wallet
+from app.services.notification_service import NotificationService
+
+NOW = datetime(2030, 3, 15, 7, 0)
+YESTERDAY = date(2030, 3, 14)
+
+
+def _history(meter, baseline, today):
+    """Daily rollups ending yesterday: ``baseline`` values, then ``today``."""
+    days = len(baseline)
+    return [
+        MeterConsumptionDaily(
+            meter_id=meter.id,
+            bucket=YESTERDAY - timedelta(days=days - i),
+            consumption=value,
+            reading_count=1,
+        )
+        for i, value in enumerate(baseline)
+    ] + [MeterConsumptionDaily(meter_id=meter.id, bucket=YESTERDAY, consumption=today, reading_count=1)]
+
+
+def test_high_usage_is_flagged_against_the_trailing_daily_baseline(app):
+    with app.app_context():
+        estate = Estate(name="Anomaly Estate")
+        owner = Person(
+            first_name="Anomaly",
+            last_name="Owner",
+            email="anomaly-owner@example.com",
+            phone="+27820008888",
+        )
+        meters = {
+            label: Meter(serial_number=f"ANOMALY-{label}", meter_type=kind)
+            for label, kind in (
+                ("spike", "water"),
+                ("noisy", "electricity"),
+                ("flat", "hot_water"),
+                ("steady", "solar"),
+                ("new", "water"),
+                ("old", "electricity"),
+            )
+        }
+        db.session.add_all([estate, owner, *meters.values()])
+        db.session.flush()
+        units = []
+        for i, (column, label) in enumerate(
+            (("water_meter_id", "spike"), ("electricity_meter_id", "noisy"),
+             ("hot_water_meter_id", "flat"), ("solar_meter_id", "steady"))
+        ):
+            units.append(Unit(estate_id=estate.id, unit_number=f"AN{i}", **{column: meters[label].id}))
+        units.append(Unit(estate_id=estate.id, unit_number="AN4", water_meter_id=meters["new"].id,
+                          electricity_meter_id=meters["old"].id))
+        db.session.add_all(units)
+        db.session.flush()
+        db.session.add_all([Wallet(unit_id=unit.id) for unit in units])
+        db.session.add(UnitOwnership(unit_id=units[0].id, person_id=owner.id, ownership_percentage=100))
+
+        rows = (
+            _history(meters["spike"], [10, 11, 9, 10, 12, 8, 10, 10], 30)
+            # +60% but well within this meter's normal swings
+            + _history(meters["noisy"], [2, 18, 4, 16, 3, 17, 5, 15], 16)
+            # A flat baseline has no spread: any rise past the percentage counts
+            + _history(meters["flat"], [5] * 8, 8)
+            + _history(meters["steady"], [10, 11, 9, 10, 12, 8, 10, 10], 11)
+            # Too little history to judge
+            + _history(meters["new"], [1, 1, 1], 50)
+            # Readings outside the 28-day window do not count toward the baseline
+            + [row for row in _history(meters["old"], [1] * 40, 50) if row.bucket
+               < YESTERDAY - timedelta(days=28) or row.bucket >= YESTERDAY - timedelta(days=3)]
+        )
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = {label: meter.id for label, meter in meters.items()}
+
+        try:
+            flagged = {
+                item["meter_id"]: item
+                for item in NotificationService.get_high_usage_units(now=NOW)
+                if item["meter_id"] in ids.values()
+            }
+            assert set(flagged) == {ids["spike"], ids["flat"]}
+
+            spike = flagged[ids["spike"]]
+            assert spike["unit_id"] == units[0].id and spike["person_id"] == owner.id
+            assert spike["meter_type"] == "water" and spike["wallet_id"] is not None
+            assert spike["current_usage"] == 30.0 and spike["average_usage"] == 10.0
+            assert spike["percentage_increase"] == 200.0 and spike["z_score"] > 10
+            assert flagged[ids["flat"]]["z_score"] is None
+            assert flagged[ids["flat"]]["person_id"] is None
+
+            # A fan-out shard sees only its own estates
+            by_estate = NotificationService.get_high_usage_units(now=NOW, estate_ids=[estate.id])
+            assert {item["meter_id"] for item in by_estate} == set(flagged)
+            assert not NotificationService.get_high_usage_units(now=NOW, estate_ids=[-1])
+
+            # Dropping the z-score rule leaves only the percentage rule
+            loose = NotificationService.get_high_usage_units(min_z_score=0, now=NOW)
+            assert ids["noisy"] in {item["meter_id"] for item in loose}
+        finally:
+            MeterConsumptionDaily.query.filter(
+                MeterConsumptionDaily.meter_id.in_(ids.values())
+            ).delete()
+            db.session.commit()
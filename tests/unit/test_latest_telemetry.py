@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.models import Meter, MeterReading
+from app.services import latest_telemetry
+from app.services.consumption_rollups import rebuild_rollups
+from app.services.latest_telemetry import get_latest, get_latest_many
+from app.services.meter_readings import bulk_insert_readings
+
+
+def _reading(meter_id, value, when, **extra):
+    return {"meter_id": meter_id, "reading_value": value, "reading_date": when, **extra}
+
+
+@pytest.fixture()
+def meters(app, factory):
+    with app.app_context():
+        first, second = factory.meter("electricity"), factory.meter("water")
+        db.session.commit()
+        yield first.id, second.id
+
+
+def test_ingest_writes_latest_through(app, fake_redis, meters):
+    first, second = meters
+    with app.app_context():
+        bulk_insert_readings(
+            [
+                _reading(first, 10, datetime(2026, 9, 1, 8)),
+                _reading(first, 12, datetime(2026, 9, 1, 9), rssi=-80),
+                _reading(second, 3, datetime(2026, 9, 1, 8, 30)),
+            ]
+        )
+        # A late reading does not replace the newer one
+        bulk_insert_readings([_reading(first, 11, datetime(2026, 9, 1, 8, 45))])
+
+        meter = db.session.get(Meter, first)
+        db.session.refresh(meter)
+        assert float(meter.last_reading) == 12
+        assert meter.last_reading_date == datetime(2026, 9, 1, 9)
+        assert meter.last_communication == datetime(2026, 9, 1, 9)
+
+        key = f"{latest_telemetry.KEY_PREFIX}:{first}"
+        cached = latest_telemetry.LatestReading.from_json(fake_redis.data[key])
+        assert cached.reading_value == 12 and cached.rssi == -80
+        assert fake_redis.ttls[key] == app.config["LATEST_READING_CACHE_TTL"]
+
+        latest = get_latest_many([first, second, None])
+        assert {m: r.reading_value for m, r in latest.items()} == {first: 12, second: 3}
+
+
+def test_lookup_without_redis_uses_meter_columns(app, monkeypatch, meters):
+    monkeypatch.setattr(latest_telemetry, "get_redis", lambda: None)
+    first, second = meters
+    with app.app_context():
+        assert get_latest(first) is None
+        bulk_insert_readings([_reading(first, 5, datetime(2026, 9, 2, 6), battery_level=90)])
+
+        latest = get_latest(first)
+        assert latest.reading_value == 5
+        assert latest.reading_date == datetime(2026, 9, 2, 6)
+        assert latest.battery_level == 90
+        assert get_latest_many([second]) == {}
+
+
+def test_readings_written_around_the_ingest_path_are_found(app, monkeypatch, meters):
+    monkeypatch.setattr(latest_telemetry, "get_redis", lambda: None)
+    first, second = meters
+    with app.app_context():
+        bulk_insert_readings([_reading(first, 20, datetime(2026, 9, 3, 6))])
+        # Seed data and the LoRaWAN server insert rows directly
+        db.session.add_all(
+            [
+                MeterReading(meter_id=first, reading_value=21, reading_date=datetime(2026, 9, 3, 7)),
+                MeterReading(meter_id=second, reading_value=4, reading_date=datetime(2026, 9, 3, 7)),
+            ]
+        )
+        db.session.commit()
+
+        latest = get_latest_many([first, second])
+        assert {m: r.reading_value for m, r in latest.items()} == {first: 21, second: 4}
+
+        rebuild_rollups(datetime(2026, 9, 3).date(), datetime(2026, 9, 4).date())
+        meter = db.session.get(Meter, second)
+        db.session.refresh(meter)
+        assert float(meter.last_reading) == 4
+        assert meter.last_reading_date == datetime(2026, 9, 3, 7)
+        assert meter.last_communication == datetime(2026, 9, 3, 7)
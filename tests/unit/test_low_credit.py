@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from app.db import db
+from app.models import Notification, UnitOwnership, UnitTenancy
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture()
+def wallets(app, factory):
+    with app.app_context():
+        estate = factory.estate()
+        owner, tenant, landlord = factory.person(), factory.person(), factory.person()
+
+        # unit label -> (balance, threshold, suspended)
+        specs = {
+            "ok": (100, 50, False),
+            "low": (30, 50, False),
+            "critical": (5, 50, False),
+            "default-threshold": (45, None, False),
+            "tenant-only": (3, 50, False),
+            "nobody": (1, 50, False),
+            "suspended": (1, 50, True),
+        }
+        units = {}
+        for label, (balance, threshold, suspended) in specs.items():
+            units[label] = factory.unit(estate)
+            factory.wallet(
+                units[label],
+                balance=balance,
+                low_balance_threshold=threshold,
+                is_suspended=suspended,
+            )
+        for label in ("ok", "low", "critical", "default-threshold", "suspended"):
+            db.session.add(
+                UnitOwnership(unit_id=units[label].id, person_id=owner.id, ownership_percentage=100)
+            )
+        # The owner takes precedence over a tenant
+        db.session.add(UnitTenancy(unit_id=units["low"].id, person_id=landlord.id))
+        db.session.add(UnitTenancy(unit_id=units["tenant-only"].id, person_id=tenant.id))
+        db.session.commit()
+        yield owner.id, tenant.id, landlord.id
+        Notification.query.filter(
+            Notification.recipient_id.in_([owner.id, tenant.id, landlord.id])
+        ).delete()
+        db.session.commit()
+
+
+def _sent(person_ids, notification_type):
+    return Notification.query.filter(
+        Notification.recipient_id.in_(person_ids),
+        Notification.notification_type == notification_type,
+    ).all()
+
+
+def test_low_and_critical_bands_are_classified_in_sql(app, wallets):
+    owner, tenant, landlord = wallets
+    people = [owner, tenant, landlord]
+    with app.app_context():
+        low = [
+            (row.person_id, float(row.balance))
+            for rows in NotificationService.iter_low_credit_wallets(False, chunk_size=1)
+            for row in rows
+            if row.person_id in people
+        ]
+        assert low == [(owner, 30.0), (owner, 45.0)]
+
+        critical = [
+            row.person_id
+            for rows in NotificationService.iter_low_credit_wallets(True)
+            for row in rows
+            if row.person_id in people
+        ]
+        assert critical == [owner, tenant]
+
+        # One notification per recipient and type per day
+        NotificationService.send_low_credit_notifications(is_critical=False, chunk_size=1)
+        assert [n.recipient_id for n in _sent(people, "low_credit")] == [owner]
+        NotificationService.send_low_credit_notifications(is_critical=True)
+        sent = _sent(people, "critical_credit")
+        assert sorted(n.recipient_id for n in sent) == sorted([owner, tenant])
+        assert {n.priority for n in sent} == {"critical"}
+
+        # The anti-join skips recipients already notified today
+        assert not [
+            row
+            for rows in NotificationService.iter_low_credit_wallets(True)
+            for row in rows
+            if row.person_id in people
+        ]
+        NotificationService.send_low_credit_notifications(is_critical=False)
+        assert len(_sent(people, "low_credit")) == 1
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+from app.db import db
+from app.models import Meter, Unit
+from app.routes.v1.meters import _assign_meter_to_unit
+from app.services.meters import list_available_by_type
+from app.services.units import decommission_unit, find_unit_by_meter_id
+
+
+@pytest.fixture()
+def fleet(app, factory):
+    with app.app_context():
+        estate = factory.estate()
+        meters = [factory.meter(kind) for kind in ("electricity", "water", "electricity")]
+        first = factory.unit(
+            estate, electricity_meter_id=meters[0].id, water_meter_id=meters[1].id
+        )
+        second = factory.unit(estate)
+        db.session.commit()
+        yield first, second, meters
+
+
+def _assignment(meter_id):
+    meter = db.session.get(Meter, meter_id)
+    return meter.unit_id, meter.utility_role
+
+
+def test_unit_writes_keep_meter_assignment_in_sync(app, fleet):
+    first, second, (electricity, water, spare) = fleet
+    with app.app_context():
+        assert _assignment(electricity.id) == (first.id, "electricity")
+        assert _assignment(water.id) == (first.id, "water")
+        assert _assignment(spare.id) == (None, None)
+        assert find_unit_by_meter_id(water.id).id == first.id
+        assert spare.id in {m.id for m in list_available_by_type("electricity")}
+
+        # Moving a meter clears the old unit and points it at the new one
+        _assign_meter_to_unit(db.session.get(Meter, electricity.id), second.id)
+        assert _assignment(electricity.id) == (second.id, "electricity")
+        assert db.session.get(Unit, first.id).electricity_meter_id is None
+
+        decommission_unit(db.session.get(Unit, first.id))
+        assert _assignment(water.id) == (None, None)
+        assert find_unit_by_meter_id(water.id) is None
+
+        db.session.delete(db.session.get(Unit, second.id))
+        db.session.commit()
+        assert _assignment(electricity.id) == (None, None)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.db import db
+from app.models import Meter
+from app.services.meter_charts import consumption_series, telemetry_series
+from app.services.meter_readings import bulk_insert_readings
+from app.utils.downsample import lttb
+from tests.conftest import login
+
+# 14:30 SAST on Tuesday 10 March
+NOW = datetime(2026, 3, 10, 12, 30)
+
+
+def _meter(serial):
+    meter = Meter(serial_number=serial, device_eui=serial, meter_type="electricity")
+    db.session.add(meter)
+    db.session.commit()
+    return meter
+
+
+def test_consumption_is_bucketed_on_local_time(app):
+    with app.app_context():
+        meter = _meter("CHART-SAST")
+        # 23:00 SAST on the 9th, then 00:30 and 01:30 SAST on the 10th
+        readings = [
+            (datetime(2026, 3, 9, 21), 9, 0),
+            (datetime(2026, 3, 9, 22, 30), 10, 1),
+            (datetime(2026, 3, 9, 23, 30), 14, 4),
+        ]
+        bulk_insert_readings(
+            [
+                {
+                    "meter_id": meter.id,
+                    "reading_value": value,
+                    "reading_date": when,
+                    "consumption_since_last": consumption,
+                }
+                for when, value, consumption in readings
+            ]
+        )
+
+        week = consumption_series(meter, "week", now=NOW)
+        assert week["labels"][-2:] == ["Mar 09", "Mar 10"]
+        assert week["data"][-2:] == [0.0, 4.0]
+
+        day = consumption_series(meter, "day", now=NOW)
+        assert len(day["labels"]) == 24 and day["labels"][-1] == "14:00"
+
+        # Served from the hourly rollups, in weeks starting Monday the 9th
+        quarter = consumption_series(meter, "quarter", now=NOW)
+        assert len(quarter["data"]) == 13
+        assert quarter["labels"][-1] == "Mar 09" and quarter["data"][-1] == 5.0
+
+        year = consumption_series(meter, "year", now=NOW)
+        assert year["labels"][0] == "Apr 2025" and year["labels"][-1] == "Mar 2026"
+        assert year["data"][-1] == 5.0
+
+
+def test_telemetry_series_is_downsampled(app, client):
+    with app.app_context():
+        meter = _meter("CHART-VOLTS")
+        start = NOW - timedelta(hours=10)
+        bulk_insert_readings(
+            [
+                {
+                    "meter_id": meter.id,
+                    "reading_value": i,
+                    "reading_date": start + timedelta(minutes=i),
+                    "voltage": 260 if i == 317 else 230,
+                }
+                for i in range(600)
+            ]
+        )
+        series = telemetry_series(meter, "voltage", "day", points=50, now=NOW)
+        assert len(series["data"]) == 50
+        assert max(series["data"]) == 260
+
+    login(client)
+    r = client.get("/api/v1/meters/CHART-VOLTS/chart-data?series=voltage&points=20")
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["unit"] == "V" and len(body["data"]) <= 20
+    assert client.get("/api/v1/meters/CHART-VOLTS/chart-data?series=raw_payload").status_code == 400
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    points = [(float(x), 0.0) for x in range(100)]
+    points[40] = (40.0, 9.0)
+    sampled = lttb(points, 10)
+    assert len(sampled) == 10
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (40.0, 9.0) in sampled
+    assert lttb(points[:5], 10) == points[:5]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.db import db
+from app.models import Estate, Meter, Unit
+from app.services.meter_readings import bulk_insert_readings
+from app.services.meter_stats import today_window
+from tests.conftest import login
+
+
+def test_batch_realtime_stats(app, client):
+    now = datetime.utcnow()
+    start, _ = today_window(now)
+    with app.app_context():
+        assigned = Meter(serial_number="STATS-A", device_eui="STATS-A", meter_type="electricity")
+        spare = Meter(serial_number="STATS-B", device_eui="STATS-B", meter_type="water")
+        db.session.add_all([assigned, spare])
+        db.session.flush()
+        estate = Estate(name="Realtime Stats Estate")
+        db.session.add(estate)
+        db.session.flush()
+        db.session.add(
+            Unit(estate_id=estate.id, unit_number="RS1", electricity_meter_id=assigned.id)
+        )
+        db.session.commit()
+
+        readings = [
+            # Yesterday (SAST) is not part of today's consumption
+            (assigned.id, 50, start - timedelta(minutes=1)),
+            (assigned.id, 60, start + timedelta(seconds=1)),
+            (assigned.id, 64, now),
+            (spare.id, 7, now),
+        ]
+        bulk_insert_readings(
+            [
+                {"meter_id": meter_id, "reading_value": value, "reading_date": when}
+                for meter_id, value, when in readings
+            ]
+        )
+
+    login(client)
+    r = client.get("/api/v1/meters/realtime-stats?meters=STATS-A,STATS-B,NO-SUCH")
+    assert r.status_code == 200
+    data = r.get_json()["data"]
+    assert set(data) == {"STATS-A", "STATS-B"}
+
+    assert data["STATS-A"]["today"]["consumption"] == 4.0
+    assert data["STATS-A"]["today"]["cost"] > 0
+    assert data["STATS-A"]["latest_reading"]["value"] == 64.0
+    assert data["STATS-B"]["today"]["consumption"] == 0.0
+    assert data["STATS-B"]["today"]["cost_message"] == "Meter not assigned to unit"
+
+    # The single-meter endpoint returns the same payload
+    assert client.get("/api/v1/meters/STATS-A/realtime-stats").get_json() == data["STATS-A"]
+    assert client.get("/api/v1/meters/realtime-stats").status_code == 400
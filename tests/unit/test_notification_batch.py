@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.db import db
+from app.models import Estate, Meter, Notification, Person, Unit, UnitTenancy, Wallet
+from app.services.notification_service import NotificationService
+
+
+def _spec(recipient_id, notification_type="maintenance", message="Water off at 10:00"):
+    return {
+        "recipient_id": recipient_id,
+        "notification_type": notification_type,
+        "subject": "Notice",
+        "message": message,
+    }
+
+
+def test_create_notifications_dedupes_and_inserts_in_one_batch(app):
+    with app.app_context():
+        recipients = [900001, 900002, 900003]
+        try:
+            NotificationService.create_notification(
+                recipient_id=900001, notification_type="maintenance", subject="Earlier", message="..."
+            )
+            since = datetime.utcnow() - timedelta(minutes=1)
+
+            rows = NotificationService.create_notifications(
+                [
+                    _spec(900001),  # already sent
+                    _spec(900002),
+                    _spec(900002, message="duplicate within the batch"),
+                    _spec(900003),
+                    _spec(900003, notification_type="solar_report"),
+                ],
+                dedupe_since=since,
+            )
+            assert [(r["recipient_id"], r["notification_type"]) for r in rows] == [
+                (900002, "maintenance"),
+                (900003, "maintenance"),
+                (900003, "solar_report"),
+            ]
+            stored = db.session.get(Notification, rows[0]["id"])
+            assert stored.message == "Water off at 10:00" and stored.status == "sent"
+
+            # Without dedupe_since every spec is written
+            assert len(NotificationService.create_notifications([_spec(900001)])) == 1
+            assert NotificationService.create_notification(
+                recipient_id=900002,
+                notification_type="maintenance",
+                subject="Again",
+                message="...",
+                dedupe_since=since,
+            ) is None
+        finally:
+            Notification.query.filter(Notification.recipient_id.in_(recipients)).delete()
+            db.session.commit()
+
+
+def test_high_usage_notifications_one_per_recipient_per_day(app):
+    with app.app_context():
+        estate = Estate(name="High Usage Batch Estate")
+        person = Person(
+            first_name="Usage",
+            last_name="Batch",
+            email="usage-batch@example.com",
+            phone="+27820009999",
+        )
+        water = Meter(serial_number="USAGE-BATCH-W", meter_type="hot_water")
+        electricity = Meter(serial_number="USAGE-BATCH-E", meter_type="electricity")
+        loose = Meter(serial_number="USAGE-BATCH-X", meter_type="water")
+        db.session.add_all([estate, person, water, electricity, loose])
+        db.session.flush()
+        unit = Unit(
+            estate_id=estate.id,
+            unit_number="HU1",
+            water_meter_id=water.id,
+            electricity_meter_id=electricity.id,
+        )
+        db.session.add(unit)
+        db.session.flush()
+        db.session.add_all([Wallet(unit_id=unit.id), UnitTenancy(unit_id=unit.id, person_id=person.id)])
+        db.session.commit()
+
+        items = [
+            {
+                "meter_id": meter.id,
+                "meter_type": meter.meter_type,
+                "person_id": person.id if meter is not loose else None,
+                "current_usage": 30.0,
+                "average_usage": 10.0,
+                "percentage_increase": 200.0,
+            }
+            for meter in (water, electricity, loose)
+        ]
+        try:
+            result = NotificationService.send_high_usage_notifications(items)
+            assert result == {"meters_flagged": 3, "notifications_created": 1}
+            sent = Notification.query.filter_by(recipient_id=person.id).one()
+            assert sent.subject == "High Water Usage Alert" and sent.priority == "high"
+            assert NotificationService.send_high_usage_notifications(items)["notifications_created"] == 0
+        finally:
+            Notification.query.filter_by(recipient_id=person.id).delete()
+            db.session.commit()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import struct
+from datetime import date, datetime
+
+from app.db import db
+from app.models import Meter, MeterConsumptionDaily, MeterReading
+from app.services.meter_readings import bulk_insert_readings, redecode_readings
+from app.utils.payload_decoders import (
+    _modbus_crc16,
+    decode_batch,
+    decode_payload,
+    get_decoder,
+    supported_device_types,
+)
+
+
+def _em300_frame(pulses, battery=87, temp_tenths=215):
+    return (
+        bytes([0x01, 0x75, battery])
+        + bytes([0x03, 0x67]) + struct.pack("<h", temp_tenths)
+        + bytes([0x04, 0x68, 120])
+        + bytes([0x05, 0xC8]) + struct.pack("<I", pulses)
+    ).hex()
+
+
+def test_registry_covers_fleet_device_types():
+    assert supported_device_types() == [
+        "eastron_sdm",
+        "ivy_em114",
+        "milesight_em300",
+        "qalcosonic_w1",
+    ]
+    assert get_decoder("unknown_device") is None
+    assert decode_payload("unknown_device", "0102") == {}
+
+
+def test_milesight_em300_pulse_factor():
+    values = decode_payload("milesight_em300", _em300_frame(655370))
+    assert values["pulse_count"] == 655370
+    assert values["reading_value"] == 655.37  # default 1000 pulses/kWh
+    assert values["battery_level"] == 87
+    assert values["temperature"] == 21.5
+    assert values["humidity"] == 60.0
+
+    values = decode_payload("milesight_em300", _em300_frame(5000), pulse_factor=500)
+    assert values["reading_value"] == 10.0
+
+
+def test_qalcosonic_w1_volume_and_flow():
+    frame = struct.pack("<IBIH", 1767225600, 0x08, 123456, 42).hex()
+    values = decode_payload("qalcosonic_w1", frame)
+    assert values["reading_value"] == 123.456
+    assert values["flow_rate"] == 42
+    assert values["status"] == "leak"
+
+
+def test_eastron_sdm_uc100_channels():
+    frame = b"".join(
+        bytes([0xFF, 0x0E, channel, 0x07]) + struct.pack("<f", value)
+        for channel, value in ((1, 1520.5), (2, 231.0), (4, 2300.0))
+    )
+    values = decode_payload("eastron_sdm", frame.hex())
+    assert values["reading_value"] == 1520.5
+    assert values["voltage"] == 231.0
+    assert values["power"] == 2.3
+
+
+def test_ivy_em114_checks_crc():
+    body = bytes([0x01, 0x03, 14]) + struct.pack(">IHHhHH", 123456, 2305, 512, 1180, 980, 5001)
+    frame = body + struct.pack("<H", _modbus_crc16(body))
+    values = decode_payload("ivy_em114", frame.hex())
+    assert values["reading_value"] == 1234.56
+    assert values["voltage"] == 230.5
+    assert values["power"] == 1.18
+    assert values["frequency"] == 50.01
+
+    corrupted = body + b"\x00\x00"
+    assert decode_payload("ivy_em114", corrupted.hex()) == {}
+
+
+def test_decode_batch_aligns_with_input():
+    payloads = [_em300_frame(1000), None, "zz", _em300_frame(3000)]
+    results = decode_batch("milesight_em300", payloads, [None, None, None, 100])
+    assert len(results) == 4
+    assert results[0]["reading_value"] == 1.0
+    assert results[1] == {}
+    assert results[2] == {}
+    assert results[3]["reading_value"] == 30.0
+
+
+def test_redecode_readings_updates_in_chunks(app):
+    with app.app_context():
+        meter = Meter(
+            serial_number="SN-REDECODE-1",
+            meter_type="electricity",
+            device_eui="0a0b0c0d0e0f1011",
+            lorawan_device_type="milesight_em300",
+            pulse_factor=100,
+        )
+        db.session.add(meter)
+        db.session.commit()
+        for i in range(5):
+            db.session.add(
+                MeterReading(
+                    meter_id=meter.id,
+                    reading_value=0,
+                    reading_date=datetime(2026, 1, 1, i),
+                    raw_payload=_em300_frame(1000 * (i + 1)),
+                )
+            )
+        db.session.commit()
+
+        updated = redecode_readings("milesight_em300", meter_id=meter.id, chunk_size=2)
+        assert updated == 5
+        values = sorted(
+            float(r.reading_value)
+            for r in MeterReading.query.filter_by(meter_id=meter.id)
+        )
+        assert values == [10.0, 20.0, 30.0, 40.0, 50.0]
+
+
+def test_redecode_readings_refreshes_consumption_and_rollups(app):
+    with app.app_context():
+        meter = Meter(
+            serial_number="SN-REDECODE-2",
+            meter_type="electricity",
+            device_eui="0a0b0c0d0e0f1012",
+            lorawan_device_type="milesight_em300",
+            pulse_factor=100,
+        )
+        db.session.add(meter)
+        db.session.commit()
+        # Stored with a wrong pulse factor (1000/kWh): values a tenth too low
+        rows = [
+            {
+                "meter_id": meter.id,
+                "reading_value": pulses / 1000,
+                "reading_date": datetime(2026, 2, 1, hour),
+                "raw_payload": _em300_frame(pulses),
+            }
+            for hour, pulses in enumerate((1000, 2000, 3000, 4000))
+        ]
+        bulk_insert_readings(rows)
+
+        def deltas():
+            return [
+                float(r.consumption_since_last) if r.consumption_since_last is not None else None
+                for r in MeterReading.query.filter_by(meter_id=meter.id).order_by(
+                    MeterReading.reading_date
+                )
+            ]
+
+        def daily_total():
+            return float(
+                MeterConsumptionDaily.query.filter_by(meter_id=meter.id, bucket=date(2026, 2, 1))
+                .one()
+                .consumption
+            )
+
+        assert deltas()[1:] == [1.0, 1.0, 1.0]
+        assert daily_total() == 3.0
+
+        # Only the first three are re-decoded; the fourth (still 4.0) is now
+        # diffed against the corrected third and counts as a register reset
+        updated = redecode_readings(
+            "milesight_em300", meter_id=meter.id, end=datetime(2026, 2, 1, 2)
+        )
+        assert updated == 3
+        assert deltas()[1:] == [10.0, 10.0, 4.0]
+        assert daily_total() == 24.0
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+from app.db import db
+from app.models import Estate, RateTable, Unit
+from app.services.units import update_unit
+from app.utils import rate_cache
+from app.utils.rates import calculate_unit_bill
+
+
+def _rate_table(name, rate):
+    rt = RateTable(
+        name=name,
+        utility_type="electricity",
+        rate_structure=json.dumps({"flat_rate": rate}),
+        effective_from=date(2026, 1, 1),
+    )
+    db.session.add(rt)
+    db.session.commit()
+    return rt
+
+
+def _set_rate(rt_id, rate):
+    # Bypass the app, as another process would
+    db.session.execute(
+        RateTable.__table__.update()
+        .where(RateTable.id == rt_id)
+        .values(rate_structure=json.dumps({"flat_rate": rate}))
+    )
+    db.session.commit()
+
+
+def test_lru_cache_evicts_and_expires():
+    cache = rate_cache.LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.ttl = -1
+    assert cache.get("a") is None
+
+
+def test_rate_entries_are_cached_until_invalidated(app):
+    with app.app_context():
+        rt = _rate_table("Cache Flat", 2.0)
+        assert rate_cache.rate_entry(rt.id).tariff.price(10) == 20.0
+
+        _set_rate(rt.id, 3.0)
+        assert rate_cache.rate_entry(rt.id).tariff.price(10) == 20.0
+
+        rate_cache.invalidate_rate_table(rt.id)
+        assert rate_cache.rate_entry(rt.id).structure == {"flat_rate": 3.0}
+
+        # A message from another process drops the entry too
+        _set_rate(rt.id, 4.0)
+        rate_cache._on_message({"data": json.dumps({"kind": "rate_table", "id": rt.id, "pid": -1})})
+        assert rate_cache.rate_entry(rt.id).tariff.price(10) == 40.0
+
+
+def test_unit_resolution_follows_unit_edits(app):
+    with app.app_context():
+        estate_rt = _rate_table("Cache Estate", 1.0)
+        unit_rt = _rate_table("Cache Unit", 5.0)
+        estate = Estate(name="Cache Estate", electricity_rate_table_id=estate_rt.id,
+                        electricity_markup_percentage=10)
+        db.session.add(estate)
+        db.session.flush()
+        unit = Unit(estate_id=estate.id, unit_number="C1")
+        db.session.add(unit)
+        db.session.commit()
+
+        bill = calculate_unit_bill(unit_id=unit.id, electricity_kwh=10, water_kl=0)
+        assert bill["electricity_total"] == 11.0
+
+        update_unit(unit, {"electricity_rate_table_id": unit_rt.id})
+        bill = calculate_unit_bill(unit_id=unit.id, electricity_kwh=10, water_kl=0)
+        assert bill["electricity_total"] == 55.0
+        assert rate_cache.unit_rates(unit.id).electricity_rate_table_id == unit_rt.id
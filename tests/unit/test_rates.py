@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from datetime import datetime, time as clock
+
+import pytest
+
+from app.utils.rates import TimeOfUseTariff, compile_tariff, compute_from_structure
+
+STRUCTURES = [
+    {"flat_rate": 2.5},
+    {
+        "tiers": [
+            {"from": 0, "to": 50, "rate": 1.7},
+            {"from": 50, "to": 350, "rate": 2.35},
+            {"from": 350, "to": 600, "rate": 3.1},
+            {"from": 600, "to": None, "rate": 3.6},
+        ]
+    },
+    # Unsorted, no open-ended tier, a zero-width tier
+    {
+        "tiers": [
+            {"from": 6, "to": 12, "rate": 22.5},
+            {"from": 0, "to": 6, "rate": 15.0},
+            {"from": 12, "to": 12, "rate": 99.0},
+        ]
+    },
+    {"tiers": []},
+    {},
+]
+
+
+def test_compiled_tariff_matches_scalar_pricing():
+    rng = random.Random(7)
+    quantities = [0, -1, 6, 50, 350, 600, 12.000000001] + [
+        round(rng.uniform(0, 900), 3) for _ in range(2000)
+    ]
+    for structure in STRUCTURES:
+        tariff = compile_tariff(structure)
+        expected = [compute_from_structure(q, structure) for q in quantities]
+        assert tariff.price_many(quantities) == expected
+        assert [tariff.price(q) for q in quantities] == expected
+
+    # JSON text as stored on RateTable
+    assert compile_tariff(json.dumps(STRUCTURES[1])).price(400) == compute_from_structure(
+        400, STRUCTURES[1]
+    )
+    assert compile_tariff(None).price(10) == 0.0
+
+
+class CountingTier(dict):
+    """A tier dict that counts how often its fields are read"""
+
+    reads = 0
+
+    def get(self, key, default=None):
+        CountingTier.reads += 1
+        return super().get(key, default)
+
+
+def test_compiled_tariff_parses_tiers_once():
+    structure = {"tiers": [CountingTier(tier) for tier in STRUCTURES[1]["tiers"]]}
+    CountingTier.reads = 0
+    tariff = compile_tariff(structure)
+    compile_reads = CountingTier.reads
+    assert compile_reads > 0
+
+    quantities = [float(i % 900) + 0.5 for i in range(1000)]
+    prices = tariff.price_many(quantities)
+    assert [tariff.price(q) for q in quantities] == prices
+    # Pricing never goes back to the tier dicts (no per-quantity sort or parse)
+    assert CountingTier.reads == compile_reads
+
+    # Whereas scalar pricing re-reads every tier for every quantity
+    compute_from_structure(quantities[0], structure)
+    assert CountingTier.reads > compile_reads
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="wall-clock benchmark; set RUN_BENCHMARKS=1"
+)
+def test_compiled_tariff_is_faster_than_scalar_pricing():
+    structure = STRUCTURES[1]
+    quantities = [float(i % 900) + 0.5 for i in range(50000)]
+    tariff = compile_tariff(structure)
+
+    started = time.perf_counter()
+    compiled = tariff.price_many(quantities)
+    compiled_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scalar = [compute_from_structure(q, structure) for q in quantities]
+    scalar_time = time.perf_counter() - started
+
+    assert compiled == scalar
+    assert compiled_time * 2 < scalar_time
+
+
+# Seeded periods: weekend daytime is not covered by any period
+TOU_PERIODS = [
+    {"period_name": "Off-peak", "start_time": clock(22, 0), "end_time": clock(6, 0),
+     "weekdays": True, "weekends": True, "rate_per_kwh": 2.432},
+    {"period_name": "Standard", "start_time": "06:00", "end_time": "17:00",
+     "weekdays": True, "weekends": False, "rate": 3.096},
+    {"period_name": "Peak", "start_time": "17:00", "end_time": "22:00",
+     "weekdays": True, "weekends": False, "rate": 4.996},
+]
+
+
+def test_time_of_use_lookup_uses_local_time():
+    tariff = TimeOfUseTariff(TOU_PERIODS)
+    # 2026-03-02 is a Monday; reading dates are UTC, periods SAST (UTC+2)
+    assert tariff.names[tariff.period_index(datetime(2026, 3, 2, 3, 59))] == "Off-peak"
+    assert tariff.names[tariff.period_index(datetime(2026, 3, 2, 4, 0))] == "Standard"
+    assert tariff.names[tariff.period_index(datetime(2026, 3, 2, 15, 30))] == "Peak"
+    assert tariff.names[tariff.period_index(datetime(2026, 3, 2, 20, 0))] == "Off-peak"
+    # Sunday 23:30 UTC is Monday 01:30 local
+    assert tariff.rate_at(datetime(2026, 3, 1, 23, 30)) == 2.432
+    # Saturday midday falls to the cheapest period
+    assert tariff.rate_at(datetime(2026, 3, 7, 10, 0)) == 2.432
+
+
+def test_time_of_use_prices_each_bucket():
+    tariff = TimeOfUseTariff(TOU_PERIODS)
+    result = tariff.price_intervals(
+        [
+            (datetime(2026, 3, 2, 16, 0), 2.0),  # Peak
+            (datetime(2026, 3, 2, 16, 15), 1.0),  # Peak
+            (datetime(2026, 3, 2, 8, 0), 4.0),  # Standard
+            (datetime(2026, 3, 2, 21, 0), 10.0),  # Off-peak
+            (datetime(2026, 3, 2, 21, 15), None),
+        ]
+    )
+    assert result["periods"] == {
+        "Peak": {"consumption": 3.0, "rate": 4.996, "amount": 14.99},
+        "Standard": {"consumption": 4.0, "rate": 3.096, "amount": 12.38},
+        "Off-peak": {"consumption": 10.0, "rate": 2.432, "amount": 24.32},
+    }
+    assert result["consumption"] == 17.0
+    assert result["amount"] == 51.69
+    assert TimeOfUseTariff([]).price_intervals([(datetime(2026, 3, 2), 1.0)])["amount"] == 0.0
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services import reading_partitions
+from app.services.reading_partitions import (
+    add_months,
+    ensure_partitions,
+    expire_partitions,
+    partition_bounds,
+    partition_month,
+    partition_name,
+)
+
+
+def test_partition_naming_round_trips():
+    assert partition_name(date(2026, 3, 1)) == "meter_readings_y2026m03"
+    assert partition_month("meter_readings_y2026m03") == date(2026, 3, 1)
+    assert partition_month("meter_readings_default") is None
+
+
+def test_partition_bounds_cross_year():
+    assert partition_bounds(date(2026, 12, 15)) == (date(2026, 12, 1), date(2027, 1, 1))
+    assert add_months(date(2026, 1, 1), -2) == date(2025, 11, 1)
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+
+
+def test_partition_management_is_noop_without_postgres(app):
+    with app.app_context():
+        assert ensure_partitions(3) == []
+        assert expire_partitions(12, drop=True) == []
+
+
+class RecordingSession:
+    """Records the SQL ensure_partitions issues, in place of PostgreSQL."""
+
+    def __init__(self, stranded=None, failing=None):
+        self.stranded = stranded or {}
+        self.failing = failing
+        self.statements = []
+        self.committed = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if self.failing and self.failing in sql and "CREATE TABLE" in sql:
+            raise OperationalError(sql, params, Exception("lock timeout"))
+        self.statements.append(sql)
+        count = self.stranded.get(params["start"]) if params else None
+        return SimpleNamespace(scalar=lambda: count or 0)
+
+    def commit(self):
+        self.committed.append(list(self.statements))
+
+    def rollback(self):
+        self.statements.clear()
+
+
+@pytest.fixture()
+def postgres(monkeypatch):
+    def use(session):
+        monkeypatch.setattr(reading_partitions, "db", SimpleNamespace(session=session))
+        monkeypatch.setattr(reading_partitions, "is_partitioned", lambda: True)
+        monkeypatch.setattr(reading_partitions, "list_partitions", lambda: [])
+        return session
+
+    return use
+
+
+def test_rows_in_the_default_partition_are_moved_into_the_new_one(postgres):
+    session = postgres(RecordingSession(stranded={date(2026, 4, 1): 3}))
+    created = ensure_partitions(1, today=date(2026, 3, 15))
+    assert created == ["meter_readings_y2026m03", "meter_readings_y2026m04"]
+
+    ddl = [
+        sql.split(" FOR VALUES")[0]
+        for sql in session.statements
+        if sql.startswith(("CREATE", "ALTER"))
+    ]
+    assert ddl == [
+        "CREATE TABLE IF NOT EXISTS meter_readings_y2026m03 PARTITION OF meter_readings",
+        "ALTER TABLE meter_readings DETACH PARTITION meter_readings_default",
+        "CREATE TABLE meter_readings_y2026m04 PARTITION OF meter_readings",
+        "ALTER TABLE meter_readings ATTACH PARTITION meter_readings_default DEFAULT",
+    ]
+    assert any(
+        "DELETE FROM meter_readings_default" in sql and "INSERT INTO meter_readings_y2026m04" in sql
+        for sql in session.statements
+    )
+
+
+def test_a_failing_month_does_not_roll_back_the_others(postgres):
+    session = postgres(RecordingSession(failing="meter_readings_y2026m04"))
+    created = ensure_partitions(2, today=date(2026, 3, 15))
+    assert created == ["meter_readings_y2026m03", "meter_readings_y2026m05"]
+    assert len(session.committed) == 2
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import literal
+
+from app.db import db
+from app.models import Estate, Transaction
+from app.routes.v1.reports import get_financial_reports
+from app.services.meter_readings import bulk_insert_readings
+from app.services.transactions import create_transaction
+from app.utils import report_cache
+
+
+@pytest.fixture()
+def wallet(app, factory):
+    with app.app_context():
+        meter = factory.meter()
+        estate = factory.estate()
+        unit = factory.unit(estate, electricity_meter_id=meter.id)
+        wallet = factory.wallet(unit)
+        db.session.commit()
+        yield wallet.id, estate.id, meter.id
+        Transaction.query.filter_by(wallet_id=wallet.id).delete()
+        db.session.commit()
+
+
+def test_reports_are_cached_until_a_transaction_lands(app, fake_redis, wallet):
+    wallet_id, estate_id, _ = wallet
+    today = date.today()
+    with app.app_context():
+        start, end = today.replace(day=1), today + timedelta(days=1)
+        first = get_financial_reports(start, end, estate_id)
+        assert first["credit_purchases_pagination"]["total"] == 0
+        get_financial_reports(start, end, estate_id)
+        assert report_cache.stats()["financial"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+        # The window includes today, so it gets the short TTL
+        assert set(fake_redis.ttls.values()) == {app.config["REPORT_CACHE_TTL_OPEN"]}
+
+        create_transaction(wallet_id, "topup", 50, payment_method="cash")
+        after = get_financial_reports(start, end, estate_id)
+        assert after["credit_purchases_pagination"]["total"] == 1
+        assert report_cache.stats()["financial"]["misses"] == 2
+
+        get_financial_reports(date(2026, 6, 1), date(2026, 6, 30), estate_id)
+        assert app.config["REPORT_CACHE_TTL_CLOSED"] in fake_redis.ttls.values()
+
+
+def test_only_late_readings_invalidate(app, fake_redis, wallet):
+    _, estate_id, meter_id = wallet
+    generation = report_cache._estate_generation_key(estate_id)
+    with app.app_context():
+        bulk_insert_readings(
+            [{"meter_id": meter_id, "reading_value": 1, "reading_date": datetime.now()}]
+        )
+        assert fake_redis.get(generation) is None
+
+        bulk_insert_readings(
+            [
+                {
+                    "meter_id": meter_id,
+                    "reading_value": 0.5,
+                    "reading_date": datetime.now() - timedelta(days=2),
+                }
+            ]
+        )
+        assert fake_redis.get(generation) == b"1"
+        assert fake_redis.get(report_cache.GLOBAL_GENERATION_KEY) == b"1"
+
+
+def test_cached_results_round_trip_as_json(app, fake_redis, wallet):
+    _, estate_id, _ = wallet
+    with app.app_context():
+        row = db.session.query(
+            Estate.name.label("estate_name"), literal(Decimal("12.50")).label("total")
+        ).filter(Estate.id == estate_id).one()
+    result = {
+        "rows": [row],
+        "day": date(2026, 3, 1),
+        "at": datetime(2026, 3, 1, 8, 30),
+        "amount": Decimal("99.95"),
+        "summary": SimpleNamespace(total_revenue=0),
+    }
+    payload = report_cache.dumps(result)
+    assert payload.startswith(b"{")
+
+    restored = report_cache.loads(payload)
+    assert restored["rows"][0].estate_name == row.estate_name
+    assert restored["rows"][0].total == Decimal("12.50")
+    assert restored["rows"][0] == tuple(row)
+    assert restored["day"] == date(2026, 3, 1) and restored["at"] == datetime(2026, 3, 1, 8, 30)
+    assert restored["amount"] == Decimal("99.95")
+    assert restored["summary"].total_revenue == 0
+
+
+def test_unreadable_entry_is_a_miss(app, fake_redis, wallet):
+    _, estate_id, _ = wallet
+    start, end = date(2026, 5, 1), date(2026, 5, 31)
+    with app.app_context():
+        expected = get_financial_reports(start, end, estate_id)
+        (key,) = [k for k in fake_redis.data if ":financial:" in k]
+        # e.g. a pickle written by an older release, or a tampered entry
+        fake_redis.data[key] = b"\x80\x04\x95not json"
+        assert get_financial_reports(start, end, estate_id) == expected
+        assert report_cache.stats()["financial"] == {"hits": 0, "misses": 2, "hit_rate": 0.0}
+        assert report_cache.loads(fake_redis.data[key]) == report_cache.loads(
+            report_cache.dumps(expected)
+        )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import db
+from app.models import ReportJob
+from app.services.report_jobs import claim_job, purge_expired_jobs, run_report_job
+from app.tasks import report_tasks
+from tests.conftest import login
+
+
+@pytest.fixture()
+def queued(app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, "REPORT_STORAGE_DIR", str(tmp_path))
+    job_ids = []
+    monkeypatch.setattr(report_tasks, "generate_report", SimpleNamespace(delay=job_ids.append))
+    return job_ids
+
+
+def test_report_job_renders_once_and_reuses_artifact(app, client, queued):
+    login(client)
+    request = {"report_type": "unit_consumption", "category": "consumption", "format": "csv"}
+
+    r = client.post("/api/v1/reports/jobs", json=request)
+    assert r.status_code == 202
+    job = r.get_json()["data"]
+    assert job["status"] == "pending" and job["reused"] is False
+    assert queued == [job["id"]]
+
+    # Joins the job still in flight
+    r = client.post("/api/v1/reports/jobs", json=request)
+    assert r.status_code == 202
+    assert r.get_json()["data"]["id"] == job["id"]
+    assert client.get(job["download_url"]).status_code == 409
+
+    with app.app_context():
+        assert run_report_job(job["id"]).status == "completed"
+
+    r = client.get(job["status_url"])
+    assert r.status_code == 200
+    assert r.get_json()["data"]["progress"] == 100
+    r = client.get(job["download_url"])
+    assert r.status_code == 200
+    assert r.mimetype == "text/csv"
+    assert r.get_data(as_text=True).startswith("Unit Number,Estate")
+    r.close()
+
+    # Reuses the finished artifact without queueing another render
+    r = client.post("/api/v1/reports/jobs", json=request)
+    assert r.status_code == 200
+    assert r.get_json()["data"]["reused"] is True
+    assert queued == [job["id"]]
+
+    with app.app_context():
+        assert purge_expired_jobs(now=datetime.utcnow() + timedelta(days=1))["expired"] >= 1
+    assert client.get(job["download_url"]).status_code == 410
+
+    r = client.post("/api/v1/reports/jobs", json=request)
+    assert r.status_code == 202
+    assert r.get_json()["data"]["id"] != job["id"]
+
+
+def test_meters_pdf_job(app, client, queued):
+    login(client)
+    r = client.post("/api/v1/meters/export/jobs", json={"meter_type": "electricity"})
+    assert r.status_code == 202
+    job_id = r.get_json()["data"]["id"]
+
+    with app.app_context():
+        job = run_report_job(job_id)
+        assert job.status == "completed"
+        assert job.file_name.startswith("meters_report_")
+
+    r = client.get(f"/api/v1/meters/export/jobs/{job_id}/download")
+    assert r.status_code == 200
+    assert r.get_data().startswith(b"%PDF")
+    r.close()
+    # Meter jobs are not visible through the reports endpoints
+    assert client.get(f"/api/v1/reports/jobs/{job_id}").status_code == 404
+
+
+def test_failed_render_is_recorded(app, queued):
+    with app.app_context():
+        job = ReportJob(
+            job_key="failed-render",
+            report_type="no_such_report",
+            category="consumption",
+            format="csv",
+            parameters='{"start_date": "2026-06-01", "end_date": "2026-06-30", "estate_id": null}',
+            status="pending",
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        with pytest.raises(ValueError):
+            run_report_job(job.id)
+        job = db.session.get(ReportJob, job.id)
+        assert job.status == "failed"
+        assert "Unsupported report" in job.error_message
+
+
+def test_running_job_is_claimed_once_until_it_goes_stale(app, queued):
+    with app.app_context():
+        job = ReportJob(
+            job_key="claimed-elsewhere",
+            report_type="unit_consumption",
+            category="consumption",
+            format="csv",
+            parameters='{"start_date": "2026-06-01", "end_date": "2026-06-30", "estate_id": null}',
+            status="pending",
+        )
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+        assert claim_job(job_id)
+        # A duplicate delivery finds the job already running and leaves it
+        assert not claim_job(job_id)
+        job = run_report_job(job_id)
+        assert job.status == "running" and job.file_path is None
+
+        job.started_at = datetime.utcnow() - timedelta(
+            seconds=app.config.get("REPORT_JOB_TIMEOUT", 1800) + 1
+        )
+        db.session.commit()
+        assert run_report_job(job_id).status == "completed"
+        assert not claim_job(job_id)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from app.db import db
+from app.models import Estate, Meter, Unit
+from app.routes.v1.reports import (
+    _communication_status_query,
+    get_consumption_reports,
+    get_estate_level_reports,
+    get_system_status_reports,
+)
+from app.services.consumption_rollups import estate_bulk_sub_totals
+from app.services.meter_readings import bulk_insert_readings
+from tests.conftest import login
+
+START, END = date(2026, 6, 1), date(2026, 6, 30)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_execute)
+
+
+def _estate(name, bulk_kwh, unit_kwh):
+    meters = {
+        kind: Meter(serial_number=f"{name}-{kind}", meter_type=kind)
+        for kind in ("bulk_electricity", "bulk_water", "electricity", "water")
+    }
+    db.session.add_all(meters.values())
+    db.session.flush()
+    estate = Estate(
+        name=name,
+        bulk_electricity_meter_id=meters["bulk_electricity"].id,
+        bulk_water_meter_id=meters["bulk_water"].id,
+    )
+    db.session.add(estate)
+    db.session.flush()
+    db.session.add(
+        Unit(
+            estate_id=estate.id,
+            unit_number="1",
+            electricity_meter_id=meters["electricity"].id,
+            water_meter_id=meters["water"].id,
+        )
+    )
+    db.session.commit()
+    bulk_insert_readings(
+        [
+            {
+                "meter_id": meters[kind].id,
+                "reading_value": 100 + value,
+                "reading_date": datetime(2026, 6, 10),
+                "consumption_since_last": value,
+            }
+            for kind, value in (
+                ("bulk_electricity", bulk_kwh),
+                ("electricity", unit_kwh),
+                ("bulk_water", 500),
+                ("water", 200),
+            )
+        ]
+    )
+    return estate.id
+
+
+def test_bulk_sub_totals_for_all_estates_in_one_query(app):
+    with app.app_context():
+        first = _estate("Comparison Estate 1", 100, 60)
+        second = _estate("Comparison Estate 2", 40, 10)
+
+        with count_queries() as statements:
+            totals = {row["estate_id"]: row for row in estate_bulk_sub_totals(START, END)}
+        assert len(statements) == 1
+
+        assert totals[first]["communal_electricity"] == 40.0
+        assert totals[second]["sub_electricity"] == 10.0
+        assert totals[second]["communal_water"] == 300.0
+        assert [row["estate_id"] for row in estate_bulk_sub_totals(START, END, second)] == [second]
+
+
+def test_report_query_count_does_not_grow_with_estates(app):
+    with app.app_context():
+        _estate("Query Count Estate 0", 10, 5)
+
+        def measure():
+            # Warm caches (default tariffs) so only report queries are counted
+            get_estate_level_reports(START, END, None)
+            with count_queries() as statements:
+                get_consumption_reports(START, END, None, "all")
+                get_estate_level_reports(START, END, None)
+            return len(statements)
+
+        before = measure()
+        for i in range(1, 6):
+            _estate(f"Query Count Estate {i}", 10 * i, i)
+        assert measure() == before
+
+
+def test_csv_export_streams_every_row(app, client):
+    with app.app_context():
+        meter = Meter(serial_number="Export-E", meter_type="electricity")
+        db.session.add(meter)
+        db.session.flush()
+        estate = Estate(name="Export Estate")
+        db.session.add(estate)
+        db.session.flush()
+        db.session.add_all(
+            [Unit(estate_id=estate.id, unit_number=f"X{i}") for i in range(11)]
+            + [Unit(estate_id=estate.id, unit_number="X11", electricity_meter_id=meter.id)]
+        )
+        db.session.commit()
+        month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        bulk_insert_readings(
+            [
+                {
+                    "meter_id": meter.id,
+                    "reading_value": i,
+                    "reading_date": month_start + timedelta(minutes=15 * i),
+                    "consumption_since_last": 1,
+                }
+                for i in range(25)
+            ]
+        )
+        estate_id = estate.id
+
+    login(client)
+    r = client.get(f"/api/v1/reports/export/unit_consumption?estate_id={estate_id}")
+    assert r.status_code == 200
+    assert r.is_streamed
+    rows = list(csv.reader(io.StringIO(r.get_data(as_text=True))))
+    # Unpaginated: all 12 units, not the first page of 10
+    assert len(rows) == 13
+
+    r = client.get(
+        f"/api/v1/reports/export/meter_readings?category=consumption&estate_id={estate_id}"
+    )
+    assert r.is_streamed
+    rows = list(csv.reader(io.StringIO(r.get_data(as_text=True))))
+    assert len(rows) == 26
+    assert rows[1][:4] == ["Export-E", "electricity", "Export Estate", "X11"]
+
+
+def test_communication_status_reads_the_meter_columns(app, factory):
+    now = datetime.now()
+    with app.app_context():
+        estate = factory.estate()
+        unit = factory.unit(estate)
+        heard = factory.meter(unit_id=unit.id, is_active=True, last_communication=now)
+        quiet = factory.meter(
+            unit_id=unit.id, is_active=True, last_reading_date=now - timedelta(hours=48)
+        )
+        silent = factory.meter(unit_id=unit.id, is_active=True)
+        db.session.commit()
+
+        query = _communication_status_query(estate.id)
+        assert "meter_readings" not in str(query.statement)
+        statuses = {row.serial_number: row.status for row in query}
+        assert statuses == {
+            heard.serial_number: "online",
+            quiet.serial_number: "warning",
+            silent.serial_number: "offline",
+        }
+
+        offline = get_system_status_reports.__wrapped__(START, END, estate.id)["offline_meters"]
+        assert [row.serial_number for row in offline] == [silent.serial_number]
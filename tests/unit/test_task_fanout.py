@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.models import Notification, UnitOwnership
+from app.services.notification_service import NotificationService
+from app.tasks import fanout
+
+
+@pytest.fixture()
+def estates(app, factory):
+    """Two estates, each with one low-credit wallet owned by its own person."""
+    with app.app_context():
+        people, estate_ids = [], []
+        for _ in range(2):
+            estate, person = factory.estate(), factory.person()
+            unit = factory.unit(estate)
+            factory.wallet(unit, balance=30, low_balance_threshold=50)
+            db.session.add(
+                UnitOwnership(unit_id=unit.id, person_id=person.id, ownership_percentage=100)
+            )
+            people.append(person.id)
+            estate_ids.append(estate.id)
+        db.session.commit()
+        yield estate_ids, people
+        Notification.query.filter(Notification.recipient_id.in_(people)).delete()
+        db.session.commit()
+
+
+def test_estate_shards_cover_every_estate(app, estates):
+    estate_ids, _ = estates
+    with app.app_context():
+        shards = fanout.estate_shards(size=1)
+        assert [[estate_id] for estate_id in estate_ids] == [
+            shard for shard in shards if shard[0] in estate_ids
+        ]
+        assert sorted(sum(fanout.estate_shards(), [])) == sorted(sum(shards, []))
+
+
+def test_shards_only_touch_their_estates_and_are_idempotent(app, estates):
+    estate_ids, (north, south) = estates
+    now = datetime.utcnow()
+
+    def shard(estate_id):
+        return NotificationService.send_low_credit_notifications(
+            is_critical=False, now=now, estate_ids=[estate_id]
+        )
+
+    with app.app_context():
+        first = shard(estate_ids[0])
+        assert first == {"wallets_matched": 1, "notifications_created": 1}
+        assert Notification.query.filter_by(recipient_id=south).count() == 0
+
+        # A re-run shard finds nothing left to do
+        again = shard(estate_ids[0])
+        assert again == {"wallets_matched": 0, "notifications_created": 0}
+        second = shard(estate_ids[1])
+        assert Notification.query.filter_by(recipient_id=south).count() == 1
+
+    merged = fanout.merge_shard_results(
+        [first, again, second, {"status": "failed", "shards_failed": 1, "failed": [[99]]}]
+    )
+    assert merged == {
+        "shards": 4,
+        "shards_failed": 1,
+        "wallets_matched": 2,
+        "notifications_created": 2,
+        "failed": [[99]],
+        "status": "partial",
+    }
+
+
+def test_chunked_splits_ids_in_order():
+    assert fanout.chunked(range(1, 6), 2) == [[1, 2], [3, 4], [5]]
+    assert fanout.chunked([], 3) == []
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import task_lock
+from app.utils.task_lock import single_instance
+
+
+def test_overlapping_run_is_skipped(fake_redis):
+    @single_instance(name="nightly")
+    def nightly():
+        # A second run (another worker or beat node) while this one holds the lease
+        return {"inner": nightly()}
+
+    assert nightly() == {
+        "inner": {"status": "skipped", "reason": "already_running", "task": "nightly"}
+    }
+    assert "task-lock:nightly" not in fake_redis.data
+    assert nightly()["inner"]["status"] == "skipped"
+
+    counts = task_lock.stats()["nightly"]
+    assert counts["acquired"] == 2 and counts["skipped"] == 2 and counts["lost"] == 0
+
+
+def test_cooldown_keeps_the_lease_after_a_successful_run(fake_redis):
+    calls = []
+
+    @single_instance(name="daily", cooldown=3600)
+    def daily():
+        calls.append(1)
+
+    daily()
+    assert daily() == {"status": "skipped", "reason": "already_running", "task": "daily"}
+    assert len(calls) == 1
+    assert 3500 * 1000 < fake_redis.ttls["task-lock:daily"] <= 3600 * 1000
+
+    # A failed run releases immediately so its retry is not blocked
+    @single_instance(name="flaky", cooldown=3600)
+    def flaky():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flaky()
+    assert "task-lock:flaky" not in fake_redis.data
+
+
+def test_heartbeat_renews_and_detects_a_lost_lease(fake_redis):
+    @single_instance(name="slow", ttl=1)
+    def slow(steal):
+        time.sleep(0.5)
+        if steal:
+            fake_redis.data["task-lock:slow"] = b"someone-else"
+            time.sleep(0.5)
+        return "done"
+
+    assert slow(False) == "done"
+    assert fake_redis.scripts.count(task_lock.RENEW_SCRIPT) >= 1
+
+    assert slow(True) == "done"
+    # The other holder's lease is left alone
+    assert fake_redis.data["task-lock:slow"] == b"someone-else"
+    assert task_lock.stats()["slow"]["lost"] == 1
+
+
+def test_runs_unlocked_without_redis(monkeypatch):
+    monkeypatch.setattr(task_lock, "get_redis", lambda: None)
+
+    @single_instance()
+    def job():
+        return job.__name__
+
+    assert job() == "job"
+
+
+def test_fanned_out_run_holds_the_lease_until_its_callback(fake_redis, monkeypatch):
+    from app.tasks import fanout
+
+    calls = []
+
+    class Task:
+        def s(self, *args, **kwargs):
+            calls.append(kwargs)
+            return self
+
+        def set(self, **options):
+            return self
+
+    monkeypatch.setattr(fanout, "group", list)
+    monkeypatch.setattr(fanout, "chord", lambda header: lambda callback: SimpleNamespace(id="r1"))
+
+    @single_instance(name="fanned", cooldown=0)
+    def coordinator():
+        return fanout.fan_out("fanned", Task(), [[1], [2]], "default", callback=Task())
+
+    assert coordinator()["status"] == "dispatched"
+    lease = calls[0]["lease"]
+    assert all(kwargs["lease"] == lease for kwargs in calls)
+    # The shards are still running: the next run is skipped
+    assert fake_redis.data["task-lock:fanned"] == lease["token"].encode()
+    assert coordinator()["status"] == "skipped"
+
+    assert task_lock.keep_lease(lease)
+    assert fake_redis.ttls["task-lock:fanned"] == 1800 * 1000
+    task_lock.release_lease(lease)
+    assert "task-lock:fanned" not in fake_redis.data
+    assert coordinator()["status"] == "dispatched"
+    assert task_lock.stats()["fanned"]["acquired"] == 2
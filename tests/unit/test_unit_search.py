@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from app.db import db
+from app.models import Estate, Meter, Unit
+from tests.conftest import login
+
+
+def test_unit_search_pages_units_with_a_free_slot(app, client):
+    with app.app_context():
+        estate = Estate(name="Typeahead_Gardens")
+        other = Estate(name="Typeahead Heights")
+        meter = Meter(serial_number="SEARCH-E1", meter_type="electricity")
+        db.session.add_all([estate, other, meter])
+        db.session.flush()
+        units = [
+            Unit(estate_id=estate.id, unit_number=f"T{n:02d}") for n in range(1, 6)
+        ]
+        units[0].electricity_meter_id = meter.id
+        units.append(Unit(estate_id=other.id, unit_number="X01"))
+        db.session.add_all(units)
+        db.session.commit()
+        taken, estate_id = units[0].id, estate.id
+
+    login(client)
+
+    def search(**params):
+        r = client.get("/api/v1/api/meters/unit-search", query_string=params)
+        assert r.status_code == 200
+        return r.get_json()
+
+    body = search(q="t0", meter_type="electricity", per_page=3)
+    assert [u["unit_number"] for u in body["data"]] == ["T02", "T03", "T04"]
+    assert body["has_more"] is True
+    body = search(q="t0", meter_type="electricity", per_page=3, after=body["next_cursor"])
+    assert [u["unit_number"] for u in body["data"]] == ["T05"]
+    assert body["has_more"] is False and body["next_cursor"] is None
+    assert client.get("/api/v1/api/meters/unit-search?after=nonsense").status_code == 400
+
+    # The meter's current unit is offered even though its slot is taken
+    body = search(q="t0", meter_type="electricity", unit_id=taken)
+    assert body["data"][0]["id"] == taken and body["data"][0]["has_electricity"]
+
+    # Estate name match, estate filter, and LIKE wildcards taken literally
+    assert {u["unit_number"] for u in search(q="heights")["data"]} == {"X01"}
+    assert len(search(q="typeahead", estate_id=estate_id)["data"]) == 5
+    assert search(q="typeahead_")["data"][0]["estate_name"] == "Typeahead_Gardens"
+    assert len(search(q="typeahead_")["data"]) == 5
+
+
+def test_unit_search_matches_unit_and_estate_names_in_separate_queries(app):
+    from sqlalchemy import event
+
+    from app.services.units import search_units_for_meter
+
+    with app.app_context():
+        estate = Estate(name="Keyset Court")
+        db.session.add(estate)
+        db.session.flush()
+        # "K1" matches both the unit prefix and the estate name
+        db.session.add_all(
+            [Unit(estate_id=estate.id, unit_number=n) for n in ("K1", "A1", "A2")]
+        )
+        db.session.commit()
+        estate_id = estate.id
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            first, cursor = search_units_for_meter(q="k", estate_id=estate_id, per_page=2)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        assert "UNION" in statements[0] and " OR " not in statements[0]
+
+        rest, end = search_units_for_meter(q="k", estate_id=estate_id, per_page=2, after=cursor)
+        assert [u["unit_number"] for u in first + rest] == ["A1", "A2", "K1"]
+        assert end is None